@@ -127,6 +127,11 @@ def create_app(config=None):
         logging.error("🔥 初始化 Firebase 失敗，服務無法啟動", exc_info=True)
         raise
 
+    # ── 遊戲別名快照（啟動時載入，第一次分類不必同步等待別名 API）──
+    from utils.game_alias_fetcher import load_alias_snapshot
+
+    load_alias_snapshot()
+
     # ── 註冊路由 ──
     register_all_routes(app, db)
 
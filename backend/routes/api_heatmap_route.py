@@ -4,6 +4,9 @@ from apiflask import APIBlueprint
 from flask import abort, jsonify
 from google.cloud import firestore
 
+from schemas.common import HeatmapQuery
+from services.firestore.heatmap_writer import heatmap_detail_ref, heatmap_doc_ref
+from services.heatmap.utils import COUNT_CELLS, matrix_to_counts
 from utils.channel_validator import is_valid_channel_id
 
 
@@ -11,20 +14,21 @@ def init_api_heatmap_route(app, db: firestore.Client):
     bp = APIBlueprint("api_heatmap", __name__, tag="Heatmap")
 
     @bp.route("/api/heatmap/<channel_id>", methods=["GET"])
-    @bp.doc(summary="取得頻道活躍熱力圖", description="回傳指定頻道的影片活躍時段統計矩陣")
-    def get_video_heatmap(channel_id):
+    @bp.doc(
+        summary="取得頻道活躍熱力圖",
+        description=(
+            "回傳指定頻道的影片活躍時段統計矩陣；"
+            "format=counts 時只回傳 168 格影片數（Sun~Sat × 0~23 時），不含影片 ID"
+        ),
+    )
+    @bp.input(HeatmapQuery, location="query", arg_name="query")
+    def get_video_heatmap(channel_id, query):
         if not is_valid_channel_id(channel_id):
             logging.warning(f"[heatmap] channel_id 格式不合法：{channel_id}")
             return jsonify({"error": "channel_id 格式不合法"}), 400
 
         # Firestore 路徑：channel_data/{channel_id}/heat_map/channel_video_heatmap
-        doc_ref = (
-            db.collection("channel_data")
-            .document(channel_id)
-            .collection("heat_map")
-            .document("channel_video_heatmap")
-        )
-        doc = doc_ref.get()
+        doc = heatmap_doc_ref(db, channel_id).get()
 
         if not doc.exists:
             logging.warning(f"[heatmap] 找不到資料：{channel_id}")
@@ -35,8 +39,25 @@ def init_api_heatmap_route(app, db: firestore.Client):
             logging.warning(f"[heatmap] all_range 欄位不存在：{channel_id}")
             abort(404, description="heatmap format invalid.")
 
-        matrix = all_range.get("matrix")
         total_count = all_range.get("totalCount")
+        # 舊格式的主文件內仍存有 matrix；新格式的影片 ID 在明細文件
+        matrix = all_range.get("matrix")
+
+        if query.format == "counts":
+            counts = all_range.get("counts")
+            if not (isinstance(counts, list) and len(counts) == COUNT_CELLS):
+                counts = matrix_to_counts(matrix) if matrix is not None else None
+            if counts is None or total_count is None:
+                logging.error(f"[heatmap] 欄位缺失：{channel_id}")
+                abort(500, description="counts or totalCount missing.")
+            return jsonify(
+                {"success": True, "format": "counts", "counts": counts, "totalCount": total_count}
+            )
+
+        if matrix is None:
+            detail = heatmap_detail_ref(db, channel_id).get()
+            if detail.exists:
+                matrix = (detail.to_dict() or {}).get("matrix")
 
         if matrix is None or total_count is None:
             logging.error(f"[heatmap] 欄位缺失：{channel_id}")
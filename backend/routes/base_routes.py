@@ -4,6 +4,7 @@ from apiflask import APIBlueprint
 from flask import Response, jsonify
 from google.cloud import firestore
 
+from services.firestore.channel_directory import get_channel_directory_stats
 from utils.circuit_breaker import get_all_breaker_statuses
 from utils.cloud_tasks_client import check_health as check_cloud_tasks_health
 
@@ -42,8 +43,12 @@ def init_base_routes(app, db: firestore.Client | None = None):
         # --- Circuit Breakers（資訊性質，不影響 healthy 判定）---
         checks["circuit_breakers"] = get_all_breaker_statuses()  # type: ignore[assignment]
 
-        # 彙整結果（circuit_breakers 不參與 healthy 判定）
-        health_checks = {k: v for k, v in checks.items() if k != "circuit_breakers"}
+        # --- 程序內快取命中統計（資訊性質）---
+        checks["caches"] = {"channel_directory": get_channel_directory_stats()}
+
+        # 彙整結果（circuit_breakers / caches 不參與 healthy 判定）
+        informational = ("circuit_breakers", "caches")
+        health_checks = {k: v for k, v in checks.items() if k not in informational}
         all_healthy = all(c.get("healthy") for c in health_checks.values())
         status_code = 200 if all_healthy else 503
         return jsonify(
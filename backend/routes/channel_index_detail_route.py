@@ -6,6 +6,7 @@ from apiflask import APIBlueprint
 from flask import jsonify
 from google.cloud import firestore
 
+from services.firestore.channel_directory import get_channel_directory
 from utils.channel_validator import is_valid_channel_id
 from utils.error_response import error_response
 
@@ -23,27 +24,22 @@ def init_channel_index_detail_route(app, db: firestore.Client):
             logging.warning(f"[channel_index_detail] channel_id 格式不合法：{channel_id}")
             return error_response("channel_id 格式不合法", 400)
 
-        root_ref = db.collection("channel_index_batch")
-        docs = root_ref.stream()
-
-        for doc in docs:
-            data = doc.to_dict() or {}
-            for entry in data.get("channels", []):
-                if entry.get("channel_id") == channel_id:
-                    return jsonify(
-                        {
-                            "success": True,
-                            "channel": {
-                                "channel_id": channel_id,
-                                "name": entry.get("name"),
-                                "url": entry.get("url"),
-                                "thumbnail": entry.get("thumbnail"),
-                                "countryCode": entry.get("countryCode", []),
-                                "enabled": entry.get("enabled", True),
-                                "priority": entry.get("priority", 0),
-                            },
-                        }
-                    )
+        entry = get_channel_directory(db).get(channel_id)
+        if entry is not None:
+            return jsonify(
+                {
+                    "success": True,
+                    "channel": {
+                        "channel_id": channel_id,
+                        "name": entry.get("name"),
+                        "url": entry.get("url"),
+                        "thumbnail": entry.get("thumbnail"),
+                        "countryCode": entry.get("countryCode", []),
+                        "enabled": entry.get("enabled", True),
+                        "priority": entry.get("priority", 0),
+                    },
+                }
+            )
 
         logging.warning(f"[channel_index_detail] 找不到該頻道：{channel_id}")
         return error_response("找不到該頻道", 404)
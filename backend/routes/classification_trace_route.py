@@ -0,0 +1,102 @@
+import logging
+
+from apiflask import APIBlueprint
+from flask import jsonify
+from google.cloud.firestore import Client
+
+from schemas.admin_schemas import (
+    ClassificationTraceEnableRequest,
+    ClassificationTraceQuery,
+    ClassificationTraceRunRequest,
+)
+from services.classified_video_fetcher import get_classified_videos
+from utils.admin_auth import require_admin_key
+from utils.classification_trace import (
+    clear_trace,
+    disable_channel_trace,
+    dump_trace,
+    enable_channel_trace,
+    get_traced_channels,
+    trace_scope,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def init_classification_trace_route(app, db: Client):
+    bp = APIBlueprint(
+        "classification_trace",
+        __name__,
+        url_prefix="/api/internal/classification-trace",
+        tag="Admin",
+    )
+
+    @bp.route("", methods=["GET"])
+    @bp.doc(
+        summary="取得分類追蹤記錄",
+        description="dump 本 instance 的分類決策 ring buffer（舊 → 新），可依頻道過濾",
+        security="BearerAuth",
+    )
+    @require_admin_key
+    @bp.input(ClassificationTraceQuery, location="query", arg_name="query")
+    def dump_classification_trace(query):
+        entries = dump_trace(query.channel_id, query.limit)
+        return jsonify(
+            {"tracedChannels": get_traced_channels(), "count": len(entries), "entries": entries}
+        )
+
+    @bp.route("", methods=["DELETE"])
+    @bp.doc(
+        summary="清除分類追蹤記錄",
+        description="清空 ring buffer，或以 channel_id 只清除單一頻道的記錄",
+        security="BearerAuth",
+    )
+    @require_admin_key
+    @bp.input(ClassificationTraceQuery, location="query", arg_name="query")
+    def clear_classification_trace(query):
+        removed = clear_trace(query.channel_id)
+        logger.info(f"🧹 清除分類追蹤記錄 {removed} 筆（channel={query.channel_id or '全部'}）")
+        return jsonify({"success": True, "removed": removed})
+
+    @bp.route("/channels", methods=["POST"])
+    @bp.doc(
+        summary="啟用頻道分類追蹤",
+        description="在指定秒數內記錄該頻道所有分類決策（僅限本 instance）",
+        security="BearerAuth",
+    )
+    @require_admin_key
+    @bp.input(ClassificationTraceEnableRequest, arg_name="body")
+    def enable_classification_trace(body):
+        ttl = enable_channel_trace(body.channel_id, body.ttl_seconds)
+        logger.info(f"🔬 啟用分類追蹤：{body.channel_id}（{ttl} 秒）")
+        return jsonify({"success": True, "channel_id": body.channel_id, "ttl_seconds": ttl})
+
+    @bp.route("/channels/<channel_id>", methods=["DELETE"])
+    @bp.doc(
+        summary="停用頻道分類追蹤",
+        description="停止記錄該頻道的分類決策，已記錄的內容保留",
+        security="BearerAuth",
+    )
+    @require_admin_key
+    def disable_classification_trace(channel_id):
+        was_enabled = disable_channel_trace(channel_id)
+        logger.info(f"🔕 停用分類追蹤：{channel_id}（原本啟用={was_enabled}）")
+        return jsonify({"success": True, "channel_id": channel_id, "was_enabled": was_enabled})
+
+    @bp.route("/run", methods=["POST"])
+    @bp.doc(
+        summary="以追蹤模式重新分類頻道影片",
+        description="僅針對這次請求啟用追蹤，重新分類並回傳每部影片的比對依據",
+        security="BearerAuth",
+    )
+    @require_admin_key
+    @bp.input(ClassificationTraceRunRequest, arg_name="body")
+    def run_classification_trace(body):
+        logger.info(f"🔬 追蹤模式重新分類：{body.channel_id}")
+        entries: list[dict] = []
+        with trace_scope(body.channel_id, force=True, sink=entries):
+            get_classified_videos(db, body.channel_id, start=body.start, end=body.end)
+
+        return jsonify({"success": True, "count": len(entries), "entries": entries})
+
+    app.register_blueprint(bp)
@@ -37,9 +37,12 @@ def init_internal_trending_route(app, db: Client):
             start_date = (now_taipei - timedelta(days=1)).strftime("%Y-%m-%d")
 
         logger.info(
-            f"🚀 開始處理 build_daily_trending | start={start_date} | days={body.days} | force={body.force}"
+            f"🚀 開始處理 build_daily_trending | start={start_date} | days={body.days} | "
+            f"force={body.force} | processes={body.processes}"
+        )
+        result = build_trending_for_date_range(
+            start_date, body.days, db, force=body.force, processes=body.processes
         )
-        result = build_trending_for_date_range(start_date, body.days, db, force=body.force)
         return jsonify(result)
 
     @bp.route("/refresh-daily-cache", methods=["POST"])
@@ -6,6 +6,7 @@ from flask import jsonify
 from google.cloud.firestore import Client
 
 from schemas.common import LiveRedirectQuery
+from services.live_redirect.cache_store import get_today_cache, rebuild_single_flight
 from services.live_redirect.cache_updater import process_video_ids
 from services.live_redirect.notify_queue_reader import get_pending_video_ids
 from utils.rate_limiter import limiter
@@ -32,14 +33,23 @@ def init_live_redirect_route(app, db: Client):
             if cached is not None:
                 return jsonify(cached)
 
-        # 📥 取得待處理影片清單（從 notify queue 取出未處理的 videoId）
-        pending_videos = get_pending_video_ids(db, force=force, now=now)
-        logging.info(f"📌 待處理影片數量：{len(pending_videos)}")
-
-        # 🔄 更新快取資料與回寫 processedAt
-        result = process_video_ids(db, pending_videos, now)
-        logging.info(f"✅ 快取重建完成，共 {len(result['channels'])} 筆資料")
-
+        def rebuild() -> dict:
+            # 📥 取得待處理影片清單（從 notify queue 取出未處理的 videoId）
+            pending_videos = get_pending_video_ids(db, force=force, now=now)
+            logging.info(f"📌 待處理影片數量：{len(pending_videos)}")
+
+            # 🔄 更新快取資料與回寫 processedAt
+            result = process_video_ids(db, pending_videos, now)
+            logging.info(f"✅ 快取重建完成，共 {len(result['channels'])} 筆資料")
+            return result
+
+        # 🔒 每個 instance 同時只重建一次；進行中的其他請求取得前一次結果
+        result = rebuild_single_flight(
+            db,
+            now,
+            rebuild,
+            is_fresh=None if (force or skip_cache) else lambda cache: is_cache_fresh(cache, now),
+        )
         return jsonify(result)
 
     app.register_blueprint(live_redirect_bp)
@@ -48,6 +58,7 @@ def init_live_redirect_route(app, db: Client):
 def check_and_return_fresh_cache(db: Client, now: datetime, force: bool) -> dict | None:
     """
     檢查今天的快取是否仍在有效時間內（5 分鐘），若是則直接回傳，不執行更新流程。
+    快取內容取自程序內副本（snapshot listener 同步），不一定讀取 Firestore。
 
     Args:
         db (Client): Firestore 實例
@@ -57,18 +68,20 @@ def check_and_return_fresh_cache(db: Client, now: datetime, force: bool) -> dict
     Returns:
         dict | None: 若快取有效則回傳快取內容，否則回傳 None 表示需要重建
     """
-    today_str = now.date().isoformat()
-    cache_ref = db.collection("live_redirect_cache").document(today_str)
-    today_cache = cache_ref.get().to_dict() or {}  # type: ignore[union-attr]
+    today_cache = get_today_cache(db, now.date().isoformat())
+    if not force and is_cache_fresh(today_cache, now):
+        logging.info("♻️ 快取尚新（5 分鐘內），直接回傳")
+        return today_cache
+    return None
 
-    updated_at_str = today_cache.get("updatedAt")
+
+def is_cache_fresh(cache: dict, now: datetime) -> bool:
+    """快取 updatedAt 是否在 5 分鐘內"""
+    updated_at_str = cache.get("updatedAt")
     if updated_at_str:
         try:
             updated_at = datetime.fromisoformat(updated_at_str)
-            if not force and now - updated_at < timedelta(minutes=5):
-                logging.info("♻️ 快取尚新（5 分鐘內），直接回傳")
-                return today_cache
+            return now - updated_at < timedelta(minutes=5)
         except Exception as e:
             logging.warning(f"⚠️ 快取時間格式錯誤：{updated_at_str} / error={e}")
-
-    return None
+    return False
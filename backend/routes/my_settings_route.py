@@ -6,6 +6,8 @@ from google.cloud import firestore
 
 from schemas.common import ChannelIdCamelQuery
 from schemas.settings_schemas import UpdateSettingsRequest
+from services.firestore.channel_directory import invalidate_channel_directory
+from services.firestore.channel_locator import apply_to_channel_batch
 from utils.auth_decorator import require_auth
 
 logger = logging.getLogger(__name__)
@@ -67,35 +69,32 @@ def init_my_settings_route(app, db: firestore.Client):
             )
             return jsonify({"error": "無權限修改此頻道資料"}), 403
 
-        # 先掃描找到目標 batch doc ref
-        target_doc_ref = None
-        batch_docs = db.collection("channel_index_batch").stream()
-        for doc in batch_docs:
-            doc_data = doc.to_dict() or {}
-            channels = doc_data.get("channels", [])
-            if any(item.get("channel_id") == body.channelId for item in channels):
-                target_doc_ref = doc.reference
-                break
-
-        if not target_doc_ref:
-            logger.warning(f"[my_settings] 更新失敗，頻道不存在：{body.channelId}")
-            return jsonify({"error": "Channel not found"}), 404
-
-        # Transaction 內讀取最新版本再修改
+        # Transaction 內讀取最新版本再修改；batch 內找不到頻道時回傳 None
         @firestore.transactional
-        def _update_batch_in_transaction(transaction):
+        def _update_batch_in_transaction(transaction, target_doc_ref):
             fresh_doc = target_doc_ref.get(transaction=transaction)
-            fresh_channels = fresh_doc.to_dict().get("channels", [])  # type: ignore[union-attr]
+            fresh_channels = (fresh_doc.to_dict() or {}).get("channels", [])
             for i, item in enumerate(fresh_channels):
                 if item.get("channel_id") == body.channelId:
                     fresh_channels[i]["enabled"] = body.enabled
                     fresh_channels[i]["countryCode"] = body.countryCode
                     fresh_channels[i]["show_live_status"] = body.show_live_status
-                    break
-            transaction.update(target_doc_ref, {"channels": fresh_channels})
-
-        transaction = db.transaction()
-        _update_batch_in_transaction(transaction)
+                    transaction.update(target_doc_ref, {"channels": fresh_channels})
+                    return True
+            return None
+
+        # 由定位表直接找到目標 batch
+        located = apply_to_channel_batch(
+            db,
+            body.channelId,
+            lambda batch_id: _update_batch_in_transaction(
+                db.transaction(), db.collection("channel_index_batch").document(batch_id)
+            ),
+        )
+        if located is None:
+            logger.warning(f"[my_settings] 更新失敗，頻道不存在：{body.channelId}")
+            return jsonify({"error": "Channel not found"}), 404
+        invalidate_channel_directory()
 
         # channel_index 是獨立文件的 merge，不需 Transaction
         index_doc_ref = db.collection("channel_index").document(body.channelId)
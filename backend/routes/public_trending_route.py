@@ -1,10 +1,12 @@
+import gzip
 import logging
 
 from apiflask import APIBlueprint
-from flask import jsonify
+from flask import Response, jsonify, request
 from google.cloud.firestore import Client
 
 from schemas.common import TrendingQuery
+from services.trending.summary_store import get_compact_payload
 from services.trending.trending_service import get_trending_games_summary
 
 logger = logging.getLogger(__name__)
@@ -13,7 +15,13 @@ bp = APIBlueprint("public_trending", __name__, tag="Trending")
 
 def init_public_trending_route(app, db: Client):
     @bp.route("/api/trending-games", methods=["GET"])
-    @bp.doc(summary="取得遊戲趨勢排行", description="回傳指定天數內的熱門遊戲排行統計")
+    @bp.doc(
+        summary="取得遊戲趨勢排行",
+        description=(
+            "回傳指定天數內的熱門遊戲排行統計；"
+            "format=compact 時回傳以索引引用頻道與影片表格的精簡格式（gzip）"
+        ),
+    )
     @bp.input(TrendingQuery, location="query", arg_name="query")
     def trending_games_api(query):
         logger.info("🚀 [GET /api/trending-games] 處理開始")
@@ -25,6 +33,17 @@ def init_public_trending_route(app, db: Client):
             logger.warning("⚠️ 回傳包含錯誤訊息")
             return jsonify(result), 500
 
+        if query.format == "compact":
+            payload = get_compact_payload(days, result)
+            logger.info(f"✅ 趨勢資料傳回成功（區間 {days} 天，精簡格式 {len(payload)} bytes）")
+            if not request.accept_encodings["gzip"]:
+                return Response(gzip.decompress(payload), mimetype="application/json")
+            return Response(
+                payload,
+                mimetype="application/json",
+                headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"},
+            )
+
         logger.info(f"✅ 趨勢資料傳回成功（區間 {days} 天）")
         return jsonify(result)
 
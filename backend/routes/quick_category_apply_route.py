@@ -5,6 +5,7 @@ from flask import jsonify
 from google.cloud import firestore
 
 from schemas.category_editor_schemas import QuickApplyRequest
+from services.classified_video_fetcher import invalidate_merged_settings
 from utils.auth_decorator import require_auth
 
 quick_apply_bp = APIBlueprint("quick_category_apply", __name__, tag="Category Editor")
@@ -66,6 +67,7 @@ def init_quick_category_apply_route(app, db: firestore.Client):
         logging.info(f"📥 正在儲存快速分類設定：{body.channelId} - {body.keyword}")
         transaction = db.transaction()
         _apply_in_transaction(transaction)
+        invalidate_merged_settings(body.channelId)
 
         return jsonify({"success": True, "message": "已儲存分類設定"})
 
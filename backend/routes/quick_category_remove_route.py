@@ -5,6 +5,7 @@ from flask import jsonify
 from google.cloud import firestore
 
 from schemas.category_editor_schemas import QuickRemoveRequest
+from services.classified_video_fetcher import invalidate_merged_settings
 from utils.auth_decorator import require_auth
 
 quick_remove_bp = APIBlueprint("quick_category_remove", __name__, tag="Category Editor")
@@ -84,6 +85,7 @@ def init_quick_category_remove_route(app, db: firestore.Client):
 
         transaction = db.transaction()
         _remove_in_transaction(transaction)
+        invalidate_merged_settings(body.channelId)
 
         return jsonify({"success": True})
 
@@ -5,6 +5,7 @@ from flask import jsonify
 from google.cloud import firestore
 
 from schemas.category_editor_schemas import SkipKeywordRequest
+from services.classified_video_fetcher import invalidate_merged_settings
 from utils.auth_decorator import require_auth
 
 logger = logging.getLogger(__name__)
@@ -42,6 +43,7 @@ def init_skip_keyword_routes(app, db: firestore.Client):
             .document("skip_keywords")
         )
         doc_ref.set({"skipped": firestore.ArrayUnion([body.keyword])}, merge=True)
+        invalidate_merged_settings(body.channelId)
 
         return jsonify({"success": True})
 
@@ -69,6 +71,7 @@ def init_skip_keyword_routes(app, db: firestore.Client):
             .document("skip_keywords")
         )
         doc_ref.set({"skipped": firestore.ArrayRemove([body.keyword])}, merge=True)
+        invalidate_merged_settings(body.channelId)
 
         return jsonify({"success": True})
 
@@ -4,6 +4,7 @@ from apiflask import APIBlueprint
 from flask import jsonify
 from google.cloud import firestore
 
+from schemas.admin_schemas import HeatmapSyncQuery
 from services.heatmap_analyzer import analyze_and_update_all_channels
 from utils.admin_auth import require_admin_key
 
@@ -18,10 +19,13 @@ def init_sync_heatmap_route(app, db: firestore.Client):
         security="BearerAuth",
     )
     @require_admin_key
-    def sync_channel_video_heatmap():
+    @bp.input(HeatmapSyncQuery, location="query", arg_name="query")
+    def sync_channel_video_heatmap(query):
         logging.info("📊 [sync] 接收到活躍統計請求（每次皆進行全量重算）")
 
-        result = analyze_and_update_all_channels(db=db)
+        result = analyze_and_update_all_channels(
+            db=db, max_workers=query.workers, channel_timeout=query.channel_timeout
+        )
 
         logging.info(
             f"✅ [sync] 處理完成：updated={result.get('updated', 0)}, "
@@ -33,6 +37,8 @@ def init_sync_heatmap_route(app, db: firestore.Client):
                 "updated_channels": result.get("updated", 0),
                 "skipped_channels": result.get("skipped", 0),
                 "skipped_channel_ids": result.get("skipped_channels", []),
+                "timed_out_channel_ids": result.get("timed_out_channels", []),
+                "elapsed_seconds": result.get("elapsed_seconds"),
             }
         ), 200
 
@@ -7,14 +7,12 @@ from flask import jsonify
 from google.cloud import firestore
 
 from schemas.video_schemas import VideoUpdateRequest
-from services.classified_video_fetcher import get_classified_videos
 from services.firestore.batch_writer import write_batches_to_firestore
-from services.firestore.category_writer import write_category_counts_to_channel_index_batch
 from services.firestore.heatmap_writer import is_channel_heatmap_initialized
 from services.firestore.sync_time_index import get_last_video_sync_time, update_last_sync_time
-from services.heatmap_analyzer import update_single_channel_heatmap
+from services.heatmap_analyzer import update_channel_heatmap_incremental
 from services.heatmap_cache_writer import append_to_pending_cache
-from services.video_analyzer.category_counter import count_category_counts
+from services.video_analyzer.category_counts_updater import update_category_counts_after_write
 from services.youtube.fetcher import get_video_data
 
 logger = logging.getLogger(__name__)
@@ -59,16 +57,14 @@ def init_video_update_route(app, db: firestore.Client):
             write_result = write_batches_to_firestore(db, body.channelId, videos)
             update_last_sync_time(db, body.channelId, videos)
 
-            # Update category_counts（分類快取統計）
-            classified = get_classified_videos(db, body.channelId)
-            counts = count_category_counts(classified)
-            if counts.get("all", 0) > 0:
-                write_category_counts_to_channel_index_batch(db, body.channelId, counts)
+            # Update category_counts（只計算本次寫入影片的差值）
+            update_category_counts_after_write(db, body.channelId, write_result)
 
             # ✅ 在更新 heatmap 前檢查是否已初始化
             was_initialized = is_channel_heatmap_initialized(db, body.channelId)
 
-            update_single_channel_heatmap(db, body.channelId)
+            # 只套用本次寫入的影片；尚未初始化時內部會改做完整重算
+            update_channel_heatmap_incremental(db, body.channelId, write_result)
             logger.info(f"✅ 成功寫入 {write_result.get('videos_written', 0)} 部影片")
 
             # ✅ 若首次初始化則寫入 pending 快取
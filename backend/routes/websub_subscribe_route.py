@@ -10,6 +10,7 @@ from google.api_core.exceptions import GoogleAPIError
 from google.cloud.firestore import Client
 
 from schemas.common import ChannelIdQuery
+from services.firestore.sync_time_index import load_sync_index
 from utils.admin_auth import require_admin_key
 from utils.cloud_tasks_client import dispatch_tasks_batch
 
@@ -113,9 +114,7 @@ def init_websub_subscribe_route(app, db: Client):
                 logging.error(f"❌ {result['message']}")
                 return jsonify(result), 400
 
-            doc = db.collection("channel_sync_index").document("index_list").get()
-            data = doc.to_dict() or {}  # type: ignore[union-attr]
-            channels = data.get("channels", [])
+            channels = load_sync_index(db).channels
 
             if not channels:
                 result["status"] = "error"
@@ -1,10 +1,17 @@
 """管理員與內部 API 的 request schema"""
 
+from datetime import datetime
 from enum import StrEnum
 
 from pydantic import BaseModel, Field, field_validator
 
+from schemas.common import ChannelIdBody
 from utils.channel_validator import is_valid_channel_id
+from utils.classification_trace import (
+    DEFAULT_CHANNEL_TRACE_TTL,
+    MAX_CHANNEL_TRACE_TTL,
+    TRACE_BUFFER_SIZE,
+)
 
 
 class _TargetChannelMixin(BaseModel):
@@ -34,6 +41,9 @@ class BuildTrendingRequest(BaseModel):
     startDate: str | None = None
     days: int = Field(default=1, gt=0)
     force: bool = False
+    processes: int | None = Field(
+        default=None, ge=1, description="分類使用的 process 數；大於 1 時啟用 process pool"
+    )
 
 
 class RefreshCacheRequest(BaseModel):
@@ -66,3 +76,37 @@ class MaintenanceRequest(BaseModel):
     """POST /api/maintenance/clean-*"""
 
     mode: MaintenanceMode
+
+
+class ClassificationTraceQuery(BaseModel):
+    """GET /api/internal/classification-trace 的查詢參數"""
+
+    channel_id: str | None = None
+    limit: int = Field(default=200, gt=0, le=TRACE_BUFFER_SIZE)
+
+    @field_validator("channel_id")
+    @classmethod
+    def validate_channel_id(cls, v: str | None) -> str | None:
+        if v is not None and not is_valid_channel_id(v):
+            raise ValueError("channel_id 格式不合法")
+        return v
+
+
+class ClassificationTraceEnableRequest(ChannelIdBody):
+    """POST /api/internal/classification-trace/channels"""
+
+    ttl_seconds: int = Field(default=DEFAULT_CHANNEL_TRACE_TTL, gt=0, le=MAX_CHANNEL_TRACE_TTL)
+
+
+class ClassificationTraceRunRequest(ChannelIdBody):
+    """POST /api/internal/classification-trace/run"""
+
+    start: datetime | None = None
+    end: datetime | None = None
+
+
+class HeatmapSyncQuery(BaseModel):
+    """GET /api/sync/channel_video_heatmap 的查詢參數（未指定時使用環境變數設定）"""
+
+    workers: int | None = Field(default=None, gt=0, le=32)
+    channel_timeout: float | None = Field(default=None, gt=0, le=600)
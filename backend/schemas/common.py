@@ -84,6 +84,7 @@ class TrendingQuery(BaseModel):
     """GET /api/trending-games 的查詢參數"""
 
     days: int = 30
+    format: str = "full"
 
     @field_validator("days")
     @classmethod
@@ -91,3 +92,23 @@ class TrendingQuery(BaseModel):
         if v not in {7, 14, 30}:
             return 30
         return v
+
+    @field_validator("format")
+    @classmethod
+    def validate_format(cls, v: str) -> str:
+        if v not in {"full", "compact"}:
+            return "full"
+        return v
+
+
+class HeatmapQuery(BaseModel):
+    """GET /api/heatmap/<channel_id> 的查詢參數"""
+
+    format: str = "matrix"
+
+    @field_validator("format")
+    @classmethod
+    def validate_format(cls, v: str) -> str:
+        if v not in {"matrix", "counts"}:
+            return "matrix"
+        return v
@@ -6,6 +6,9 @@ from datetime import date, datetime
 from dateutil import parser as date_parser
 from google.cloud import firestore
 
+from services.firestore.channel_directory import get_channel_directory
+from services.firestore.sync_time_index import load_sync_index
+
 logger = logging.getLogger(__name__)
 
 
@@ -32,56 +35,46 @@ def get_all_enabled_channels_data(db: firestore.Client) -> dict:
         }
     """
     # 讀取同步資料（channel_id → lastVideoSyncAt）
-    sync_ref = db.collection("channel_sync_index").document("index_list")
-    sync_doc = sync_ref.get()
     sync_map = {}
+    for item in load_sync_index(db).channels:
+        cid = item.get("channel_id")
+        sync_time = item.get("lastVideoSyncAt")
+        if cid and sync_time:
+            sync_map[cid] = sync_time
 
-    if sync_doc.exists:  # type: ignore[union-attr]
-        sync_list = sync_doc.to_dict().get("channels", [])  # type: ignore[union-attr]
-        for item in sync_list:
-            cid = item.get("channel_id")
-            sync_time = item.get("lastVideoSyncAt")
-            if cid and sync_time:
-                sync_map[cid] = sync_time
-
-    # 讀取所有 batch
-    root_ref = db.collection("channel_index_batch")
-    docs = root_ref.stream()
+    # 讀取所有 batch（共用程序內快照）
+    directory = get_channel_directory(db)
 
     all_channels = []
     joined_at_dates = []
-    total_registered_count = 0
-
-    for doc in docs:
-        data = doc.to_dict() or {}
-        batch_channels = data.get("channels", [])
-        for entry in batch_channels:
-            total_registered_count += 1
-            if entry.get("enabled") is not True:
-                continue
-
-            channel_id = entry.get("channel_id")
-            joined_at = entry.get("joinedAt")
-            parsed_date = try_parse_date(joined_at)
-
-            if parsed_date:
-                joined_at_dates.append(parsed_date)
-
-            all_channels.append(
-                {
-                    "channel_id": channel_id,
-                    "name": entry.get("name"),
-                    "url": entry.get("url"),
-                    "thumbnail": entry.get("thumbnail"),
-                    "priority": entry.get("priority", 0),
-                    "joinedAt": joined_at,
-                    "countryCode": entry.get("countryCode", []),
-                    "enabled": entry.get("enabled", True),
-                    "lastVideoUploadedAt": sync_map.get(channel_id),
-                    "active_time_all": entry.get("active_time_all"),
-                    "category_counts": entry.get("category_counts"),
-                }
-            )
+    total_registered_count = len(directory)
+
+    for entry in directory.entries:
+        if entry.get("enabled") is not True:
+            continue
+
+        channel_id = entry.get("channel_id")
+        joined_at = entry.get("joinedAt")
+        parsed_date = try_parse_date(joined_at)
+
+        if parsed_date:
+            joined_at_dates.append(parsed_date)
+
+        all_channels.append(
+            {
+                "channel_id": channel_id,
+                "name": entry.get("name"),
+                "url": entry.get("url"),
+                "thumbnail": entry.get("thumbnail"),
+                "priority": entry.get("priority", 0),
+                "joinedAt": joined_at,
+                "countryCode": entry.get("countryCode", []),
+                "enabled": entry.get("enabled", True),
+                "lastVideoUploadedAt": sync_map.get(channel_id),
+                "active_time_all": entry.get("active_time_all"),
+                "category_counts": entry.get("category_counts"),
+            }
+        )
 
     # 排序所有資料
     sorted_channels = sorted(all_channels, key=lambda c: (-c["priority"], c["name"]))
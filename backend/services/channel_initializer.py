@@ -9,6 +9,12 @@ from google.cloud import firestore
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
+from services.classified_video_fetcher import invalidate_merged_settings
+from services.firestore.channel_directory import (
+    get_channel_directory,
+    invalidate_channel_directory,
+)
+from services.firestore.channel_locator import get_channel_locator, record_channel_batch
 from utils.admin_ids import get_admin_channel_ids
 from utils.exceptions import ConfigurationError, NotFoundError
 
@@ -37,6 +43,7 @@ def init_config_if_absent(db: firestore.Client, channel_id: str, channel_name: s
             default_config = json.load(f)
 
         doc_ref.set(default_config)
+        invalidate_merged_settings(channel_id)
         logging.info(f"[Config] ✅ 寫入預設設定成功：{channel_id} {channel_name}")
 
     except GoogleAPIError:
@@ -102,27 +109,27 @@ def append_channel_to_batch(db: firestore.Client, channel_id: str, info_data: di
     try:
         logging.info(f"[Batch] 🚀 開始處理 channel_index_batch 寫入：{channel_id}")
         root_ref = db.collection("channel_index_batch")
-        docs = list(root_ref.stream())
-        logging.info(f"[Batch] 📦 讀取到 {len(docs)} 個 batch 文件")
+        # 寫入前強制重新載入，避免依據過期快照重複寫入
+        directory = get_channel_directory(db, force_refresh=True)
+        logging.info(f"[Batch] 📦 讀取到 {len(directory.batches)} 個 batch 文件")
 
         # 先檢查是否已存在於任何 batch（包含 batch_0）
-        for doc in docs:
-            data = doc.to_dict() or {}
-            channels = data.get("channels", [])
-            if any(c.get("channel_id") == channel_id for c in channels):
-                logging.info(f"[Batch] ⚠️ 頻道 {channel_id} 已存在於 {doc.id}，略過寫入 batch")
-                break
+        existing_batch = directory.batch_of.get(channel_id)
+        if existing_batch is not None:
+            logging.info(f"[Batch] ⚠️ 頻道 {channel_id} 已存在於 {existing_batch}，略過寫入 batch")
+            if get_channel_locator(db).get(channel_id) != existing_batch:
+                record_channel_batch(db, channel_id, existing_batch)
         else:
             # 找出最後一個 batch 編號（排除 batch_0）
-            valid_batches = [doc for doc in docs if doc.id != "batch_0"]
+            valid_batches = [bid for bid in directory.batch_ids if bid != "batch_0"]
             max_batch_number = 0
-            for doc in valid_batches:
+            for batch_id in valid_batches:
                 try:
-                    n = int(doc.id.replace("batch_", ""))
+                    n = int(batch_id.replace("batch_", ""))
                     if n > max_batch_number:
                         max_batch_number = n
                 except ValueError:
-                    logging.warning(f"[Batch] ❓ 無法解析 batch ID：{doc.id}")
+                    logging.warning(f"[Batch] ❓ 無法解析 batch ID：{batch_id}")
 
             last_batch_id = f"batch_{max_batch_number or 1}"
             last_batch_ref = root_ref.document(last_batch_id)
@@ -152,6 +159,8 @@ def append_channel_to_batch(db: firestore.Client, channel_id: str, info_data: di
             last_batch_ref.set(
                 {"channels": current_channels, "updatedAt": firestore.SERVER_TIMESTAMP}
             )
+            invalidate_channel_directory()
+            record_channel_batch(db, channel_id, last_batch_id)
             logging.info(
                 f"[Batch] ✅ 寫入成功：{channel_id} → {last_batch_id}（總筆數：{len(current_channels)}）"
             )
@@ -4,19 +4,24 @@ from datetime import UTC, datetime, timedelta
 from google.api_core.exceptions import GoogleAPIError
 from google.cloud.firestore import Client
 
-from services.classified_video_fetcher import get_classified_videos
 from services.firestore.batch_writer import write_batches_to_firestore
-from services.firestore.category_writer import (
-    write_category_counts_to_channel_index_batch,
-)
+from services.firestore.channel_directory import get_channel_directory
+from services.firestore.channel_locator import locate_channel_batch
 from services.firestore.check_and_update_channel_info import (
     check_and_update_channel_info,
 )
 from services.firestore.sync_time_index import (
+    compact_sync_index,
     get_last_video_sync_time,
+    load_sync_index,
+    parse_sync_time,
+    record_channel_sync_state,
     update_last_sync_time,
 )
-from services.video_analyzer.category_counter import count_category_counts
+from services.video_analyzer.category_counts_updater import (
+    recount_category_counts,
+    update_category_counts_after_write,
+)
 from services.youtube.fetcher import get_video_data
 
 DEFAULT_REFRESH_LIMIT = 50
@@ -67,39 +72,29 @@ def select_channels_for_scan(
 
 def update_index_entry(
     index_data: dict, channel_id: str, checked_at: datetime, sync_at: str | None
-) -> None:
-    updated = False
+) -> dict:
+    """更新（或新增）index 內的頻道項目，回傳本次變更的欄位"""
     for entry in index_data["channels"]:
         if entry.get("channel_id") == channel_id:
-            entry["lastCheckedAt"] = checked_at.isoformat()
+            changes = {"lastCheckedAt": checked_at.isoformat()}
             if sync_at:
-                entry["lastVideoSyncAt"] = sync_at
-            updated = True
-            break
-
-    if not updated:
-        index_data["channels"].append(
-            {
-                "channel_id": channel_id,
-                "lastCheckedAt": checked_at.isoformat(),
-                "lastVideoSyncAt": sync_at or checked_at.isoformat(),
-            }
-        )
+                changes["lastVideoSyncAt"] = sync_at
+            entry.update(changes)
+            return changes
+
+    changes = {
+        "lastCheckedAt": checked_at.isoformat(),
+        "lastVideoSyncAt": sync_at or checked_at.isoformat(),
+    }
+    index_data["channels"].append({"channel_id": channel_id, **changes})
+    return changes
 
 
 def get_batch_id_map(db: Client) -> dict[str, str]:
     """
     扫描所有 channel_index_batch，建立 channel_id → batch_id 的對照表。
     """
-    result = {}
-    docs = db.collection("channel_index_batch").stream()
-    for doc in docs:
-        data = doc.to_dict() or {}
-        for ch in data.get("channels", []):
-            cid = ch.get("channel_id")
-            if cid:
-                result[cid] = doc.id
-    return result
+    return dict(get_channel_directory(db).batch_of)
 
 
 def run_daily_channel_refresh(
@@ -111,14 +106,13 @@ def run_daily_channel_refresh(
     force_category_counts: bool = False,
     channel_ids: list[str] | None = None,
 ) -> dict:
-    index_ref = db.collection("channel_sync_index").document("index_list")
-    index_doc = index_ref.get()
-    if not index_doc.exists:  # type: ignore[union-attr]
-        logger.warning("📭 無 index_list 文件，略過")
+    sync_index = load_sync_index(db)
+    if not sync_index.channels and not channel_ids:
+        logger.warning("📭 同步索引沒有任何頻道，略過")
         return {"status": "no_index_list"}
 
-    index_data = index_doc.to_dict() or {}  # type: ignore[union-attr]
-    all_channels = index_data.get("channels", [])
+    index_data = {"channels": sync_index.channels}
+    all_channels = index_data["channels"]
 
     # 指定頻道時直接使用，跳過排序篩選
     if channel_ids:
@@ -146,9 +140,6 @@ def run_daily_channel_refresh(
             "limit_applied": len(selected) < len(all_channels),
         }
 
-    # 🆕 預先建立 batch_id map（一次性查詢）
-    batch_id_map = get_batch_id_map(db)
-
     now = datetime.now(UTC)
     processed = []
     skipped = []
@@ -159,7 +150,7 @@ def run_daily_channel_refresh(
             logger.info(f"📡 更新頻道 {channel_id}")
 
             # 🆕 同步名稱與頭像
-            batch_id = batch_id_map.get(channel_id)
+            batch_id = locate_channel_batch(db, channel_id)
             if batch_id:
                 check_and_update_channel_info(db, channel_id, batch_id)
             else:
@@ -170,7 +161,10 @@ def run_daily_channel_refresh(
                 date_ranges = None
                 limit_pages = None
             else:
-                last_sync_time = get_last_video_sync_time(db, channel_id)
+                # 同步索引已含最新的 lastVideoSyncAt，只有索引內沒有時才個別讀取
+                last_sync_time = parse_sync_time(
+                    ch.get("lastVideoSyncAt")
+                ) or get_last_video_sync_time(db, channel_id)
                 safe_sync_time = last_sync_time + timedelta(seconds=1) if last_sync_time else None
                 date_ranges = [(safe_sync_time, now)] if safe_sync_time else None
                 limit_pages = 2
@@ -192,33 +186,31 @@ def run_daily_channel_refresh(
                 latest_sync = update_last_sync_time(db, channel_id, new_videos)
                 logger.info(f"✅ 寫入頻道 {channel_id} 的影片數量：{videos_written}")
 
-            # 🟡 強制 category_counts（如啟用）
+            # 🟡 強制 category_counts（如啟用）→ 完整重算；否則只套用本次寫入的差值
             if force_category_counts:
-                classified = get_classified_videos(db, channel_id)
-                counts = count_category_counts(classified)
-                if counts.get("all", 0) > 0:
-                    write_category_counts_to_channel_index_batch(db, channel_id, counts)
-                    logger.info(f"📊 強制更新 category_counts → {channel_id}")
-                else:
-                    logger.info(f"⚪ category_counts 空值，略過寫入 → {channel_id}")
-
-            update_index_entry(
+                recount_category_counts(db, channel_id)
+                logger.info(f"📊 強制更新 category_counts → {channel_id}")
+            elif new_videos:
+                update_category_counts_after_write(db, channel_id, result)
+
+            changes = update_index_entry(
                 index_data,
                 channel_id,
                 checked_at=now,
                 sync_at=latest_sync if new_videos else None,
             )
+            record_channel_sync_state(db, channel_id, changes)
             processed.append({"channel_id": channel_id, "videos_written": videos_written})
 
         except Exception as e:
             logger.warning(f"⚠️ 更新頻道 {channel_id} 失敗：{e}", exc_info=True)
             skipped.append(channel_id)
 
+    # 各頻道狀態已個別寫入；這裡只把合併後的檢視寫回彙總文件，縮小下次的差異查詢
     try:
-        index_ref.set(index_data)
-        logger.info("📁 回寫 index_list 完成")
+        compact_sync_index(db, sync_index)
     except GoogleAPIError:
-        logger.error("🔥 回寫 index_list 發生錯誤", exc_info=True)
+        logger.error("🔥 回寫同步索引彙總發生錯誤", exc_info=True)
 
     return {
         "status": "success",
@@ -1,11 +1,26 @@
 import logging
+import os
+import threading
 from datetime import datetime
 
+from cachetools import TTLCache
+from google.api_core.exceptions import GoogleAPIError
 from google.cloud.firestore import Client
 
-from utils.categorizer import match_category_and_game
-from utils.settings_game_merger import merge_game_categories_with_aliases
-from utils.settings_main_merger import merge_main_categories_with_user_config
+from services.firestore.classification_store import (
+    load_classified_entries,
+    result_to_entry,
+    schedule_classified_writes,
+    video_signature,
+)
+from utils.categorizer import classify_batch, match_category_and_game, settings_fingerprint
+from utils.classification_trace import trace_scope
+from utils.compiled_settings import CompiledSettings, compile_settings
+from utils.game_alias_fetcher import get_alias_map_etag
+from utils.settings_main_merger import (
+    get_default_config_version,
+    merge_main_categories_with_user_config,
+)
 from utils.youtube_utils import normalize_video_item
 
 logger = logging.getLogger(__name__)
@@ -19,29 +34,73 @@ type_map = {
     "shorts": "shorts",
 }
 
+# 合併後設定快取：channel_id → ((default 版本, 別名 etag), CompiledSettings)
+# - 同程序內的設定寫入路徑會呼叫 invalidate_merged_settings() 主動清除
+# - default config（update_time，最晚 60 秒內讀到）或遊戲別名版本變動時自動失效
+# - 其他程序（其他 Cloud Run instance）寫入的頻道設定只靠 TTL 兜底，
+#   最多延遲 MERGED_SETTINGS_TTL 秒（預設 600）才生效
+_MERGED_SETTINGS_CACHE_SIZE = 256
+DEFAULT_MERGED_SETTINGS_TTL = 600
+_MERGED_SETTINGS_TTL = float(os.getenv("MERGED_SETTINGS_TTL", str(DEFAULT_MERGED_SETTINGS_TTL)))
+_merged_settings_cache: TTLCache = TTLCache(
+    maxsize=_MERGED_SETTINGS_CACHE_SIZE, ttl=_MERGED_SETTINGS_TTL
+)
+_merged_settings_lock = threading.Lock()
 
-def get_merged_settings(db: Client, channel_id: str) -> dict:
+
+def invalidate_merged_settings(channel_id: str | None = None) -> None:
+    """清除指定頻道的合併設定快取；未指定 channel_id 時清除全部"""
+    with _merged_settings_lock:
+        if channel_id is None:
+            _merged_settings_cache.clear()
+        else:
+            _merged_settings_cache.pop(channel_id, None)
+
+
+def get_compiled_settings(db: Client, channel_id: str) -> CompiledSettings | None:
     """
-    讀取並合併後端設定，包含主分類與遊戲別名。
-    可用於影片分類前的準備，或除錯用途。
+    讀取並合併後端設定（主分類 + 遊戲別名），回傳唯讀的 CompiledSettings。
+    頻道沒有設定時回傳 None。
+
+    結果會快取於程序內，由多個呼叫端共用；中央遊戲別名以參照方式共用，不會複製進每個頻道。
     """
+    versions = (get_default_config_version(db), get_alias_map_etag())
+    with _merged_settings_lock:
+        cached = _merged_settings_cache.get(channel_id)
+    if cached is not None and cached[0] == versions:
+        logger.debug("♻️ 使用快取的合併設定：%s", channel_id)
+        return cached[1]  # type: ignore[no-any-return]
+
     settings_ref = (
         db.collection("channel_data").document(channel_id).collection("settings").document("config")
     )
     settings_doc = settings_ref.get()
     if not settings_doc.exists:
         logger.warning("⚠️ 無分類設定 config，頻道 %s", channel_id)
-        return {}
-
-    settings = settings_doc.to_dict()
+        return None
 
     # 🧩 合併 default_categories_config_v2（主分類設定）
-    settings = merge_main_categories_with_user_config(db, settings)
+    settings = merge_main_categories_with_user_config(db, settings_doc.to_dict())
 
-    # 🔁 合併遊戲別名（中央別名 + 使用者自訂）
-    settings = merge_game_categories_with_aliases(settings)
+    # 🔁 疊加遊戲別名（中央別名表共用 + 使用者自訂 overlay）
+    compiled = compile_settings(settings)
 
-    return settings
+    # 取得別名表時可能刷新別名快取，以之後的版本為準
+    versions = (versions[0], get_alias_map_etag())
+    with _merged_settings_lock:
+        _merged_settings_cache[channel_id] = (versions, compiled)
+
+    return compiled
+
+
+def get_merged_settings(db: Client, channel_id: str) -> dict:
+    """
+    讀取並合併後端設定，以舊格式 dict 回傳（live / videos / shorts 各含完整遊戲別名）。
+    供前端顯示或除錯用途；分類請改用 get_compiled_settings。
+    回傳的是 CompiledSettings 快取的展開結果，呼叫端不可修改。
+    """
+    compiled = get_compiled_settings(db, channel_id)
+    return compiled.to_dict() if compiled is not None else {}
 
 
 def get_classified_videos(
@@ -53,60 +112,118 @@ def get_classified_videos(
     """
     從 videos_batch 撈出影片，套用分類設定後回傳，格式與舊 API 一致。
     - 支援傳入 start / end 為 UTC+0 時間範圍（datetime，含時區）
-    - 不寫入 Firestore
-    - 僅回傳符合 video_type 的影片
+    - 優先使用 videos_classified 中指紋相符的既有分類結果，只重新分類過期或新增的影片
+    - 有新結果或含已刪除影片的 batch 才回寫 videos_classified，由背景執行緒寫入，不阻塞回應
     """
     try:
-        settings = get_merged_settings(db, channel_id)
+        settings = get_compiled_settings(db, channel_id)
         if not settings:
             return []
 
         batch_ref = db.collection("channel_data").document(channel_id).collection("videos_batch")
         docs = list(batch_ref.stream())
-        raw_items = []
-        for doc in docs:
-            data = doc.to_dict()
-            raw_items.extend(data.get("videos", []))
 
-        logger.info(f"📦 讀取 {len(docs)} 筆 batch，共 {len(raw_items)} 部影片")
+        fingerprint = settings_fingerprint(settings)
+        try:
+            stored = load_classified_entries(db, channel_id, fingerprint, [doc.id for doc in docs])
+        except GoogleAPIError as e:
+            logger.warning("⚠️ 讀取既有分類結果失敗，全部重新分類：%s", e)
+            stored = {}
 
-        results = []
+        items: list[tuple[str, dict, str]] = []  # (batch_id, item, signature)
+        batch_video_ids: dict[str, set] = {}  # 各 batch 目前的影片（不受時間範圍影響）
+        raw_count = 0
         skipped = 0  # 紀錄被時間過濾掉的數量
-        for raw_item in raw_items:
-            item = normalize_video_item(raw_item)
-            if not item:
-                logger.warning("⚠️ normalize_video_item 失敗: %s", raw_item)
-                continue
-
-            # 🕓 時間過濾處理
-            try:
-                publish_dt = datetime.fromisoformat(item["publishDate"])  # aware UTC+0 datetime
-                if start and publish_dt < start:
-                    skipped += 1
+        for doc in docs:
+            raw_items = (doc.to_dict() or {}).get("videos", [])
+            raw_count += len(raw_items)
+            batch_video_ids[doc.id] = {
+                raw_item.get("videoId") for raw_item in raw_items if isinstance(raw_item, dict)
+            }
+            for raw_item in raw_items:
+                item = normalize_video_item(raw_item)
+                if not item:
+                    logger.warning("⚠️ normalize_video_item 失敗: %s", raw_item)
                     continue
-                if end and publish_dt > end:
-                    skipped += 1
+
+                # 🕓 時間過濾處理
+                try:
+                    publish_dt = datetime.fromisoformat(item["publishDate"])  # aware UTC+0
+                    if start and publish_dt < start:
+                        skipped += 1
+                        continue
+                    if end and publish_dt > end:
+                        skipped += 1
+                        continue
+                except ValueError:
+                    logger.warning("⚠️ 解析 publishDate 失敗：%s", item["publishDate"])
                     continue
-            except ValueError:
-                logger.warning("⚠️ 解析 publishDate 失敗：%s", item["publishDate"])
+
+                items.append((doc.id, item, video_signature(item["title"], item["type"])))
+
+        logger.info(f"📦 讀取 {len(docs)} 筆 batch，共 {raw_count} 部影片")
+
+        # ♻️ 沿用指紋相符且標題未變的既有結果
+        entries: list[dict | None] = []
+        stale: list[int] = []
+        for index, (batch_id, item, signature) in enumerate(items):
+            entry = stored.get(batch_id, {}).get(item["videoId"])
+            if isinstance(entry, dict) and entry.get("sig") == signature:
+                entries.append(entry)
+            else:
+                entries.append(None)
+                stale.append(index)
+
+        # 🏷️ 過期影片整批分類（同一份 settings，每種影片類型只準備一次）
+        # 🔬 頻道啟用追蹤時全部重新分類，讓每部影片的比對依據都寫入追蹤記錄
+        with trace_scope(channel_id) as tracing:
+            targets = list(range(len(items))) if tracing else stale
+            matches = (
+                classify_batch(
+                    [(items[i][1]["title"], items[i][1]["type"]) for i in targets], settings
+                )
+                if targets
+                else []
+            )
+
+        # 💾 回寫：已從 videos_batch 移除的影片一併清掉，只寫有變動的 batch
+        dirty: dict[str, dict[str, dict]] = {}
+        for batch_id, videos in stored.items():
+            present = batch_video_ids.get(batch_id)
+            if present is not None and not present.issuperset(videos):
+                dirty[batch_id] = {vid: e for vid, e in videos.items() if vid in present}
+
+        stale_set = set(stale)
+        for index, match in zip(targets, matches, strict=True):
+            if index not in stale_set:
                 continue
+            batch_id, item, signature = items[index]
+            entry = result_to_entry(signature, match)
+            entries[index] = entry
+            if batch_id not in dirty:
+                dirty[batch_id] = dict(stored.get(batch_id, {}))
+            dirty[batch_id][item["videoId"]] = entry
 
-            result = match_category_and_game(item["title"], item["type"], settings)
+        if dirty:
+            schedule_classified_writes(db, channel_id, fingerprint, dirty)
 
-            video_data = {
+        results = [
+            {
                 "videoId": item["videoId"],
                 "title": item["title"],
                 "publishDate": item["publishDate"],
                 "duration": item["duration"],
                 "type": item["type"],
-                "matchedCategories": result["matchedCategories"],
-                "game": result["game"],
-                "matchedKeywords": result["matchedKeywords"],
-                "matchedPairs": result.get("matchedPairs", []),
+                "matchedCategories": entry["matchedCategories"],
+                "game": entry["game"],
+                "matchedKeywords": entry["matchedKeywords"],
+                "matchedPairs": entry.get("matchedPairs", []),
             }
+            for (_, item, _), entry in zip(items, entries, strict=True)
+            if entry is not None
+        ]
 
-            results.append(video_data)
-
+        logger.info("♻️ 沿用 %d 部既有分類結果，重新分類 %d 部", len(items) - len(stale), len(stale))
         logger.info(
             f"✅ 成功分類 {len(results)} 部影片"
             f"（已篩掉 {skipped} 部不在時間範圍內）"
@@ -132,14 +249,15 @@ def classify_live_title(db: Client, channel_id: str, title: str) -> dict:
     }
     """
     try:
-        settings = get_merged_settings(db, channel_id)
+        settings = get_compiled_settings(db, channel_id)
         if not settings:
             return {
                 "matchedCategories": [],
                 "matchedPairs": [],
             }
 
-        result = match_category_and_game(title, "live", settings)
+        with trace_scope(channel_id):
+            result = match_category_and_game(title, "live", settings)
         return {
             "matchedCategories": result.get("matchedCategories", []),
             "matchedPairs": result.get("matchedPairs", []),
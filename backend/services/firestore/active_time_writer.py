@@ -1,9 +1,16 @@
 import logging
+from collections import defaultdict
 from datetime import datetime
 
 from google.api_core.exceptions import GoogleAPIError
 from google.cloud import firestore
 
+from services.firestore.channel_directory import update_channel_directory_entries
+from services.firestore.channel_locator import apply_to_channel_batch, get_channel_locator
+
+BATCH_COLLECTION = "channel_index_batch"
+SLOT_KEYS = ("凌", "早", "午", "晚")
+
 
 @firestore.transactional
 def _update_active_time_in_transaction(transaction, doc_ref, channel_id, new_stat) -> bool:
@@ -22,6 +29,55 @@ def _update_active_time_in_transaction(transaction, doc_ref, channel_id, new_sta
     return False
 
 
+@firestore.transactional
+def _update_batch_active_time_in_transaction(transaction, doc_ref, stats) -> set[str]:
+    """Transaction 內讀取 batch 文件一次，更新多個頻道的 active_time_all；回傳實際寫入的頻道"""
+    doc = doc_ref.get(transaction=transaction)
+    if not doc.exists:
+        return set()
+
+    channels = (doc.to_dict() or {}).get("channels", [])
+    written = set()
+    for ch in channels:
+        channel_id = ch.get("channel_id")
+        if channel_id in stats and channel_id not in written:
+            ch["active_time_all"] = stats[channel_id]
+            written.add(channel_id)
+    if written:
+        transaction.set(doc_ref, {"channels": channels}, merge=True)
+    return written
+
+
+def build_active_time_stat(
+    slot_counter: list[int],  # [凌, 早, 午, 晚]
+    total_count: int,
+    updated_at: datetime,
+) -> dict:
+    return {
+        **dict(zip(SLOT_KEYS, slot_counter, strict=True)),
+        "totalCount": total_count,
+        "updatedAt": updated_at,
+    }
+
+
+def _write_single_active_time(db, channel_id: str, new_stat: dict) -> bool:
+    def attempt(batch_id: str) -> bool | None:
+        doc_ref = db.collection(BATCH_COLLECTION).document(batch_id)
+        transaction = db.transaction()
+        return (
+            _update_active_time_in_transaction(transaction, doc_ref, channel_id, new_stat) or None
+        )
+
+    # 由定位表直接找到頻道所在的 batch，只開一次 transaction
+    located = apply_to_channel_batch(db, channel_id, attempt)
+    if located is not None:
+        logging.info(f"📝 成功寫入 active_time_all → {channel_id}（位於 {located[0]}）")
+        return True
+
+    logging.warning(f"❗ 找不到符合的 channel_id：{channel_id}，無法寫入 active_time_all")
+    return False
+
+
 def write_active_time_all_to_channel_index_batch(
     db,
     channel_id: str,
@@ -30,29 +86,122 @@ def write_active_time_all_to_channel_index_batch(
     updated_at: datetime,
 ) -> None:
     try:
-        new_stat = {
-            "凌": slot_counter[0],
-            "早": slot_counter[1],
-            "午": slot_counter[2],
-            "晚": slot_counter[3],
-            "totalCount": total_count,
-            "updatedAt": updated_at,
-        }
+        new_stat = build_active_time_stat(slot_counter, total_count, updated_at)
+        if _write_single_active_time(db, channel_id, new_stat):
+            update_channel_directory_entries({channel_id: {"active_time_all": new_stat}})
 
-        batch_prefix = "channel_index_batch"
-        batch_ids = [
-            doc.id for doc in db.collection(batch_prefix).stream() if doc.id.startswith("batch_")
-        ]
-        batch_ids.sort()
+    except GoogleAPIError as e:
+        logging.error(f"🔥 寫入 active_time_all 失敗（{channel_id}）：{e}")
 
-        for batch_id in batch_ids:
-            doc_ref = db.collection(batch_prefix).document(batch_id)
-            transaction = db.transaction()
-            if _update_active_time_in_transaction(transaction, doc_ref, channel_id, new_stat):
-                logging.info(f"📝 成功寫入 active_time_all → {channel_id}（位於 {batch_id}）")
-                return
 
-        logging.warning(f"❗ 找不到符合的 channel_id：{channel_id}，無法寫入 active_time_all")
+def write_active_time_for_channels(db, stats: dict[str, dict]) -> list[str]:
+    """
+    批次寫入多個頻道的 active_time_all：依定位表把同一份 channel_index_batch 的頻道分成一組，
+    每組只開一次 transaction（讀一次、寫一次），寫入次數與 batch 文件數成正比。
+    定位表查不到或已過期的頻道，改走單頻道路徑（會重新定位）。
+    回傳未能寫入的 channel_id。
+    """
+    locator = get_channel_locator(db)
+    groups: dict[str, dict[str, dict]] = defaultdict(dict)
+    leftovers: list[str] = []
+    for channel_id, stat in stats.items():
+        batch_id = locator.get(channel_id)
+        if batch_id is None:
+            leftovers.append(channel_id)
+        else:
+            groups[batch_id][channel_id] = stat
 
-    except GoogleAPIError as e:
-        logging.error(f"🔥 寫入 active_time_all 失敗（{channel_id}）：{e}")
+    written_ids: list[str] = []
+    failed: list[str] = []
+    for batch_id, group in groups.items():
+        doc_ref = db.collection(BATCH_COLLECTION).document(batch_id)
+        try:
+            written = _update_batch_active_time_in_transaction(db.transaction(), doc_ref, group)
+        except GoogleAPIError as e:
+            logging.error(f"🔥 寫入 {batch_id} 的 active_time_all 失敗（{len(group)} 個頻道）：{e}")
+            failed.extend(group)
+            continue
+        written_ids.extend(written)
+        leftovers.extend(cid for cid in group if cid not in written)
+        logging.info(f"📝 {batch_id} 寫入 {len(written)} 個頻道的 active_time_all")
+
+    for channel_id in leftovers:
+        try:
+            if _write_single_active_time(db, channel_id, stats[channel_id]):
+                written_ids.append(channel_id)
+            else:
+                failed.append(channel_id)
+        except GoogleAPIError as e:
+            logging.error(f"🔥 寫入 active_time_all 失敗（{channel_id}）：{e}")
+            failed.append(channel_id)
+
+    if written_ids:
+        update_channel_directory_entries(
+            {cid: {"active_time_all": stats[cid]} for cid in written_ids}
+        )
+    return failed
+
+
+@firestore.transactional
+def _apply_active_time_delta_in_transaction(
+    transaction, doc_ref, channel_id, slot_delta, count_delta, updated_at, written=None
+) -> bool | None:
+    """
+    Transaction 內把差值加到頻道既有的 active_time_all。
+    回傳 True 已套用；False 頻道尚無 active_time_all（需完整重算）；None batch 內找不到頻道。
+    指定 written（dict）時，套用後的新 active_time_all 會放進 written["active_time_all"]。
+    """
+    doc = doc_ref.get(transaction=transaction)
+    if not doc.exists:
+        return None
+
+    channels = (doc.to_dict() or {}).get("channels", [])
+    for ch in channels:
+        if ch.get("channel_id") != channel_id:
+            continue
+        current = ch.get("active_time_all")
+        if not current:
+            return False
+        ch["active_time_all"] = {
+            **current,
+            **{
+                key: current.get(key, 0) + delta
+                for key, delta in zip(SLOT_KEYS, slot_delta, strict=True)
+            },
+            "totalCount": current.get("totalCount", 0) + count_delta,
+            "updatedAt": updated_at,
+        }
+        transaction.set(doc_ref, {"channels": channels}, merge=True)
+        if written is not None:
+            written["active_time_all"] = ch["active_time_all"]
+        return True
+    return None
+
+
+def apply_active_time_delta(
+    db, channel_id: str, slot_delta: list[int], count_delta: int, updated_at: datetime
+) -> bool:
+    """
+    增量更新 active_time_all（四時段與 totalCount 加上差值）。
+    頻道尚無 active_time_all 時回傳 False，由呼叫端改做完整重算。
+    """
+    written: dict = {}
+    located = apply_to_channel_batch(
+        db,
+        channel_id,
+        lambda batch_id: _apply_active_time_delta_in_transaction(
+            db.transaction(),
+            db.collection(BATCH_COLLECTION).document(batch_id),
+            channel_id,
+            slot_delta,
+            count_delta,
+            updated_at,
+            written,
+        ),
+    )
+    if located is None:
+        logging.warning(f"❗ 找不到符合的 channel_id：{channel_id}，無法增量更新 active_time_all")
+        return False
+    if located[1]:
+        update_channel_directory_entries({channel_id: written})
+    return located[1]  # type: ignore[no-any-return]
@@ -22,6 +22,12 @@ def get_batch_doc_ref(db: Client, channel_id: str, batch_index: int) -> firestor
 
 
 def write_batches_to_firestore(db: Client, channel_id: str, new_videos: list[dict]) -> dict:
+    """
+    將影片寫入 videos_batch（先合併進最後一個 batch，剩餘的分批新增）。
+    回傳值除寫入數量外，另含：
+    - written_videos：實際寫入的標準化影片
+    - replaced_videos：被覆寫的舊版影片（供 category_counts 增量更新扣除）
+    """
     if not firestore_breaker.allow_request():
         logger.warning("🔴 Firestore 熔斷中，略過寫入：%s", channel_id)
         return {"batches_written": 0, "videos_written": 0, "error": "circuit breaker open"}
@@ -78,6 +84,7 @@ def write_batches_to_firestore(db: Client, channel_id: str, new_videos: list[dic
         last_index = max_index
         merged_count = 0
         remaining = normalized_videos
+        replaced_videos: list[dict] = []
 
         if last_index >= 0:
             last_doc_ref = get_batch_doc_ref(db, channel_id, last_index)
@@ -86,7 +93,7 @@ def write_batches_to_firestore(db: Client, channel_id: str, new_videos: list[dic
             def _merge_in_transaction(transaction):
                 last_doc = last_doc_ref.get(transaction=transaction)
                 if not last_doc.exists:
-                    return 0, normalized_videos
+                    return 0, normalized_videos, []
 
                 data = last_doc.to_dict() or {}
                 videos = data.get("videos", [])
@@ -96,9 +103,11 @@ def write_batches_to_firestore(db: Client, channel_id: str, new_videos: list[dic
                 updated_map = existing_map.copy()
 
                 count = 0
+                replaced = []
                 for video in normalized_videos:
                     vid = video["videoId"]
                     if vid in existing_map:
+                        replaced.append(existing_map[vid])
                         updated_map[vid] = video
                         count += 1
                     elif space_left > 0:
@@ -111,10 +120,10 @@ def write_batches_to_firestore(db: Client, channel_id: str, new_videos: list[dic
 
                 written_ids = set(updated_map.keys())
                 leftover = [v for v in normalized_videos if v["videoId"] not in written_ids]
-                return count, leftover
+                return count, leftover, replaced
 
             transaction = db.transaction()
-            merged_count, remaining = _merge_in_transaction(transaction)
+            merged_count, remaining, replaced_videos = _merge_in_transaction(transaction)
             if merged_count > 0:
                 logger.info(f"🧩 合併/覆蓋 {merged_count} 筆到 batch_{last_index}")
 
@@ -133,6 +142,8 @@ def write_batches_to_firestore(db: Client, channel_id: str, new_videos: list[dic
         return {
             "batches_written": len(new_batches) + (1 if merged_count else 0),
             "videos_written": len(normalized_videos),
+            "written_videos": normalized_videos,
+            "replaced_videos": replaced_videos,
         }
 
     except GoogleAPIError as e:
@@ -1,12 +1,22 @@
 import logging
+from datetime import UTC, datetime
 
 from google.api_core.exceptions import GoogleAPIError
 from google.cloud import firestore
 from google.cloud.firestore import Client
 
+from services.firestore.channel_directory import update_channel_directory_entries
+from services.firestore.channel_locator import apply_to_channel_batch
+from services.video_analyzer.category_counter import COUNT_KEYS
+
+# 頻道元素上記錄 category_counts 由哪一份 settings 指紋統計而來
+FINGERPRINT_FIELD = "category_counts_fingerprint"
+
 
 @firestore.transactional
-def _update_category_counts_in_transaction(transaction, doc_ref, channel_id, counts) -> bool:
+def _update_category_counts_in_transaction(
+    transaction, doc_ref, channel_id, counts, fingerprint=None
+) -> bool:
     """Transaction 內讀取 batch 文件並更新 category_counts"""
     doc = doc_ref.get(transaction=transaction)
     if not doc.exists:
@@ -17,28 +27,100 @@ def _update_category_counts_in_transaction(transaction, doc_ref, channel_id, cou
     for i, ch in enumerate(channels):
         if ch.get("channel_id") == channel_id:
             channels[i]["category_counts"] = counts
+            if fingerprint:
+                channels[i][FINGERPRINT_FIELD] = fingerprint
             transaction.set(doc_ref, {"channels": channels}, merge=True)
             return True
     return False
 
 
-def write_category_counts_to_channel_index_batch(db: Client, channel_id: str, counts: dict) -> None:
+@firestore.transactional
+def _apply_category_delta_in_transaction(
+    transaction, doc_ref, channel_id, delta, fingerprint, written=None
+) -> str | None:
+    """
+    Transaction 內將差值加到既有 category_counts。
+    回傳 "applied"（已套用）、"stale"（找到頻道但指紋不符或無既有統計）、None（不在此 batch）
+    指定 written（dict）時，套用後寫入的新 category_counts 會放進 written["category_counts"]。
+    """
+    doc = doc_ref.get(transaction=transaction)
+    if not doc.exists:
+        return None
+
+    channels = (doc.to_dict() or {}).get("channels", [])
+    for ch in channels:
+        if ch.get("channel_id") != channel_id:
+            continue
+
+        counts = ch.get("category_counts")
+        if ch.get(FINGERPRINT_FIELD) != fingerprint or not isinstance(counts, dict):
+            return "stale"
+
+        ch["category_counts"] = {
+            **{key: max(0, int(counts.get(key, 0)) + delta.get(key, 0)) for key in COUNT_KEYS},
+            "updatedAt": datetime.now(UTC).isoformat(),
+        }
+        transaction.set(doc_ref, {"channels": channels}, merge=True)
+        if written is not None:
+            written["category_counts"] = ch["category_counts"]
+        return "applied"
+    return None
+
+
+def apply_category_counts_delta(db: Client, channel_id: str, delta: dict, fingerprint: str) -> bool:
+    """
+    將 category_counts 差值套用到 channel_index_batch 中對應頻道。
+    僅在既有統計的指紋與目前設定相符時套用；回傳 False 代表需要完整重算。
+    """
+    batch_prefix = "channel_index_batch"
+    written: dict = {}
+
+    def attempt(batch_id: str) -> str | None:
+        doc_ref = db.collection(batch_prefix).document(batch_id)
+        transaction = db.transaction()
+        return _apply_category_delta_in_transaction(  # type: ignore[no-any-return]
+            transaction, doc_ref, channel_id, delta, fingerprint, written
+        )
+
+    located = apply_to_channel_batch(db, channel_id, attempt)
+    if located is None or located[1] != "applied":
+        return False
+
+    update_channel_directory_entries({channel_id: written})
+    logging.info(f"📊 增量更新 category_counts → {channel_id}（位於 {located[0]}）")
+    return True
+
+
+def write_category_counts_to_channel_index_batch(
+    db: Client, channel_id: str, counts: dict, fingerprint: str | None = None
+) -> None:
     """
     寫入 category_counts 至 channel_index_batch 中對應的頻道資料。
-    - 對所有 batch_* 文件逐一掃描 channels 陣列
-    - 找到對應 channel_id 後以 Transaction 更新該元素的 category_counts 欄位
+    - 由定位表找到頻道所在的 batch 文件
+    - 以 Transaction 更新該元素的 category_counts 欄位
+    - 指定 fingerprint 時一併記錄，供之後的增量更新判斷
     """
     try:
         batch_prefix = "channel_index_batch"
-        batch_docs = db.collection(batch_prefix).stream()
-        batch_ids = sorted([doc.id for doc in batch_docs if doc.id.startswith("batch_")])
 
-        for batch_id in batch_ids:
+        def attempt(batch_id: str) -> bool | None:
             doc_ref = db.collection(batch_prefix).document(batch_id)
             transaction = db.transaction()
-            if _update_category_counts_in_transaction(transaction, doc_ref, channel_id, counts):
-                logging.info(f"📊 成功寫入 category_counts → {channel_id}（位於 {batch_id}）")
-                return
+            return (
+                _update_category_counts_in_transaction(
+                    transaction, doc_ref, channel_id, counts, fingerprint
+                )
+                or None
+            )
+
+        located = apply_to_channel_batch(db, channel_id, attempt)
+        if located is not None:
+            fields: dict = {"category_counts": counts}
+            if fingerprint:
+                fields[FINGERPRINT_FIELD] = fingerprint
+            update_channel_directory_entries({channel_id: fields})
+            logging.info(f"📊 成功寫入 category_counts → {channel_id}（位於 {located[0]}）")
+            return
 
         logging.warning(f"❗ 找不到符合的 channel_id：{channel_id}，無法寫入 category_counts")
 
@@ -0,0 +1,201 @@
+"""
+channel_index_batch 的程序內快照（頻道目錄）。
+
+多條路徑（頻道列表、熱力圖 metadata、trending 頻道資訊與活躍頻道、頻道詳情、
+每日刷新、個人設定）原本各自 stream 整個 channel_index_batch；這裡改為：
+- 整個 collection 讀一次，建立 channel_id / batch_id / 啟用狀態索引，所有讀取端共用
+- TTL 到期後重新讀取；本程序內新增頻道或變更啟用狀態後呼叫 invalidate_channel_directory()
+- 只改動單一頻道欄位的寫入（category_counts、active_time_all、名稱頭像）改呼叫
+  update_channel_directory_entries()：以 copy-on-write 換掉該頻道的 entry，快照不必重新讀取
+- 其他 instance 的寫入由 TTL 兜底（最長延遲 _DIRECTORY_TTL 秒）
+
+快照內的 entry 與其他讀取端共用，請勿修改；需要寫入時請在 transaction 內重新讀取文件。
+"""
+
+import logging
+import threading
+import time
+from collections.abc import Mapping, Sequence
+from types import MappingProxyType
+from typing import Any
+
+from google.cloud.firestore import Client
+
+logger = logging.getLogger(__name__)
+
+COLLECTION = "channel_index_batch"
+_DIRECTORY_TTL = 300  # 秒
+
+
+class ChannelDirectory:
+    """channel_index_batch 單次讀取的唯讀快照"""
+
+    __slots__ = ("batches", "entries", "by_channel", "batch_of", "enabled_ids", "disabled_ids")
+
+    def __init__(self, batches: Sequence[tuple[str, Sequence[dict[str, Any]]]]):
+        # 與 stream 順序相同：[(batch_id, [entry, ...]), ...]
+        self.batches = tuple((batch_id, tuple(channels)) for batch_id, channels in batches)
+        self.entries: tuple[dict[str, Any], ...] = tuple(
+            entry for _, channels in self.batches for entry in channels
+        )
+
+        by_channel: dict[str, dict[str, Any]] = {}
+        batch_of: dict[str, str] = {}
+        enabled_ids: set[str] = set()
+        disabled_ids: set[str] = set()
+        for batch_id, channels in self.batches:
+            for entry in channels:
+                cid = entry.get("channel_id")
+                if not cid:
+                    continue
+                by_channel.setdefault(cid, entry)
+                batch_of.setdefault(cid, batch_id)
+                # enabled 欄位缺少時視為啟用；只有明確為 True 才算 enabled_ids
+                if entry.get("enabled") is True:
+                    enabled_ids.add(cid)
+                if not entry.get("enabled", True):
+                    disabled_ids.add(cid)
+
+        self.by_channel = MappingProxyType(by_channel)
+        self.batch_of = MappingProxyType(batch_of)
+        self.enabled_ids = frozenset(enabled_ids)
+        self.disabled_ids = frozenset(disabled_ids)
+
+    @property
+    def batch_ids(self) -> list[str]:
+        return [batch_id for batch_id, _ in self.batches]
+
+    def get(self, channel_id: str) -> dict[str, Any] | None:
+        return self.by_channel.get(channel_id)
+
+    def with_updates(self, updates: Mapping[str, Mapping[str, Any]]) -> "ChannelDirectory":
+        """
+        回傳套用 updates（channel_id → 欄位）後的新快照；只複製被更新的 entry，
+        其餘 entry 與原快照共用。沒有任何頻道在快照內時回傳 self。
+        """
+        # entry 是 dict，以 id 對應（同一頻道重複出現時只更新索引指向的那一筆）
+        targets = {id(self.by_channel[cid]): cid for cid in updates if cid in self.by_channel}
+        if not targets:
+            return self
+
+        batches: list[tuple[str, Sequence[dict[str, Any]]]] = []
+        for batch_id, channels in self.batches:
+            if any(id(entry) in targets for entry in channels):
+                channels = tuple(
+                    {**entry, **updates[targets[id(entry)]]} if id(entry) in targets else entry
+                    for entry in channels
+                )
+            batches.append((batch_id, channels))
+        return ChannelDirectory(batches)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+# 快照狀態：(db, 快照, 載入時間 monotonic)；讀寫皆需持有 _state_lock
+_state: tuple[Client, ChannelDirectory, float] | None = None
+_state_lock = threading.Lock()
+# 同一時間只讓一個執行緒讀取 Firestore，其餘等待同一份結果
+_load_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "invalidations": 0, "entry_updates": 0}
+
+
+def _load(db: Client) -> ChannelDirectory:
+    batches = []
+    for doc in db.collection(COLLECTION).stream():
+        data = doc.to_dict() or {}
+        batches.append((doc.id, data.get("channels", [])))
+    directory = ChannelDirectory(batches)
+    logger.info(
+        "🗂️ 載入 channel_index_batch 快照：%d 個 batch、%d 個頻道", len(batches), len(directory)
+    )
+    return directory
+
+
+def _cached(db: Client, max_age: float) -> ChannelDirectory | None:
+    with _state_lock:
+        if _state is None:
+            return None
+        cached_db, directory, loaded_at = _state
+        if cached_db is not db or time.monotonic() - loaded_at >= max_age:
+            return None
+        _stats["hits"] += 1
+        return directory
+
+
+def get_channel_directory(
+    db: Client, force_refresh: bool = False, max_age: float | None = None
+) -> ChannelDirectory:
+    """
+    取得 channel_index_batch 快照；快取有效時不讀取 Firestore。
+    max_age 指定時以它取代 TTL（例如查無頻道時，只在快照超過 max_age 秒才重新讀取）。
+    讀取失敗時丟出原本的 Firestore 例外（由呼叫端沿用既有的錯誤處理）。
+    """
+    global _state
+    age_limit = _DIRECTORY_TTL if max_age is None else max_age
+    if not force_refresh and (directory := _cached(db, age_limit)) is not None:
+        return directory
+
+    with _load_lock:
+        # 等待期間其他執行緒可能已載入完成
+        if not force_refresh and (directory := _cached(db, age_limit)) is not None:
+            return directory
+
+        directory = _load(db)
+        with _state_lock:
+            _stats["misses"] += 1
+            _state = (db, directory, time.monotonic())
+        return directory
+
+
+def invalidate_channel_directory() -> None:
+    """寫入 channel_index_batch 後呼叫，下一次讀取會重新載入"""
+    global _state
+    with _state_lock:
+        if _state is not None:
+            _stats["invalidations"] += 1
+        _state = None
+
+
+def update_channel_directory_entries(updates: Mapping[str, Mapping[str, Any]]) -> None:
+    """
+    寫入 channel_index_batch 中個別頻道的欄位後呼叫，把新值套用到目前的快照。
+    快照未載入或頻道不在快照內時略過（下次載入即為最新）；快照的載入時間不變，
+    其他 instance 的寫入仍由 TTL 兜底。
+    """
+    global _state
+    with _state_lock:
+        if _state is None:
+            return
+        db, directory, loaded_at = _state
+        updated = directory.with_updates(updates)
+        if updated is not directory:
+            _stats["entry_updates"] += 1
+            _state = (db, updated, loaded_at)
+
+
+def get_channel_directory_stats() -> dict[str, Any]:
+    """回傳快照的命中統計與目前狀態"""
+    with _state_lock:
+        stats: dict[str, Any] = dict(_stats)
+        if _state is None:
+            stats.update({"loaded": False, "age_seconds": None, "channels": 0})
+        else:
+            _, directory, loaded_at = _state
+            stats.update(
+                {
+                    "loaded": True,
+                    "age_seconds": round(time.monotonic() - loaded_at, 1),
+                    "channels": len(directory),
+                }
+            )
+        return stats
+
+
+def reset_channel_directory() -> None:
+    """清除快照與統計（主要供測試使用）"""
+    global _state
+    with _state_lock:
+        _state = None
+        for key in _stats:
+            _stats[key] = 0
@@ -4,6 +4,7 @@ import re
 from google.api_core.exceptions import GoogleAPIError
 from google.cloud import firestore
 
+from services.firestore.sync_time_index import load_sync_index
 from utils.breaker_instances import firestore_breaker
 
 
@@ -13,32 +14,30 @@ def load_all_channels_from_index_list(db: firestore.Client) -> list[dict]:
         return []
 
     try:
-        ref = db.collection("channel_sync_index").document("index_list")
-        doc = ref.get()
-        if not doc.exists:  # type: ignore[union-attr]
-            logging.warning("⚠️ index_list 文件不存在")
-            return []
-
-        data = doc.to_dict() or {}  # type: ignore[union-attr]
-        channels = data.get("channels", [])
-        logging.info(f"📥 從 index_list 載入 {len(channels)} 個頻道")
+        channels = load_sync_index(db).channels
+        if not channels:
+            logging.warning("⚠️ 同步索引沒有任何頻道")
+        logging.info(f"📥 從同步索引載入 {len(channels)} 個頻道")
         firestore_breaker.record_success()
-        return channels  # type: ignore[no-any-return]
+        return channels
 
     except GoogleAPIError as e:
         firestore_breaker.record_failure()
-        logging.error(f"🔥 無法讀取 channel_sync_index/index_list：{e}")
+        logging.error(f"🔥 無法讀取同步索引：{e}")
         return []
 
 
-def load_videos_for_channel(db: firestore.Client, channel_id) -> list[dict]:
+def load_videos_for_channel(
+    db: firestore.Client, channel_id, timeout: float | None = None
+) -> list[dict]:
     if not firestore_breaker.allow_request():
         logging.warning("🔴 Firestore 熔斷中，略過載入影片：%s", channel_id)
         return []
 
     try:
         collection_ref = db.collection(f"channel_data/{channel_id}/videos_batch")
-        batch_docs = collection_ref.stream()
+        # timeout 涵蓋整個串流讀取，呼叫端放棄等待後執行緒不會一直卡住
+        batch_docs = collection_ref.stream(timeout=timeout)
 
         batch_list = []
         for doc in batch_docs:
@@ -0,0 +1,156 @@
+"""
+channel_id → channel_index_batch 文件的定位表。
+
+寫入端（active_time / category_counts / 個人設定 / 名稱頭像同步）原本要列出所有 batch，
+再逐一開 transaction 讀整份 1000 筆的 channels 陣列直到找到頻道。
+定位表讓寫入端直接打開正確的 batch，只需一次 transaction。
+
+- 持久化於 Firestore：channel_index_locator/batch_map
+    {"channels": {channel_id: batch_id}, "updatedAt": SERVER_TIMESTAMP}
+- 程序內快取整張表；查不到或定位過期（transaction 在該 batch 找不到頻道）時，
+  以 channel_index_batch 快照重新定位並回寫，定位表因此會自我修復
+- 重新定位只在快照超過 _RELOCATE_MIN_AGE 秒時才重新讀取整個 collection；
+  快照內也沒有的頻道記入短期的查無快取，_UNKNOWN_TTL 內不再重新定位
+  （其他 instance 剛新增的頻道最長延遲約 _RELOCATE_MIN_AGE + _UNKNOWN_TTL 秒才找得到）
+- 新增頻道（append_channel_to_batch）、遷移工具、一致性檢查工具負責維護
+"""
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+from google.cloud import firestore
+from google.cloud.firestore import Client
+
+from services.firestore.channel_directory import get_channel_directory
+
+logger = logging.getLogger(__name__)
+
+LOCATOR_DOC_PATH = "channel_index_locator/batch_map"
+_LOCATOR_TTL = 600  # 秒；其他 instance 新增頻道時由 TTL 與自我修復兜底
+_RELOCATE_MIN_AGE = 30  # 秒；重新定位時快照比這更新就直接使用
+_UNKNOWN_TTL = 60  # 秒；查無頻道的快取時間
+
+# (db, {channel_id: batch_id}, 載入時間 monotonic)
+_locator: tuple[Client, dict[str, str], float] | None = None
+_locator_lock = threading.Lock()
+# 查無頻道：channel_id -> 到期時間 monotonic；讀寫皆需持有 _locator_lock
+_unknown: dict[str, float] = {}
+
+
+def _load_locator(db: Client) -> dict[str, str]:
+    snapshot = db.document(LOCATOR_DOC_PATH).get()
+    data = (snapshot.to_dict() or {}) if snapshot.exists else {}
+    channels = data.get("channels")
+    if not isinstance(channels, dict):
+        return {}
+    return {cid: bid for cid, bid in channels.items() if isinstance(bid, str)}
+
+
+def get_channel_locator(db: Client) -> dict[str, str]:
+    """取得整張定位表（程序內快取，請勿修改回傳的 dict）"""
+    global _locator
+    with _locator_lock:
+        if _locator is not None:
+            cached_db, mapping, loaded_at = _locator
+            if cached_db is db and time.monotonic() - loaded_at < _LOCATOR_TTL:
+                return mapping
+
+    mapping = _load_locator(db)
+    if not mapping:
+        # 定位表尚未建立：以 channel_index_batch 快照初始化一次
+        mapping = dict(get_channel_directory(db).batch_of)
+        if mapping:
+            rebuild_channel_locator(db, mapping)
+    with _locator_lock:
+        _locator = (db, mapping, time.monotonic())
+    return mapping
+
+
+def record_channel_batch(db: Client, channel_id: str, batch_id: str) -> None:
+    """記錄單一頻道所在的 batch（merge 寫入，不影響其他頻道）"""
+    global _locator
+    db.document(LOCATOR_DOC_PATH).set(
+        {"channels": {channel_id: batch_id}, "updatedAt": firestore.SERVER_TIMESTAMP},
+        merge=True,
+    )
+    with _locator_lock:
+        if _locator is not None and _locator[0] is db:
+            # 複製後替換，正在讀取舊表的呼叫端不受影響
+            cached_db, mapping, loaded_at = _locator
+            _locator = (cached_db, {**mapping, channel_id: batch_id}, loaded_at)
+        _unknown.pop(channel_id, None)
+
+
+def rebuild_channel_locator(db: Client, batch_map: dict[str, str]) -> None:
+    """以完整的 channel_id → batch_id 對照表覆寫定位表（遷移 / 一致性工具使用）"""
+    global _locator
+    db.document(LOCATOR_DOC_PATH).set(
+        {"channels": dict(batch_map), "updatedAt": firestore.SERVER_TIMESTAMP}
+    )
+    with _locator_lock:
+        _locator = (db, dict(batch_map), time.monotonic())
+    logger.info("🧭 重建頻道定位表，共 %d 筆", len(batch_map))
+
+
+def locate_channel_batch(db: Client, channel_id: str) -> str | None:
+    """
+    回傳頻道所在的 batch_id：先查定位表，查不到時以最新的 channel_index_batch 快照定位並回寫。
+    兩者都找不到時回傳 None。
+    """
+    batch_id = get_channel_locator(db).get(channel_id)
+    if batch_id is not None:
+        return batch_id
+    return _relocate(db, channel_id, stale=None)
+
+
+def _relocate(db: Client, channel_id: str, stale: str | None) -> str | None:
+    now = time.monotonic()
+    with _locator_lock:
+        if _unknown.get(channel_id, 0) > now:
+            return None
+
+    directory = get_channel_directory(db, max_age=_RELOCATE_MIN_AGE)
+    batch_id = directory.batch_of.get(channel_id)
+    if batch_id is None:
+        with _locator_lock:
+            _unknown[channel_id] = now + _UNKNOWN_TTL
+        return None
+    if batch_id == stale:
+        return None
+    logger.info("🧭 更新頻道定位：%s → %s", channel_id, batch_id)
+    record_channel_batch(db, channel_id, batch_id)
+    return batch_id
+
+
+def apply_to_channel_batch(
+    db: Client, channel_id: str, attempt: Callable[[str], Any]
+) -> tuple[str, Any] | None:
+    """
+    對頻道所在的 batch 執行 attempt(batch_id)；attempt 回傳 None 代表該 batch 內沒有此頻道。
+    定位過期時重新定位後再試一次。回傳 (batch_id, attempt 結果)，找不到頻道時回傳 None。
+    """
+    batch_id = locate_channel_batch(db, channel_id)
+    if batch_id is None:
+        return None
+
+    result = attempt(batch_id)
+    if result is not None:
+        return batch_id, result
+
+    logger.warning("⚠️ 頻道定位過期：%s 不在 %s，重新定位", channel_id, batch_id)
+    relocated = _relocate(db, channel_id, stale=batch_id)
+    if relocated is None:
+        return None
+    result = attempt(relocated)
+    return (relocated, result) if result is not None else None
+
+
+def reset_channel_locator() -> None:
+    """清除程序內的定位表快取（主要供測試使用）"""
+    global _locator
+    with _locator_lock:
+        _locator = None
+        _unknown.clear()
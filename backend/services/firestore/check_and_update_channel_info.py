@@ -5,6 +5,7 @@ from google.cloud import firestore
 from google.cloud.firestore import Client
 from googleapiclient.errors import HttpError
 
+from services.firestore.channel_directory import update_channel_directory_entries
 from services.youtube.channel_info_fetcher import fetch_channel_basic_info
 
 logger = logging.getLogger(__name__)
@@ -28,8 +29,9 @@ def check_and_update_channel_info(db: Client, channel_id: str, batch_id: str) ->
         )
 
         # 使用 Transaction 確保讀寫一致性（batch write 僅保證原子寫入，不保證讀寫隔離）
+        # 回傳寫進 channel_index_batch 的欄位（未寫入時為空 dict）
         @firestore.transactional
-        def _update_in_transaction(transaction):
+        def _update_in_transaction(transaction) -> dict:
             index_doc = index_ref.get(transaction=transaction).to_dict() or {}  # type: ignore[union-attr]
             batch_doc = batch_ref.get(transaction=transaction).to_dict() or {}  # type: ignore[union-attr]
             info_doc = info_ref.get(transaction=transaction).to_dict() or {}
@@ -48,18 +50,19 @@ def check_and_update_channel_info(db: Client, channel_id: str, batch_id: str) ->
 
             if not (name_changed or thumbnail_changed):
                 logger.info(f"🔍 頻道 {channel_id} 無名稱或頭像變更")
-                return
+                return {}
 
+            changes = {}
             if name_changed:
                 index_doc["name"] = new_name
-                if batch_entry is not None:
-                    batch_entry["name"] = new_name
+                changes["name"] = new_name
                 info_doc["name"] = new_name
             if thumbnail_changed:
                 index_doc["thumbnail"] = new_thumbnail
-                if batch_entry is not None:
-                    batch_entry["thumbnail"] = new_thumbnail
+                changes["thumbnail"] = new_thumbnail
                 info_doc["thumbnail"] = new_thumbnail
+            if batch_entry is not None:
+                batch_entry.update(changes)
 
             transaction.set(index_ref, index_doc)
             transaction.set(info_ref, info_doc)
@@ -71,9 +74,12 @@ def check_and_update_channel_info(db: Client, channel_id: str, batch_id: str) ->
                 f"    - 名稱：原「{old_name}」→ 新「{new_name}」\n"
                 f"    - 頭像：原「{old_thumbnail}」→ 新「{new_thumbnail}」"
             )
+            return changes if batch_entry is not None else {}
 
         transaction = db.transaction()
-        _update_in_transaction(transaction)
+        changes = _update_in_transaction(transaction)
+        if changes:
+            update_channel_directory_entries({channel_id: changes})
 
     except (HttpError, GoogleAPIError) as e:
         logger.warning(f"⚠️ 頻道 {channel_id} 同步名稱與頭像失敗：{e}", exc_info=True)
@@ -0,0 +1,163 @@
+import hashlib
+import logging
+import threading
+from typing import Any
+
+from cachetools import TTLCache
+from google.api_core.exceptions import GoogleAPIError
+from google.cloud import firestore
+from google.cloud.firestore import Client
+
+from utils.breaker_instances import firestore_breaker
+from utils.categorizer import ClassificationResult
+
+logger = logging.getLogger(__name__)
+
+# 分類結果與 videos_batch 一對一存放於同名文件：
+#   channel_data/{channel_id}/videos_classified/{batch_id}
+#   {
+#     "fingerprint": str,                  # 產生這批結果的 settings 指紋
+#     "videos": {videoId: {"sig": ..., "matchedCategories": ..., ...}},
+#     "updatedAt": SERVER_TIMESTAMP,
+#   }
+CLASSIFIED_COLLECTION = "videos_classified"
+
+# 已讀取的分類結果：channel_id → (fingerprint, {batch_id: {videoId: entry}})
+# entry 以指紋 + sig 驗證，快取落後於其他 instance 的寫入時只會多重新分類幾部，不會回傳錯誤結果
+_ENTRIES_CACHE_SIZE = 256
+_ENTRIES_CACHE_TTL = 600
+_entries_cache: TTLCache = TTLCache(maxsize=_ENTRIES_CACHE_SIZE, ttl=_ENTRIES_CACHE_TTL)
+
+# 待回寫：(channel_id, batch_id) → (db, fingerprint, videos)；同一 batch 重複排入時只寫最新一份
+_pending_writes: dict[tuple[str, str], tuple[Client, str, dict[str, dict]]] = {}
+_writer_idle = threading.Event()
+_writer_idle.set()
+_state_lock = threading.Lock()
+
+
+def video_signature(title: str, video_type: str) -> str:
+    """標題或類型變動（影片被覆寫）時，對應的分類結果即視為過期"""
+    return hashlib.sha1(f"{video_type}\x1f{title}".encode()).hexdigest()[:10]
+
+
+def result_to_entry(signature: str, result: ClassificationResult) -> dict[str, Any]:
+    return {
+        "sig": signature,
+        "matchedCategories": result.matched_categories,
+        "game": result.game,
+        "matchedKeywords": result.matched_keywords,
+        "matchedPairs": result.matched_pairs,
+    }
+
+
+def load_classified_entries(
+    db: Client, channel_id: str, fingerprint: str, batch_ids: list[str] | None = None
+) -> dict[str, dict]:
+    """
+    讀取頻道已持久化的分類結果。
+    只回傳指紋與目前設定相符的文件：{batch_id: {videoId: entry}}（呼叫端不可修改）
+    - 程序內快取的指紋相符時直接回傳，不讀 Firestore
+    - 指定 batch_ids 時只以 get_all 讀取這些文件，否則 stream 整個 collection
+    """
+    with _state_lock:
+        cached = _entries_cache.get(channel_id)
+    if cached is not None and cached[0] == fingerprint:
+        return cached[1]  # type: ignore[no-any-return]
+
+    col = db.collection("channel_data").document(channel_id).collection(CLASSIFIED_COLLECTION)
+    if batch_ids is None:
+        docs = col.stream()
+    else:
+        docs = db.get_all([col.document(batch_id) for batch_id in batch_ids])
+    entries: dict[str, dict] = {}
+    for doc in docs:
+        data = (doc.to_dict() or {}) if doc.exists else {}
+        videos = data.get("videos")
+        if data.get("fingerprint") == fingerprint and isinstance(videos, dict):
+            entries[doc.id] = videos
+
+    with _state_lock:
+        _entries_cache[channel_id] = (fingerprint, entries)
+    return entries
+
+
+def schedule_classified_writes(
+    db: Client, channel_id: str, fingerprint: str, batches: dict[str, dict[str, dict]]
+) -> None:
+    """
+    排入分類結果回寫（{batch_id: 整份 videos}），由背景執行緒寫入 Firestore，不阻塞呼叫端。
+    程序內快取立即更新，之後的讀取直接沿用；回寫失敗時下次快取過期後重新分類即可。
+    Cloud Run 在回應後可能限制 CPU，回寫時間點不保證，僅作為快取使用。
+    """
+    with _state_lock:
+        cached = _entries_cache.get(channel_id)
+        entries = dict(cached[1]) if cached is not None and cached[0] == fingerprint else {}
+        entries.update(batches)
+        _entries_cache[channel_id] = (fingerprint, entries)
+
+        for batch_id, videos in batches.items():
+            _pending_writes[(channel_id, batch_id)] = (db, fingerprint, videos)
+        start_writer = _writer_idle.is_set()
+        _writer_idle.clear()
+
+    if start_writer:
+        threading.Thread(
+            target=_drain_pending_writes, name="classified-writeback", daemon=True
+        ).start()
+
+
+def _drain_pending_writes() -> None:
+    while True:
+        with _state_lock:
+            if not _pending_writes:
+                _writer_idle.set()
+                return
+            (channel_id, batch_id), (db, fingerprint, videos) = _pending_writes.popitem()
+        try:
+            write_classified_entries(db, channel_id, batch_id, fingerprint, videos)
+        except Exception:
+            logger.error(
+                "🔥 分類結果背景回寫發生未預期錯誤：%s/%s", channel_id, batch_id, exc_info=True
+            )
+
+
+def wait_for_classified_writes(timeout: float | None = None) -> bool:
+    """等待背景回寫完成（主要供測試使用）；逾時回傳 False"""
+    return _writer_idle.wait(timeout)
+
+
+def reset_classification_store() -> None:
+    """清除分類結果快取與尚未寫入的回寫（主要供測試使用）"""
+    with _state_lock:
+        _entries_cache.clear()
+        _pending_writes.clear()
+
+
+def write_classified_entries(
+    db: Client, channel_id: str, batch_id: str, fingerprint: str, videos: dict[str, dict]
+) -> bool:
+    """整份覆寫單一 batch 的分類結果；失敗不拋出，僅記錄（下次讀取時會重新分類）"""
+    if not firestore_breaker.allow_request():
+        logger.warning("🔴 Firestore 熔斷中，略過分類結果回寫：%s/%s", channel_id, batch_id)
+        return False
+
+    try:
+        doc_ref = (
+            db.collection("channel_data")
+            .document(channel_id)
+            .collection(CLASSIFIED_COLLECTION)
+            .document(batch_id)
+        )
+        doc_ref.set(
+            {
+                "fingerprint": fingerprint,
+                "videos": videos,
+                "updatedAt": firestore.SERVER_TIMESTAMP,
+            }
+        )
+        firestore_breaker.record_success()
+        return True
+    except GoogleAPIError as e:
+        firestore_breaker.record_failure()
+        logger.warning("⚠️ 分類結果回寫失敗：%s/%s：%s", channel_id, batch_id, e)
+        return False
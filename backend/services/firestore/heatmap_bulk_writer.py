@@ -0,0 +1,113 @@
+"""
+全頻道 heatmap 同步的輸出階段。
+
+analyze_and_update_all_channels 原本每個頻道各自 doc_ref.set heat_map，
+再各開一次 active_time transaction；這裡改為先收集，再統一提交：
+- heat_map 主文件（168 格 counts）與影片 ID 明細文件經 BulkWriter 送出（限制送出速率、失敗自動重試），
+  每 flush_every 個頻道 flush 一次，待送出的寫入數量有上限
+- active_time_all 依所在的 channel_index_batch 分組，每份 batch 文件一次 transaction
+"""
+
+import logging
+import threading
+from datetime import datetime
+
+from google.cloud.firestore import Client
+from google.cloud.firestore_v1.bulk_writer import BulkWriteFailure, BulkWriter, BulkWriterOptions
+
+from services.firestore.active_time_writer import (
+    build_active_time_stat,
+    write_active_time_for_channels,
+)
+from services.firestore.heatmap_writer import (
+    build_heatmap_documents,
+    heatmap_detail_ref,
+    heatmap_doc_ref,
+)
+
+logger = logging.getLogger(__name__)
+
+FLUSH_EVERY = 100  # 每累積幾個頻道 flush 一次
+MAX_WRITE_ATTEMPTS = 5
+MAX_OPS_PER_SECOND = 500
+
+
+class HeatmapBulkWriter:
+    """收集每個頻道的 heat_map 與 active_time 統計，批次寫入 Firestore"""
+
+    def __init__(
+        self,
+        db: Client,
+        flush_every: int = FLUSH_EVERY,
+        max_attempts: int = MAX_WRITE_ATTEMPTS,
+        max_ops_per_second: int = MAX_OPS_PER_SECOND,
+    ):
+        self._db = db
+        self._flush_every = flush_every
+        self._max_attempts = max_attempts
+        self._bulk: BulkWriter = db.bulk_writer(
+            options=BulkWriterOptions(
+                initial_ops_per_second=max_ops_per_second,
+                max_ops_per_second=max_ops_per_second,
+            )
+        )
+        self._bulk.on_write_error(self._on_write_error)
+        self._channel_of_path: dict[str, str] = {}
+        self._active_time: dict[str, dict] = {}
+        self._queued = 0
+        # BulkWriter 的回呼在背景執行緒執行
+        self._failed_lock = threading.Lock()
+        self._failed: set[str] = set()
+
+    def _on_write_error(self, failure: BulkWriteFailure, _bulk: BulkWriter) -> bool:
+        path = failure.operation.reference.path  # type: ignore[attr-defined]
+        if failure.attempts < self._max_attempts:
+            logger.warning(
+                "🔁 heat_map 寫入失敗，重試第 %d 次：%s（%s）",
+                failure.attempts,
+                path,
+                failure.message,
+            )
+            return True
+        logger.error("🔥 heat_map 寫入失敗，放棄：%s（%s）", path, failure.message)
+        with self._failed_lock:
+            self._failed.add(self._channel_of_path.get(path, path))
+        return False
+
+    def add(
+        self,
+        channel_id: str,
+        full_matrix: dict[str, list[list]],
+        full_count: int,
+        slot_counter: list[int],
+        updated_at: datetime,
+    ) -> None:
+        summary, detail = build_heatmap_documents(full_matrix, full_count, updated_at)
+        for ref, data in (
+            (heatmap_doc_ref(self._db, channel_id), summary),
+            (heatmap_detail_ref(self._db, channel_id), detail),
+        ):
+            self._channel_of_path[ref.path] = channel_id
+            self._bulk.set(ref, data)
+        self._active_time[channel_id] = build_active_time_stat(slot_counter, full_count, updated_at)
+
+        self._queued += 1
+        if self._queued % self._flush_every == 0:
+            self._bulk.flush()
+
+    def close(self) -> dict[str, list[str]]:
+        """送出所有待寫入資料；回傳 heat_map 與 active_time 各自寫入失敗的 channel_id"""
+        self._bulk.close()
+        active_time_failed = (
+            write_active_time_for_channels(self._db, self._active_time) if self._active_time else []
+        )
+        with self._failed_lock:
+            heatmap_failed = sorted(self._failed)
+        logger.info(
+            "📦 批次寫入完成：heat_map %d 筆（失敗 %d）、active_time %d 筆（失敗 %d）",
+            self._queued,
+            len(heatmap_failed),
+            len(self._active_time),
+            len(active_time_failed),
+        )
+        return {"heatmap": heatmap_failed, "active_time": active_time_failed}
@@ -4,6 +4,11 @@ from datetime import UTC, datetime
 
 from google.api_core.exceptions import GoogleAPIError
 from google.cloud import firestore
+from google.cloud.firestore_v1.field_path import FieldPath
+
+from services.heatmap.utils import COUNT_CELLS, count_index, matrix_to_counts
+
+DETAIL_DOC_ID = "channel_video_heatmap_ids"
 
 
 def is_channel_heatmap_initialized(db: firestore.Client, channel_id: str) -> bool:
@@ -45,6 +50,36 @@ def convert_to_nested_map(matrix) -> dict[str, dict[str, list[str]]]:
     }
 
 
+def heatmap_doc_ref(db, channel_id: str):
+    # path 為合法的 4 段（collection/document/collection/document）
+    return db.document(f"channel_data/{channel_id}/heat_map/channel_video_heatmap")
+
+
+def heatmap_detail_ref(db, channel_id: str):
+    """影片 ID 明細文件（僅 hover 明細與增量更新需要）"""
+    return db.document(f"channel_data/{channel_id}/heat_map/{DETAIL_DOC_ID}")
+
+
+def build_heatmap_documents(
+    full_matrix, full_count: int, updated_at: datetime
+) -> tuple[dict, dict]:
+    """
+    組出 heat_map 主文件與明細文件：
+    - 主文件 all_range 只存 168 格影片數（counts），讀取端不必下載影片 ID
+    - 明細文件存每格的影片 ID 清單（matrix）
+    """
+    matrix = convert_to_nested_map(full_matrix)
+    summary = {
+        "all_range": {
+            "counts": matrix_to_counts(matrix),
+            "totalCount": full_count,
+            "updatedAt": updated_at,
+        }
+    }
+    detail = {"matrix": matrix, "updatedAt": updated_at}
+    return summary, detail
+
+
 def write_channel_heatmap_result(
     db,
     channel_id,
@@ -53,19 +88,12 @@ def write_channel_heatmap_result(
     slot_counter=None,  # 仍保留此參數供其他模組使用（但本函式中不處理）
 ) -> None:
     try:
-        # 將 path 修正為合法的 4 段（collection/document/collection/document）
-        doc_ref = db.document(f"channel_data/{channel_id}/heat_map/channel_video_heatmap")
-        update_data = {}
+        update_data: dict = {}
+        detail_data: dict = {}
         now = datetime.now(UTC)
 
         if full_matrix is not None and full_count is not None:
-            update_data = {
-                "all_range": {  # ✅ 改為欄位 key，而非 Firestore path
-                    "matrix": convert_to_nested_map(full_matrix),
-                    "totalCount": full_count,
-                    "updatedAt": now,
-                }
-            }
+            update_data, detail_data = build_heatmap_documents(full_matrix, full_count, now)
             logging.debug(f"📦 準備寫入 all_range：影片數={full_count}")
 
         if not update_data:
@@ -88,9 +116,90 @@ def write_channel_heatmap_result(
             f"📤 寫入前資料內容（{channel_id}）：\n{json.dumps(serialized, ensure_ascii=False, indent=2)}"
         )
 
-        # 覆蓋寫入整個 document
-        doc_ref.set(update_data)
+        # 主文件與明細文件一起覆蓋寫入（舊格式主文件內的 matrix 會一併移除）
+        batch = db.batch()
+        batch.set(heatmap_doc_ref(db, channel_id), update_data)
+        batch.set(heatmap_detail_ref(db, channel_id), detail_data)
+        batch.commit()
         logging.info(f"✅ 寫入成功：{channel_id}（欄位數：{len(update_data)}）")
 
     except GoogleAPIError as e:
         logging.error(f"🔥 寫入 {channel_id} 統計資料失敗：{e}")
+
+
+def apply_heatmap_increment(
+    db,
+    channel_id: str,
+    added: list[tuple[str, str, int]],
+    removed: list[tuple[str, str, int]],
+) -> tuple[list[int], int] | None:
+    """
+    將新寫入的影片增量套用到已初始化的 heat_map（只更新有變動的格子）。
+    added / removed 為 (video_id, 星期 key, 小時)；先移除被覆寫的舊版本再加入新版本，
+    每格的 video_id 清單確保重複套用不會重複計數。
+
+    回傳：
+        (四時段差值, totalCount 差值)；heat_map 尚未初始化（無 all_range）時回傳 None
+    """
+    doc_ref = heatmap_doc_ref(db, channel_id)
+    detail_ref = heatmap_detail_ref(db, channel_id)
+
+    @firestore.transactional
+    def _apply_in_transaction(transaction):
+        doc = doc_ref.get(transaction=transaction)
+        all_range = ((doc.to_dict() or {}).get("all_range") if doc.exists else None) or {}
+        counts = all_range.get("counts")
+        if not isinstance(counts, list) or len(counts) != COUNT_CELLS:
+            # 未初始化或舊格式（matrix 仍在主文件內）：交由完整重算轉為新格式
+            return None
+        detail = detail_ref.get(transaction=transaction)
+        if not detail.exists:
+            return None
+
+        matrix = (detail.to_dict() or {}).get("matrix", {})
+        counts = list(counts)
+        cells: dict[tuple[str, str], list[str]] = {}
+        slot_delta = [0, 0, 0, 0]
+
+        def cell(day: str, hour: int) -> list[str]:
+            key = (day, str(hour))
+            if key not in cells:
+                cells[key] = list(matrix.get(day, {}).get(str(hour), []))
+            return cells[key]
+
+        for video_id, day, hour in removed:
+            ids = cell(day, hour)
+            if video_id in ids:
+                ids.remove(video_id)
+                counts[count_index(day, hour)] -= 1
+                slot_delta[hour // 6] -= 1
+        for video_id, day, hour in added:
+            ids = cell(day, hour)
+            if video_id not in ids:
+                ids.append(video_id)
+                counts[count_index(day, hour)] += 1
+                slot_delta[hour // 6] += 1
+
+        count_delta = sum(slot_delta)
+        changed = {
+            FieldPath("matrix", day, hour).to_api_repr(): ids
+            for (day, hour), ids in cells.items()
+            if ids != matrix.get(day, {}).get(hour, [])
+        }
+        if changed:
+            now = datetime.now(UTC)
+            transaction.update(detail_ref, {**changed, "updatedAt": now})
+            transaction.update(
+                doc_ref,
+                {
+                    "all_range.counts": counts,
+                    "all_range.totalCount": all_range.get("totalCount", 0) + count_delta,
+                    "all_range.updatedAt": now,
+                },
+            )
+        return slot_delta, count_delta
+
+    result = _apply_in_transaction(db.transaction())
+    if result is not None:
+        logging.info(f"🧮 增量更新 heat_map：{channel_id}（totalCount {result[1]:+d}）")
+    return result  # type: ignore[no-any-return]
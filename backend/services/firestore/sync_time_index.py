@@ -1,31 +1,170 @@
+"""
+頻道同步狀態（lastCheckedAt / lastVideoSyncAt）。
+
+原本所有頻道的同步狀態都放在 channel_sync_index/index_list 一份文件內，
+check-update、影片同步、每日刷新都要改寫整份文件，頻道數一多就成為寫入熱點，
+transaction 互相衝突，也逐漸逼近 1 MB 文件上限。現改為：
+- 每個頻道一份小文件：channel_sync_state/{channel_id}
+    {"channel_id", "lastCheckedAt", "lastVideoSyncAt", "updatedAt": SERVER_TIMESTAMP}
+  所有寫入只更新該頻道自己的文件；updatedAt 為 Firestore 的 commit 時間，不受寫入端時鐘影響
+- channel_sync_index/index_list 保留為列表讀取端使用的彙總檢視
+    {"channels": [...], "builtAt": 讀取開始時間（Timestamp）}
+  讀取時以「彙總文件 + updatedAt > builtAt − _QUERY_OVERLAP 的頻道文件」合併，彙總過期也不會讀到舊值；
+  每日刷新結束時呼叫 compact_sync_index() 把合併結果寫回，讓差異查詢維持很小
+- 差異查詢沒看到的寫入，commit 時間一定晚於該次查詢，也就晚於 builtAt（讀取前記錄的時間）；
+  重疊區間吸收本機時鐘與 Firestore 的誤差，重複合併同一份頻道文件不影響結果
+- builtAt 為舊格式（ISO 字串）或不存在時讀取全部頻道文件，舊版寫入的字串 updatedAt 也一併合併
+- 尚未建立頻道文件的舊資料回退讀取彙總文件；首次寫入時以彙總文件內的舊資料建立頻道文件，
+  之後只讀頻道文件也不會遺失未寫入的欄位
+"""
+
 import logging
-from datetime import datetime
+from datetime import UTC, datetime, timedelta
+from typing import Any, NamedTuple
 
 from dateutil.parser import parse
-from google.api_core.exceptions import GoogleAPIError
+from google.api_core.exceptions import AlreadyExists, GoogleAPIError, NotFound
 from google.cloud import firestore
 from google.cloud.firestore import Client
 
 logger = logging.getLogger(__name__)
 
+INDEX_COLLECTION = "channel_sync_index"
+INDEX_DOCUMENT = "index_list"
+STATE_COLLECTION = "channel_sync_state"
+# 差異查詢往前多看的時間：涵蓋 builtAt（本機時鐘）與 updatedAt（Firestore commit 時間）的誤差
+_QUERY_OVERLAP = timedelta(seconds=60)
+
+
+class SyncIndex(NamedTuple):
+    """彙總檢視：channels 依彙總文件順序，新頻道附加在後；as_of 為讀取開始時間"""
+
+    channels: list[dict[str, Any]]
+    as_of: datetime
+
+
+def _index_ref(db: Client):
+    return db.collection(INDEX_COLLECTION).document(INDEX_DOCUMENT)
+
+
+def _state_ref(db: Client, channel_id: str):
+    return db.collection(STATE_COLLECTION).document(channel_id)
+
+
+def parse_sync_time(raw: Any) -> datetime | None:
+    """lastVideoSyncAt 可能是 ISO 字串或 Firestore Timestamp"""
+    if isinstance(raw, str):
+        return parse(raw)
+    if hasattr(raw, "to_datetime"):
+        return raw.to_datetime()  # type: ignore[no-any-return]
+    return None
+
+
+def load_sync_index(db: Client) -> SyncIndex:
+    """
+    讀取彙總檢視：一次讀彙總文件，再查詢彙總之後有異動的頻道文件並合併。
+    彙總文件尚未含 builtAt，或 builtAt 為舊版的 ISO 字串時，讀取全部頻道文件合併。
+    讀取失敗時丟出原本的 Firestore 例外。
+    """
+    # 先記錄時間再讀取，讀取期間的異動會落在下一次的差異查詢內
+    as_of = datetime.now(UTC)
+    snapshot = _index_ref(db).get()
+    data = (snapshot.to_dict() or {}) if snapshot.exists else {}
+
+    channels = [dict(entry) for entry in data.get("channels", [])]
+    position = {entry.get("channel_id"): i for i, entry in enumerate(channels)}
+
+    built_at = data.get("builtAt")
+    states = db.collection(STATE_COLLECTION)
+    query = (
+        states.where("updatedAt", ">", built_at - _QUERY_OVERLAP)
+        if isinstance(built_at, datetime)
+        else states
+    )
+    changed = 0
+    for doc in query.stream():
+        state = doc.to_dict() or {}
+        channel_id = state.get("channel_id")
+        if not channel_id:
+            continue
+        state.pop("updatedAt", None)
+        if channel_id in position:
+            channels[position[channel_id]].update(state)
+        else:
+            position[channel_id] = len(channels)
+            channels.append(state)
+        changed += 1
+
+    logger.info("📥 同步索引：彙總 %d 個頻道，合併 %d 筆異動", len(channels), changed)
+    return SyncIndex(channels, as_of)
+
+
+def compact_sync_index(db: Client, index: SyncIndex) -> None:
+    """把合併後的檢視寫回彙總文件；builtAt 使用檢視的讀取時間，之後的異動仍由差異查詢補上"""
+    _index_ref(db).set(
+        {
+            "channels": [
+                {key: value for key, value in entry.items() if key != "updatedAt"}
+                for entry in index.channels
+            ],
+            "builtAt": index.as_of,
+            "updatedAt": firestore.SERVER_TIMESTAMP,
+        }
+    )
+    logger.info("📁 回寫同步索引彙總，共 %d 個頻道", len(index.channels))
+
+
+def _legacy_entry(db: Client, channel_id: str) -> dict[str, Any] | None:
+    """彙總文件內該頻道的舊資料"""
+    index_snapshot = _index_ref(db).get()
+    if not index_snapshot.exists:
+        return None
+    for entry in (index_snapshot.to_dict() or {}).get("channels", []):
+        if entry.get("channel_id") == channel_id:
+            return dict(entry)
+    return None
+
+
+def get_channel_sync_state(db: Client, channel_id: str) -> dict[str, Any] | None:
+    """
+    讀取單一頻道的同步狀態（一次小文件讀取）。
+    頻道文件不存在時回退至彙總文件內的舊資料（不含 updatedAt）；兩者皆無時回傳 None。
+    """
+    snapshot = _state_ref(db, channel_id).get()
+    if snapshot.exists:
+        return snapshot.to_dict() or {}
+    return _legacy_entry(db, channel_id)
+
+
+def record_channel_sync_state(db: Client, channel_id: str, fields: dict[str, Any]) -> None:
+    """
+    寫入單一頻道的同步狀態，不影響其他頻道。
+    頻道文件已存在時只更新 fields；不存在時以彙總文件的舊資料為底建立，
+    避免只寫入其中一個欄位後，另一個欄位不再回退讀取而遺失。
+    """
+    ref = _state_ref(db, channel_id)
+    data = {**fields, "channel_id": channel_id, "updatedAt": firestore.SERVER_TIMESTAMP}
+    try:
+        ref.update(data)
+        return
+    except NotFound:
+        pass
+
+    seed = _legacy_entry(db, channel_id) or {}
+    seed.pop("updatedAt", None)
+    try:
+        ref.create({**seed, **data})
+    except AlreadyExists:
+        # 其他請求已先建立頻道文件，只更新本次的欄位
+        ref.update(data)
+
 
 def get_last_video_sync_time(db: Client, channel_id: str) -> datetime | None:
     try:
-        index_ref = db.collection("channel_sync_index").document("index_list")
-        doc = index_ref.get()
-        if not doc.exists:  # type: ignore[union-attr]
+        state = get_channel_sync_state(db, channel_id)
+        if state is None:
             return None
-
-        data = doc.to_dict() or {}  # type: ignore[union-attr]
-        channels = data.get("channels", [])
-        for ch in channels:
-            if ch.get("channel_id") == channel_id:
-                raw_sync = ch.get("lastVideoSyncAt")
-                if isinstance(raw_sync, str):
-                    return parse(raw_sync)
-                elif hasattr(raw_sync, "to_datetime"):
-                    return raw_sync.to_datetime()  # type: ignore[no-any-return]
-        return None
+        return parse_sync_time(state.get("lastVideoSyncAt"))
 
     except GoogleAPIError as e:
         logger.error("🔥 無法讀取 lastVideoSyncAt (新版 index): %s", e, exc_info=True)
@@ -39,37 +178,7 @@ def update_last_sync_time(db: Client, channel_id: str, new_videos: list[dict]) -
 
     try:
         latest = max(v["snippet"]["publishedAt"] for v in new_videos)
-
-        index_ref = db.collection("channel_sync_index").document("index_list")
-
-        @firestore.transactional
-        def _update_in_transaction(transaction):
-            doc = index_ref.get(transaction=transaction)
-            if not doc.exists:  # type: ignore[union-attr]
-                transaction.set(
-                    index_ref,
-                    {"channels": [{"channel_id": channel_id, "lastVideoSyncAt": latest}]},
-                )
-                logger.info(f"🕒 [init] 建立 index_list 並加入 {channel_id}")
-            else:
-                data = doc.to_dict() or {}  # type: ignore[union-attr]
-                channels = data.get("channels", [])
-
-                found = False
-                for c in channels:
-                    if c.get("channel_id") == channel_id:
-                        c["lastVideoSyncAt"] = latest
-                        found = True
-                        break
-
-                if not found:
-                    channels.append({"channel_id": channel_id, "lastVideoSyncAt": latest})
-                    logger.info(f"➕ [append] 新增頻道 {channel_id} 至 index_list")
-
-                transaction.set(index_ref, {"channels": channels})
-
-        transaction = db.transaction()
-        _update_in_transaction(transaction)
+        record_channel_sync_state(db, channel_id, {"lastVideoSyncAt": latest})
 
         logger.info(f"🕒 更新 lastVideoSyncAt 為 {latest}")
         return latest  # type: ignore[no-any-return]
@@ -3,6 +3,8 @@ import logging
 from google.api_core.exceptions import GoogleAPIError
 from google.cloud import firestore
 
+from services.classified_video_fetcher import invalidate_merged_settings
+
 
 def load_category_settings(db: firestore.Client, channel_id: str) -> dict | None:
     doc_ref = (
@@ -23,6 +25,7 @@ def save_category_settings(db: firestore.Client, channel_id: str, settings: dict
             .document("config")
         )
         doc_ref.set(settings)  # 完整覆蓋設定
+        invalidate_merged_settings(channel_id)
         logging.info(f"✅ 成功儲存分類設定 - channel_id: {channel_id}")
         return True
     except GoogleAPIError:
@@ -3,6 +3,8 @@ import logging
 from google.api_core.exceptions import GoogleAPIError
 from google.cloud import firestore
 
+from services.firestore.channel_directory import get_channel_directory
+
 
 def build_channel_metadata_lookup(db: firestore.Client) -> dict:
     """
@@ -17,17 +19,14 @@ def build_channel_metadata_lookup(db: firestore.Client) -> dict:
     """
     lookup = {}
     try:
-        batch_docs = db.collection("channel_index_batch").stream()
-        for batch_doc in batch_docs:
-            data = batch_doc.to_dict() or {}
-            for entry in data.get("channels", []):
-                cid = entry.get("channel_id")
-                if cid:
-                    lookup[cid] = {
-                        "name": entry.get("name"),
-                        "thumbnail": entry.get("thumbnail"),
-                        "countryCode": entry.get("countryCode", []),
-                    }
+        for entry in get_channel_directory(db).entries:
+            cid = entry.get("channel_id")
+            if cid:
+                lookup[cid] = {
+                    "name": entry.get("name"),
+                    "thumbnail": entry.get("thumbnail"),
+                    "countryCode": entry.get("countryCode", []),
+                }
         logging.info(f"🧾 從 channel_index_batch 建立 metadata lookup，共 {len(lookup)} 筆")
     except GoogleAPIError as e:
         logging.error(f"🔥 無法讀取 channel_index_batch：{e}")
@@ -24,3 +24,45 @@ def convert_matrix_to_count(matrix) -> tuple[dict[str, dict[str, int]], int]:
             total += count
         result[day] = count_map
     return result, total
+
+
+HOURS_PER_DAY = 24
+COUNT_CELLS = len(DAY_KEYS) * HOURS_PER_DAY  # 168
+
+
+def count_index(day: str, hour: int) -> int:
+    """counts 陣列的位置：DAY_KEYS 順序（Sun 起）× 24 小時"""
+    return DAY_KEYS.index(day) * HOURS_PER_DAY + hour
+
+
+def matrix_to_counts(matrix) -> list[int]:
+    """
+    將影片 ID 矩陣壓縮為 168 個整數（day-major，DAY_KEYS × 0~23 時）
+
+    參數:
+        matrix: dict[day] -> dict[hour_str] -> list[str]，或 dict[day] -> list[list[str]]
+    """
+    counts = [0] * COUNT_CELLS
+    for day in DAY_KEYS:
+        hours = matrix.get(day, {})
+        items = hours.items() if isinstance(hours, dict) else enumerate(hours)
+        for hour, video_list in items:
+            counts[count_index(day, int(hour))] = len(video_list)
+    return counts
+
+
+def counts_to_active_time(counts: list[int]) -> tuple[dict[str, dict[str, int]], int]:
+    """168 個整數 → 與 convert_matrix_to_count 相同的 (active_time_dict, total_count)"""
+    result = {
+        day: {str(hour): counts[d * HOURS_PER_DAY + hour] for hour in range(HOURS_PER_DAY)}
+        for d, day in enumerate(DAY_KEYS)
+    }
+    return result, sum(counts)
+
+
+def read_active_time(all_range: dict) -> tuple[dict[str, dict[str, int]], int]:
+    """從 heat_map 的 all_range 取得每格影片數；優先使用 counts，舊格式才從 matrix 計算"""
+    counts = all_range.get("counts")
+    if isinstance(counts, list) and len(counts) == COUNT_CELLS:
+        return counts_to_active_time(counts)
+    return convert_matrix_to_count(all_range.get("matrix", {}))
@@ -1,17 +1,38 @@
 import logging
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from datetime import UTC, datetime
+from typing import Any
 
+from google.api_core.exceptions import GoogleAPIError
 from google.cloud import firestore
 
-from services.firestore.active_time_writer import write_active_time_all_to_channel_index_batch
+from services.firestore.active_time_writer import (
+    apply_active_time_delta,
+    write_active_time_all_to_channel_index_batch,
+)
 from services.firestore.channel_loader import (
     load_all_channels_from_index_list,
     load_videos_for_channel,
 )
-from services.firestore.heatmap_writer import write_channel_heatmap_result
+from services.firestore.heatmap_bulk_writer import HeatmapBulkWriter
+from services.firestore.heatmap_writer import (
+    apply_heatmap_increment,
+    write_channel_heatmap_result,
+)
+from utils.breaker_instances import firestore_breaker
+from utils.circuit_breaker import CircuitOpenError, CircuitState
 from utils.datetime_utils import get_taiwan_datetime_from_publish, is_within_last_7_days
 
 WEEKDAY_KEYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+DEFAULT_SYNC_WORKERS = 8
+DEFAULT_CHANNEL_TIMEOUT = 60.0  # 秒；單一頻道載入與統計的上限
+DEFAULT_BREAKER_PAUSE = 120.0  # 秒；熔斷時暫停派發、等待恢復的上限
+_BREAKER_POLL_INTERVAL = 1.0  # 秒
 
 
 def create_empty_video_matrix() -> dict[str, list[list]]:
@@ -19,10 +40,152 @@ def create_empty_video_matrix() -> dict[str, list[list]]:
     return {k: [[] for _ in range(24)] for k in WEEKDAY_KEYS}
 
 
-def analyze_and_update_all_channels(db: firestore.Client) -> dict:
-    updated = 0
+def _default_max_workers() -> int:
+    return int(os.getenv("HEATMAP_SYNC_WORKERS", str(DEFAULT_SYNC_WORKERS)))
+
+
+def _default_channel_timeout() -> float:
+    return float(os.getenv("HEATMAP_CHANNEL_TIMEOUT", str(DEFAULT_CHANNEL_TIMEOUT)))
+
+
+def _default_breaker_pause() -> float:
+    return float(os.getenv("HEATMAP_BREAKER_PAUSE", str(DEFAULT_BREAKER_PAUSE)))
+
+
+def _dispatch_allowed(in_flight: int) -> bool:
+    """依 firestore_breaker 調節派發：熔斷中停止、試探中一次只跑一個頻道"""
+    state = firestore_breaker.state
+    if state is CircuitState.OPEN:
+        return False
+    if state is CircuitState.HALF_OPEN:
+        return in_flight == 0
+    return True
+
+
+def _compute_channels_concurrently(
+    db: firestore.Client,
+    channel_ids: list[str],
+    max_workers: int,
+    channel_timeout: float,
+    breaker_pause: float | None = None,
+) -> Iterator[tuple[str, Any]]:
+    """
+    以有上限的 thread pool 統計各頻道，完成一個 yield 一個 (channel_id, 結果)。
+    結果為 compute_channel_heatmap 的回傳值，或代表失敗的例外
+    （TimeoutError：超過 channel_timeout 秒；CircuitOpenError：熔斷未恢復、未派發）。
+    同時在途的頻道最多 2 × max_workers，避免統計結果堆積在記憶體。
+
+    熔斷時暫停派發，等待 breaker 進入 HALF_OPEN 後繼續；連續暫停超過 breaker_pause 秒
+    仍未恢復時放棄剩餘頻道，並記錄頻道 ID 供之後重試。
+    channel_timeout 同時作為 Firestore 讀取的 timeout，逾時的執行緒會隨讀取失敗結束。
+    """
+    if breaker_pause is None:
+        breaker_pause = _default_breaker_pause()
+    # 頻道實際開始執行的時間（由 worker 寫入、主執行緒讀取）
+    started: dict[str, float] = {}
+    started_lock = threading.Lock()
+
+    def run(channel_id: str):
+        with started_lock:
+            started[channel_id] = time.monotonic()
+        return compute_channel_heatmap(db, channel_id, timeout=channel_timeout)
+
+    def started_at(channel_id: str) -> float | None:
+        with started_lock:
+            return started.get(channel_id)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="heatmap-sync")
+    pending: dict[Future, str] = {}
+    # 已回報逾時但執行緒仍在跑的頻道：仍佔用 executor 的 worker，計入在途數量
+    abandoned: set[Future] = set()
+    queue = deque(channel_ids)
+
+    def in_flight() -> int:
+        return len(pending) + len(abandoned)
+
+    def refill() -> None:
+        while queue and in_flight() < max_workers * 2 and _dispatch_allowed(in_flight()):
+            channel_id = queue.popleft()
+            pending[executor.submit(run, channel_id)] = channel_id
+
+    try:
+        refill()
+        paused_at: float | None = None
+        while pending or queue:
+            abandoned = {future for future in abandoned if not future.done()}
+            if not pending and not abandoned:
+                # 熔斷中且沒有在途頻道：等待 breaker 冷卻進入 HALF_OPEN
+                now = time.monotonic()
+                if paused_at is None:
+                    paused_at = now
+                    logging.warning(f"⏸️ Firestore 熔斷中，暫停派發（剩餘 {len(queue)} 個頻道）")
+                remaining = breaker_pause - (now - paused_at)
+                if remaining <= 0:
+                    break
+                time.sleep(min(_BREAKER_POLL_INTERVAL, remaining))
+                refill()
+                continue
+            if paused_at is not None:
+                logging.info(f"▶️ Firestore 熔斷恢復試探，繼續派發（剩餘 {len(queue)} 個頻道）")
+                paused_at = None
+
+            start_times = [started_at(cid) for cid in pending.values()]
+            deadlines = [t + channel_timeout for t in start_times if t is not None]
+            wait_for = max(0.0, min(deadlines) - time.monotonic()) if deadlines else channel_timeout
+            # 逾時執行緒結束時也要醒來，才能補派頻道
+            done, _ = wait([*pending, *abandoned], timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                channel_id = pending.pop(future, None)
+                if channel_id is None:
+                    continue
+                try:
+                    yield channel_id, future.result()
+                except Exception as e:
+                    yield channel_id, e
+
+            # 逾時的頻道不再等待；執行緒內的 Firestore 讀取帶有同樣的 timeout，會自行結束，
+            # 結束前仍佔用 worker，refill 會把它們算進在途數量
+            now = time.monotonic()
+            for future, channel_id in list(pending.items()):
+                start = started_at(channel_id)
+                if start is not None and now - start >= channel_timeout:
+                    pending.pop(future)
+                    abandoned.add(future)
+                    yield channel_id, TimeoutError(f"超過 {channel_timeout:.0f} 秒")
+
+            refill()
+
+        # 熔斷未恢復導致未派發的頻道
+        if queue:
+            logging.error(
+                f"🔴 Firestore 熔斷 {breaker_pause:.0f} 秒內未恢復，"
+                f"{len(queue)} 個頻道未統計，請稍後重試：{', '.join(queue)}"
+            )
+        for channel_id in queue:
+            yield channel_id, CircuitOpenError(firestore_breaker.name)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def analyze_and_update_all_channels(
+    db: firestore.Client,
+    max_workers: int | None = None,
+    channel_timeout: float | None = None,
+) -> dict:
+    """全量重算本週有同步的頻道 heatmap
+
+    各頻道的影片載入與統計以 thread pool 並行（max_workers=1 即為循序執行），
+    輸出統一交給 HeatmapBulkWriter 批次寫入。
+    max_workers / channel_timeout 未指定時讀取環境變數
+    HEATMAP_SYNC_WORKERS / HEATMAP_CHANNEL_TIMEOUT。
+    """
+    max_workers = max_workers or _default_max_workers()
+    channel_timeout = channel_timeout or _default_channel_timeout()
+    started = time.perf_counter()
     skipped = 0
     skipped_channels = []
+    eligible: list[str] = []
 
     channels = load_all_channels_from_index_list(db)
     logging.debug(f"📡 共載入 {len(channels)} 個頻道進行分析")
@@ -56,20 +219,53 @@ def analyze_and_update_all_channels(db: firestore.Client) -> dict:
             skipped_channels.append(channel_id)
             continue
 
-        try:
-            success = update_single_channel_heatmap(db, channel_id)
-            if success:
-                updated += 1
-            else:
-                skipped += 1
-                skipped_channels.append(channel_id)
-        except Exception as e:
-            logging.error(f"🔥 頻道 {channel_id} 統計錯誤：{e}")
+        eligible.append(channel_id)
+
+    writer = HeatmapBulkWriter(db)
+    queued: list[str] = []
+    timed_out: list[str] = []
+    circuit_open: list[str] = []
+
+    for channel_id, result in _compute_channels_concurrently(
+        db, eligible, max_workers, channel_timeout
+    ):
+        if isinstance(result, Exception):
+            logging.error(f"🔥 頻道 {channel_id} 統計錯誤：{result}")
+            if isinstance(result, TimeoutError):
+                timed_out.append(channel_id)
+            elif isinstance(result, CircuitOpenError):
+                circuit_open.append(channel_id)
+            skipped += 1
+            skipped_channels.append(channel_id)
+            continue
+        if result is None:
             skipped += 1
             skipped_channels.append(channel_id)
+            continue
+        full_matrix, full_count, slot_counter = result
+        writer.add(channel_id, full_matrix, full_count, slot_counter, datetime.now(UTC))
+        queued.append(channel_id)
+
+    # 所有頻道統計完才統一提交；heat_map 寫入失敗的頻道計為跳過
+    failed = writer.close()
+    failed_heatmaps = set(failed["heatmap"])
+    updated = sum(1 for channel_id in queued if channel_id not in failed_heatmaps)
+    skipped += len(failed_heatmaps)
+    skipped_channels.extend(cid for cid in queued if cid in failed_heatmaps)
 
-    logging.info(f"🏁 統計完成：成功={updated}，跳過={skipped}")
-    return {"updated": updated, "skipped": skipped, "skipped_channels": skipped_channels}
+    elapsed = round(time.perf_counter() - started, 2)
+    logging.info(
+        f"🏁 統計完成：成功={updated}，跳過={skipped}，逾時={len(timed_out)}，"
+        f"workers={max_workers}，耗時 {elapsed}s"
+    )
+    return {
+        "updated": updated,
+        "skipped": skipped,
+        "skipped_channels": skipped_channels,
+        "timed_out_channels": timed_out,
+        "circuit_open_channels": circuit_open,
+        "elapsed_seconds": elapsed,
+    }
 
 
 def update_single_channel_heatmap(db: firestore.Client, channel_id: str) -> bool:
@@ -84,12 +280,109 @@ def update_single_channel_heatmap(db: firestore.Client, channel_id: str) -> bool
         logging.warning("⚠️ update_single_channel_heatmap 收到空的 channel_id")
         return False
 
+    result = compute_channel_heatmap(db, channel_id)
+    if result is None:
+        return False
+    full_matrix, full_count, slot_counter = result
+
+    now = datetime.now(UTC)
+
+    write_channel_heatmap_result(
+        db=db,
+        channel_id=channel_id,
+        full_matrix=full_matrix,
+        full_count=full_count,
+        slot_counter=slot_counter,
+    )
+
+    write_active_time_all_to_channel_index_batch(
+        db=db,
+        channel_id=channel_id,
+        slot_counter=slot_counter,
+        total_count=full_count,
+        updated_at=now,
+    )
+
+    logging.debug(f"✅ 成功寫入 {channel_id} 的 heat_map 與 active_time 統計結果")
+    return True
+
+
+def _heatmap_cells(videos: list[dict]) -> list[tuple[str, str, int]]:
+    """影片 → (video_id, 星期 key, 小時)；無法解析的影片略過"""
+    cells = []
+    for v in videos:
+        video_id = v.get("videoId")
+        if not video_id:
+            continue
+        try:
+            dt = get_taiwan_datetime_from_publish(v)
+        except Exception as e:
+            logging.warning(f"❗ 無法處理影片：{video_id}，錯誤：{e}")
+            continue
+        cells.append((video_id, WEEKDAY_KEYS[dt.weekday()], dt.hour))
+    return cells
+
+
+def update_channel_heatmap_incremental(
+    db: firestore.Client, channel_id: str, write_result: dict
+) -> bool:
+    """只把本次寫入的影片加進既有的 heat_map 與 active_time_all（讀寫量與頻道大小無關）
+
+    heat_map 或 active_time_all 尚未初始化時改做完整重算；完整重算另保留給每週同步等修復用途。
+
+    回傳：
+        True 表示成功更新
+    """
+    added = _heatmap_cells(write_result.get("written_videos") or [])
+    removed = _heatmap_cells(write_result.get("replaced_videos") or [])
+    if not added and not removed:
+        return True
+
+    try:
+        increment = apply_heatmap_increment(db, channel_id, added=added, removed=removed)
+        if increment is None:
+            logging.info(f"🆕 頻道 {channel_id} heat_map 尚未初始化，改做完整重算")
+            return _full_rebuild_after_increment(db, channel_id)
+
+        slot_delta, count_delta = increment
+        if not any(slot_delta) and not count_delta:
+            return True
+
+        if apply_active_time_delta(db, channel_id, slot_delta, count_delta, datetime.now(UTC)):
+            return True
+        logging.info(f"🆕 頻道 {channel_id} 尚無 active_time_all，改做完整重算")
+    except (GoogleAPIError, CircuitOpenError):
+        # 兩個 transaction 各自提交；heat_map 已套用而 active_time_all 失敗時兩者會不一致，
+        # 一律以完整重算覆寫
+        logging.error(f"🔥 頻道 {channel_id} 增量更新熱力圖失敗，改做完整重算", exc_info=True)
+    return _full_rebuild_after_increment(db, channel_id)
+
+
+def _full_rebuild_after_increment(db: firestore.Client, channel_id: str) -> bool:
+    """增量更新無法套用時的完整重算；失敗只記錄，不讓影片寫入流程中斷"""
+    try:
+        return update_single_channel_heatmap(db, channel_id)
+    except (GoogleAPIError, CircuitOpenError):
+        logging.error(f"🔥 頻道 {channel_id} 完整重算熱力圖失敗", exc_info=True)
+        return False
+
+
+def compute_channel_heatmap(
+    db: firestore.Client, channel_id: str, timeout: float | None = None
+) -> tuple[dict[str, list[list]], int, list[int]] | None:
+    """載入頻道影片並統計 7x24 矩陣與四時段分布；沒有影片時回傳 None
+
+    timeout 為載入影片的 Firestore 讀取上限（秒），未指定時使用用戶端預設值。
+
+    回傳：
+        (full_matrix, 影片總數, slot_counter)
+    """
     logging.debug(f"🔍 處理頻道：{channel_id}")
 
-    videos = load_videos_for_channel(db, channel_id)
+    videos = load_videos_for_channel(db, channel_id, timeout=timeout)
     if not videos:
         logging.warning(f"⚠️ 頻道 {channel_id} 沒有可用影片，跳過")
-        return False
+        return None
 
     logging.debug(f"📊 開始統計 {channel_id} 的影片數量：{len(videos)}")
 
@@ -116,23 +409,4 @@ def update_single_channel_heatmap(db: firestore.Client, channel_id: str) -> bool
 
     logging.debug(f"📈 統計完成：{channel_id} - 全片={len(videos)}，slot分布={slot_counter}")
 
-    now = datetime.now(UTC)
-
-    write_channel_heatmap_result(
-        db=db,
-        channel_id=channel_id,
-        full_matrix=full_matrix,
-        full_count=len(videos),
-        slot_counter=slot_counter,
-    )
-
-    write_active_time_all_to_channel_index_batch(
-        db=db,
-        channel_id=channel_id,
-        slot_counter=slot_counter,
-        total_count=len(videos),
-        updated_at=now,
-    )
-
-    logging.debug(f"✅ 成功寫入 {channel_id} 的 heat_map 與 active_time 統計結果")
-    return True
+    return full_matrix, len(videos), slot_counter
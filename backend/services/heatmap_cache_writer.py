@@ -7,7 +7,7 @@ from google.cloud.firestore import Client
 
 from services.firestore.channel_loader import load_all_channels_from_index_list
 from services.heatmap.metadata_loader import build_channel_metadata_lookup
-from services.heatmap.utils import convert_matrix_to_count
+from services.heatmap.utils import read_active_time
 
 
 def build_weekly_heatmap_cache(db: Client) -> dict:
@@ -44,8 +44,7 @@ def build_weekly_heatmap_cache(db: Client) -> dict:
             missing_count += 1
             continue
 
-        matrix = all_range.get("matrix", {})
-        active_time, total_count = convert_matrix_to_count(matrix)
+        active_time, total_count = read_active_time(all_range)
 
         result.append(
             {
@@ -111,11 +110,11 @@ def append_to_pending_cache(db: firestore.Client, channel_id: str) -> None:
     將單一新初始化頻道的活躍 heatmap 統計結果寫入 pending 快取文件（避免重複）
 
     來源：
-    - activeTime: 從 Firestore 的 all_range.matrix 統計 count
+    - activeTime: 從 Firestore 的 all_range.counts 取得（舊格式由 matrix 統計 count）
     - metadata: 從 channel_index_batch 裡查 name / thumbnail / countryCode
     """
     try:
-        # 🔍 Step 1: 讀取 heatmap matrix
+        # 🔍 Step 1: 讀取 heatmap 統計
         doc_ref = db.document(f"channel_data/{channel_id}/heat_map/channel_video_heatmap")
         doc = doc_ref.get()
         if not doc.exists:
@@ -127,8 +126,7 @@ def append_to_pending_cache(db: firestore.Client, channel_id: str) -> None:
             logging.warning(f"⚠️ [pending] {channel_id} 無 all_range，無法加入快取")
             return
 
-        matrix = all_range.get("matrix", {})
-        active_time, total_count = convert_matrix_to_count(matrix)
+        active_time, total_count = read_active_time(all_range)
 
         # 🔍 Step 2: 查找 metadata
         metadata_lookup = build_channel_metadata_lookup(db)
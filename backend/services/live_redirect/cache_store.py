@@ -0,0 +1,155 @@
+"""
+live_redirect_cache 的程序內副本與單一重建（single-flight）。
+
+GET /api/live-redirect/cache 原本每次都讀取當日快取文件判斷是否新鮮；快取過期時，
+所有同時進來的請求都各自執行 get_pending_video_ids + process_video_ids，
+重複呼叫 YouTube API 並覆寫同一份文件。現改為：
+- 當日快取文件在程序內保留一份副本，並以 snapshot listener 追蹤文件變更
+  （包含其他 instance 的重建），listener 收到第一次快照後讀取端不再讀 Firestore；
+  listener 無法建立時每次改為直接讀取文件
+- 同一時間每個 instance 只執行一個重建；重建進行中的其他請求直接回傳前一次的結果，
+  程序內尚無任何結果時才等待進行中的重建
+- 取得重建權後再檢查一次新鮮度，等待期間已被其他請求重建的情況不再重建
+
+副本與其他讀取端共用，請勿修改。
+"""
+
+import logging
+import threading
+from collections.abc import Callable
+from datetime import datetime
+from typing import Any
+
+from google.cloud.firestore import Client
+
+logger = logging.getLogger(__name__)
+
+CACHE_COLLECTION = "live_redirect_cache"
+
+
+class _CacheState:
+    __slots__ = ("db", "date", "doc", "watch", "listening")
+
+    def __init__(self, db: Client, date: str):
+        self.db = db
+        self.date = date
+        self.doc: dict[str, Any] | None = None
+        self.watch: Any = None
+        # listener 已送達第一次快照，副本與文件同步
+        self.listening = False
+
+
+# 當日快取狀態；讀寫皆需持有 _state_lock
+_state: _CacheState | None = None
+_state_lock = threading.Lock()
+# 每個 instance 同一時間只執行一個重建
+_rebuild_lock = threading.Lock()
+
+
+def _newer(doc: dict[str, Any] | None, than: dict[str, Any] | None) -> bool:
+    """updatedAt 皆為同格式的 ISO 字串，字串比較即等同時間先後"""
+    if doc is None:
+        return False
+    if than is None:
+        return True
+    return str(doc.get("updatedAt", "")) >= str(than.get("updatedAt", ""))
+
+
+def _store(state: _CacheState, doc: dict[str, Any] | None) -> None:
+    # 呼叫端需持有 _state_lock；不讓較舊的快照覆蓋較新的副本
+    if _newer(doc, state.doc):
+        state.doc = doc
+
+
+def _on_snapshot(state: _CacheState) -> Callable[..., None]:
+    def callback(doc_snapshots, _changes, _read_time) -> None:
+        with _state_lock:
+            if _state is not state:
+                return
+            for snapshot in doc_snapshots:
+                if snapshot.exists:
+                    _store(state, snapshot.to_dict() or {})
+            state.listening = True
+
+    return callback
+
+
+def _current_state(db: Client, today_str: str) -> _CacheState:
+    """取得當日狀態；日期或 db 改變時換新狀態並重新訂閱當日文件"""
+    global _state
+    with _state_lock:
+        state = _state
+        if state is not None and state.db is db and state.date == today_str:
+            return state
+        _state = new_state = _CacheState(db, today_str)
+
+    if state is not None and state.watch is not None:
+        state.watch.unsubscribe()
+    try:
+        watch = (
+            db.collection(CACHE_COLLECTION).document(today_str).on_snapshot(_on_snapshot(new_state))
+        )
+    except Exception:
+        logger.warning("⚠️ 無法建立 live_redirect_cache listener，改為每次讀取文件", exc_info=True)
+        watch = None
+    with _state_lock:
+        new_state.watch = watch
+    return new_state
+
+
+def get_today_cache(db: Client, today_str: str) -> dict[str, Any]:
+    """取得當日快取內容；listener 同步中直接回傳副本，否則讀取文件並更新副本"""
+    state = _current_state(db, today_str)
+    with _state_lock:
+        if state.listening:
+            return state.doc or {}
+
+    doc = db.collection(CACHE_COLLECTION).document(today_str).get().to_dict() or {}  # type: ignore[union-attr]
+    with _state_lock:
+        _store(state, doc)
+        return state.doc or {}
+
+
+def rebuild_single_flight(
+    db: Client,
+    now: datetime,
+    build: Callable[[], dict[str, Any]],
+    is_fresh: Callable[[dict[str, Any]], bool] | None = None,
+) -> dict[str, Any]:
+    """
+    執行快取重建，每個 instance 同一時間只跑一個 build()。
+    - 已有重建進行中：回傳程序內的前一次結果；尚無結果時等待該重建完成
+    - 取得重建權後，若 is_fresh(目前副本) 成立則直接回傳副本
+    """
+    state = _current_state(db, now.date().isoformat())
+    if not _rebuild_lock.acquire(blocking=False):
+        with _state_lock:
+            previous = state.doc
+        # 文件不存在時副本為空 dict，不算前一次結果
+        if previous and "channels" in previous:
+            logger.info("⏳ 快取重建進行中，回傳前一次結果")
+            return previous
+        _rebuild_lock.acquire()
+
+    try:
+        with _state_lock:
+            current = state.doc
+        if current is not None and is_fresh is not None and is_fresh(current):
+            logger.info("♻️ 等待期間快取已重建，直接回傳")
+            return current
+
+        result = build()
+        with _state_lock:
+            _store(state, result)
+        return result
+    finally:
+        _rebuild_lock.release()
+
+
+def reset_live_redirect_cache() -> None:
+    """清除程序內副本並取消訂閱（測試用）"""
+    global _state
+    with _state_lock:
+        state, _state = _state, None
+    if state is not None and state.watch is not None:
+        state.watch.unsubscribe()
@@ -1,23 +1,19 @@
 from google.cloud.firestore import Client
 
+from services.firestore.channel_directory import get_channel_directory
+
 
 def load_channel_info_index(db: Client) -> dict[str, dict[str, str]]:
     """
     從 channel_index_batch/* 合併頻道資訊，回傳 channel_id 對應的 info dict。
     僅包含 enabled == True 的頻道。
     """
-    result = {}
-    batch_docs = db.collection("channel_index_batch").stream()
-    for doc in batch_docs:
-        data = doc.to_dict() or {}
-        channels = data.get("channels", [])
-        for ch in channels:
-            cid = ch.get("channel_id")
-            if not cid or not ch.get("enabled", True):
-                continue
-            if cid not in result:
-                result[cid] = {
-                    "name": ch.get("name", ""),
-                    "thumbnail": ch.get("thumbnail", ""),
-                }
-    return result
+    directory = get_channel_directory(db)
+    return {
+        cid: {
+            "name": ch.get("name", ""),
+            "thumbnail": ch.get("thumbnail", ""),
+        }
+        for cid, ch in directory.by_channel.items()
+        if cid not in directory.disabled_ids
+    }
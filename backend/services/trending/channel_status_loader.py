@@ -5,6 +5,9 @@ from typing import Any
 from google.api_core.exceptions import GoogleAPIError
 from google.cloud.firestore import Client
 
+from services.firestore.channel_directory import get_channel_directory
+from services.firestore.sync_time_index import load_sync_index
+
 from .firestore_date_utils import parse_firestore_date
 
 logger = logging.getLogger(__name__)
@@ -12,23 +15,17 @@ logger = logging.getLogger(__name__)
 
 def get_active_channels(db: Client) -> list[dict[str, Any]]:
     try:
-        logger.info("🔍 嘗試載入 channel_sync_index/index_list")
-        doc = db.collection("channel_sync_index").document("index_list").get()
-        if not doc.exists:  # type: ignore[union-attr]
-            logger.warning("⚠️ 無 index_list 文件，無法取得活躍頻道")
+        logger.info("🔍 嘗試載入同步索引")
+        items = load_sync_index(db).channels
+        if not items:
+            logger.warning("⚠️ 同步索引沒有任何頻道，無法取得活躍頻道")
             return []
 
-        items = (doc.to_dict() or {}).get("channels", [])  # type: ignore[union-attr]
         logger.info("📋 總頻道數量：%d", len(items))
 
         # 🔽 收集所有 disabled 的 channel_id
-        disabled_ids: set[str] = set()
-        batch_docs = db.collection("channel_index_batch").stream()
-        for batch_doc in batch_docs:
-            batch_data = batch_doc.to_dict() or {}
-            for ch in batch_data.get("channels", []):
-                if not ch.get("enabled", True):  # 預設為 True，僅在明確為 False 時加入排除
-                    disabled_ids.add(ch.get("channel_id"))
+        # enabled 預設為 True，僅在明確為 False 時加入排除
+        disabled_ids = get_channel_directory(db).disabled_ids
         logger.info("🚫 被停用頻道數量：%d", len(disabled_ids))
 
         now = datetime.now(UTC)
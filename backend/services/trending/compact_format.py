@@ -0,0 +1,108 @@
+"""
+/api/trending-games 的精簡格式（format=compact）。
+
+預設格式在 contributorsByDateAndGame 每個日期、每個遊戲都重複頻道 ID 與名稱，
+details 也逐頻道重複完整影片資料。精簡格式把頻道與影片各收成一張欄位式表格，其餘以索引引用：
+{
+    "format": "compact",
+    "dates": [...],                      # 與預設格式相同，由舊到新
+    "gameList": [...],
+    "channels": {"id": [...], "name": [...], "thumbnail": [...]},
+        # name / thumbnail 取自 channelInfo；不在 channelInfo 的頻道 thumbnail 為 null
+    "videos": {"id": [...], "title": [...], "publishedAt": [...]},
+    "counts": {game: [n, ...]},          # 對齊 dates 的每日影片數
+    "contributors": {game: [[頻道索引, 影片數, 頻道索引, 影片數, ...], ...]},  # 對齊 dates
+    "details": {game: [[頻道索引, [影片索引, ...]], ...]},
+}
+沒有 videoId 的影片各自佔一列（不會被併成同一部）。
+值的序列化（例如 datetime 的 publishedAt）與預設格式的 jsonify 相同。
+"""
+
+import gzip
+from typing import Any
+
+from flask import json
+
+
+class _Table:
+    """依加入順序編號的欄位式表格，同一個 key 只存一次；key 為 None 時每次都新增一列"""
+
+    def __init__(self, *columns: str):
+        self._index: dict[Any, int] = {}
+        self._size = 0
+        self.columns: dict[str, list[Any]] = {name: [] for name in columns}
+
+    def intern(self, key: Any, **values: Any) -> int:
+        index = self._index.get(key) if key is not None else None
+        if index is None:
+            index = self._size
+            self._size += 1
+            if key is not None:
+                self._index[key] = index
+            for name, column in self.columns.items():
+                column.append(values.get(name))
+        return index
+
+
+def to_compact_summary(summary: dict[str, Any]) -> dict[str, Any]:
+    """將 analyze_trending_summary 的結構轉為精簡格式"""
+    dates: list[str] = summary.get("dates", [])
+    games: list[str] = summary.get("gameList", [])
+    channel_info: dict[str, dict[str, str]] = summary.get("channelInfo", {})
+    details: dict[str, dict[str, Any]] = summary.get("details", {})
+    contributors_by_date = summary.get("contributorsByDateAndGame", {})
+    counts_by_game = summary.get("videoCountByGameAndDate", {})
+
+    channels = _Table("id", "name", "thumbnail")
+    videos = _Table("id", "title", "publishedAt")
+
+    def channel(cid: str, fallback_name: str) -> int:
+        info = channel_info.get(cid)
+        if info is None:
+            return channels.intern(cid, id=cid, name=fallback_name)
+        return channels.intern(
+            cid, id=cid, name=info.get("name", ""), thumbnail=info.get("thumbnail", "")
+        )
+
+    compact_details: dict[str, list[list[Any]]] = {}
+    for game in games:
+        compact_details[game] = [
+            [
+                channel(cid, entry.get("channelName", "")),
+                [videos.intern(v.get("id"), **v) for v in entry.get("videos", [])],
+            ]
+            for cid, entry in details.get(game, {}).items()
+        ]
+
+    contributors: dict[str, list[list[int]]] = {}
+    for game in games:
+        per_date = []
+        for date_str in dates:
+            flat: list[int] = []
+            for cid, entry in contributors_by_date.get(date_str, {}).get(game, {}).items():
+                flat += [channel(cid, entry.get("channelName", "")), entry.get("count", 0)]
+            per_date.append(flat)
+        contributors[game] = per_date
+
+    return {
+        "format": "compact",
+        "dates": dates,
+        "gameList": games,
+        "channels": channels.columns,
+        "videos": videos.columns,
+        "counts": {
+            game: [counts_by_game.get(game, {}).get(date_str, 0) for date_str in dates]
+            for game in games
+        },
+        "contributors": contributors,
+        "details": compact_details,
+    }
+
+
+def encode_compact_summary(summary: dict[str, Any]) -> bytes:
+    """
+    精簡格式的 gzip 壓縮 JSON。
+    以 flask.json 序列化：在 app context 內沿用 app.json 的設定，與預設格式的 jsonify 輸出一致。
+    """
+    body = json.dumps(to_compact_summary(summary), ensure_ascii=False, separators=(",", ":"))
+    return gzip.compress(body.encode("utf-8"))
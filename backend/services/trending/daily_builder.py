@@ -5,46 +5,96 @@ from typing import Any
 from google.api_core.exceptions import GoogleAPIError
 from google.cloud.firestore import Client
 
-from utils.categorizer import match_category_and_game
-from utils.channel_data_loader import load_channel_settings_and_videos
+from utils.channel_data_loader import stream_channel_data
+from utils.circuit_breaker import CircuitOpenError
 from utils.trending_classifier import classify_videos_to_games
 
 from .channel_status_loader import get_active_channels
-from .firestore_date_utils import parse_firestore_date
+from .firestore_date_utils import bucket_videos_by_date
 from .firestore_path_tools import document_exists, write_document
+from .process_pool import ChannelClassifyPool
+from .summary_store import build_trending_summaries
 
 logger = logging.getLogger(__name__)
 
 
 def build_trending_for_date_range(
-    start_date: str, days: int, db: Client, force: bool = False
+    start_date: str, days: int, db: Client, force: bool = False, processes: int | None = None
 ) -> dict[str, Any]:
-    """從 start_date 開始，往前處理 N 天的 trending 分析"""
+    """
+    從 start_date 開始，往前處理 N 天的 trending 分析。
+    processes > 1 時分類工作改由 process pool 執行（多日 force 重建用）；預設在本執行緒內分類。
+    """
     try:
         target_start = datetime.strptime(start_date, "%Y-%m-%d").date()
         date_range = [(target_start - timedelta(days=offset)).isoformat() for offset in range(days)]
         logger.info(f"📆 開始批次處理 {len(date_range)} 天：{date_range[0]} ～ {date_range[-1]}")
 
-        # 快取頻道清單、設定與影片
+        # 快取頻道清單
         active_channels = get_active_channels(db)
         logger.info(f"📡 活躍頻道數量：{len(active_channels)}")
 
-        channel_settings_map, channel_videos_map = load_channel_settings_and_videos(
-            db, active_channels
-        )
+        skipped_dates = set()
+        for date_str in date_range:
+            if not force and document_exists(db, f"trending_games_daily/{date_str}"):
+                logger.info(f"⚠️ {date_str} 已存在，略過建立")
+                skipped_dates.add(date_str)
+        target_dates = {
+            datetime.strptime(d, "%Y-%m-%d").date(): d for d in date_range if d not in skipped_dates
+        }
+
+        # 頻道資料邊載入邊分類：partials[date_str][頻道順位] = (game_map, stats)
+        channel_order: dict[str, int] = {}
+        for index, channel in enumerate(active_channels):
+            channel_order.setdefault(channel.get("channel_id", ""), index)
+        partials: dict[str, dict[int, tuple[dict, dict]]] = {d: {} for d in target_dates.values()}
+        timings: dict[str, Any] = {}
+
+        if target_dates:
+            pool: ChannelClassifyPool | None = None
+            try:
+                for channel_id, settings, all_videos in stream_channel_data(
+                    db, active_channels, timings=timings
+                ):
+                    # 每部影片只解析一次日期，各日只處理當天的影片
+                    buckets = bucket_videos_by_date(all_videos, target_dates)
+                    day_videos = {
+                        target_dates[day]: videos for day, videos in buckets.items() if videos
+                    }
+                    if not day_videos:
+                        continue
+                    order = channel_order[channel_id]
+
+                    if processes and processes > 1:
+                        if pool is None:
+                            pool = ChannelClassifyPool(processes, settings.alias_table)
+                        pool.submit(order, channel_id, settings, day_videos)
+                        continue
+
+                    for date_str, videos in day_videos.items():
+                        # 使用共用函式分類
+                        partials[date_str][order] = classify_videos_to_games(
+                            videos, channel_id, settings
+                        )
+
+                if pool is not None:
+                    for order, day_results in pool.drain():
+                        for date_str, result in day_results.items():
+                            partials[date_str][order] = result
+                    timings["processes"] = pool.processes
+            finally:
+                if pool is not None:
+                    pool.close()
 
         # 每日處理
         results = []
         for date_str in date_range:
-            trending_doc_path = f"trending_games_daily/{date_str}"
-            if not force and document_exists(db, trending_doc_path):
-                logger.info(f"⚠️ {date_str} 已存在，略過建立")
+            if date_str in skipped_dates:
                 results.append(
                     {"date": date_str, "skipped": True, "reason": "Document already exists"}
                 )
                 continue
 
-            target_date = datetime.strptime(date_str, "%Y-%m-%d").date()
             game_map: dict[str, list[dict[str, Any]]] = {}
             stats: dict[str, Any] = {
                 "date": date_str,
@@ -54,29 +104,8 @@ def build_trending_for_date_range(
                 "games_found": {},
             }
 
-            for channel in active_channels:
-                channel_id: str = channel.get("channel_id", "")
-                if not channel_id:
-                    continue
-                settings = channel_settings_map[channel_id]
-                all_videos = channel_videos_map[channel_id]
-
-                # 當日影片過濾
-                videos = [
-                    v
-                    for v in all_videos
-                    if (pd := parse_firestore_date(v.get("publishDate")))
-                    and pd.date() == target_date
-                ]
-
-                # 使用共用函式分類
-                game_map_partial, stats_partial = classify_videos_to_games(
-                    videos,
-                    channel_id,
-                    settings,
-                    match_category_and_game,
-                )
-
+            # 依頻道原始順序合併，輸出與載入完成順序無關
+            for _, (game_map_partial, stats_partial) in sorted(partials[date_str].items()):
                 # 合併分類結果
                 for game, vids in game_map_partial.items():
                     game_map.setdefault(game, []).extend(vids)
@@ -88,7 +117,7 @@ def build_trending_for_date_range(
                     stats["games_found"].setdefault(game, 0)
                     stats["games_found"][game] += count
 
-            write_document(db, trending_doc_path, game_map)
+            write_document(db, f"trending_games_daily/{date_str}", game_map)
             logger.info(f"✅ 寫入完成 {date_str}，共 {len(game_map)} 個遊戲")
             results.append(
                 {
@@ -99,13 +128,23 @@ def build_trending_for_date_range(
                 }
             )
 
+        # 每日資料更新後重算 7 / 14 / 30 天摘要；失敗時公開 API 改走即時計算
+        try:
+            summaries: dict[int, str] | None = build_trending_summaries(db)
+        except Exception:
+            # 每日文件已寫入，摘要失敗不影響本次結果
+            logger.error("🔥 重算 trending 摘要失敗", exc_info=True)
+            summaries = None
+
         return {
             "startDate": start_date,
             "days": days,
             "force": force,
             "results": results,
+            "timings": timings,
+            "summaries": summaries,
         }
 
-    except GoogleAPIError as e:
+    except (GoogleAPIError, CircuitOpenError) as e:
         logger.error("🔥 批次建立 trending_games_daily 發生錯誤", exc_info=True)
         return {"error": str(e), "startDate": start_date}
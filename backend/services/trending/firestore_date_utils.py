@@ -1,4 +1,6 @@
-from datetime import datetime
+from collections.abc import Iterable
+from datetime import date, datetime
+from typing import Any
 
 
 def parse_firestore_date(raw) -> datetime | None:
@@ -10,3 +12,20 @@ def parse_firestore_date(raw) -> datetime | None:
     elif hasattr(raw, "to_datetime"):
         return raw.to_datetime()  # type: ignore[no-any-return]
     return None
+
+
+def bucket_videos_by_date(
+    videos: Iterable[dict[str, Any]], target_dates: Iterable[date]
+) -> dict[date, list[dict[str, Any]]]:
+    """
+    依 publishDate 的日期（以時間字串本身的時區為準）將影片分桶，只保留 target_dates。
+    每部影片只解析一次，多日重建時每一天只需處理當天的影片。
+    """
+    buckets: dict[date, list[dict[str, Any]]] = {d: [] for d in target_dates}
+    if not buckets:
+        return buckets
+    for v in videos:
+        pd = parse_firestore_date(v.get("publishDate"))
+        if pd is not None and (bucket := buckets.get(pd.date())) is not None:
+            bucket.append(v)
+    return buckets
@@ -0,0 +1,155 @@
+"""
+多日 trending 重建的 process pool 分類。
+
+force 重建多天時，資料載入完成後剩下的都是純 CPU 的關鍵字比對，
+在單一 request thread 內受 GIL 限制只能用到一顆核心。這裡把「頻道 × 日期」的分類工作
+以頻道為單位分給 process pool：
+- 中央別名表在每個 worker 啟動時傳送一次並編譯（initializer），之後所有工作共用
+- 每個頻道只傳送一次原始設定與各日影片；影片只保留 classify_videos_to_games 讀取的欄位，
+  其餘內容原樣保留（缺少的欄位照樣缺少），與本執行緒分類看到的輸入相同
+- 同時在途的頻道數最多 2 × processes，載入端比分類快時不會把影片全堆在記憶體裡
+- 回傳結果附上頻道順位，由呼叫端依順位合併，輸出與完成順序無關
+
+worker 使用 spawn 啟動，避免在已有載入執行緒的程序內 fork。
+分類追蹤（classification_trace）無法傳到 worker：正在追蹤的頻道（或呼叫端已在追蹤範圍內）
+一律在本執行緒內分類，追蹤紀錄才會留在主程序。
+
+worker 例外或 pool 損毀（BrokenProcessPool）時，該頻道改在本執行緒內分類；
+pool 損毀後其餘頻道也都在本執行緒內分類。
+
+processes 上限為容器可用的 CPU 數：TRENDING_BUILD_MAX_PROCESSES 優先，
+未設定時以 sched_getaffinity 計算（os.cpu_count 回傳主機核心數，不反映容器限制）。
+Cloud Run 以 CPU 配額限制容器，affinity 仍可能看到全部核心，部署時應設定環境變數。
+"""
+
+import logging
+import multiprocessing
+import os
+from collections.abc import Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any
+
+from utils.classification_trace import current_trace, is_channel_traced
+from utils.compiled_settings import AliasTable, CompiledSettings
+from utils.trending_classifier import classify_videos_to_games
+
+logger = logging.getLogger(__name__)
+
+# classify_videos_to_games 讀取的影片欄位
+_ROW_FIELDS = ("videoId", "title", "publishDate", "duration", "type")
+
+VideoRow = dict[str, Any]
+DayResults = dict[str, tuple[dict[str, list[dict[str, Any]]], dict[str, Any]]]
+DayVideos = dict[str, list[dict[str, Any]]]
+
+_worker_alias_table: AliasTable | None = None
+
+
+def _init_worker(alias_map: dict[str, list[str]], fingerprint: str) -> None:
+    global _worker_alias_table
+    _worker_alias_table = AliasTable(alias_map, fingerprint)
+
+
+def available_cpus() -> int:
+    """容器可用的 CPU 數"""
+    configured = os.getenv("TRENDING_BUILD_MAX_PROCESSES")
+    if configured:
+        return max(1, int(configured))
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+
+def _to_row(video: dict[str, Any]) -> VideoRow:
+    """只保留分類需要的欄位；不補預設值，worker 與本執行緒分類看到相同的輸入"""
+    return {key: video[key] for key in _ROW_FIELDS if key in video}
+
+
+def _classify_channel(
+    channel_id: str, settings: dict[str, Any], days: dict[str, list[VideoRow]]
+) -> DayResults:
+    """worker 端：以共用別名表建立頻道設定，逐日分類"""
+    assert _worker_alias_table is not None
+    compiled = CompiledSettings(settings, _worker_alias_table)
+    return {
+        date_str: classify_videos_to_games(rows, channel_id, compiled)
+        for date_str, rows in days.items()
+    }
+
+
+def _classify_in_thread(channel_id: str, settings: CompiledSettings, days: DayVideos) -> DayResults:
+    return {
+        date_str: classify_videos_to_games(videos, channel_id, settings)
+        for date_str, videos in days.items()
+    }
+
+
+class ChannelClassifyPool:
+    """以 process pool 分類各頻道多日影片；submit 後以 drain 取回 (頻道順位, 各日結果)"""
+
+    def __init__(self, processes: int, alias_table: AliasTable):
+        self.processes = max(1, min(processes, available_cpus()))
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(alias_table.alias_map, alias_table.fingerprint),
+        )
+        # future -> (頻道順位, channel_id, settings, 各日影片)；worker 失敗時改在本執行緒分類
+        self._pending: dict[Future, tuple[int, str, CompiledSettings, DayVideos]] = {}
+        self._done: list[tuple[int, DayResults]] = []
+        self._broken = False
+        logger.info(f"🧮 啟用 process pool 分類，processes={self.processes}")
+
+    def submit(
+        self,
+        order: int,
+        channel_id: str,
+        settings: CompiledSettings,
+        days: DayVideos,
+    ) -> None:
+        while len(self._pending) >= self.processes * 2:
+            self._collect(wait(self._pending, return_when=FIRST_COMPLETED).done)
+        traced = current_trace() is not None or is_channel_traced(channel_id)
+        if not self._broken and not traced:
+            rows = {date_str: list(map(_to_row, videos)) for date_str, videos in days.items()}
+            try:
+                future = self._executor.submit(
+                    _classify_channel, channel_id, dict(settings.base), rows
+                )
+            except BrokenProcessPool:
+                self._mark_broken()
+            else:
+                self._pending[future] = (order, channel_id, settings, days)
+                return
+        self._done.append((order, _classify_in_thread(channel_id, settings, days)))
+
+    def _mark_broken(self) -> None:
+        if not self._broken:
+            logger.error("🔥 process pool 已損毀，其餘頻道改在本執行緒內分類", exc_info=True)
+            self._broken = True
+
+    def _collect(self, done) -> None:
+        for future in done:
+            order, channel_id, settings, days = self._pending.pop(future)
+            try:
+                result = future.result()
+            except BrokenProcessPool:
+                self._mark_broken()
+                result = _classify_in_thread(channel_id, settings, days)
+            except Exception:
+                logger.warning(
+                    f"⚠️ 頻道 {channel_id} 於 worker 分類失敗，改在本執行緒內分類", exc_info=True
+                )
+                result = _classify_in_thread(channel_id, settings, days)
+            self._done.append((order, result))
+
+    def drain(self) -> Iterator[tuple[int, DayResults]]:
+        """等待所有工作完成，依完成順序回傳結果"""
+        self._collect(wait(self._pending).done)
+        done, self._done = self._done, []
+        yield from done
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,129 @@
+"""
+預先計算的 trending 摘要（7 / 14 / 30 天）。
+
+GET /api/trending-games 原本每次都讀取最多 30 份 trending_games_daily、重新載入頻道資訊，
+再以 analyze_trending_summary 重算所有主題統計；但結果只在 build-daily-trending 執行後才會變動。
+現改為：
+- 建立每日資料後呼叫 build_trending_summaries()：只讀一次 30 天資料與頻道資訊，
+  以 TrendingWindowAggregator 算出三個區間的摘要，寫入 trending_games_summary/{days}
+    {"days", "version", "summary": {...可直接回傳的結構}}
+- 讀取端以 get_materialized_summary() 取得：TTL 內直接使用程序內快取（不讀 Firestore），
+  到期後讀一次摘要文件，version 未變時沿用既有快取
+- 摘要文件尚未建立，或摘要的日期已不是目前的統計區間（跨日後尚未重建）時回傳 None，
+  由呼叫端改走即時計算
+- format=compact 的 gzip 內容以 get_compact_payload() 依版本快取
+"""
+
+import logging
+import threading
+import time
+from datetime import UTC, datetime
+from typing import Any
+
+from google.api_core.exceptions import GoogleAPIError
+from google.cloud.firestore import Client
+
+from services.trending.channel_info_loader import load_channel_info_index
+from services.trending.compact_format import encode_compact_summary
+from services.trending.trending_analyzer import window_dates
+from services.trending.trending_loader import load_trending_videos_by_date
+from services.trending.window_aggregator import TrendingWindowAggregator
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_COLLECTION = "trending_games_summary"
+SUMMARY_WINDOWS = (7, 14, 30)
+_SUMMARY_TTL = 300  # 秒；其他 instance 重建後最長延遲這麼久才會讀到新版本
+
+# days -> (version, summary, 確認時間 monotonic)；讀寫皆需持有 _cache_lock
+_cache: dict[int, tuple[str, dict[str, Any], float]] = {}
+# days -> (version, 精簡格式 gzip bytes)；同一版本只編碼一次
+_compact_cache: dict[int, tuple[str, bytes]] = {}
+_cache_lock = threading.Lock()
+
+
+def reset_summary_cache() -> None:
+    """清空程序內快取（測試用）"""
+    with _cache_lock:
+        _cache.clear()
+        _compact_cache.clear()
+
+
+def build_trending_summaries(db: Client) -> dict[int, str]:
+    """
+    重算 7 / 14 / 30 天摘要並寫入 Firestore，同時更新本程序的快取。
+    每次執行都從 30 天資料重新分桶（聚合器狀態不跨次保存），只省下三個區間各自重算的成本。
+    回傳 {days: version}；讀取失敗時丟出原本的 Firestore 例外。
+    """
+    daily = load_trending_videos_by_date(db, days=max(SUMMARY_WINDOWS))
+    channel_info = load_channel_info_index(db)
+
+    # 30 天資料只分桶一次；由長到短產生摘要，每縮短一次只扣掉移出視窗的日期
+    aggregator = TrendingWindowAggregator(theme_key="game")
+    for videos in daily.videos_by_date.values():
+        aggregator.add_videos(videos)
+
+    version = datetime.now(UTC).isoformat(timespec="microseconds")
+    versions: dict[int, str] = {}
+    for days in sorted(SUMMARY_WINDOWS, reverse=True):
+        summary = aggregator.summary(window_dates(days), channel_info=channel_info)
+        db.collection(SUMMARY_COLLECTION).document(str(days)).set(
+            {"days": days, "version": version, "summary": summary}
+        )
+        with _cache_lock:
+            _cache[days] = (version, summary, time.monotonic())
+        versions[days] = version
+        logger.info(f"🧾 已寫入 {days} 天 trending 摘要（{len(summary['gameList'])} 個主題）")
+    return versions
+
+
+def get_materialized_summary(db: Client, days: int) -> dict[str, Any] | None:
+    """取得預先計算的摘要；尚未建立、日期區間已過期或讀取失敗時回傳 None"""
+    expected_dates = window_dates(days)
+    now = time.monotonic()
+    with _cache_lock:
+        cached = _cache.get(days)
+    if cached and cached[1].get("dates") != expected_dates:
+        cached = None
+    if cached and now - cached[2] < _SUMMARY_TTL:
+        return cached[1]
+
+    try:
+        doc = db.collection(SUMMARY_COLLECTION).document(str(days)).get()
+    except GoogleAPIError:
+        logger.warning(f"⚠️ 無法讀取 {days} 天 trending 摘要", exc_info=True)
+        # 讀取失敗時沿用舊快取
+        return cached[1] if cached else None
+
+    data = (doc.to_dict() or {}) if doc.exists else {}  # type: ignore[union-attr]
+    version, summary = data.get("version"), data.get("summary")
+    if not isinstance(version, str) or not isinstance(summary, dict):
+        return None
+    if summary.get("dates") != expected_dates:
+        logger.info(f"⌛ {days} 天 trending 摘要的日期區間已過期，改為即時計算")
+        return None
+
+    if cached and cached[0] == version:
+        summary = cached[1]
+    with _cache_lock:
+        _cache[days] = (version, summary, now)
+    return summary
+
+
+def get_compact_payload(days: int, summary: dict[str, Any]) -> bytes:
+    """
+    summary 的精簡格式（gzip）。summary 為目前快取中的預先計算摘要時，
+    同一版本只編碼一次；即時計算的結果每次編碼。
+    """
+    with _cache_lock:
+        cached = _cache.get(days)
+        version = cached[0] if cached and cached[1] is summary else None
+        compact = _compact_cache.get(days)
+    if version is not None and compact and compact[0] == version:
+        return compact[1]
+
+    payload = encode_compact_summary(summary)
+    if version is not None:
+        with _cache_lock:
+            _compact_cache[days] = (version, payload)
+    return payload
@@ -1,14 +1,17 @@
 # services/trending/trending_analyzer.py
 
 import logging
+from collections.abc import Mapping, Sequence
 from datetime import UTC, datetime, timedelta
 from typing import Any
 
 
 def build_theme_statistics(
-    videos: list[dict[str, Any]], theme_key: str, dates: list[str]
+    videos: Sequence[Mapping[str, Any]], theme_key: str, dates: list[str]
 ) -> tuple[
-    dict[str, dict[str, int]], dict[str, list[dict[str, Any]]], dict[str, dict[str, dict[str, int]]]
+    dict[str, dict[str, int]],
+    dict[str, list[Mapping[str, Any]]],
+    dict[str, dict[str, dict[str, int]]],
 ]:
     """
     聚合主題統計資料（不分排序方式），共用。
@@ -18,8 +21,9 @@ def build_theme_statistics(
       - 每個主題在各日期的頻道貢獻影片數量（不去重）
     """
     theme_stats: dict[str, dict[str, int]] = {}
-    theme_videos: dict[str, list[dict[str, Any]]] = {}
+    theme_videos: dict[str, list[Mapping[str, Any]]] = {}
     theme_channel_stats: dict[str, dict[str, dict[str, int]]] = {}
+    date_set = set(dates)
 
     for v in videos:
         theme = v.get(theme_key)
@@ -30,7 +34,7 @@ def build_theme_statistics(
             continue
 
         date_str = str(ts)[:10]
-        if date_str not in dates:
+        if date_str not in date_set:
             continue
 
         # 累加主題每日影片數
@@ -48,7 +52,7 @@ def build_theme_statistics(
 
 
 def get_theme_top_by_videos(
-    theme_videos: dict[str, list[dict[str, Any]]], top_n: int = 10
+    theme_videos: dict[str, list[Mapping[str, Any]]], top_n: int = 10
 ) -> list[str]:
     """
     依據主題的「貢獻頻道數」「影片數」「最新影片時間」排序，取得前 top_n 主題。
@@ -88,7 +92,7 @@ def get_theme_top_by_videos(
 
 
 def build_theme_details(
-    theme_names: list[str], theme_videos: dict[str, list[dict[str, Any]]]
+    theme_names: list[str], theme_videos: dict[str, list[Mapping[str, Any]]]
 ) -> dict[str, dict[str, Any]]:
     """
     將主題影片清單彙整為 details: 主題 → 頻道 → 影片清單
@@ -172,8 +176,14 @@ def filter_channel_info(
     return {cid: channel_info[cid] for cid in channel_ids if cid in channel_info}
 
 
+def window_dates(days: int) -> list[str]:
+    """統計區間的日期（UTC 昨天往前 days 天），由舊到新"""
+    today = datetime.now(UTC).date()
+    return sorted((today - timedelta(days=i)).isoformat() for i in range(1, days + 1))
+
+
 def analyze_trending_summary(
-    videos: list[dict[str, Any]],
+    videos: Sequence[Mapping[str, Any]],
     theme_key: str = "game",
     channel_info: dict[str, dict[str, str]] | None = None,
     days: int = 30,
@@ -182,9 +192,7 @@ def analyze_trending_summary(
     將影片清單依主題分類，產生前端統計用結構
     """
     logger = logging.getLogger(__name__)
-    today = datetime.now(UTC).date()
-    dates = [(today - timedelta(days=i)).isoformat() for i in range(1, days + 1)]
-    dates = sorted(dates)  # 由舊到新
+    dates = window_dates(days)
 
     # 主題→日期與主題→影片清單
     theme_stats, theme_videos, theme_channel_stats = build_theme_statistics(
@@ -4,47 +4,112 @@ services/trending/trending_loader.py
 """
 
 import logging
+from collections.abc import Iterator, Mapping
 from datetime import UTC, datetime, timedelta
-from typing import Any
+from typing import Any, NamedTuple
 
 from google.cloud.firestore import Client
 
 logger = logging.getLogger(__name__)
 
+COLLECTION = "trending_games_daily"
 
-def load_trending_videos_by_date_range(db: Client, days: int = 30) -> list[dict[str, Any]]:
+
+class GameVideo(Mapping):
     """
-    從 Firestore 'trending_games_daily/{YYYY-MM-DD}' 批次載入影片，
-    並合併成一份包含 'game', 'channelId', 'publishDate', 及其他欄位的影片清單。
+    每日文件內的影片 dict 加上所屬 'game' 的唯讀檢視。
+    與文件資料共用同一個 dict，不逐支複製；對外行為與附加 'game' 欄位後的 dict 相同。
+    """
+
+    __slots__ = ("_video", "_game")
+
+    def __init__(self, video: dict[str, Any], game: str):
+        self._video = video
+        self._game = game
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "game":
+            return self._game
+        return self._video[key]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key == "game":
+            return self._game
+        return self._video.get(key, default)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._video
+        if "game" not in self._video:
+            yield "game"
+
+    def __len__(self) -> int:
+        return len(self._video) + ("game" not in self._video)
+
+
+class TrendingDailyData(NamedTuple):
+    """videos_by_date 依日期由新到舊；missing_dates 為找不到文件的日期"""
+
+    videos_by_date: dict[str, list[GameVideo]]
+    missing_dates: list[str]
+
+
+def load_trending_videos_by_date(db: Client, days: int = 30) -> TrendingDailyData:
+    """
+    以一次 get_all 讀取過去 days 天的 'trending_games_daily/{YYYY-MM-DD}'，
+    依來源日期分組，每支影片包成帶 'game' 欄位的 GameVideo。
 
     參數:
         db: Firestore client 實例
-        days: 查詢區間天數，支援 7、14、30（預設 30）
+        days: 查詢區間天數
 
     回傳:
-        List of video dicts
+        TrendingDailyData；找不到文件的日期只列入 missing_dates
     """
-    videos: list[dict[str, Any]] = []
     today = datetime.now(UTC).date()
     dates = [(today - timedelta(days=i)).isoformat() for i in range(1, days + 1)]
     logger.info(f"📅 讀取過去 {days} 天資料：{dates[-1]} ~ {dates[0]}")
 
+    collection = db.collection(COLLECTION)
+    # get_all 不保證回傳順序，依文件 id 對回日期
+    snapshots = {
+        snapshot.id: snapshot
+        for snapshot in db.get_all([collection.document(date_str) for date_str in dates])
+    }
+
+    videos_by_date: dict[str, list[GameVideo]] = {}
+    missing_dates: list[str] = []
     for date_str in dates:
-        doc_ref = db.collection("trending_games_daily").document(date_str)
-        doc = doc_ref.get()
-        if not doc.exists:  # type: ignore[union-attr]
-            logger.info(f"⚠️ 找不到日期 {date_str} 的資料，跳過")
+        snapshot = snapshots.get(date_str)
+        if snapshot is None or not snapshot.exists:
+            missing_dates.append(date_str)
             continue
-        data = doc.to_dict() or {}  # type: ignore[union-attr]
-        logger.info(f"🔄 讀取 {date_str}，共 {len(data)} 種主題")
-        for game, video_list in data.items():
-            if not isinstance(video_list, list):
-                continue
-            for v in video_list:
-                if not isinstance(v, dict):
-                    continue
-                item = dict(v)
-                item["game"] = game
-                videos.append(item)
+        data = snapshot.to_dict() or {}
+        videos_by_date[date_str] = [
+            GameVideo(v, game)
+            for game, video_list in data.items()
+            if isinstance(video_list, list)
+            for v in video_list
+            if isinstance(v, dict)
+        ]
+
+    if missing_dates:
+        logger.info(f"⚠️ 找不到 {len(missing_dates)} 天的資料，跳過：{', '.join(missing_dates)}")
+    return TrendingDailyData(videos_by_date, missing_dates)
+
+
+def load_trending_videos_by_date_range(db: Client, days: int = 30) -> list[GameVideo]:
+    """
+    從 Firestore 'trending_games_daily/{YYYY-MM-DD}' 批次載入影片，
+    並合併成一份包含 'game', 'channelId', 'publishDate', 及其他欄位的影片清單。
+
+    參數:
+        db: Firestore client 實例
+        days: 查詢區間天數，支援 7、14、30（預設 30）
+
+    回傳:
+        List of video mappings（GameVideo）
+    """
+    daily = load_trending_videos_by_date(db, days)
+    videos = [v for day in daily.videos_by_date.values() for v in day]
     logger.info(f"✅ 已載入影片總數：{len(videos)}")
     return videos
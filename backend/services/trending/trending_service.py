@@ -6,6 +6,7 @@ from google.cloud.firestore import Client
 
 # 如果你在同一層 services/trending 下
 from services.trending.channel_info_loader import load_channel_info_index
+from services.trending.summary_store import get_materialized_summary
 from services.trending.trending_analyzer import analyze_trending_summary
 from services.trending.trending_loader import load_trending_videos_by_date_range
 
@@ -43,7 +44,12 @@ def get_trending_games_summary(db: Client, days: int = 30) -> dict[str, Any]:
             logger.warning(f"⚠️ 無效的 days 參數：{days}，已自動套用預設值 30")
             days = 30
 
-        logger.info(f"📅 準備讀取過去 {days} 天資料")
+        # 0. 優先使用 build-daily-trending 預先計算的摘要
+        materialized = get_materialized_summary(db, days)
+        if materialized is not None:
+            return materialized
+
+        logger.info(f"📅 無預先計算摘要，即時讀取過去 {days} 天資料")
         channel_info = load_channel_info_index(db)
         logger.info(f"📡 已載入頻道資訊，共 {len(channel_info)} 筆")
 
@@ -0,0 +1,165 @@
+"""
+trending 滑動視窗聚合器。
+
+analyze_trending_summary 原本每次都從整個區間的影片清單重算主題統計、排名、明細與貢獻者；
+這裡改為依發佈日期分桶，保留每日 × 主題的影片數、頻道影片數與影片清單，
+視窗內另維護主題總計（影片數、各頻道影片數）：
+- add_videos()：影片分進各日桶，落在視窗內的日期同步累加總計
+- set_window()：只處理進出視窗的日期（加入新的一天、扣掉移出的一天），
+  成本與異動日期的影片數成正比，與視窗長度無關
+- summary()：以 heap 取前 N 名主題，只為入選主題組出明細與圖表資料；
+  排序鍵完全相同時依主題在視窗內第一次出現的順序（與舊版穩定排序一致）
+"""
+
+import heapq
+from collections.abc import Iterable, Mapping
+from datetime import datetime
+from typing import Any
+
+from services.trending.trending_analyzer import (
+    build_chart_data_by_game_and_date,
+    build_contributors_by_date_and_game,
+    build_theme_details,
+    filter_channel_info,
+)
+
+
+class _ThemeDay:
+    """單一日期、單一主題的統計"""
+
+    __slots__ = ("count", "channels", "videos", "latest", "first_seen")
+
+    def __init__(self, first_seen: int) -> None:
+        self.count = 0
+        self.channels: dict[str, int] = {}
+        self.videos: list[Mapping[str, Any]] = []
+        self.latest: Any = None
+        # 當日第一支影片的加入序號，用於同分主題的排序
+        self.first_seen = first_seen
+
+
+class _ThemeTotal:
+    """視窗內單一主題的總計；channels 保留各頻道影片數，扣除日期時才知道頻道是否仍存在"""
+
+    __slots__ = ("count", "channels", "dates")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.channels: dict[str, int] = {}
+        self.dates: set[str] = set()
+
+
+class TrendingWindowAggregator:
+    """依發佈日期維護主題統計，視窗前進時只加減整天的資料"""
+
+    def __init__(self, theme_key: str = "game"):
+        self._theme_key = theme_key
+        self._days: dict[str, dict[str, _ThemeDay]] = {}
+        self._totals: dict[str, _ThemeTotal] = {}
+        self._window: set[str] = set()
+        self._seq = 0
+
+    def add_videos(self, videos: Iterable[Mapping[str, Any]]) -> None:
+        """影片依發佈日期（publishDate 前 10 碼）分桶；缺少主題、日期或頻道的影片略過"""
+        for v in videos:
+            theme = v.get(self._theme_key)
+            ts = v.get("publishDate")
+            channel_id = v.get("channelId")
+            if not theme or not ts or not channel_id:
+                continue
+
+            date_str = str(ts)[:10]
+            themes = self._days.setdefault(date_str, {})
+            day = themes.get(theme)
+            if day is None:
+                day = themes[theme] = _ThemeDay(self._seq)
+            self._seq += 1
+            day.count += 1
+            day.channels[channel_id] = day.channels.get(channel_id, 0) + 1
+            day.videos.append(v)
+            if day.latest is None or ts > day.latest:
+                day.latest = ts
+
+            if date_str in self._window:
+                total = self._totals.setdefault(theme, _ThemeTotal())
+                total.count += 1
+                total.channels[channel_id] = total.channels.get(channel_id, 0) + 1
+                total.dates.add(date_str)
+
+    def set_window(self, dates: Iterable[str]) -> None:
+        """切換視窗日期；只處理新進入與移出視窗的日期"""
+        window = set(dates)
+        for date_str in self._window - window:
+            self._apply_day(date_str, sign=-1)
+        for date_str in window - self._window:
+            self._apply_day(date_str, sign=1)
+        self._window = window
+
+    def _apply_day(self, date_str: str, sign: int) -> None:
+        for theme, day in self._days.get(date_str, {}).items():
+            total = self._totals.setdefault(theme, _ThemeTotal())
+            total.count += sign * day.count
+            for cid, count in day.channels.items():
+                remaining = total.channels.get(cid, 0) + sign * count
+                if remaining > 0:
+                    total.channels[cid] = remaining
+                else:
+                    total.channels.pop(cid, None)
+            if sign > 0:
+                total.dates.add(date_str)
+            else:
+                total.dates.discard(date_str)
+            if total.count <= 0:
+                del self._totals[theme]
+
+    def top_themes(self, top_n: int = 10) -> list[str]:
+        """
+        與 get_theme_top_by_videos 相同的排序：
+        頻道數多 > 影片數多 > 最新影片時間新；每個主題只轉換一次最新時間。
+        以上皆相同時，視窗內較早加入的主題在前（_totals 的順序取決於日期集合的走訪順序，不能依賴）
+        """
+
+        def rank(theme: str) -> tuple[int, int, float, int]:
+            total = self._totals[theme]
+            days = [self._days[d][theme] for d in total.dates]
+            latest = max(day.latest for day in days)
+            if isinstance(latest, str):
+                latest = datetime.fromisoformat(latest)
+            first_seen = min(day.first_seen for day in days)
+            return len(total.channels), total.count, latest.timestamp(), -first_seen
+
+        return heapq.nlargest(top_n, self._totals, key=rank)
+
+    def summary(
+        self,
+        dates: list[str],
+        channel_info: dict[str, dict[str, str]] | None = None,
+        top_n: int = 10,
+    ) -> dict[str, Any]:
+        """以目前視窗產生與 analyze_trending_summary 相同的結構；dates 為視窗日期（由舊到新）"""
+        self.set_window(dates)
+        top = self.top_themes(top_n)
+
+        theme_stats: dict[str, dict[str, int]] = {}
+        theme_videos: dict[str, list[Mapping[str, Any]]] = {}
+        theme_channel_stats: dict[str, dict[str, dict[str, int]]] = {}
+        for theme in top:
+            for date_str in dates:
+                day = self._days.get(date_str, {}).get(theme)
+                if day is None:
+                    continue
+                theme_stats.setdefault(theme, {})[date_str] = day.count
+                theme_videos.setdefault(theme, []).extend(day.videos)
+                theme_channel_stats.setdefault(theme, {})[date_str] = day.channels
+
+        details = build_theme_details(top, theme_videos)
+        return {
+            "dates": dates,
+            "gameList": top,
+            "videoCountByGameAndDate": build_chart_data_by_game_and_date(top, theme_stats, dates),
+            "contributorsByDateAndGame": build_contributors_by_date_and_game(
+                top, dates, theme_channel_stats, channel_info
+            ),
+            "details": details,
+            "channelInfo": filter_channel_info(details, channel_info or {}),
+        }
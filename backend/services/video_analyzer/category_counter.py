@@ -8,11 +8,11 @@ CATEGORY_MAPPING = {
 }
 
 
-def count_category_counts(videos: list[dict]) -> dict:
-    """
-    接收經 get_classified_videos() 處理過的影片清單，
-    回傳符合 Firestore 儲存結構的 category_counts 統計結果。
-    """
+COUNT_KEYS = ("talk", "game", "music", "show", "all")
+
+
+def _tally_category_counts(videos: list[dict]) -> dict[str, int]:
+    """計算各主分類的影片數（不含 updatedAt）"""
     counts: dict[str, int] = {
         "talk": 0,
         "game": 0,
@@ -39,6 +39,24 @@ def count_category_counts(videos: list[dict]) -> dict:
                 counts[key] += 1
                 already_counted.add(key)
 
+    return counts
+
+
+def count_category_counts(videos: list[dict]) -> dict:
+    """
+    接收經 get_classified_videos() 處理過的影片清單，
+    回傳符合 Firestore 儲存結構的 category_counts 統計結果。
+    """
     # 加入更新時間
-    result: dict = {**counts, "updatedAt": datetime.now(UTC).isoformat()}
+    result: dict = {**_tally_category_counts(videos), "updatedAt": datetime.now(UTC).isoformat()}
     return result
+
+
+def compute_category_delta(added: list[dict], removed: list[dict]) -> dict[str, int]:
+    """
+    計算新增影片與被覆寫影片造成的 category_counts 差值。
+    兩者皆需帶有 matchedCategories。
+    """
+    plus = _tally_category_counts(added)
+    minus = _tally_category_counts(removed)
+    return {key: plus[key] - minus[key] for key in COUNT_KEYS}
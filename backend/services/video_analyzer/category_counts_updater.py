@@ -0,0 +1,74 @@
+import logging
+
+from google.api_core.exceptions import GoogleAPIError
+from google.cloud.firestore import Client
+
+from services.classified_video_fetcher import get_classified_videos, get_compiled_settings
+from services.firestore.category_writer import (
+    apply_category_counts_delta,
+    write_category_counts_to_channel_index_batch,
+)
+from services.video_analyzer.category_counter import compute_category_delta, count_category_counts
+from utils.categorizer import classify_batch, settings_fingerprint
+from utils.compiled_settings import CompiledSettings
+from utils.youtube_utils import normalize_video_item
+
+logger = logging.getLogger(__name__)
+
+
+def _normalized(videos: list[dict]) -> list[dict]:
+    """與 get_classified_videos 相同的標準化；舊格式或缺欄位的影片不列入統計，一併略過"""
+    items = []
+    for raw_item in videos:
+        item = normalize_video_item(raw_item)
+        if not item:
+            logger.warning("⚠️ normalize_video_item 失敗: %s", raw_item)
+            continue
+        items.append(item)
+    return items
+
+
+def _classify(videos: list[dict], settings: CompiledSettings) -> list[dict]:
+    matches = classify_batch([(v["title"], v["type"]) for v in videos], settings)
+    return [{"matchedCategories": m.matched_categories} for m in matches]
+
+
+def recount_category_counts(db: Client, channel_id: str) -> dict:
+    """完整重算頻道的 category_counts 並連同 settings 指紋寫入"""
+    settings = get_compiled_settings(db, channel_id)
+    classified = get_classified_videos(db, channel_id)
+    counts = count_category_counts(classified)
+    if counts.get("all", 0) > 0:
+        fingerprint = settings_fingerprint(settings) if settings else None
+        write_category_counts_to_channel_index_batch(db, channel_id, counts, fingerprint)
+    else:
+        logger.info(f"⚪ category_counts 空值，略過寫入 → {channel_id}")
+    return counts
+
+
+def update_category_counts_after_write(db: Client, channel_id: str, write_result: dict) -> None:
+    """
+    依 write_batches_to_firestore 的結果增量更新 category_counts：
+    - 只分類本次寫入的影片與被覆寫的舊版影片，將差值套用到既有統計
+    - 既有統計不存在或 settings 指紋已變動時，改為完整重算
+    """
+    # replaced_videos 是既有文件中的原始資料，可能是舊格式或缺欄位
+    written = _normalized(write_result.get("written_videos") or [])
+    replaced = _normalized(write_result.get("replaced_videos") or [])
+    if not written and not replaced:
+        return
+
+    try:
+        settings = get_compiled_settings(db, channel_id)
+        if not settings:
+            return
+
+        delta = compute_category_delta(_classify(written, settings), _classify(replaced, settings))
+        if apply_category_counts_delta(db, channel_id, delta, settings_fingerprint(settings)):
+            return
+
+        logger.info(f"🔁 category_counts 指紋不符或尚未建立，完整重算 → {channel_id}")
+        recount_category_counts(db, channel_id)
+
+    except GoogleAPIError as e:
+        logger.error(f"🔥 更新 category_counts 失敗（{channel_id}）：{e}", exc_info=True)
@@ -6,21 +6,22 @@ from datetime import UTC, datetime, timedelta
 
 from google.cloud import firestore
 
+from services.firestore.sync_time_index import get_channel_sync_state, record_channel_sync_state
+
 logger = logging.getLogger(__name__)
 
 
 def check_channel_update_status(db: firestore.Client, channel_id: str) -> dict:
     """檢查頻道影片同步狀態，必要時產生更新 token。
 
-    讀取 channel_sync_index/index_list，判斷頻道是否超過 12 小時未同步，
-    若需更新則產生短效 token 供 /api/videos/update 使用。
+    讀取頻道自己的同步狀態文件，判斷頻道是否超過 12 小時未同步，
+    僅在需要更新時寫回 lastCheckedAt，並產生短效 token 供 /api/videos/update 使用。
 
     Returns:
         包含 shouldUpdate、channelId、lastCheckedAt、lastVideoSyncAt 的 dict，
         若需更新另包含 updateToken。
     """
-    index_ref = db.collection("channel_sync_index").document("index_list")
-    doc = index_ref.get()
+    state = get_channel_sync_state(db, channel_id)
     now = datetime.now(UTC)
     now_iso = now.isoformat()
 
@@ -28,64 +29,31 @@ def check_channel_update_status(db: firestore.Client, channel_id: str) -> dict:
     last_video_sync_at = None
     should_update = False
 
-    if not doc.exists:  # type: ignore[union-attr]
-        logger.info(f"📄 [check-update] 尚未存在 index_list，初始化頻道 {channel_id}")
-        index_ref.set(
-            {
-                "channels": [
-                    {
-                        "channel_id": channel_id,
-                        "lastCheckedAt": now_iso,
-                    }
-                ]
-            }
-        )
-        logger.info(
-            f"📝 [check-update] 寫入 index_list：新增頻道 {channel_id}（僅設定 lastCheckedAt）"
-        )
+    if state is None:
+        logger.info(f"➕ [check-update] 頻道 {channel_id} 尚無同步狀態，建立新紀錄")
         should_update = True
     else:
-        data = doc.to_dict() or {}  # type: ignore[union-attr]
-        channels = data.get("channels", [])
-        found = False
-        for ch in channels:
-            if ch.get("channel_id") == channel_id:
-                last_checked_at = ch.get("lastCheckedAt")
-                last_video_sync_at = ch.get("lastVideoSyncAt")
-                found = True
-
-                if not last_checked_at:
-                    should_update = True
-                    logger.info(f"🧭 [check-update] 頻道 {channel_id} 沒有 lastCheckedAt，需更新")
-                else:
-                    last_checked_dt = datetime.fromisoformat(last_checked_at)
-                    delta = now - last_checked_dt
-                    if delta > timedelta(hours=12):
-                        should_update = True
-                        logger.info(f"⏰ [check-update] 距離上次檢查已超過 {delta}，需更新")
-
-                if should_update:
-                    ch["lastCheckedAt"] = now_iso
-                break
+        last_checked_at = state.get("lastCheckedAt")
+        last_video_sync_at = state.get("lastVideoSyncAt")
 
-        if not found:
-            logger.info(f"➕ [check-update] 頻道 {channel_id} 尚未在 index_list 中，加入新紀錄")
-            channels.append(
-                {
-                    "channel_id": channel_id,
-                    "lastCheckedAt": now_iso,
-                }
-            )
-            logger.info(
-                f"📝 [check-update] 寫入 index_list：新增頻道 {channel_id}（僅設定 lastCheckedAt）"
-            )
+        if not last_checked_at:
             should_update = True
-
-        index_ref.set({"channels": channels})
-        logger.info(
-            f"📦 [check-update] 寫入整份 channels 更新："
-            f"頻道 {channel_id}，shouldUpdate = {should_update}"
-        )
+            logger.info(f"🧭 [check-update] 頻道 {channel_id} 沒有 lastCheckedAt，需更新")
+        else:
+            last_checked_dt = datetime.fromisoformat(last_checked_at)
+            delta = now - last_checked_dt
+            if delta > timedelta(hours=12):
+                should_update = True
+                logger.info(f"⏰ [check-update] 距離上次檢查已超過 {delta}，需更新")
+
+    # 狀態沒有變化時不寫入；需更新時只 merge 此頻道自己的文件
+    if should_update:
+        fields = {"lastCheckedAt": now_iso}
+        if state is not None and "updatedAt" not in state and last_video_sync_at:
+            # 狀態回退自彙總文件（尚無頻道文件）時一併帶入，完成此頻道的遷移
+            fields["lastVideoSyncAt"] = last_video_sync_at
+        record_channel_sync_state(db, channel_id, fields)
+        logger.info(f"📝 [check-update] 更新頻道 {channel_id} 的 lastCheckedAt")
 
     response = {
         "shouldUpdate": should_update,
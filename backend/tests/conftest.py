@@ -66,6 +66,7 @@ KNOWN_COLLECTIONS = [
     "live_redirect_notifications",
     "scheduler_job_logs",
     "channel_sync_index",
+    "channel_sync_state",
 ]
 
 
@@ -156,6 +157,68 @@ def _reset_kms_cache():
     kms_mod._kms_key_name = None
 
 
+@pytest.fixture(autouse=True)
+def _clear_compiled_settings_cache():
+    """每個測試前清空編譯後的分類設定快取"""
+    from utils.categorizer import clear_compiled_settings_cache
+
+    clear_compiled_settings_cache()
+
+
+@pytest.fixture(autouse=True)
+def _clear_alias_table():
+    """每個測試前清除已編譯的中央遊戲別名表"""
+    from utils.compiled_settings import clear_alias_table
+
+    clear_alias_table()
+
+
+@pytest.fixture(autouse=True)
+def _reset_trending_summary_cache():
+    """每個測試前清空 trending 摘要快取"""
+    from services.trending.summary_store import reset_summary_cache
+
+    reset_summary_cache()
+
+
+@pytest.fixture(autouse=True)
+def _reset_live_redirect_cache():
+    """每個測試前清空 live redirect 快取副本"""
+    from services.live_redirect.cache_store import reset_live_redirect_cache
+
+    reset_live_redirect_cache()
+
+
+@pytest.fixture(autouse=True)
+def _clear_merged_settings_cache():
+    """每個測試前清空合併設定與 default config 快取"""
+    from services.classified_video_fetcher import invalidate_merged_settings
+    from utils.settings_main_merger import clear_default_config_cache
+
+    invalidate_merged_settings()
+    clear_default_config_cache()
+
+
+@pytest.fixture(autouse=True)
+def _reset_classification_store():
+    """每個測試前清空分類結果快取與待回寫佇列"""
+    from services.firestore.classification_store import (
+        reset_classification_store,
+        wait_for_classified_writes,
+    )
+
+    wait_for_classified_writes(timeout=5)
+    reset_classification_store()
+
+
+@pytest.fixture(autouse=True)
+def _reset_classification_trace():
+    """每個測試前清空分類追蹤 buffer 與頻道追蹤設定"""
+    from utils.classification_trace import reset_classification_trace
+
+    reset_classification_trace()
+
+
 # ═══════════════════════════════════════════════════════
 # Flask test app（使用 mock_db 的版本，供向下相容）
 # ═══════════════════════════════════════════════════════
@@ -201,3 +264,19 @@ def app(mock_db):
 def client(app):
     """Flask test client"""
     return app.test_client()
+
+
+@pytest.fixture(autouse=True)
+def _reset_channel_directory():
+    """每個測試前清除 channel_index_batch 快照"""
+    from services.firestore.channel_directory import reset_channel_directory
+
+    reset_channel_directory()
+
+
+@pytest.fixture(autouse=True)
+def _reset_channel_locator():
+    """每個測試前清除頻道定位表快取"""
+    from services.firestore.channel_locator import reset_channel_locator
+
+    reset_channel_locator()
@@ -9,8 +9,11 @@ import pytest
 from google.api_core.exceptions import GoogleAPIError
 
 from services.firestore.active_time_writer import (
+    _apply_active_time_delta_in_transaction,
     _update_active_time_in_transaction,
+    _update_batch_active_time_in_transaction,
     write_active_time_all_to_channel_index_batch,
+    write_active_time_for_channels,
 )
 
 
@@ -197,3 +200,125 @@ class TestWriteActiveTimeAllToChannelIndexBatch:
         assert captured_stat["晚"] == 20
         assert captured_stat["totalCount"] == 50
         assert captured_stat["updatedAt"] == now
+
+
+# ═══════════════════════════════════════════════════════
+# write_active_time_for_channels（同一份 batch 的頻道一次寫入）
+# ═══════════════════════════════════════════════════════
+
+
+class TestUpdateBatchActiveTimeInTransaction:
+    def test_updates_all_listed_channels_with_one_set(self):
+        tx = MagicMock()
+        doc_ref = MagicMock()
+        channels = [{"channel_id": "UC001"}, {"channel_id": "UC002"}, {"channel_id": "UC003"}]
+        doc_ref.get.return_value = _make_batch_doc("batch_0", channels)
+
+        written = _update_batch_active_time_in_transaction.to_wrap(
+            tx, doc_ref, {"UC001": {"凌": 1}, "UC003": {"凌": 3}, "UC_X": {"凌": 9}}
+        )
+
+        assert written == {"UC001", "UC003"}
+        tx.set.assert_called_once()
+        saved = tx.set.call_args[0][1]["channels"]
+        assert saved[0]["active_time_all"] == {"凌": 1}
+        assert "active_time_all" not in saved[1]
+
+    def test_no_match_does_not_write(self):
+        tx = MagicMock()
+        doc_ref = MagicMock()
+        doc_ref.get.return_value = _make_batch_doc("batch_0", [{"channel_id": "UC002"}])
+
+        assert _update_batch_active_time_in_transaction.to_wrap(tx, doc_ref, {"UC001": {}}) == set()
+        tx.set.assert_not_called()
+
+
+class TestWriteActiveTimeForChannels:
+    _MOD = "services.firestore.active_time_writer"
+
+    def test_one_transaction_per_batch_doc(self, mock_db):
+        stats = {"UC001": {"凌": 1}, "UC002": {"凌": 2}, "UC003": {"凌": 3}}
+        locator = {"UC001": "batch_0", "UC002": "batch_0", "UC003": "batch_1"}
+
+        with (
+            patch(f"{self._MOD}.get_channel_locator", return_value=locator),
+            patch(f"{self._MOD}._update_batch_active_time_in_transaction") as mock_tx,
+            patch(f"{self._MOD}._write_single_active_time") as mock_single,
+        ):
+            mock_tx.side_effect = lambda tx, ref, group: set(group)
+            failed = write_active_time_for_channels(mock_db, stats)
+
+        assert failed == []
+        assert mock_tx.call_count == 2
+        groups = [call[0][2] for call in mock_tx.call_args_list]
+        assert {"UC001", "UC002"} == set(groups[0])
+        mock_single.assert_not_called()
+
+    def test_stale_or_unknown_channels_fall_back_to_single_write(self, mock_db):
+        stats = {"UC001": {"凌": 1}, "UC002": {"凌": 2}, "UC_NEW": {"凌": 3}}
+        locator = {"UC001": "batch_0", "UC002": "batch_0"}
+
+        with (
+            patch(f"{self._MOD}.get_channel_locator", return_value=locator),
+            patch(f"{self._MOD}._update_batch_active_time_in_transaction", return_value={"UC001"}),
+            patch(f"{self._MOD}._write_single_active_time") as mock_single,
+        ):
+            mock_single.side_effect = lambda db, cid, stat: cid == "UC002"
+            failed = write_active_time_for_channels(mock_db, stats)
+
+        assert [call[0][1] for call in mock_single.call_args_list] == ["UC_NEW", "UC002"]
+        assert failed == ["UC_NEW"]
+
+    def test_batch_error_marks_group_failed(self, mock_db):
+        with (
+            patch(f"{self._MOD}.get_channel_locator", return_value={"UC001": "batch_0"}),
+            patch(
+                f"{self._MOD}._update_batch_active_time_in_transaction",
+                side_effect=GoogleAPIError("boom"),
+            ),
+        ):
+            assert write_active_time_for_channels(mock_db, {"UC001": {}}) == ["UC001"]
+
+
+class TestApplyActiveTimeDeltaInTransaction:
+    _NOW = datetime(2025, 6, 1, tzinfo=UTC)
+
+    def _doc_ref(self, channels):
+        doc_ref = MagicMock()
+        doc_ref.get.return_value = _make_batch_doc("batch_0", channels)
+        return doc_ref
+
+    def test_adds_delta_to_existing_stats(self):
+        tx = MagicMock()
+        stat = {"凌": 1, "早": 2, "午": 3, "晚": 4, "totalCount": 10}
+        doc_ref = self._doc_ref([{"channel_id": "UC001", "active_time_all": stat}])
+
+        result = _apply_active_time_delta_in_transaction.to_wrap(
+            tx, doc_ref, "UC001", [0, 1, 0, -1], 0, self._NOW
+        )
+
+        assert result is True
+        saved = tx.set.call_args[0][1]["channels"][0]["active_time_all"]
+        assert (saved["早"], saved["晚"], saved["totalCount"]) == (3, 3, 10)
+        assert saved["updatedAt"] == self._NOW
+
+    def test_missing_stats_returns_false(self):
+        tx = MagicMock()
+        doc_ref = self._doc_ref([{"channel_id": "UC001"}])
+
+        assert (
+            _apply_active_time_delta_in_transaction.to_wrap(
+                tx, doc_ref, "UC001", [1, 0, 0, 0], 1, self._NOW
+            )
+            is False
+        )
+        tx.set.assert_not_called()
+
+    def test_channel_not_in_batch_returns_none(self):
+        doc_ref = self._doc_ref([{"channel_id": "UC002"}])
+        assert (
+            _apply_active_time_delta_in_transaction.to_wrap(
+                MagicMock(), doc_ref, "UC001", [1, 0, 0, 0], 1, self._NOW
+            )
+            is None
+        )
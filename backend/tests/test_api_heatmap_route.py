@@ -0,0 +1,93 @@
+"""
+Heatmap route 測試：GET /api/heatmap/<channel_id>
+"""
+
+import importlib
+from unittest.mock import MagicMock
+
+import pytest
+from conftest import create_test_app
+
+SUMMARY = "channel_data/UC1234567890123456789012/heat_map/channel_video_heatmap"
+DETAIL = "channel_data/UC1234567890123456789012/heat_map/channel_video_heatmap_ids"
+URL = "/api/heatmap/UC1234567890123456789012"
+
+
+@pytest.fixture
+def mock_db():
+    return MagicMock()
+
+
+@pytest.fixture
+def client(mock_db):
+    import routes.api_heatmap_route as mod
+
+    importlib.reload(mod)
+
+    app = create_test_app()
+    mod.init_api_heatmap_route(app, mock_db)
+    return app.test_client()
+
+
+def _set_docs(mock_db, docs):
+    refs = {}
+
+    def document(path):
+        ref = refs.setdefault(path, MagicMock())
+        ref.get.return_value.exists = docs.get(path) is not None
+        ref.get.return_value.to_dict.return_value = docs.get(path)
+        return ref
+
+    mock_db.document.side_effect = document
+    return refs
+
+
+class TestGetVideoHeatmap:
+    def test_counts_format_reads_summary_only(self, mock_db, client):
+        counts = [0] * 168
+        counts[3] = 2
+        refs = _set_docs(mock_db, {SUMMARY: {"all_range": {"counts": counts, "totalCount": 2}}})
+
+        resp = client.get(f"{URL}?format=counts")
+
+        assert resp.status_code == 200
+        body = resp.get_json()
+        assert body["format"] == "counts"
+        assert body["counts"] == counts
+        assert body["totalCount"] == 2
+        assert DETAIL not in refs
+
+    def test_counts_format_from_legacy_matrix(self, mock_db, client):
+        _set_docs(
+            mock_db,
+            {SUMMARY: {"all_range": {"matrix": {"Sun": {"1": ["v1"]}}, "totalCount": 1}}},
+        )
+
+        body = client.get(f"{URL}?format=counts").get_json()
+
+        assert body["counts"][1] == 1
+
+    def test_matrix_format_reads_detail(self, mock_db, client):
+        _set_docs(
+            mock_db,
+            {
+                SUMMARY: {"all_range": {"counts": [0] * 168, "totalCount": 1}},
+                DETAIL: {"matrix": {"Sun": {"1": ["v1"]}}},
+            },
+        )
+
+        body = client.get(URL).get_json()
+
+        assert body == {"success": True, "matrix": {"Sun": {"1": ["v1"]}}, "totalCount": 1}
+
+    def test_legacy_matrix_in_summary(self, mock_db, client):
+        refs = _set_docs(
+            mock_db, {SUMMARY: {"all_range": {"matrix": {"Mon": {}}, "totalCount": 0}}}
+        )
+
+        assert client.get(URL).get_json()["matrix"] == {"Mon": {}}
+        assert DETAIL not in refs
+
+    def test_missing_doc_returns_404(self, mock_db, client):
+        _set_docs(mock_db, {})
+        assert client.get(URL).status_code == 404
@@ -70,6 +70,8 @@ class TestWriteBatchesToFirestore:
         result = write_batches_to_firestore(mock_db, "UC001", raw_videos)
         # 應該只寫入 1 筆（去重後）
         assert result["videos_written"] == 1
+        assert [v["title"] for v in result["written_videos"]] == ["Second"]
+        assert result["replaced_videos"] == []
 
     def test_merge_into_existing_batch(self, mock_db, mock_normalize):
         from services.firestore.batch_writer import write_batches_to_firestore
@@ -0,0 +1,74 @@
+"""
+benchmark_classification 工具測試：合成資料與記憶體版 Firestore
+"""
+
+import random
+
+import pytest
+
+from tools.benchmark_classification import (
+    CHANNEL_ID,
+    build_alias_map,
+    build_channel_db,
+    build_default_config,
+    build_titles,
+    run_scenario,
+)
+
+
+@pytest.fixture(autouse=True)
+def _restore_alias_cache(monkeypatch):
+    """run_scenario 會直接覆寫別名快取，測試後還原"""
+    import utils.game_alias_fetcher as fetcher
+
+    monkeypatch.setattr(fetcher, "_cache", fetcher._cache)
+    monkeypatch.setattr(fetcher, "_last_fetch_time", fetcher._last_fetch_time)
+
+
+class TestSyntheticData:
+    def test_generation_is_deterministic(self):
+        def _build(seed):
+            rng = random.Random(seed)
+            aliases = build_alias_map(rng, 10)
+            config = build_default_config(rng, 20)
+            return aliases, config, build_titles(rng, 50, config, aliases)
+
+        assert _build(7) == _build(7)
+        assert _build(7) != _build(8)
+
+    def test_default_config_has_requested_keyword_count(self):
+        config = build_default_config(random.Random(1), 25)
+        total = sum(len(kws) for subs in config.values() for kws in subs.values())
+        assert total == 25
+
+    def test_channel_db_splits_videos_into_batches(self):
+        titles = [(f"title {i}", "影片") for i in range(2500)]
+        db = build_channel_db(titles, {}, {})
+
+        batches = list(
+            db.collection("channel_data").document(CHANNEL_ID).collection("videos_batch").stream()
+        )
+        assert [b.id for b in batches] == ["batch_0", "batch_1"]
+        assert len(batches[1].to_dict()["videos"]) == 500
+
+
+class TestRunScenario:
+    def test_reports_every_measurement(self):
+        report = run_scenario(40, 12, 8, repeat=1, seed=3)
+
+        assert report["params"] == {"titles": 40, "keywords": 12, "aliases": 8, "seed": 3}
+        assert set(report["results"]) == {
+            "match_category_and_game",
+            "classify_batch",
+            "classify_batch_game_only",
+            "classify_batch_compiled",
+            "compile_settings",
+            "merge_main_categories_with_user_config",
+            "merge_main_categories_with_user_config_cached",
+            "merge_game_categories_with_aliases",
+            "get_classified_videos_cold",
+            "get_classified_videos_warm",
+        }
+        for result in report["results"].values():
+            assert result["seconds"] >= 0
+            assert result["peak_kib"] >= 0
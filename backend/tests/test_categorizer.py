@@ -3,9 +3,13 @@ categorizer 測試：normalize、tokenize_title、keyword_in_title、match_categ
 """
 
 from utils.categorizer import (
+    TYPE_MAP,
+    ClassificationResult,
+    classify_batch,
     keyword_in_title,
     match_category_and_game,
     normalize,
+    settings_fingerprint,
     tokenize_title,
 )
 
@@ -238,3 +242,214 @@ class TestMatchCategoryAndGame:
         result = match_category_and_game("test", "live", None)  # settings=None 會觸發異常
         assert result["matchedCategories"] == ["其他"]
         assert result["game"] is None
+
+
+# ═══════════════════════════════════════════════════════
+# 編譯後比對器：與逐一 keyword_in_title 比對結果一致
+# ═══════════════════════════════════════════════════════
+
+
+def _reference_match(title, video_type, settings):
+    """舊版逐關鍵字比對邏輯，作為編譯後比對器的對照組"""
+    tokens = tokenize_title(title)
+    category_settings = settings.get(TYPE_MAP.get(video_type, video_type), {})
+    categories, keywords, pairs, game = [], [], [], None
+
+    for main, subs in category_settings.items():
+        if main == "遊戲" or not isinstance(subs, dict):
+            continue
+        for sub_name, kws in subs.items():
+            hits = [kw for kw in [sub_name, *kws] if keyword_in_title(kw, tokens, title)]
+            if hits:
+                if main not in categories:
+                    categories.append(main)
+                keywords.extend(hits)
+                pairs.append({"main": main, "keyword": sub_name, "hitKeywords": hits})
+
+    for game_name, kws in category_settings.get("遊戲", {}).items():
+        hits = [kw for kw in kws + [game_name] if keyword_in_title(kw, tokens, title)]
+        if hits:
+            game = game_name
+            keywords.extend(hits)
+            pairs.append({"main": "遊戲", "keyword": game_name, "hitKeywords": hits})
+            break
+
+    if game and "遊戲" not in categories:
+        categories.append("遊戲")
+    if not categories and "其他" in category_settings:
+        categories = ["其他"]
+    return {
+        "matchedCategories": categories,
+        "game": game,
+        "matchedKeywords": list(dict.fromkeys(keywords)),
+        "matchedPairs": pairs,
+    }
+
+
+COMPILED_SETTINGS = {
+    "live": {
+        "雜談": {"雜談": ["閒聊", "Free Talk", "FT"], "歌回": ["歌枠", "karaoke"]},
+        "節目": {"企劃": ["凸待", "3D"], "重大": ["初配信", "周年"]},
+        "遊戲": {
+            "Minecraft": ["mc", "麥塊", "マイクラ"],
+            "Pokémon": ["寶可夢", "ポケモン", "pokemon"],
+            "Apex Legends": ["apex", "エーペックス"],
+        },
+        "其他": {},
+    },
+}
+
+
+class TestCompiledMatcher:
+    """編譯後的 token set + Aho-Corasick 比對器"""
+
+    def test_equivalent_to_reference(self):
+        titles = [
+            "【Minecraft】今天來蓋房子 #mc",
+            "閒聊配信 free talk！初配信一周年",
+            "【歌枠】karaoke night ft. @guest_mc",
+            "ポケモン 寶可夢 Pokémon apex 3D",
+            "mc-server 開放中",
+            "完全無關的標題",
+            "APEX エーペックス ranked",
+        ]
+        for title in titles:
+            assert match_category_and_game(title, "直播", COMPILED_SETTINGS) == _reference_match(
+                title, "直播", COMPILED_SETTINGS
+            ), title
+
+    def test_mention_is_not_token(self):
+        """@mention 不會被切成英文 token"""
+        result = match_category_and_game("@mc_fan 的合作", "live", COMPILED_SETTINGS)
+        assert result["game"] is None
+
+    def test_single_char_keyword_uses_substring(self):
+        """單一字元關鍵字不符合 token 規則 → 走子字串比對"""
+        settings = {"live": {"遊戲": {"Minecraft": ["mc"], "A": ["a"]}}}
+        result = match_category_and_game("banana", "live", settings)
+        assert result["game"] == "A"
+        assert result["matchedKeywords"] == ["a", "A"]
+
+    def test_overlapping_substring_keywords(self):
+        """重疊的子字串關鍵字都會命中"""
+        settings = {"live": {"節目": {"企劃": ["初配信", "配信", "信"]}}}
+        result = match_category_and_game("初配信", "live", settings)
+        assert result["matchedPairs"][0]["hitKeywords"] == ["初配信", "配信", "信"]
+
+    def test_empty_keyword_always_matches(self):
+        settings = {"live": {"雜談": {"雜談": [""]}}}
+        result = match_category_and_game("任何標題", "live", settings)
+        assert result["matchedCategories"] == ["雜談"]
+        assert result["matchedKeywords"] == [""]
+
+    def test_compiled_once_per_settings(self):
+        from utils import categorizer
+
+        settings = {"live": {"雜談": {"雜談": ["閒聊"]}}}
+        match_category_and_game("閒聊", "live", settings)
+        first = categorizer._get_compiled_category_settings(settings, "live")
+        match_category_and_game("閒聊 2", "live", settings)
+        assert categorizer._get_compiled_category_settings(settings, "live") is first
+
+    def test_broken_game_entry_after_hit_is_ignored(self):
+        """格式錯誤的遊戲設定在命中之後 → 不影響結果（與逐筆比對一致）"""
+        settings = {"live": {"遊戲": {"Minecraft": ["mc"], "Broken": "not_a_list"}}}
+        assert match_category_and_game("mc", "live", settings)["game"] == "Minecraft"
+
+    def test_broken_game_entry_before_hit_returns_default(self):
+        settings = {"live": {"遊戲": {"Broken": "not_a_list", "Minecraft": ["mc"]}}}
+        result = match_category_and_game("mc", "live", settings)
+        assert result["matchedCategories"] == ["其他"]
+        assert result["game"] is None
+
+
+# ═══════════════════════════════════════════════════════
+# classify_batch
+# ═══════════════════════════════════════════════════════
+
+
+class TestClassifyBatch:
+    """classify_batch 整批分類"""
+
+    def test_results_follow_input_order(self):
+        items = [("一邊閒聊一邊打 mc", "live"), ("閒聊影片", "影片"), ("無關", "直播檔")]
+        results = classify_batch(items, SAMPLE_SETTINGS)
+
+        assert [r.to_dict() for r in results] == [
+            match_category_and_game(title, vtype, SAMPLE_SETTINGS) for title, vtype in items
+        ]
+
+    def test_returns_records(self):
+        (result,) = classify_batch([("GeoGuessr 挑戰", "live")], SAMPLE_SETTINGS)
+        assert isinstance(result, ClassificationResult)
+        assert result.game == "GeoGuessr"
+        assert result.matched_categories == ["遊戲"]
+
+    def test_empty_items(self):
+        assert classify_batch([], SAMPLE_SETTINGS) == []
+
+    def test_bad_settings_fall_back_per_item(self):
+        results = classify_batch([("a", "live"), ("b", "videos")], None)
+        assert [r.matched_categories for r in results] == [["其他"], ["其他"]]
+
+    def test_broken_type_does_not_affect_other_types(self):
+        settings = {
+            "live": {"遊戲": {"Broken": "not_a_list"}},
+            "videos": {"雜談": {"雜談": ["閒聊"]}},
+        }
+        live, videos = classify_batch([("mc", "live"), ("閒聊", "videos")], settings)
+        assert live.matched_pairs == [{"main": "其他", "keyword": "", "hitKeywords": []}]
+        assert videos.matched_categories == ["雜談"]
+
+
+class TestSettingsFingerprint:
+    def test_same_content_same_fingerprint(self):
+        other = {"videos": SAMPLE_SETTINGS["videos"], "live": SAMPLE_SETTINGS["live"]}
+        assert settings_fingerprint(SAMPLE_SETTINGS) == settings_fingerprint(other)
+
+    def test_keyword_change_changes_fingerprint(self):
+        changed = {"live": {"遊戲": {"Minecraft": ["mc", "麥塊"]}}}
+        original = {"live": {"遊戲": {"Minecraft": ["mc"]}}}
+        assert settings_fingerprint(changed) != settings_fingerprint(original)
+
+
+class TestGameIndex:
+    """遊戲反向索引與 game_only 模式"""
+
+    GAME_SETTINGS = {
+        "live": {
+            "雜談": {"雜談": ["閒聊"]},
+            "遊戲": {
+                "Minecraft": ["mc", "麥塊"],
+                "Minecraft Dungeons": ["dungeons", "mc"],
+                "Apex Legends": ["apex"],
+            },
+            "其他": {},
+        }
+    }
+
+    def test_earliest_game_wins_regardless_of_title_order(self):
+        result = match_category_and_game("apex 之後玩麥塊", "live", self.GAME_SETTINGS)
+        assert result["game"] == "Minecraft"
+        assert result["matchedPairs"][-1]["hitKeywords"] == ["麥塊"]
+
+    def test_shared_keyword_goes_to_first_game(self):
+        result = match_category_and_game("mc dungeons", "live", self.GAME_SETTINGS)
+        assert result["game"] == "Minecraft"
+
+    def test_game_only_skips_other_categories(self):
+        (result,) = classify_batch([("閒聊 apex", "live")], self.GAME_SETTINGS, game_only=True)
+        assert result.game == "Apex Legends"
+        assert result.matched_categories == ["遊戲"]
+        assert result.matched_keywords == ["apex"]
+
+    def test_game_only_no_other_fallback(self):
+        (result,) = classify_batch([("閒聊", "live")], self.GAME_SETTINGS, game_only=True)
+        assert result.game is None
+        assert result.matched_categories == []
+
+    def test_game_only_matches_full_mode_game(self):
+        titles = [("apex 之後玩麥塊", "live"), ("mc dungeons", "live"), ("閒聊", "live")]
+        full = classify_batch(titles, self.GAME_SETTINGS)
+        game_only = classify_batch(titles, self.GAME_SETTINGS, game_only=True)
+        assert [r.game for r in full] == [r.game for r in game_only]
@@ -4,7 +4,10 @@ category_counter 測試：分類計數、重複去除、非法輸入跳過
 
 from datetime import datetime
 
-from services.video_analyzer.category_counter import count_category_counts
+from services.video_analyzer.category_counter import (
+    compute_category_delta,
+    count_category_counts,
+)
 
 
 def _make_video(matched_categories):
@@ -91,3 +94,20 @@ class TestCountCategoryCounts:
         assert "updatedAt" in result
         # 能成功解析表示格式正確
         datetime.fromisoformat(result["updatedAt"])
+
+
+class TestComputeCategoryDelta:
+    """compute_category_delta() 差值計算"""
+
+    def test_added_only(self):
+        delta = compute_category_delta([_make_video(["雜談", "遊戲"])], [])
+        assert delta == {"talk": 1, "game": 1, "music": 0, "show": 0, "all": 1}
+
+    def test_replaced_video_moves_between_categories(self):
+        """影片被覆寫後從遊戲改為雜談 → game -1、talk +1、all 不變"""
+        delta = compute_category_delta([_make_video(["雜談"])], [_make_video(["遊戲"])])
+        assert delta == {"talk": 1, "game": -1, "music": 0, "show": 0, "all": 0}
+
+    def test_unmapped_categories_ignored(self):
+        delta = compute_category_delta([_make_video(["其他"])], [])
+        assert delta["all"] == 0
@@ -0,0 +1,110 @@
+"""
+category_counts_updater 測試：寫入影片後的 category_counts 增量更新
+"""
+
+from unittest.mock import MagicMock, patch
+
+_MOD = "services.video_analyzer.category_counts_updater"
+
+SETTINGS = {"live": {"雜談": {"雜談": ["閒聊"]}, "遊戲": {"Minecraft": ["mc"]}}}
+
+
+def _video(video_id, title):
+    return {
+        "videoId": video_id,
+        "title": title,
+        "publishDate": "2025-01-06T02:00:00+00:00",
+        "duration": 3600,
+        "type": "直播檔",
+    }
+
+
+class TestUpdateCategoryCountsAfterWrite:
+    @patch(f"{_MOD}.recount_category_counts")
+    @patch(f"{_MOD}.apply_category_counts_delta", return_value=True)
+    @patch(f"{_MOD}.get_compiled_settings", return_value=SETTINGS)
+    def test_applies_delta_from_written_and_replaced(self, _settings, mock_apply, mock_recount):
+        from services.video_analyzer.category_counts_updater import (
+            update_category_counts_after_write,
+        )
+
+        write_result = {
+            "written_videos": [_video("v1", "閒聊配信"), _video("v2", "mc 生存")],
+            "replaced_videos": [_video("v2", "閒聊")],
+        }
+        update_category_counts_after_write(MagicMock(), "UC001", write_result)
+
+        delta = mock_apply.call_args[0][2]
+        assert delta == {"talk": 0, "game": 1, "music": 0, "show": 0, "all": 1}
+        mock_recount.assert_not_called()
+
+    @patch(f"{_MOD}.recount_category_counts")
+    @patch(f"{_MOD}.apply_category_counts_delta", return_value=True)
+    @patch(f"{_MOD}.get_compiled_settings", return_value=SETTINGS)
+    def test_legacy_replaced_item_without_type_is_skipped(
+        self, _settings, mock_apply, mock_recount
+    ):
+        """舊格式影片不在完整重算的統計內，覆寫時也不扣除"""
+        from services.video_analyzer.category_counts_updater import (
+            update_category_counts_after_write,
+        )
+
+        legacy = {"videoId": "v1", "title": "閒聊", "publishDate": "2024-01-01T00:00:00+00:00"}
+        write_result = {"written_videos": [_video("v1", "閒聊配信")], "replaced_videos": [legacy]}
+        update_category_counts_after_write(MagicMock(), "UC001", write_result)
+
+        delta = mock_apply.call_args[0][2]
+        assert delta == {"talk": 1, "game": 0, "music": 0, "show": 0, "all": 1}
+        mock_recount.assert_not_called()
+
+    @patch(f"{_MOD}.recount_category_counts")
+    @patch(f"{_MOD}.apply_category_counts_delta", return_value=False)
+    @patch(f"{_MOD}.get_compiled_settings", return_value=SETTINGS)
+    def test_stale_counts_trigger_full_recount(self, _settings, _apply, mock_recount):
+        from services.video_analyzer.category_counts_updater import (
+            update_category_counts_after_write,
+        )
+
+        db = MagicMock()
+        update_category_counts_after_write(
+            db, "UC001", {"written_videos": [_video("v1", "閒聊")], "replaced_videos": []}
+        )
+
+        mock_recount.assert_called_once_with(db, "UC001")
+
+    @patch(f"{_MOD}.get_compiled_settings")
+    def test_nothing_written_is_noop(self, mock_settings):
+        from services.video_analyzer.category_counts_updater import (
+            update_category_counts_after_write,
+        )
+
+        update_category_counts_after_write(MagicMock(), "UC001", {"videos_written": 0})
+        mock_settings.assert_not_called()
+
+
+class TestRecountCategoryCounts:
+    @patch(f"{_MOD}.write_category_counts_to_channel_index_batch")
+    @patch(f"{_MOD}.get_classified_videos")
+    @patch(f"{_MOD}.get_compiled_settings", return_value=SETTINGS)
+    def test_writes_counts_with_fingerprint(self, _settings, mock_classified, mock_write):
+        from services.video_analyzer.category_counts_updater import recount_category_counts
+        from utils.categorizer import settings_fingerprint
+
+        mock_classified.return_value = [{"matchedCategories": ["雜談"]}]
+        db = MagicMock()
+
+        counts = recount_category_counts(db, "UC001")
+
+        assert counts["talk"] == 1
+        args = mock_write.call_args[0]
+        assert args[:2] == (db, "UC001")
+        assert args[3] == settings_fingerprint(SETTINGS)
+
+    @patch(f"{_MOD}.write_category_counts_to_channel_index_batch")
+    @patch(f"{_MOD}.get_classified_videos", return_value=[])
+    @patch(f"{_MOD}.get_compiled_settings", return_value=SETTINGS)
+    def test_empty_counts_not_written(self, _settings, _classified, mock_write):
+        from services.video_analyzer.category_counts_updater import recount_category_counts
+
+        recount_category_counts(MagicMock(), "UC001")
+        mock_write.assert_not_called()
@@ -93,14 +93,15 @@ class TestWriteCategoryCountsToChannelIndexBatch:
         ]
         mock_db.collection.return_value.stream.return_value = batch_docs
 
-        # mock transaction 讓第一次回 False，第二次回 True
+        # 定位表直接指向 batch_1，只需一次 transaction
         with patch(
             "services.firestore.category_writer._update_category_counts_in_transaction"
         ) as mock_update:
-            mock_update.side_effect = [False, True]
+            mock_update.return_value = True
             write_category_counts_to_channel_index_batch(mock_db, "UC001", {"遊戲": 5})
 
-        assert mock_update.call_count == 2
+        assert mock_update.call_count == 1
+        mock_db.collection.return_value.document.assert_any_call("batch_1")
 
     def test_channel_not_found_in_any_batch(self, mock_db):
         """所有 batch 都找不到頻道時記錄 warning"""
@@ -147,3 +148,57 @@ class TestWriteCategoryCountsToChannelIndexBatch:
 
         # metadata 文件應被過濾，只處理 batch_0
         assert mock_update.call_count == 1
+
+
+class TestApplyCategoryDeltaInTransaction:
+    """_apply_category_delta_in_transaction 的增量套用邏輯"""
+
+    def _doc_ref(self, channels):
+        doc_ref = MagicMock()
+        doc_ref.get.return_value = _make_batch_doc("batch_0", channels)
+        return doc_ref
+
+    def test_applies_delta_when_fingerprint_matches(self):
+        from services.firestore.category_writer import _apply_category_delta_in_transaction
+
+        channels = [
+            {
+                "channel_id": "UC001",
+                "category_counts": {"talk": 3, "game": 2, "music": 0, "show": 0, "all": 4},
+                "category_counts_fingerprint": "fp1",
+            }
+        ]
+        tx = MagicMock()
+        delta = {"talk": 1, "game": -1, "music": 0, "show": 0, "all": 0}
+
+        outcome = _apply_category_delta_in_transaction.to_wrap(
+            tx, self._doc_ref(channels), "UC001", delta, "fp1"
+        )
+
+        assert outcome == "applied"
+        counts = channels[0]["category_counts"]
+        assert (counts["talk"], counts["game"], counts["all"]) == (4, 1, 4)
+        assert "updatedAt" in counts
+        tx.set.assert_called_once()
+
+    def test_fingerprint_mismatch_is_stale(self):
+        from services.firestore.category_writer import _apply_category_delta_in_transaction
+
+        channels = [{"channel_id": "UC001", "category_counts": {"all": 1}}]
+        tx = MagicMock()
+
+        outcome = _apply_category_delta_in_transaction.to_wrap(
+            tx, self._doc_ref(channels), "UC001", {"all": 1}, "fp1"
+        )
+
+        assert outcome == "stale"
+        tx.set.assert_not_called()
+
+    def test_channel_not_in_batch(self):
+        from services.firestore.category_writer import _apply_category_delta_in_transaction
+
+        tx = MagicMock()
+        outcome = _apply_category_delta_in_transaction.to_wrap(
+            tx, self._doc_ref([{"channel_id": "UC999"}]), "UC001", {}, "fp1"
+        )
+        assert outcome is None
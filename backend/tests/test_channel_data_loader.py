@@ -2,35 +2,64 @@
 channel_data_loader 測試：載入頻道設定與影片
 """
 
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
-from utils.channel_data_loader import load_channel_settings_and_videos
+import pytest
+from google.api_core.exceptions import GoogleAPIError
+
+import utils.channel_data_loader as loader
+from utils.breaker_instances import firestore_breaker
+from utils.channel_data_loader import load_channel_settings_and_videos, stream_channel_data
+from utils.circuit_breaker import CircuitOpenError
+
+
+def _snapshot(channel_id, data):
+    snap = MagicMock()
+    snap.reference.path = f"channel_data/{channel_id}/settings/config"
+    snap.exists = data is not None
+    snap.to_dict.return_value = data
+    return snap
+
+
+def _mock_db(configs, videos):
+    """
+    configs: {channel_id: settings dict | None}（None 代表文件不存在）
+    videos: {channel_id: [video, ...]}
+    """
+    db = MagicMock()
+    db.get_all.side_effect = lambda refs: [
+        _snapshot(ref.path.split("/")[1], configs.get(ref.path.split("/")[1])) for ref in refs
+    ]
+    db.document.side_effect = lambda path: MagicMock(path=path)
+
+    def collection(name):
+        col = MagicMock()
+
+        def document(channel_id):
+            doc = MagicMock()
+            batch = MagicMock()
+            batch.to_dict.return_value = {"videos": videos.get(channel_id, [])}
+            doc.collection.return_value.stream.return_value = [batch]
+            return doc
+
+        col.document.side_effect = document
+        return col
+
+    db.collection.side_effect = collection
+    return db
 
 
 class TestLoadChannelSettingsAndVideos:
     def test_loads_settings_and_videos(self):
-        db = MagicMock()
-
-        # mock 設定 document
-        config_doc = MagicMock()
-        config_doc.exists = True
-        config_doc.to_dict.return_value = {"categories": ["game1"]}
-        db.collection("channel_data").document("UC001").collection("settings").document(
-            "config"
-        ).get.return_value = config_doc
-
-        # mock 影片 batch
-        vid_doc = MagicMock()
-        vid_doc.to_dict.return_value = {"videos": [{"videoId": "v1", "title": "test"}]}
-        db.collection("channel_data").document("UC001").collection(
-            "videos_batch"
-        ).stream.return_value = [vid_doc]
+        db = _mock_db(
+            {"UC001": {"videos": {"雜談": ["聊天"]}}},
+            {"UC001": [{"videoId": "v1", "title": "test"}]},
+        )
 
         channels = [{"channel_id": "UC001"}]
         settings_map, videos_map = load_channel_settings_and_videos(db, channels)
 
-        assert "UC001" in settings_map
-        assert "UC001" in videos_map
+        assert settings_map["UC001"].base["videos"] == {"雜談": ["聊天"]}
         assert len(videos_map["UC001"]) == 1
 
     def test_skips_channels_without_id(self):
@@ -40,20 +69,84 @@ class TestLoadChannelSettingsAndVideos:
         assert len(settings_map) == 0
 
     def test_handles_missing_config(self):
-        db = MagicMock()
-
-        config_doc = MagicMock()
-        config_doc.exists = False
-        db.collection("channel_data").document("UC001").collection("settings").document(
-            "config"
-        ).get.return_value = config_doc
-
-        db.collection("channel_data").document("UC001").collection(
-            "videos_batch"
-        ).stream.return_value = []
+        db = _mock_db({"UC001": None}, {})
 
         channels = [{"channel_id": "UC001"}]
         settings_map, videos_map = load_channel_settings_and_videos(db, channels)
 
-        assert settings_map["UC001"] is not None  # merge 後仍有值
+        assert settings_map["UC001"] is not None
+        assert not settings_map["UC001"]
         assert videos_map["UC001"] == []
+
+    @patch(
+        "utils.compiled_settings.fetch_global_alias_map_with_etag",
+        return_value=({"Minecraft": ["mc"]}, "etag1"),
+    )
+    def test_channels_share_alias_table(self, _mock_fetch):
+        db = MagicMock()
+        config_doc = MagicMock()
+        config_doc.exists = True
+        config_doc.to_dict.return_value = {}
+        db.collection.return_value.document.return_value.collection.return_value.document.return_value.get.return_value = config_doc
+        db.collection.return_value.document.return_value.collection.return_value.stream.return_value = []
+
+        channels = [{"channel_id": "UC001"}, {"channel_id": "UC002"}]
+        settings_map, _ = load_channel_settings_and_videos(db, channels)
+
+        assert settings_map["UC001"].alias_table is settings_map["UC002"].alias_table
+        assert settings_map["UC001"].to_dict()["live"]["遊戲"] == {"Minecraft": ["mc"]}
+
+
+# ═══════════════════════════════════════════════════════
+# stream_channel_data
+# ═══════════════════════════════════════════════════════
+
+
+class TestStreamChannelData:
+    def test_configs_loaded_with_batched_get_all(self, monkeypatch):
+        monkeypatch.setattr(loader, "CONFIG_BATCH_SIZE", 2)
+        channel_ids = ["UC001", "UC002", "UC003"]
+        db = _mock_db({cid: {"videos": {}} for cid in channel_ids}, {})
+
+        results = list(stream_channel_data(db, [{"channel_id": cid} for cid in channel_ids]))
+
+        assert sorted(r.channel_id for r in results) == channel_ids
+        assert db.get_all.call_count == 2
+        db.collection.return_value.document.return_value.get.assert_not_called()
+
+    def test_duplicate_channels_loaded_once(self):
+        db = _mock_db({"UC001": {}}, {"UC001": [{"videoId": "v1"}]})
+
+        results = list(stream_channel_data(db, [{"channel_id": "UC001"}] * 3))
+
+        assert [r.channel_id for r in results] == ["UC001"]
+
+    def test_reports_timings(self):
+        db = _mock_db({"UC001": {}, "UC002": {}}, {"UC001": [{"videoId": "v1"}] * 3})
+        timings: dict = {}
+
+        list(
+            stream_channel_data(
+                db, [{"channel_id": "UC001"}, {"channel_id": "UC002"}], timings=timings
+            )
+        )
+
+        assert timings["channels"] == 2
+        assert timings["videos"] == 3
+        assert {"configs", "videos_wait", "total"} <= timings.keys()
+
+    def test_breaker_open_aborts(self):
+        db = _mock_db({"UC001": {}}, {})
+        with patch.object(firestore_breaker, "allow_request", return_value=False):
+            with pytest.raises(CircuitOpenError):
+                list(stream_channel_data(db, [{"channel_id": "UC001"}]))
+        db.get_all.assert_not_called()
+
+    def test_stream_error_records_failure_and_propagates(self):
+        db = _mock_db({"UC001": {}}, {})
+        db.collection.side_effect = GoogleAPIError("boom")
+
+        with patch.object(firestore_breaker, "record_failure") as mock_failure:
+            with pytest.raises(GoogleAPIError):
+                list(stream_channel_data(db, [{"channel_id": "UC001"}]))
+        mock_failure.assert_called()
@@ -0,0 +1,210 @@
+"""
+channel_directory 測試：channel_index_batch 程序內快照
+"""
+
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from google.api_core.exceptions import GoogleAPIError
+
+import services.firestore.channel_directory as mod
+from services.firestore.channel_directory import (
+    get_channel_directory,
+    get_channel_directory_stats,
+    invalidate_channel_directory,
+    update_channel_directory_entries,
+)
+
+
+def _batch_doc(batch_id, channels):
+    doc = MagicMock()
+    doc.id = batch_id
+    doc.to_dict.return_value = {"channels": channels}
+    return doc
+
+
+def _mock_db(batches):
+    db = MagicMock()
+    db.collection.return_value.stream.side_effect = lambda: [
+        _batch_doc(batch_id, channels) for batch_id, channels in batches
+    ]
+    return db
+
+
+BATCHES = [
+    (
+        "batch_0",
+        [
+            {"channel_id": "UC_A", "name": "A", "enabled": True},
+            {"channel_id": "UC_B", "name": "B", "enabled": False},
+        ],
+    ),
+    (
+        "batch_1",
+        [
+            {"channel_id": "UC_C", "name": "C"},
+            {"name": "沒有 id"},
+        ],
+    ),
+]
+
+
+class TestChannelDirectoryIndexes:
+    def test_indexes(self):
+        directory = get_channel_directory(_mock_db(BATCHES))
+
+        assert len(directory) == 4
+        assert directory.batch_ids == ["batch_0", "batch_1"]
+        assert directory.get("UC_C")["name"] == "C"
+        assert directory.get("UC_X") is None
+        assert dict(directory.batch_of) == {"UC_A": "batch_0", "UC_B": "batch_0", "UC_C": "batch_1"}
+        assert directory.enabled_ids == {"UC_A"}
+        # 缺少 enabled 欄位視為啟用，只有明確停用才列入
+        assert directory.disabled_ids == {"UC_B"}
+
+    def test_indexes_are_read_only(self):
+        directory = get_channel_directory(_mock_db(BATCHES))
+        with pytest.raises(TypeError):
+            directory.batch_of["UC_Z"] = "batch_9"  # type: ignore[index]
+
+
+class TestChannelDirectoryCache:
+    def test_second_read_hits_cache(self):
+        db = _mock_db(BATCHES)
+        first = get_channel_directory(db)
+        assert get_channel_directory(db) is first
+
+        assert db.collection.return_value.stream.call_count == 1
+        stats = get_channel_directory_stats()
+        assert (stats["hits"], stats["misses"]) == (1, 1)
+        assert stats["loaded"] is True
+        assert stats["channels"] == 4
+
+    def test_ttl_expiry_reloads(self, monkeypatch):
+        db = _mock_db(BATCHES)
+        get_channel_directory(db)
+        monkeypatch.setattr(mod, "_DIRECTORY_TTL", 0)
+        get_channel_directory(db)
+
+        assert db.collection.return_value.stream.call_count == 2
+
+    def test_invalidate_reloads(self):
+        db = _mock_db(BATCHES)
+        get_channel_directory(db)
+        invalidate_channel_directory()
+        get_channel_directory(db)
+
+        assert db.collection.return_value.stream.call_count == 2
+        assert get_channel_directory_stats()["invalidations"] == 1
+
+    def test_force_refresh_reloads(self):
+        db = _mock_db(BATCHES)
+        get_channel_directory(db)
+        get_channel_directory(db, force_refresh=True)
+
+        assert db.collection.return_value.stream.call_count == 2
+
+    def test_different_client_not_shared(self):
+        get_channel_directory(_mock_db(BATCHES))
+        other = get_channel_directory(_mock_db([]))
+        assert len(other) == 0
+
+    def test_load_error_propagates_and_is_not_cached(self):
+        db = MagicMock()
+        db.collection.return_value.stream.side_effect = GoogleAPIError("boom")
+
+        with pytest.raises(GoogleAPIError):
+            get_channel_directory(db)
+        assert get_channel_directory_stats()["loaded"] is False
+
+    def test_concurrent_misses_load_once(self):
+        release = threading.Event()
+        db = MagicMock()
+
+        def slow_stream():
+            release.wait(timeout=5)
+            time.sleep(0.01)
+            return [_batch_doc("batch_0", [{"channel_id": "UC_A"}])]
+
+        db.collection.return_value.stream.side_effect = slow_stream
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(get_channel_directory(db)))
+            for _ in range(5)
+        ]
+        for t in threads:
+            t.start()
+        release.set()
+        for t in threads:
+            t.join(timeout=5)
+
+        assert db.collection.return_value.stream.call_count == 1
+        assert len({id(r) for r in results}) == 1
+
+
+# ═══════════════════════════════════════════════════════
+# 讀取端共用 / 寫入端更新
+# ═══════════════════════════════════════════════════════
+
+
+class TestSharedReaders:
+    def test_readers_share_one_read(self):
+        from services.heatmap.metadata_loader import build_channel_metadata_lookup
+        from services.trending.channel_info_loader import load_channel_info_index
+
+        db = _mock_db(BATCHES)
+        lookup = build_channel_metadata_lookup(db)
+        info = load_channel_info_index(db)
+
+        assert set(lookup) == {"UC_A", "UC_B", "UC_C"}
+        assert set(info) == {"UC_A", "UC_C"}
+        assert db.collection.return_value.stream.call_count == 1
+
+    @patch("services.firestore.active_time_writer._update_active_time_in_transaction")
+    def test_active_time_writer_updates_entry_in_place(self, mock_tx):
+        from datetime import UTC, datetime
+
+        from services.firestore.active_time_writer import (
+            write_active_time_all_to_channel_index_batch,
+        )
+
+        db = _mock_db(BATCHES)
+        before = get_channel_directory(db)
+        mock_tx.return_value = True
+
+        write_active_time_all_to_channel_index_batch(
+            db, "UC_A", [1, 2, 3, 4], 10, datetime.now(UTC)
+        )
+
+        # 快照仍有效，不重新讀取；新快照帶有寫入的值
+        after = get_channel_directory(db)
+        assert db.collection.return_value.stream.call_count == 1
+        assert after.get("UC_A")["active_time_all"]["totalCount"] == 10
+        assert "active_time_all" not in before.get("UC_A")
+        assert get_channel_directory_stats()["entry_updates"] == 1
+
+
+class TestEntryUpdates:
+    def test_copy_on_write_keeps_other_entries_shared(self):
+        before = get_channel_directory(_mock_db(BATCHES))
+        update_channel_directory_entries({"UC_C": {"category_counts": {"遊戲": 3}}})
+        after = mod._state[1]
+
+        assert after.get("UC_C")["category_counts"] == {"遊戲": 3}
+        assert after.get("UC_C")["name"] == "C"
+        assert "category_counts" not in before.get("UC_C")
+        assert after.get("UC_A") is before.get("UC_A")
+        assert after.batches[0][1] is before.batches[0][1]
+        assert after.batch_of["UC_C"] == "batch_1"
+        assert after.disabled_ids == before.disabled_ids
+
+    def test_unknown_channel_or_unloaded_snapshot_is_noop(self):
+        update_channel_directory_entries({"UC_A": {"name": "x"}})
+        assert get_channel_directory_stats()["loaded"] is False
+
+        before = get_channel_directory(_mock_db(BATCHES))
+        update_channel_directory_entries({"UC_X": {"name": "x"}})
+        assert mod._state[1] is before
+        assert get_channel_directory_stats()["entry_updates"] == 0
@@ -7,7 +7,7 @@ GoogleAPIError 場景改用 mock_db 避免 emulator 干擾。
 
 from unittest.mock import MagicMock
 
-from google.api_core.exceptions import ServiceUnavailable
+from google.api_core.exceptions import DeadlineExceeded, ServiceUnavailable
 
 from services.firestore.channel_loader import (
     load_all_channels_from_index_list,
@@ -189,3 +189,11 @@ class TestLoadVideosForChannel:
 
         result = load_videos_for_channel(mock_db, "UC_FAIL")
         assert result == []
+
+    def test_timeout_passed_to_stream(self):
+        """timeout 傳給串流讀取，呼叫端放棄等待後讀取也會結束"""
+        mock_db = MagicMock()
+        mock_db.collection.return_value.stream.side_effect = DeadlineExceeded("too slow")
+
+        assert load_videos_for_channel(mock_db, "UC_SLOW", timeout=5) == []
+        mock_db.collection.return_value.stream.assert_called_once_with(timeout=5)
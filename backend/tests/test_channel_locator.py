@@ -0,0 +1,152 @@
+"""
+channel_locator 測試：channel_id → channel_index_batch 定位表
+"""
+
+from unittest.mock import MagicMock, patch
+
+from services.firestore import channel_locator
+from services.firestore.channel_locator import (
+    LOCATOR_DOC_PATH,
+    apply_to_channel_batch,
+    get_channel_locator,
+    locate_channel_batch,
+    rebuild_channel_locator,
+    record_channel_batch,
+)
+
+
+def _batch_doc(batch_id, channel_ids):
+    doc = MagicMock()
+    doc.id = batch_id
+    doc.to_dict.return_value = {"channels": [{"channel_id": cid} for cid in channel_ids]}
+    return doc
+
+
+def _mock_db(locator=None, batches=()):
+    """locator：定位表內容（None 代表文件不存在）；batches：[(batch_id, [channel_id, ...])]"""
+    db = MagicMock()
+    locator_doc = MagicMock()
+    locator_doc.exists = locator is not None
+    locator_doc.to_dict.return_value = {"channels": locator or {}}
+    db.document.return_value.get.return_value = locator_doc
+    db.collection.return_value.stream.side_effect = lambda: [
+        _batch_doc(batch_id, ids) for batch_id, ids in batches
+    ]
+    return db
+
+
+class TestGetChannelLocator:
+    def test_loads_stored_locator_once(self):
+        db = _mock_db(locator={"UC001": "batch_1"})
+
+        assert get_channel_locator(db) == {"UC001": "batch_1"}
+        assert get_channel_locator(db) == {"UC001": "batch_1"}
+
+        db.document.assert_called_with(LOCATOR_DOC_PATH)
+        assert db.document.return_value.get.call_count == 1
+        db.collection.return_value.stream.assert_not_called()
+
+    def test_bootstraps_from_batches_when_missing(self):
+        db = _mock_db(locator=None, batches=[("batch_0", ["UC001"]), ("batch_1", ["UC002"])])
+
+        assert get_channel_locator(db) == {"UC001": "batch_0", "UC002": "batch_1"}
+        written = db.document.return_value.set.call_args[0][0]
+        assert written["channels"] == {"UC001": "batch_0", "UC002": "batch_1"}
+
+    def test_ignores_malformed_entries(self):
+        db = _mock_db(locator={"UC001": "batch_1", "UC002": 3})
+        assert get_channel_locator(db) == {"UC001": "batch_1"}
+
+
+class TestLocateChannelBatch:
+    def test_hit(self):
+        db = _mock_db(locator={"UC001": "batch_1"})
+        assert locate_channel_batch(db, "UC001") == "batch_1"
+        db.collection.return_value.stream.assert_not_called()
+
+    def test_miss_relocates_and_records(self):
+        db = _mock_db(locator={"UC001": "batch_1"}, batches=[("batch_2", ["UC002"])])
+
+        assert locate_channel_batch(db, "UC002") == "batch_2"
+        db.document.return_value.set.assert_called_once()
+        assert db.document.return_value.set.call_args.kwargs == {"merge": True}
+        # 已寫回程序內快取，不需再次定位
+        assert locate_channel_batch(db, "UC002") == "batch_2"
+        assert db.collection.return_value.stream.call_count == 1
+
+    def test_unknown_channel(self):
+        db = _mock_db(locator={"UC001": "batch_1"}, batches=[("batch_1", ["UC001"])])
+        assert locate_channel_batch(db, "UC999") is None
+
+    def test_unknown_channel_cached_without_rereading_directory(self):
+        db = _mock_db(locator={"UC001": "batch_1"}, batches=[("batch_1", ["UC001"])])
+
+        assert locate_channel_batch(db, "UC999") is None
+        assert locate_channel_batch(db, "UC999") is None
+        assert db.collection.return_value.stream.call_count == 1
+
+        # 查無快取到期後重新定位，快照尚新時不重新讀取 collection
+        with patch.object(channel_locator, "_UNKNOWN_TTL", 0):
+            locate_channel_batch(db, "UC998")
+            locate_channel_batch(db, "UC998")
+        assert db.collection.return_value.stream.call_count == 1
+
+    def test_old_directory_snapshot_is_refreshed(self):
+        db = _mock_db(locator={"UC001": "batch_1"}, batches=[("batch_1", ["UC001"])])
+
+        with (
+            patch.object(channel_locator, "_UNKNOWN_TTL", 0),
+            patch.object(channel_locator, "_RELOCATE_MIN_AGE", 0),
+        ):
+            locate_channel_batch(db, "UC999")
+            locate_channel_batch(db, "UC999")
+        assert db.collection.return_value.stream.call_count == 2
+
+    def test_recorded_channel_clears_unknown_cache(self):
+        db = _mock_db(locator={"UC001": "batch_1"}, batches=[("batch_1", ["UC001"])])
+        assert locate_channel_batch(db, "UC002") is None
+
+        record_channel_batch(db, "UC002", "batch_1")
+        assert locate_channel_batch(db, "UC002") == "batch_1"
+
+
+class TestApplyToChannelBatch:
+    def test_single_attempt_when_locator_correct(self):
+        db = _mock_db(locator={"UC001": "batch_1"})
+        attempt = MagicMock(return_value=True)
+
+        assert apply_to_channel_batch(db, "UC001", attempt) == ("batch_1", True)
+        attempt.assert_called_once_with("batch_1")
+
+    def test_stale_locator_relocates_and_retries(self):
+        db = _mock_db(locator={"UC001": "batch_0"}, batches=[("batch_3", ["UC001"])])
+        attempt = MagicMock(side_effect=[None, True])
+
+        assert apply_to_channel_batch(db, "UC001", attempt) == ("batch_3", True)
+        assert [c.args[0] for c in attempt.call_args_list] == ["batch_0", "batch_3"]
+        assert get_channel_locator(db)["UC001"] == "batch_3"
+
+    def test_not_found_anywhere(self):
+        db = _mock_db(locator={"UC001": "batch_0"}, batches=[("batch_0", ["UC001"])])
+        attempt = MagicMock(return_value=None)
+
+        assert apply_to_channel_batch(db, "UC001", attempt) is None
+        attempt.assert_called_once_with("batch_0")
+
+
+class TestMaintenance:
+    def test_record_updates_cache_without_reload(self):
+        db = _mock_db(locator={"UC001": "batch_1"})
+        before = get_channel_locator(db)
+        record_channel_batch(db, "UC002", "batch_2")
+
+        assert get_channel_locator(db) == {"UC001": "batch_1", "UC002": "batch_2"}
+        assert before == {"UC001": "batch_1"}  # 舊參照不受影響
+        assert db.document.return_value.get.call_count == 1
+
+    def test_rebuild_overwrites(self):
+        db = _mock_db(locator={"UC001": "batch_1"})
+        rebuild_channel_locator(db, {"UC009": "batch_0"})
+
+        assert get_channel_locator(db) == {"UC009": "batch_0"}
+        assert "merge" not in db.document.return_value.set.call_args.kwargs
@@ -0,0 +1,118 @@
+"""
+classification_store 測試：videos_classified 分類結果讀寫
+"""
+
+from unittest.mock import MagicMock, patch
+
+from google.api_core.exceptions import GoogleAPIError
+
+from services.firestore.classification_store import (
+    load_classified_entries,
+    result_to_entry,
+    schedule_classified_writes,
+    video_signature,
+    wait_for_classified_writes,
+    write_classified_entries,
+)
+from utils.breaker_instances import firestore_breaker
+from utils.categorizer import ClassificationResult
+
+
+def _mock_db_with_docs(docs):
+    db = MagicMock()
+    db.collection.return_value.document.return_value.collection.return_value.stream.return_value = [
+        MagicMock(id=doc_id, to_dict=lambda data=data: data) for doc_id, data in docs.items()
+    ]
+    return db
+
+
+class TestVideoSignature:
+    def test_changes_with_title_and_type(self):
+        base = video_signature("標題", "直播檔")
+        assert base == video_signature("標題", "直播檔")
+        assert base != video_signature("標題2", "直播檔")
+        assert base != video_signature("標題", "影片")
+
+
+class TestLoadClassifiedEntries:
+    def test_only_matching_fingerprint_returned(self):
+        db = _mock_db_with_docs(
+            {
+                "batch_0": {"fingerprint": "fp1", "videos": {"v1": {"sig": "a"}}},
+                "batch_1": {"fingerprint": "old", "videos": {"v2": {"sig": "b"}}},
+            }
+        )
+        assert load_classified_entries(db, "UC001", "fp1") == {"batch_0": {"v1": {"sig": "a"}}}
+
+    def test_batch_ids_read_with_get_all_and_cached(self):
+        db = MagicMock()
+        db.get_all.return_value = [
+            MagicMock(
+                id="batch_0", exists=True, to_dict=lambda: {"fingerprint": "fp1", "videos": {}}
+            ),
+            MagicMock(id="batch_1", exists=False),
+        ]
+
+        assert load_classified_entries(db, "UC001", "fp1", ["batch_0", "batch_1"]) == {
+            "batch_0": {}
+        }
+        load_classified_entries(db, "UC001", "fp1", ["batch_0", "batch_1"])
+
+        assert db.get_all.call_count == 1
+        db.collection.return_value.document.return_value.collection.return_value.stream.assert_not_called()
+
+    def test_fingerprint_change_reloads(self):
+        db = _mock_db_with_docs({"batch_0": {"fingerprint": "fp2", "videos": {"v1": {}}}})
+        load_classified_entries(db, "UC001", "fp1")
+
+        assert load_classified_entries(db, "UC001", "fp2") == {"batch_0": {"v1": {}}}
+
+
+class TestScheduleClassifiedWrites:
+    @patch("services.firestore.classification_store.write_classified_entries")
+    def test_writes_in_background_and_updates_cache(self, mock_write):
+        db = MagicMock()
+        schedule_classified_writes(db, "UC001", "fp1", {"batch_0": {"v1": {"sig": "a"}}})
+
+        assert wait_for_classified_writes(timeout=5)
+        mock_write.assert_called_once_with(db, "UC001", "batch_0", "fp1", {"v1": {"sig": "a"}})
+        # 之後的讀取直接使用快取
+        assert load_classified_entries(db, "UC001", "fp1") == {"batch_0": {"v1": {"sig": "a"}}}
+        db.collection.assert_not_called()
+
+    @patch("services.firestore.classification_store.write_classified_entries")
+    def test_write_error_does_not_stop_writer(self, mock_write):
+        mock_write.side_effect = [RuntimeError("boom"), True]
+        schedule_classified_writes(MagicMock(), "UC001", "fp1", {"b0": {}, "b1": {}})
+
+        assert wait_for_classified_writes(timeout=5)
+        assert mock_write.call_count == 2
+
+
+class TestWriteClassifiedEntries:
+    def test_writes_fingerprint_and_videos(self):
+        db = MagicMock()
+        entry = result_to_entry("sig", ClassificationResult(["雜談"], None, ["閒聊"], []))
+
+        assert write_classified_entries(db, "UC001", "batch_0", "fp1", {"v1": entry}) is True
+
+        doc_ref = db.collection.return_value.document.return_value.collection.return_value.document
+        doc_ref.assert_called_with("batch_0")
+        written = doc_ref.return_value.set.call_args[0][0]
+        assert written["fingerprint"] == "fp1"
+        assert written["videos"]["v1"]["matchedCategories"] == ["雜談"]
+
+    def test_error_returns_false(self):
+        db = MagicMock()
+        doc_ref = db.collection.return_value.document.return_value.collection.return_value.document
+        doc_ref.return_value.set.side_effect = GoogleAPIError("boom")
+
+        assert write_classified_entries(db, "UC001", "batch_0", "fp1", {}) is False
+
+    def test_breaker_open_skips_write(self):
+        for _ in range(firestore_breaker.failure_threshold):
+            firestore_breaker.record_failure()
+        db = MagicMock()
+
+        assert write_classified_entries(db, "UC001", "batch_0", "fp1", {}) is False
+        db.collection.assert_not_called()
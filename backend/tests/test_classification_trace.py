@@ -0,0 +1,163 @@
+"""
+classification_trace 測試：頻道追蹤啟用、trace_scope、ring buffer 與 categorizer 整合
+"""
+
+from unittest.mock import patch
+
+import utils.classification_trace as trace_mod
+from utils.categorizer import classify_batch, match_category_and_game
+from utils.classification_trace import (
+    clear_trace,
+    current_trace,
+    disable_channel_trace,
+    dump_trace,
+    enable_channel_trace,
+    get_traced_channels,
+    is_channel_traced,
+    record_trace,
+    trace_scope,
+)
+
+CID = "UCxxxxxxxxxxxxxxxxxxxxxx"
+
+SETTINGS = {
+    "live": {
+        "雜談": {"閒聊": ["聊天"]},
+        "遊戲": {"Minecraft": ["mc", "麥塊"]},
+    },
+}
+
+# ═══════════════════════════════════════════════════════
+# 頻道追蹤設定
+# ═══════════════════════════════════════════════════════
+
+
+class TestChannelTrace:
+    def test_enable_and_disable(self):
+        assert is_channel_traced(CID) is False
+
+        enable_channel_trace(CID, ttl=60)
+        assert is_channel_traced(CID) is True
+        assert 0 < get_traced_channels()[CID] <= 60
+
+        assert disable_channel_trace(CID) is True
+        assert is_channel_traced(CID) is False
+        assert disable_channel_trace(CID) is False
+
+    def test_ttl_is_clamped(self):
+        assert enable_channel_trace(CID, ttl=10**9) == trace_mod.MAX_CHANNEL_TRACE_TTL
+
+    def test_expired_channel_is_dropped(self):
+        with patch.object(trace_mod.time, "monotonic", return_value=1000.0):
+            enable_channel_trace(CID, ttl=10)
+        with patch.object(trace_mod.time, "monotonic", return_value=1011.0):
+            assert is_channel_traced(CID) is False
+            assert get_traced_channels() == {}
+
+
+# ═══════════════════════════════════════════════════════
+# trace_scope
+# ═══════════════════════════════════════════════════════
+
+
+class TestTraceScope:
+    def test_inactive_by_default(self):
+        with trace_scope(CID) as tracing:
+            assert tracing is False
+            assert current_trace() is None
+
+    def test_force_enables_for_scope_only(self):
+        with trace_scope(CID, force=True) as tracing:
+            assert tracing is True
+            assert current_trace() == CID
+        assert current_trace() is None
+
+    def test_enabled_channel_is_traced(self):
+        enable_channel_trace(CID)
+        with trace_scope(CID) as tracing:
+            assert tracing is True
+
+    def test_nested_scope_inherits_outer_trace(self):
+        with trace_scope(CID, force=True), trace_scope(CID) as inner:
+            assert inner is True
+
+    def test_sink_collects_scope_records(self):
+        sink: list[dict] = []
+        record_trace(CID, {"title": "before"})
+        with trace_scope(CID, force=True, sink=sink):
+            record_trace(CID, {"title": "inside"})
+
+        assert [e["title"] for e in sink] == ["inside"]
+        assert len(dump_trace()) == 2
+
+
+# ═══════════════════════════════════════════════════════
+# ring buffer
+# ═══════════════════════════════════════════════════════
+
+
+class TestRingBuffer:
+    def test_buffer_is_bounded(self):
+        for i in range(trace_mod.TRACE_BUFFER_SIZE + 5):
+            record_trace(CID, {"title": str(i)})
+
+        entries = dump_trace()
+        assert len(entries) == trace_mod.TRACE_BUFFER_SIZE
+        assert entries[0]["title"] == "5"
+
+    def test_dump_filters_by_channel_and_limit(self):
+        record_trace(CID, {"title": "a"})
+        record_trace("UCother", {"title": "b"})
+        record_trace(CID, {"title": "c"})
+
+        assert [e["title"] for e in dump_trace(CID)] == ["a", "c"]
+        assert [e["title"] for e in dump_trace(limit=1)] == ["c"]
+
+    def test_clear_by_channel(self):
+        record_trace(CID, {"title": "a"})
+        record_trace("UCother", {"title": "b"})
+
+        assert clear_trace(CID) == 1
+        assert [e["channelId"] for e in dump_trace()] == ["UCother"]
+        assert clear_trace() == 1
+
+
+# ═══════════════════════════════════════════════════════
+# categorizer 整合
+# ═══════════════════════════════════════════════════════
+
+
+class TestCategorizerIntegration:
+    def test_no_records_without_trace(self):
+        classify_batch([("麥塊 閒聊", "直播檔")], SETTINGS)
+        assert dump_trace() == []
+
+    def test_records_each_decision(self):
+        with trace_scope(CID, force=True):
+            classify_batch([("麥塊 閒聊", "直播檔"), ("今天吃什麼", "直播檔")], SETTINGS)
+
+        first, second = dump_trace(CID)
+        assert first["title"] == "麥塊 閒聊"
+        assert first["typeKey"] == "live"
+        assert first["hits"] == ["閒聊", "麥塊"]
+        assert first["game"] == "Minecraft"
+        assert first["matchedCategories"] == ["雜談", "遊戲"]
+        assert first["settingsFingerprint"]
+        assert first["error"] is False
+        assert second["hits"] == []
+
+    def test_game_only_records_game_hits(self):
+        with trace_scope(CID, force=True):
+            classify_batch([("麥塊 閒聊", "直播檔")], SETTINGS, game_only=True)
+
+        (entry,) = dump_trace()
+        assert entry["gameOnly"] is True
+        assert entry["hits"] == ["麥塊"]
+
+    def test_fallback_is_marked_as_error(self):
+        broken = {"live": {"遊戲": {"Bad": None}}}
+        with trace_scope(CID, force=True):
+            result = match_category_and_game("任意標題", "直播檔", broken)
+
+        assert result["matchedCategories"] == ["其他"]
+        assert dump_trace()[0]["error"] is True
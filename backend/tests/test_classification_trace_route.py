@@ -0,0 +1,87 @@
+"""
+classification trace route 測試：admin-only 分類追蹤啟用、dump 與重跑
+"""
+
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+from conftest import create_test_app
+
+from schemas import register_validation_error_handler
+from utils.classification_trace import is_channel_traced, record_trace
+
+ADMIN_KEY = os.environ["ADMIN_API_KEY"]
+ADMIN_HEADERS = {"Authorization": f"Bearer {ADMIN_KEY}"}
+CID = "UCxxxxxxxxxxxxxxxxxxxxxx"
+BASE = "/api/internal/classification-trace"
+
+
+@pytest.fixture
+def trace_client():
+    from routes.classification_trace_route import init_classification_trace_route
+
+    app = create_test_app()
+    register_validation_error_handler(app)
+    init_classification_trace_route(app, MagicMock())
+    return app.test_client()
+
+
+class TestAuth:
+    def test_no_auth_returns_401(self, trace_client):
+        assert trace_client.get(BASE).status_code == 401
+        assert trace_client.post(f"{BASE}/channels", json={"channel_id": CID}).status_code == 401
+
+
+class TestChannelToggle:
+    def test_enable_then_disable(self, trace_client):
+        resp = trace_client.post(
+            f"{BASE}/channels", json={"channel_id": CID, "ttl_seconds": 120}, headers=ADMIN_HEADERS
+        )
+        assert resp.status_code == 200
+        assert resp.get_json()["ttl_seconds"] == 120
+        assert is_channel_traced(CID)
+
+        resp = trace_client.delete(f"{BASE}/channels/{CID}", headers=ADMIN_HEADERS)
+        assert resp.get_json()["was_enabled"] is True
+        assert not is_channel_traced(CID)
+
+    def test_invalid_channel_id_returns_422(self, trace_client):
+        resp = trace_client.post(
+            f"{BASE}/channels", json={"channel_id": "bad"}, headers=ADMIN_HEADERS
+        )
+        assert resp.status_code == 422
+
+
+class TestDump:
+    def test_dump_and_clear(self, trace_client):
+        record_trace(CID, {"title": "a"})
+        record_trace("UCyyyyyyyyyyyyyyyyyyyyyy", {"title": "b"})
+
+        resp = trace_client.get(f"{BASE}?channel_id={CID}", headers=ADMIN_HEADERS)
+        data = resp.get_json()
+        assert data["count"] == 1
+        assert data["entries"][0]["title"] == "a"
+
+        resp = trace_client.delete(BASE, headers=ADMIN_HEADERS)
+        assert resp.get_json()["removed"] == 2
+
+
+class TestRun:
+    @patch("routes.classification_trace_route.get_classified_videos")
+    def test_run_returns_only_this_request_entries(self, mock_fetch, trace_client):
+        record_trace(CID, {"title": "old"})
+
+        def _fake_fetch(db, channel_id, start=None, end=None):
+            record_trace(channel_id, {"title": "new"})
+            return [{"videoId": "v1"}]
+
+        mock_fetch.side_effect = _fake_fetch
+
+        resp = trace_client.post(f"{BASE}/run", json={"channel_id": CID}, headers=ADMIN_HEADERS)
+
+        data = resp.get_json()
+        assert data["count"] == 1
+        assert data["entries"][0]["title"] == "new"
+        # 強制追蹤只限於此請求
+        assert not is_channel_traced(CID)
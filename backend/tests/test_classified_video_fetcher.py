@@ -1,5 +1,5 @@
 """
-classified_video_fetcher 測試：get_merged_settings、get_classified_videos、classify_live_title
+classified_video_fetcher 測試：get_compiled_settings、get_merged_settings、get_classified_videos、classify_live_title
 """
 
 from datetime import UTC, datetime
@@ -8,8 +8,12 @@ from unittest.mock import MagicMock, patch
 from services.classified_video_fetcher import (
     classify_live_title,
     get_classified_videos,
+    get_compiled_settings,
     get_merged_settings,
+    invalidate_merged_settings,
 )
+from services.firestore.classification_store import wait_for_classified_writes
+from utils.categorizer import ClassificationResult
 
 
 def _mock_db_with_settings(settings_dict):
@@ -36,29 +40,95 @@ def _mock_db_no_settings():
 
 
 class TestGetMergedSettings:
-    @patch("services.classified_video_fetcher.merge_game_categories_with_aliases")
+    @patch("services.classified_video_fetcher.compile_settings")
     @patch("services.classified_video_fetcher.merge_main_categories_with_user_config")
-    def test_returns_merged_settings(self, mock_main_merge, mock_game_merge):
+    def test_returns_merged_settings(self, mock_main_merge, mock_compile):
         db = _mock_db_with_settings({"live": {"雜談": {}}})
         mock_main_merge.return_value = {"live": {"雜談": {"閒聊": []}}}
-        mock_game_merge.return_value = {"live": {"雜談": {"閒聊": []}, "遊戲": {}}}
+        mock_compile.return_value.to_dict.return_value = {
+            "live": {"雜談": {"閒聊": []}, "遊戲": {}}
+        }
 
         result = get_merged_settings(db, "UCxxxxxxxxxxxxxxxxxxxxxx")
 
         assert "live" in result
         mock_main_merge.assert_called_once()
-        mock_game_merge.assert_called_once()
+        mock_compile.assert_called_once()
 
-    @patch("services.classified_video_fetcher.merge_game_categories_with_aliases")
+    @patch("services.classified_video_fetcher.compile_settings")
     @patch("services.classified_video_fetcher.merge_main_categories_with_user_config")
-    def test_no_settings_returns_empty(self, mock_main_merge, mock_game_merge):
+    def test_no_settings_returns_empty(self, mock_main_merge, mock_compile):
         db = _mock_db_no_settings()
 
         result = get_merged_settings(db, "UCxxxxxxxxxxxxxxxxxxxxxx")
 
         assert result == {}
         mock_main_merge.assert_not_called()
-        mock_game_merge.assert_not_called()
+        mock_compile.assert_not_called()
+
+
+class TestMergedSettingsCache:
+    """合併設定的程序內快取"""
+
+    @patch("services.classified_video_fetcher.compile_settings")
+    @patch("services.classified_video_fetcher.merge_main_categories_with_user_config")
+    def test_second_call_uses_cache(self, mock_main_merge, mock_compile):
+        db = _mock_db_with_settings({"雜談": {}})
+
+        first = get_compiled_settings(db, "UC_cached")
+        second = get_compiled_settings(db, "UC_cached")
+
+        assert first is second
+        mock_main_merge.assert_called_once()
+        mock_compile.assert_called_once()
+
+    @patch("services.classified_video_fetcher.compile_settings")
+    @patch("services.classified_video_fetcher.merge_main_categories_with_user_config")
+    def test_invalidate_forces_reload(self, mock_main_merge, mock_compile):
+        db = _mock_db_with_settings({"雜談": {}})
+
+        get_merged_settings(db, "UC_cached")
+        invalidate_merged_settings("UC_cached")
+        get_merged_settings(db, "UC_cached")
+
+        assert mock_main_merge.call_count == 2
+
+    @patch("services.classified_video_fetcher.get_alias_map_etag")
+    @patch("services.classified_video_fetcher.compile_settings")
+    @patch("services.classified_video_fetcher.merge_main_categories_with_user_config")
+    def test_alias_version_change_invalidates(self, mock_main_merge, mock_compile, mock_ver):
+        db = _mock_db_with_settings({"雜談": {}})
+
+        mock_ver.return_value = "etag-1"
+        get_merged_settings(db, "UC_cached")
+        mock_ver.return_value = "etag-2"
+        get_merged_settings(db, "UC_cached")
+
+        assert mock_compile.call_count == 2
+
+    @patch("services.classified_video_fetcher.get_default_config_version")
+    @patch("services.classified_video_fetcher.compile_settings")
+    @patch("services.classified_video_fetcher.merge_main_categories_with_user_config")
+    def test_default_version_change_invalidates(self, mock_main_merge, mock_compile, mock_ver):
+        db = _mock_db_with_settings({"雜談": {}})
+
+        mock_ver.return_value = "aaa"
+        get_merged_settings(db, "UC_cached")
+        mock_ver.return_value = "bbb"
+        get_merged_settings(db, "UC_cached")
+
+        assert mock_main_merge.call_count == 2
+
+    @patch("services.classified_video_fetcher.compile_settings")
+    @patch("services.classified_video_fetcher.merge_main_categories_with_user_config")
+    def test_missing_config_not_cached(self, mock_main_merge, mock_compile):
+        db = _mock_db_no_settings()
+
+        get_merged_settings(db, "UC_cached")
+        get_merged_settings(db, "UC_cached")
+
+        config_get = db.collection.return_value.document.return_value.collection.return_value.document.return_value.get
+        assert config_get.call_count == 2
 
 
 # ═══════════════════════════════════════════════════════
@@ -130,10 +200,10 @@ def _setup_db_with_videos(videos, settings=None):
 
 
 class TestGetClassifiedVideos:
-    @patch("services.classified_video_fetcher.get_merged_settings")
+    @patch("services.classified_video_fetcher.get_compiled_settings")
     @patch("services.classified_video_fetcher.normalize_video_item")
-    @patch("services.classified_video_fetcher.match_category_and_game")
-    def test_basic_classification(self, mock_match, mock_normalize, mock_settings):
+    @patch("services.classified_video_fetcher.classify_batch")
+    def test_basic_classification(self, mock_batch, mock_normalize, mock_settings):
         """基本分類流程"""
         mock_settings.return_value = SAMPLE_SETTINGS
         mock_normalize.return_value = {
@@ -143,12 +213,14 @@ class TestGetClassifiedVideos:
             "duration": 3600,
             "type": "直播檔",
         }
-        mock_match.return_value = {
-            "matchedCategories": ["雜談"],
-            "game": None,
-            "matchedKeywords": ["閒聊"],
-            "matchedPairs": [{"main": "雜談", "keyword": "閒聊", "hitKeywords": ["閒聊"]}],
-        }
+        mock_batch.return_value = [
+            ClassificationResult(
+                ["雜談"],
+                None,
+                ["閒聊"],
+                [{"main": "雜談", "keyword": "閒聊", "hitKeywords": ["閒聊"]}],
+            )
+        ]
 
         db = MagicMock()
         db.collection.return_value.document.return_value.collection.return_value.stream.return_value = [
@@ -160,8 +232,9 @@ class TestGetClassifiedVideos:
         assert len(result) == 1
         assert result[0]["videoId"] == "v1"
         assert "雜談" in result[0]["matchedCategories"]
+        mock_batch.assert_called_once_with([("閒聊配信", "直播檔")], SAMPLE_SETTINGS)
 
-    @patch("services.classified_video_fetcher.get_merged_settings")
+    @patch("services.classified_video_fetcher.get_compiled_settings")
     def test_no_settings_returns_empty(self, mock_settings):
         mock_settings.return_value = {}
         db = MagicMock()
@@ -169,7 +242,7 @@ class TestGetClassifiedVideos:
         result = get_classified_videos(db, "UCxxxxxxxxxxxxxxxxxxxxxx")
         assert result == []
 
-    @patch("services.classified_video_fetcher.get_merged_settings")
+    @patch("services.classified_video_fetcher.get_compiled_settings")
     @patch("services.classified_video_fetcher.normalize_video_item")
     def test_normalize_returns_none_skipped(self, mock_normalize, mock_settings):
         """normalize_video_item 回傳 None → 跳過"""
@@ -184,18 +257,15 @@ class TestGetClassifiedVideos:
         result = get_classified_videos(db, "UCxxxxxxxxxxxxxxxxxxxxxx")
         assert result == []
 
-    @patch("services.classified_video_fetcher.get_merged_settings")
+    @patch("services.classified_video_fetcher.get_compiled_settings")
     @patch("services.classified_video_fetcher.normalize_video_item")
-    @patch("services.classified_video_fetcher.match_category_and_game")
-    def test_time_filter_start(self, mock_match, mock_normalize, mock_settings):
+    @patch("services.classified_video_fetcher.classify_batch")
+    def test_time_filter_start(self, mock_batch, mock_normalize, mock_settings):
         """start 過濾：早於 start 的影片被排除"""
         mock_settings.return_value = SAMPLE_SETTINGS
-        mock_match.return_value = {
-            "matchedCategories": ["其他"],
-            "game": None,
-            "matchedKeywords": [],
-            "matchedPairs": [],
-        }
+        mock_batch.side_effect = lambda items, _settings: [
+            ClassificationResult(["其他"], None, [], []) for _ in items
+        ]
 
         # 兩部影片，一部早於 start
         call_count = [0]
@@ -231,7 +301,7 @@ class TestGetClassifiedVideos:
         assert len(result) == 1
         assert result[0]["videoId"] == "new"
 
-    @patch("services.classified_video_fetcher.get_merged_settings")
+    @patch("services.classified_video_fetcher.get_compiled_settings")
     @patch("services.classified_video_fetcher.normalize_video_item")
     def test_invalid_publish_date_skipped(self, mock_normalize, mock_settings):
         """publishDate 格式錯誤 → 跳過"""
@@ -252,7 +322,7 @@ class TestGetClassifiedVideos:
         result = get_classified_videos(db, "UCxxxxxxxxxxxxxxxxxxxxxx")
         assert result == []
 
-    @patch("services.classified_video_fetcher.get_merged_settings")
+    @patch("services.classified_video_fetcher.get_compiled_settings")
     def test_exception_returns_empty(self, mock_settings):
         """異常時回傳空 list"""
         mock_settings.side_effect = Exception("Firestore error")
@@ -262,6 +332,150 @@ class TestGetClassifiedVideos:
         assert result == []
 
 
+class TestPersistedClassification:
+    """videos_classified 既有分類結果的沿用與回寫"""
+
+    ITEM = {
+        "videoId": "v1",
+        "title": "閒聊配信",
+        "publishDate": "2024-01-15T12:00:00+00:00",
+        "duration": 3600,
+        "type": "直播檔",
+    }
+
+    def _db(self):
+        db = MagicMock()
+        batch_doc = MagicMock(id="batch_0", to_dict=lambda: {"videos": [{"videoId": "v1"}]})
+        db.collection.return_value.document.return_value.collection.return_value.stream.return_value = [
+            batch_doc
+        ]
+        return db
+
+    @patch("services.classified_video_fetcher.schedule_classified_writes")
+    @patch("services.classified_video_fetcher.classify_batch")
+    @patch("services.classified_video_fetcher.load_classified_entries")
+    @patch("services.classified_video_fetcher.normalize_video_item")
+    @patch("services.classified_video_fetcher.get_compiled_settings")
+    def test_fresh_entry_is_reused(
+        self, mock_settings, mock_normalize, mock_load, mock_batch, mock_write
+    ):
+        from services.firestore.classification_store import video_signature
+
+        mock_settings.return_value = SAMPLE_SETTINGS
+        mock_normalize.return_value = dict(self.ITEM)
+        mock_load.return_value = {
+            "batch_0": {
+                "v1": {
+                    "sig": video_signature("閒聊配信", "直播檔"),
+                    "matchedCategories": ["雜談"],
+                    "game": None,
+                    "matchedKeywords": ["閒聊"],
+                    "matchedPairs": [],
+                }
+            }
+        }
+
+        result = get_classified_videos(self._db(), "UCxxxxxxxxxxxxxxxxxxxxxx")
+
+        assert result[0]["matchedCategories"] == ["雜談"]
+        mock_batch.assert_not_called()
+        mock_write.assert_not_called()
+
+    @patch("services.classified_video_fetcher.schedule_classified_writes")
+    @patch("services.classified_video_fetcher.load_classified_entries")
+    @patch("services.classified_video_fetcher.normalize_video_item")
+    @patch("services.classified_video_fetcher.get_compiled_settings")
+    def test_stale_entry_is_reclassified_and_written_back(
+        self, mock_settings, mock_normalize, mock_load, mock_write
+    ):
+        mock_settings.return_value = SAMPLE_SETTINGS
+        mock_normalize.return_value = dict(self.ITEM)
+        # 標題已變更 → sig 不符
+        mock_load.return_value = {"batch_0": {"v1": {"sig": "old", "matchedCategories": []}}}
+
+        result = get_classified_videos(self._db(), "UCxxxxxxxxxxxxxxxxxxxxxx")
+
+        assert result[0]["matchedCategories"] == ["雜談"]
+        mock_write.assert_called_once()
+        _, channel_id, _, batches = mock_write.call_args[0]
+        assert channel_id == "UCxxxxxxxxxxxxxxxxxxxxxx"
+        assert batches["batch_0"]["v1"]["matchedCategories"] == ["雜談"]
+
+    @patch("services.classified_video_fetcher.schedule_classified_writes")
+    @patch("services.classified_video_fetcher.load_classified_entries")
+    @patch("services.classified_video_fetcher.normalize_video_item")
+    @patch("services.classified_video_fetcher.get_compiled_settings")
+    def test_deleted_videos_are_pruned(self, mock_settings, mock_normalize, mock_load, mock_write):
+        from services.firestore.classification_store import video_signature
+
+        mock_settings.return_value = SAMPLE_SETTINGS
+        mock_normalize.return_value = dict(self.ITEM)
+        fresh = {
+            "sig": video_signature("閒聊配信", "直播檔"),
+            "matchedCategories": ["雜談"],
+            "game": None,
+            "matchedKeywords": ["閒聊"],
+            "matchedPairs": [],
+        }
+        # v_gone 已不在 videos_batch 中
+        mock_load.return_value = {"batch_0": {"v1": fresh, "v_gone": fresh}}
+
+        get_classified_videos(self._db(), "UCxxxxxxxxxxxxxxxxxxxxxx")
+
+        batches = mock_write.call_args[0][3]
+        assert batches == {"batch_0": {"v1": fresh}}
+
+    @patch("services.firestore.classification_store.write_classified_entries")
+    @patch("services.classified_video_fetcher.normalize_video_item")
+    @patch("services.classified_video_fetcher.get_compiled_settings")
+    def test_write_back_is_deferred_and_reused(self, mock_settings, mock_normalize, mock_write):
+        """回寫在背景執行；第二次請求沿用程序內快取，不再讀取 videos_classified 也不再回寫"""
+        mock_settings.return_value = SAMPLE_SETTINGS
+        mock_normalize.return_value = dict(self.ITEM)
+        db = self._db()
+        db.get_all.return_value = []
+
+        first = get_classified_videos(db, "UCxxxxxxxxxxxxxxxxxxxxxx")
+        assert wait_for_classified_writes(timeout=5)
+        second = get_classified_videos(db, "UCxxxxxxxxxxxxxxxxxxxxxx")
+
+        assert first == second
+        assert db.get_all.call_count == 1
+        mock_write.assert_called_once()
+        assert mock_write.call_args[0][2] == "batch_0"
+
+    @patch("services.classified_video_fetcher.schedule_classified_writes")
+    @patch("services.classified_video_fetcher.load_classified_entries")
+    @patch("services.classified_video_fetcher.normalize_video_item")
+    @patch("services.classified_video_fetcher.get_compiled_settings")
+    def test_traced_channel_reclassifies_without_rewriting(
+        self, mock_settings, mock_normalize, mock_load, mock_write
+    ):
+        from services.firestore.classification_store import video_signature
+        from utils.classification_trace import dump_trace, enable_channel_trace
+
+        mock_settings.return_value = SAMPLE_SETTINGS
+        mock_normalize.return_value = dict(self.ITEM)
+        mock_load.return_value = {
+            "batch_0": {
+                "v1": {
+                    "sig": video_signature("閒聊配信", "直播檔"),
+                    "matchedCategories": ["雜談"],
+                    "game": None,
+                    "matchedKeywords": ["閒聊"],
+                    "matchedPairs": [],
+                }
+            }
+        }
+        enable_channel_trace("UCxxxxxxxxxxxxxxxxxxxxxx")
+
+        result = get_classified_videos(self._db(), "UCxxxxxxxxxxxxxxxxxxxxxx")
+
+        assert result[0]["matchedCategories"] == ["雜談"]
+        assert [e["title"] for e in dump_trace()] == ["閒聊配信"]
+        mock_write.assert_not_called()
+
+
 # ═══════════════════════════════════════════════════════
 # classify_live_title
 # ═══════════════════════════════════════════════════════
@@ -269,7 +483,7 @@ class TestGetClassifiedVideos:
 
 class TestClassifyLiveTitle:
     @patch("services.classified_video_fetcher.match_category_and_game")
-    @patch("services.classified_video_fetcher.get_merged_settings")
+    @patch("services.classified_video_fetcher.get_compiled_settings")
     def test_returns_categories_and_pairs(self, mock_settings, mock_match):
         mock_settings.return_value = SAMPLE_SETTINGS
         mock_match.return_value = {
@@ -286,7 +500,7 @@ class TestClassifyLiveTitle:
         assert "matchedPairs" in result
         assert "雜談" in result["matchedCategories"]
 
-    @patch("services.classified_video_fetcher.get_merged_settings")
+    @patch("services.classified_video_fetcher.get_compiled_settings")
     def test_no_settings_returns_empty(self, mock_settings):
         mock_settings.return_value = {}
         db = MagicMock()
@@ -295,7 +509,7 @@ class TestClassifyLiveTitle:
         assert result["matchedCategories"] == []
         assert result["matchedPairs"] == []
 
-    @patch("services.classified_video_fetcher.get_merged_settings")
+    @patch("services.classified_video_fetcher.get_compiled_settings")
     def test_exception_returns_empty(self, mock_settings):
         mock_settings.side_effect = Exception("error")
         db = MagicMock()
@@ -0,0 +1,121 @@
+"""
+compact_format 測試：頻道 / 影片表格化、依索引引用
+"""
+
+import copy
+import gzip
+import json
+from datetime import UTC, datetime
+
+from flask import Flask, jsonify
+
+from services.trending.compact_format import encode_compact_summary, to_compact_summary
+
+SUMMARY = {
+    "dates": ["2025-06-01", "2025-06-02"],
+    "gameList": ["Minecraft", "Apex"],
+    "videoCountByGameAndDate": {
+        "Minecraft": {"2025-06-01": 2, "2025-06-02": 0},
+        "Apex": {"2025-06-01": 0, "2025-06-02": 1},
+    },
+    "contributorsByDateAndGame": {
+        "2025-06-01": {"Minecraft": {"UC1": {"channelName": "Ch1", "count": 2}}},
+        "2025-06-02": {"Apex": {"UC1": {"channelName": "Ch1", "count": 1}}},
+    },
+    "details": {
+        "Minecraft": {
+            "UC1": {
+                "channelName": "Ch1",
+                "videos": [
+                    {"id": "v1", "title": "t1", "publishedAt": "2025-06-01T10:00:00Z"},
+                    {"id": "v2", "title": "t2", "publishedAt": "2025-06-01T09:00:00Z"},
+                ],
+            }
+        },
+        "Apex": {
+            "UC1": {
+                "channelName": "Ch1",
+                "videos": [{"id": "v3", "title": "t3", "publishedAt": "2025-06-02T10:00:00Z"}],
+            }
+        },
+    },
+    "channelInfo": {"UC1": {"name": "Ch1", "thumbnail": "th1"}},
+}
+
+
+class TestToCompactSummary:
+    def test_interns_channels_and_videos(self):
+        compact = to_compact_summary(SUMMARY)
+
+        assert compact["format"] == "compact"
+        assert compact["channels"] == {"id": ["UC1"], "name": ["Ch1"], "thumbnail": ["th1"]}
+        assert compact["videos"]["id"] == ["v1", "v2", "v3"]
+        assert compact["details"] == {"Minecraft": [[0, [0, 1]]], "Apex": [[0, [2]]]}
+
+    def test_columnar_counts_and_contributors(self):
+        compact = to_compact_summary(SUMMARY)
+
+        assert compact["counts"] == {"Minecraft": [2, 0], "Apex": [0, 1]}
+        assert compact["contributors"] == {"Minecraft": [[0, 2], []], "Apex": [[], [0, 1]]}
+
+    def test_channel_without_info_keeps_name(self):
+        summary = {
+            **SUMMARY,
+            "channelInfo": {},
+        }
+        compact = to_compact_summary(summary)
+        assert compact["channels"] == {"id": ["UC1"], "name": ["Ch1"], "thumbnail": [None]}
+
+    def test_encode_is_gzip_json(self):
+        payload = encode_compact_summary(SUMMARY)
+        assert json.loads(gzip.decompress(payload)) == to_compact_summary(SUMMARY)
+
+    def test_videos_without_id_are_not_merged(self):
+        summary = copy.deepcopy(SUMMARY)
+        summary["details"]["Minecraft"]["UC1"]["videos"] = [
+            {"id": None, "title": "a", "publishedAt": "2025-06-01T10:00:00Z"},
+            {"id": None, "title": "b", "publishedAt": "2025-06-01T09:00:00Z"},
+        ]
+
+        compact = to_compact_summary(summary)
+
+        assert compact["videos"]["title"] == ["a", "b", "t3"]
+        assert compact["details"]["Minecraft"] == [[0, [0, 1]]]
+
+
+def _expand_details(compact):
+    """由精簡格式還原 details（與預設格式相同的結構）"""
+    channels, videos = compact["channels"], compact["videos"]
+    return {
+        game: {
+            channels["id"][channel_index]: [
+                {column: values[i] for column, values in videos.items()} for i in video_indexes
+            ]
+            for channel_index, video_indexes in rows
+        }
+        for game, rows in compact["details"].items()
+    }
+
+
+class TestRoundTripWithJsonFormat:
+    def test_matches_jsonify_serialization(self):
+        """publishedAt 為 datetime 時，精簡格式與預設格式（jsonify）輸出相同的字串"""
+        summary = copy.deepcopy(SUMMARY)
+        for game in summary["details"].values():
+            for entry in game.values():
+                for video in entry["videos"]:
+                    video["publishedAt"] = datetime.fromisoformat(video["publishedAt"]).astimezone(
+                        UTC
+                    )
+
+        app = Flask(__name__)
+        with app.app_context():
+            expected = json.loads(jsonify(summary).get_data())
+            compact = json.loads(gzip.decompress(encode_compact_summary(summary)))
+
+        assert compact["dates"] == expected["dates"]
+        assert compact["gameList"] == expected["gameList"]
+        assert _expand_details(compact) == {
+            game: {cid: entry["videos"] for cid, entry in channels.items()}
+            for game, channels in expected["details"].items()
+        }
@@ -0,0 +1,177 @@
+"""
+compiled_settings 測試：中央別名表共用、使用者 overlay 順位與舊版合併結果一致
+"""
+
+import copy
+import random
+from unittest.mock import patch
+
+import pytest
+
+from utils.categorizer import classify_batch, settings_fingerprint
+from utils.compiled_settings import (
+    AliasTable,
+    CompiledSettings,
+    get_alias_table,
+)
+from utils.settings_game_merger import merge_game_categories_with_aliases
+
+ALIAS_MAP = {
+    "Minecraft": ["mc", "麥塊", "mc"],
+    "Apex Legends": ["apex", "エペ"],
+    "League of Legends": ["lol", "聯盟"],
+}
+
+CATEGORIES = {"雜談": {"閒聊": ["聊天"]}, "音樂": {"歌回": ["歌枠", "karaoke"]}}
+
+
+def _settings(games=None, with_other=False):
+    per_type = {**CATEGORIES, "遊戲": games or {}}
+    if with_other:
+        per_type["其他"] = {}
+    return {key: dict(per_type) for key in ("live", "videos", "shorts")}
+
+
+def _legacy_merge(settings, alias_map=ALIAS_MAP):
+    with patch("utils.settings_game_merger.fetch_global_alias_map", return_value=alias_map):
+        return merge_game_categories_with_aliases(copy.deepcopy(settings))
+
+
+# ═══════════════════════════════════════════════════════
+# 與舊版合併結果一致
+# ═══════════════════════════════════════════════════════
+
+
+class TestLegacyEquivalence:
+    TITLES = [
+        ("麥塊 生存 閒聊", "直播檔"),
+        ("APEX ranked", "影片"),
+        ("MC 建築", "Shorts"),
+        ("lol 聯盟 歌枠", "直播檔"),
+        ("今天吃什麼", "影片"),
+        ("my game time", "直播檔"),
+        ("麥塊", "未知類型"),
+    ]
+
+    @pytest.mark.parametrize(
+        "games",
+        [
+            {},
+            {"Minecraft": ["礦坑"]},
+            {"Apex Legends": ["apex", "排位"], "My Game": ["my game", "礦坑"]},
+            {"My Game": ["mc"]},  # 使用者自訂遊戲與中央別名衝突：中央別名順位在前
+            {"Minecraft": "not-a-list", "Broken": None},
+        ],
+    )
+    def test_matches_legacy_merge(self, games):
+        settings = _settings(games, with_other=True)
+        compiled = CompiledSettings(copy.deepcopy(settings), AliasTable(ALIAS_MAP))
+        merged = _legacy_merge(settings)
+
+        for game_only in (False, True):
+            assert classify_batch(self.TITLES, compiled, game_only) == classify_batch(
+                self.TITLES, merged, game_only
+            )
+        assert compiled.to_dict() == merged
+
+    def test_randomized_configs_match_legacy(self):
+        words = ["mc", "麥塊", "apex", "エペ", "lol", "聊天", "歌枠", "boss", "頭目", "a1", "MC"]
+        for seed in range(200):
+            rng = random.Random(seed)
+            alias_map = {
+                f"G{i}": [rng.choice(words) for _ in range(rng.randint(0, 3))]
+                for i in range(rng.randint(0, 5))
+            }
+            names = [*alias_map, "U1", "U2"]
+            games = {
+                rng.choice(names): [rng.choice(words) for _ in range(rng.randint(0, 3))]
+                for _ in range(rng.randint(0, 4))
+            }
+            settings = _settings(games)
+            settings["videos"] = {**CATEGORIES, "遊戲": {}}
+            titles = [
+                (" ".join(rng.choice(words) for _ in range(3)), rng.choice(["直播檔", "影片"]))
+                for _ in range(8)
+            ]
+
+            compiled = CompiledSettings(copy.deepcopy(settings), AliasTable(alias_map))
+            merged = _legacy_merge(settings, alias_map)
+            assert classify_batch(titles, compiled) == classify_batch(titles, merged), seed
+
+
+# ═══════════════════════════════════════════════════════
+# 結構共用
+# ═══════════════════════════════════════════════════════
+
+
+class TestStructuralSharing:
+    def test_identical_types_share_compiled_matcher(self):
+        compiled = CompiledSettings(_settings({"My Game": ["x"]}), AliasTable(ALIAS_MAP))
+        assert compiled.for_type("live") is compiled.for_type("videos")
+        assert compiled.for_type("live") is compiled.for_type("shorts")
+
+    def test_alias_scanner_shared_across_channels(self):
+        """別名自動機只建一次，各頻道只持有自己關鍵字的小型 scanner"""
+        table = AliasTable(ALIAS_MAP)
+        first = CompiledSettings(_settings(), table).for_type("live")
+        custom = CompiledSettings(_settings({"My Game": ["x遊戲"]}), table).for_type("live")
+
+        assert first.games.shared_scanner is table.scanner
+        assert custom.games.shared_scanner is table.scanner
+        assert "麥塊" not in custom.scanner.token_keywords
+        assert "麥塊" not in custom.games.local_keywords
+
+    def test_hits_merge_channel_and_alias_scanners(self):
+        compiled = CompiledSettings(_settings({"My Game": ["x遊戲"]}), AliasTable(ALIAS_MAP))
+        live = compiled.for_type("live")
+
+        assert {"聊天", "x遊戲", "麥塊", "apex"} <= live._find_hits("聊天 x遊戲 麥塊 apex")
+        assert live._find_hits("x遊戲 麥塊 聊天", game_only=True) >= {"x遊戲", "麥塊"}
+
+    def test_alias_table_references_alias_map(self):
+        table = AliasTable(ALIAS_MAP)
+        assert table.alias_map is ALIAS_MAP
+
+    def test_base_top_level_is_read_only(self):
+        compiled = CompiledSettings(_settings(), AliasTable(ALIAS_MAP))
+        with pytest.raises(TypeError):
+            compiled.base["live"] = {}  # type: ignore[index]
+
+    def test_to_dict_is_cached(self):
+        compiled = CompiledSettings(_settings({"My Game": ["x"]}), AliasTable(ALIAS_MAP))
+        assert compiled.to_dict() is compiled.to_dict()
+
+
+# ═══════════════════════════════════════════════════════
+# 指紋與別名表快取
+# ═══════════════════════════════════════════════════════
+
+
+class TestFingerprintAndAliasTable:
+    def test_fingerprint_tracks_alias_table(self):
+        settings = _settings()
+        a = CompiledSettings(settings, AliasTable(ALIAS_MAP))
+        b = CompiledSettings(settings, AliasTable(ALIAS_MAP))
+        c = CompiledSettings(settings, AliasTable({"Minecraft": ["mc"]}))
+
+        assert settings_fingerprint(a) == settings_fingerprint(b)
+        assert settings_fingerprint(a) != settings_fingerprint(c)
+
+    @patch("utils.compiled_settings.fetch_global_alias_map_with_etag")
+    def test_alias_table_reused_until_etag_changes(self, mock_fetch):
+        mock_fetch.return_value = (ALIAS_MAP, "etag1")
+        first = get_alias_table()
+        assert first.fingerprint == "etag1"
+        # 重新抓取但內容相同（新的 dict 物件、相同 etag）→ 沿用
+        mock_fetch.return_value = (dict(ALIAS_MAP), "etag1")
+        assert get_alias_table() is first
+
+        mock_fetch.return_value = ({"Minecraft": ["mc"]}, "etag2")
+        assert get_alias_table() is not first
+
+    @patch(
+        "utils.compiled_settings.fetch_global_alias_map_with_etag",
+        side_effect=OSError("no endpoint"),
+    )
+    def test_fetch_failure_falls_back_to_empty_table(self, _mock_fetch):
+        assert get_alias_table().alias_map == {}
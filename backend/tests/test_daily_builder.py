@@ -21,14 +21,12 @@ class TestBuildTrendingForDateRange:
     @patch(f"{_MOD}.write_document")
     @patch(f"{_MOD}.document_exists", return_value=False)
     @patch(f"{_MOD}.classify_videos_to_games")
-    @patch(f"{_MOD}.match_category_and_game")
-    @patch(f"{_MOD}.load_channel_settings_and_videos")
+    @patch(f"{_MOD}.stream_channel_data")
     @patch(f"{_MOD}.get_active_channels")
     def test_single_day_basic_flow(
         self,
         mock_active,
         mock_load,
-        mock_match,
         mock_classify,
         mock_exists,
         mock_write,
@@ -37,10 +35,13 @@ class TestBuildTrendingForDateRange:
         from services.trending.daily_builder import build_trending_for_date_range
 
         mock_active.return_value = [{"channel_id": "UC001"}]
-        mock_load.return_value = (
-            {"UC001": {"keywords": []}},  # settings_map
-            {"UC001": [{"title": "玩 Minecraft", "publishDate": "2025-06-15T10:00:00Z"}]},
-        )
+        mock_load.return_value = [
+            (
+                "UC001",
+                {"keywords": []},  # settings
+                [{"title": "玩 Minecraft", "publishDate": "2025-06-15T10:00:00Z"}],
+            )
+        ]
         mock_classify.return_value = (
             {"Minecraft": [{"title": "玩 Minecraft", "channel_id": "UC001"}]},
             {"videos_processed": 1, "videos_classified": 1, "games_found": {"Minecraft": 1}},
@@ -55,7 +56,7 @@ class TestBuildTrendingForDateRange:
 
     @patch(f"{_MOD}.write_document")
     @patch(f"{_MOD}.document_exists", return_value=True)
-    @patch(f"{_MOD}.load_channel_settings_and_videos")
+    @patch(f"{_MOD}.stream_channel_data")
     @patch(f"{_MOD}.get_active_channels")
     def test_skips_existing_document(
         self,
@@ -68,7 +69,7 @@ class TestBuildTrendingForDateRange:
         from services.trending.daily_builder import build_trending_for_date_range
 
         mock_active.return_value = []
-        mock_load.return_value = ({}, {})
+        mock_load.return_value = []
 
         result = build_trending_for_date_range("2025-06-15", 1, mock_db, force=False)
 
@@ -78,14 +79,12 @@ class TestBuildTrendingForDateRange:
     @patch(f"{_MOD}.write_document")
     @patch(f"{_MOD}.document_exists", return_value=True)
     @patch(f"{_MOD}.classify_videos_to_games")
-    @patch(f"{_MOD}.match_category_and_game")
-    @patch(f"{_MOD}.load_channel_settings_and_videos")
+    @patch(f"{_MOD}.stream_channel_data")
     @patch(f"{_MOD}.get_active_channels")
     def test_force_overrides_existing(
         self,
         mock_active,
         mock_load,
-        mock_match,
         mock_classify,
         mock_exists,
         mock_write,
@@ -94,7 +93,7 @@ class TestBuildTrendingForDateRange:
         from services.trending.daily_builder import build_trending_for_date_range
 
         mock_active.return_value = [{"channel_id": "UC001"}]
-        mock_load.return_value = ({"UC001": {}}, {"UC001": []})
+        mock_load.return_value = [("UC001", {}, [])]
         mock_classify.return_value = (
             {},
             {"videos_processed": 0, "videos_classified": 0, "games_found": {}},
@@ -108,14 +107,12 @@ class TestBuildTrendingForDateRange:
     @patch(f"{_MOD}.write_document")
     @patch(f"{_MOD}.document_exists", return_value=False)
     @patch(f"{_MOD}.classify_videos_to_games")
-    @patch(f"{_MOD}.match_category_and_game")
-    @patch(f"{_MOD}.load_channel_settings_and_videos")
+    @patch(f"{_MOD}.stream_channel_data")
     @patch(f"{_MOD}.get_active_channels")
     def test_multi_day_range(
         self,
         mock_active,
         mock_load,
-        mock_match,
         mock_classify,
         mock_exists,
         mock_write,
@@ -124,7 +121,7 @@ class TestBuildTrendingForDateRange:
         from services.trending.daily_builder import build_trending_for_date_range
 
         mock_active.return_value = [{"channel_id": "UC001"}]
-        mock_load.return_value = ({"UC001": {}}, {"UC001": []})
+        mock_load.return_value = [("UC001", {}, [])]
         mock_classify.return_value = (
             {},
             {"videos_processed": 0, "videos_classified": 0, "games_found": {}},
@@ -139,14 +136,12 @@ class TestBuildTrendingForDateRange:
     @patch(f"{_MOD}.write_document")
     @patch(f"{_MOD}.document_exists", return_value=False)
     @patch(f"{_MOD}.classify_videos_to_games")
-    @patch(f"{_MOD}.match_category_and_game")
-    @patch(f"{_MOD}.load_channel_settings_and_videos")
+    @patch(f"{_MOD}.stream_channel_data")
     @patch(f"{_MOD}.get_active_channels")
     def test_merges_game_maps_across_channels(
         self,
         mock_active,
         mock_load,
-        mock_match,
         mock_classify,
         mock_exists,
         mock_write,
@@ -158,13 +153,10 @@ class TestBuildTrendingForDateRange:
             {"channel_id": "UC001"},
             {"channel_id": "UC002"},
         ]
-        mock_load.return_value = (
-            {"UC001": {}, "UC002": {}},
-            {
-                "UC001": [{"title": "Minecraft", "publishDate": "2025-06-15T10:00:00Z"}],
-                "UC002": [{"title": "Minecraft too", "publishDate": "2025-06-15T11:00:00Z"}],
-            },
-        )
+        mock_load.return_value = [
+            ("UC001", {}, [{"title": "Minecraft", "publishDate": "2025-06-15T10:00:00Z"}]),
+            ("UC002", {}, [{"title": "Minecraft too", "publishDate": "2025-06-15T11:00:00Z"}]),
+        ]
 
         # 兩個頻道都有 Minecraft 影片
         mock_classify.side_effect = [
@@ -184,6 +176,103 @@ class TestBuildTrendingForDateRange:
         written_data = mock_write.call_args[0][2]
         assert len(written_data["Minecraft"]) == 2
 
+    @patch(f"{_MOD}.write_document")
+    @patch(f"{_MOD}.document_exists", return_value=False)
+    @patch(f"{_MOD}.classify_videos_to_games")
+    @patch(f"{_MOD}.stream_channel_data")
+    @patch(f"{_MOD}.get_active_channels")
+    def test_merge_order_follows_channel_list_not_load_order(
+        self,
+        mock_active,
+        mock_load,
+        mock_classify,
+        mock_exists,
+        mock_write,
+        mock_db,
+    ):
+        from services.trending.daily_builder import build_trending_for_date_range
+
+        mock_active.return_value = [{"channel_id": "UC001"}, {"channel_id": "UC002"}]
+        # UC002 先載入完成
+        video = {"title": "Minecraft", "publishDate": "2025-06-15T10:00:00Z"}
+        mock_load.return_value = [("UC002", {}, [video]), ("UC001", {}, [video])]
+        mock_classify.side_effect = lambda videos, channel_id, settings: (
+            {"Minecraft": [{"channel_id": channel_id}]},
+            {"videos_processed": 1, "videos_classified": 1, "games_found": {"Minecraft": 1}},
+        )
+
+        build_trending_for_date_range("2025-06-15", 1, mock_db)
+
+        written_data = mock_write.call_args[0][2]
+        assert [v["channel_id"] for v in written_data["Minecraft"]] == ["UC001", "UC002"]
+
+    @patch(f"{_MOD}.write_document")
+    @patch(f"{_MOD}.document_exists", return_value=False)
+    @patch(f"{_MOD}.classify_videos_to_games")
+    @patch(f"{_MOD}.stream_channel_data")
+    @patch(f"{_MOD}.get_active_channels")
+    def test_multi_day_parses_each_video_once(
+        self,
+        mock_active,
+        mock_load,
+        mock_classify,
+        mock_exists,
+        mock_write,
+        mock_db,
+    ):
+        from services.trending import firestore_date_utils
+        from services.trending.daily_builder import build_trending_for_date_range
+
+        videos = [
+            {"title": f"v{i}", "publishDate": f"2025-06-{10 + i % 5:02d}T10:00:00Z"}
+            for i in range(20)
+        ]
+        mock_active.return_value = [{"channel_id": "UC001"}]
+        mock_load.return_value = [("UC001", {}, videos)]
+        mock_classify.return_value = (
+            {},
+            {"videos_processed": 0, "videos_classified": 0, "games_found": {}},
+        )
+
+        with patch.object(
+            firestore_date_utils,
+            "parse_firestore_date",
+            wraps=firestore_date_utils.parse_firestore_date,
+        ) as mock_parse:
+            result = build_trending_for_date_range("2025-06-15", 30, mock_db)
+
+        assert mock_parse.call_count == len(videos)
+        # 只有有影片的日期需要分類，每天只拿到當天的影片
+        assert mock_classify.call_count == 5
+        assert all(len(call.args[0]) == 4 for call in mock_classify.call_args_list)
+        assert mock_write.call_count == 30
+        assert len(result["results"]) == 30
+
+    @patch(f"{_MOD}.stream_channel_data")
+    @patch(f"{_MOD}.get_active_channels")
+    def test_all_dates_skipped_does_not_load_channels(self, mock_active, mock_load, mock_db):
+        from services.trending.daily_builder import build_trending_for_date_range
+
+        mock_active.return_value = [{"channel_id": "UC001"}]
+        with patch(f"{_MOD}.document_exists", return_value=True):
+            result = build_trending_for_date_range("2025-06-15", 2, mock_db)
+
+        mock_load.assert_not_called()
+        assert all(r["skipped"] for r in result["results"])
+
+    @patch(f"{_MOD}.stream_channel_data")
+    @patch(f"{_MOD}.document_exists", return_value=False)
+    @patch(f"{_MOD}.get_active_channels")
+    def test_circuit_open_returns_error(self, mock_active, mock_exists, mock_load, mock_db):
+        from services.trending.daily_builder import build_trending_for_date_range
+        from utils.circuit_breaker import CircuitOpenError
+
+        mock_active.return_value = [{"channel_id": "UC001"}]
+        mock_load.side_effect = CircuitOpenError("firestore")
+
+        result = build_trending_for_date_range("2025-06-15", 1, mock_db)
+        assert "error" in result
+
     @patch(f"{_MOD}.get_active_channels")
     def test_google_api_error_returns_error(self, mock_active, mock_db):
         from services.trending.daily_builder import build_trending_for_date_range
@@ -192,3 +281,61 @@ class TestBuildTrendingForDateRange:
 
         result = build_trending_for_date_range("2025-06-15", 1, mock_db)
         assert "error" in result
+
+    @patch(f"{_MOD}.build_trending_summaries", return_value={7: "v1", 14: "v1", 30: "v1"})
+    @patch(f"{_MOD}.get_active_channels", return_value=[])
+    def test_rebuilds_summaries_after_daily_docs(self, _mock_active, mock_summaries, mock_db):
+        from services.trending.daily_builder import build_trending_for_date_range
+
+        with patch(f"{_MOD}.document_exists", return_value=True):
+            result = build_trending_for_date_range("2025-06-15", 1, mock_db)
+
+        mock_summaries.assert_called_once_with(mock_db)
+        assert result["summaries"] == {7: "v1", 14: "v1", 30: "v1"}
+
+    @patch(f"{_MOD}.build_trending_summaries", side_effect=KeyError("gameList"))
+    @patch(f"{_MOD}.get_active_channels", return_value=[])
+    def test_summary_failure_keeps_daily_result(self, _mock_active, _mock_summaries, mock_db):
+        from services.trending.daily_builder import build_trending_for_date_range
+
+        with patch(f"{_MOD}.document_exists", return_value=True):
+            result = build_trending_for_date_range("2025-06-15", 1, mock_db)
+
+        assert "error" not in result
+        assert result["summaries"] is None
+
+    @patch(f"{_MOD}.write_document")
+    @patch(f"{_MOD}.document_exists", return_value=False)
+    @patch(f"{_MOD}.ChannelClassifyPool")
+    @patch(f"{_MOD}.stream_channel_data")
+    @patch(f"{_MOD}.get_active_channels")
+    def test_process_pool_results_merged_by_channel_order(
+        self, mock_active, mock_load, mock_pool_cls, _mock_exists, mock_write, mock_db
+    ):
+        from services.trending.daily_builder import build_trending_for_date_range
+
+        mock_active.return_value = [{"channel_id": "UC001"}, {"channel_id": "UC002"}]
+        video = {"title": "t", "publishDate": "2025-06-15T10:00:00Z"}
+        mock_load.return_value = [("UC002", MagicMock(), [video]), ("UC001", MagicMock(), [video])]
+        pool = mock_pool_cls.return_value
+        pool.processes = 2
+
+        def result(cid):
+            return {
+                "2025-06-15": (
+                    {"Minecraft": [{"channel_id": cid}]},
+                    {"videos_processed": 1, "videos_classified": 1, "games_found": {}},
+                )
+            }
+
+        # 完成順序與頻道順位相反
+        pool.drain.return_value = [(1, result("UC002")), (0, result("UC001"))]
+
+        result_data = build_trending_for_date_range("2025-06-15", 1, mock_db, processes=2)
+
+        assert pool.submit.call_count == 2
+        assert [c.args[0] for c in pool.submit.call_args_list] == [1, 0]
+        pool.close.assert_called_once()
+        written = mock_write.call_args[0][2]
+        assert [v["channel_id"] for v in written["Minecraft"]] == ["UC001", "UC002"]
+        assert result_data["timings"]["processes"] == 2
@@ -81,8 +81,10 @@ class TestUpdateIndexEntry:
     def test_no_sync_at(self):
         now = datetime.now(UTC)
         index_data = {"channels": [{"channel_id": "UC001", "lastCheckedAt": "old"}]}
-        update_index_entry(index_data, "UC001", checked_at=now, sync_at=None)
+        changes = update_index_entry(index_data, "UC001", checked_at=now, sync_at=None)
         assert "lastVideoSyncAt" not in index_data["channels"][0]
+        # 回傳的變更欄位供寫入頻道自己的同步狀態文件
+        assert changes == {"lastCheckedAt": now.isoformat()}
 
 
 class TestGetBatchIdMap:
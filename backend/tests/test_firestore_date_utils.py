@@ -0,0 +1,53 @@
+"""
+firestore_date_utils 測試：Firestore 日期解析與影片日期分桶
+"""
+
+from datetime import UTC, date, datetime
+from unittest.mock import MagicMock
+
+from services.trending.firestore_date_utils import bucket_videos_by_date, parse_firestore_date
+
+
+class TestParseFirestoreDate:
+    def test_iso_string_with_z(self):
+        assert parse_firestore_date("2025-06-15T10:00:00Z") == datetime(2025, 6, 15, 10, tzinfo=UTC)
+
+    def test_timestamp_object(self):
+        ts = MagicMock()
+        ts.to_datetime.return_value = datetime(2025, 6, 15, tzinfo=UTC)
+        assert parse_firestore_date(ts) == datetime(2025, 6, 15, tzinfo=UTC)
+
+    def test_invalid_values(self):
+        assert parse_firestore_date("not a date") is None
+        assert parse_firestore_date(None) is None
+
+
+class TestBucketVideosByDate:
+    def test_buckets_only_target_dates(self):
+        videos = [
+            {"id": "a", "publishDate": "2025-06-15T10:00:00Z"},
+            {"id": "b", "publishDate": "2025-06-14T23:59:59Z"},
+            {"id": "c", "publishDate": "2025-06-13T00:00:00Z"},
+            {"id": "d", "publishDate": "2025-06-15T00:30:00Z"},
+        ]
+        buckets = bucket_videos_by_date(videos, [date(2025, 6, 15), date(2025, 6, 14)])
+
+        assert [v["id"] for v in buckets[date(2025, 6, 15)]] == ["a", "d"]
+        assert [v["id"] for v in buckets[date(2025, 6, 14)]] == ["b"]
+        assert date(2025, 6, 13) not in buckets
+
+    def test_date_follows_timestamp_offset(self):
+        # 台灣時間 06-15 00:30 = UTC 06-14 16:30，日期以字串本身的時區為準
+        videos = [{"publishDate": "2025-06-15T00:30:00+08:00"}]
+        buckets = bucket_videos_by_date(videos, [date(2025, 6, 14), date(2025, 6, 15)])
+
+        assert len(buckets[date(2025, 6, 15)]) == 1
+        assert buckets[date(2025, 6, 14)] == []
+
+    def test_skips_missing_or_invalid_dates(self):
+        videos = [{"publishDate": None}, {"publishDate": "bad"}, {}]
+        buckets = bucket_videos_by_date(videos, [date(2025, 6, 15)])
+        assert buckets == {date(2025, 6, 15): []}
+
+    def test_no_target_dates(self):
+        assert bucket_videos_by_date([{"publishDate": "2025-06-15T10:00:00Z"}], []) == {}
@@ -2,7 +2,9 @@
 game_alias_fetcher 測試：遊戲別名 API 抓取與快取
 """
 
+import json
 import os
+import threading
 import time
 from unittest.mock import MagicMock, patch
 
@@ -13,11 +15,24 @@ import utils.game_alias_fetcher as mod
 
 @pytest.fixture(autouse=True)
 def _reset_cache():
-    mod._cache = {}
-    mod._last_fetch_time = 0
+    def reset():
+        mod._cache = {}
+        mod._last_fetch_time = 0
+        mod._cache_etag = ""
+        mod._inflight = None
+        mod._snapshot_loaded = False
+        mod._failure_count = 0
+        mod._retry_after = 0
+
+    reset()
     yield
-    mod._cache = {}
-    mod._last_fetch_time = 0
+    reset()
+
+
+def _api_response(data):
+    resp = MagicMock()
+    resp.json.return_value = data
+    return resp
 
 
 class TestFetchGlobalAliasMap:
@@ -65,3 +80,215 @@ class TestFetchGlobalAliasMap:
         with patch.dict(os.environ, {"GAME_ALIAS_ENDPOINT": "https://example.com/api"}):
             result = mod.fetch_global_alias_map(force_refresh=True)
             assert result == {"cached": ["value"]}
+
+    @patch("utils.game_alias_fetcher.requests.get")
+    def test_etag_follows_content(self, mock_get):
+        mock_get.return_value = _api_response({"Apex": ["APEX"]})
+
+        with patch.dict(os.environ, {"GAME_ALIAS_ENDPOINT": "https://example.com/api"}):
+            alias_map, etag = mod.fetch_global_alias_map_with_etag(force_refresh=True)
+            assert alias_map == {"Apex": ["APEX"]}
+            assert etag and etag == mod.get_alias_map_etag()
+
+            # 內容相同 → etag 不變（與程序無關，重啟後也相同）
+            mock_get.return_value = _api_response({"Apex": ["APEX"]})
+            assert mod.fetch_global_alias_map_with_etag(force_refresh=True)[1] == etag
+
+            mock_get.return_value = _api_response({"Apex": ["APEX", "エペ"]})
+            assert mod.fetch_global_alias_map_with_etag(force_refresh=True)[1] != etag
+
+
+# ═══════════════════════════════════════════════════════
+# stale-while-revalidate / single-flight
+# ═══════════════════════════════════════════════════════
+
+
+class TestRefreshStrategy:
+    @patch("utils.game_alias_fetcher.requests.get")
+    def test_stale_cache_returned_immediately_and_refreshed_in_background(self, mock_get):
+        mod._cache = {"old": ["data"]}
+        mod._last_fetch_time = time.time() - mod._CACHE_TTL - 1
+        release = threading.Event()
+
+        def slow_get(*args, **kwargs):
+            release.wait(timeout=5)
+            return _api_response({"new": ["data"]})
+
+        mock_get.side_effect = slow_get
+
+        with patch.dict(os.environ, {"GAME_ALIAS_ENDPOINT": "https://example.com/api"}):
+            # API 尚未回應前，過期快取仍立即回傳，且只會啟動一個背景刷新
+            assert mod.fetch_global_alias_map() == {"old": ["data"]}
+            assert mod.fetch_global_alias_map() == {"old": ["data"]}
+            inflight = mod._inflight
+            assert inflight is not None
+
+            release.set()
+            assert inflight.wait(timeout=5)
+
+        assert mock_get.call_count == 1
+        assert mod.fetch_global_alias_map() == {"new": ["data"]}
+
+    @patch("utils.game_alias_fetcher.requests.get")
+    def test_background_refresh_failure_keeps_stale_cache(self, mock_get):
+        mod._cache = {"old": ["data"]}
+        mod._last_fetch_time = time.time() - mod._CACHE_TTL - 1
+        mock_get.side_effect = ConnectionError("network down")
+
+        with patch.dict(os.environ, {"GAME_ALIAS_ENDPOINT": "https://example.com/api"}):
+            assert mod.fetch_global_alias_map() == {"old": ["data"]}
+            inflight = mod._inflight
+            if inflight is not None:
+                assert inflight.wait(timeout=5)
+
+        assert mod._cache == {"old": ["data"]}
+        assert mod._inflight is None
+
+    @patch("utils.game_alias_fetcher.requests.get")
+    def test_failure_backs_off_background_refresh(self, mock_get):
+        """連續失敗時，退避期間內過期的呼叫不再啟動背景抓取"""
+        mod._cache = {"old": ["data"]}
+        mod._last_fetch_time = time.time() - mod._CACHE_TTL - 1
+        mock_get.side_effect = ConnectionError("network down")
+
+        with patch.dict(os.environ, {"GAME_ALIAS_ENDPOINT": "https://example.com/api"}):
+            mod.fetch_global_alias_map()
+            inflight = mod._inflight
+            if inflight is not None:
+                assert inflight.wait(timeout=5)
+            assert mock_get.call_count == 1
+
+            for _ in range(3):
+                assert mod.fetch_global_alias_map() == {"old": ["data"]}
+            assert mod._inflight is None
+            assert mock_get.call_count == 1
+
+            # force_refresh 不受退避限制
+            mod.fetch_global_alias_map(force_refresh=True)
+            assert mock_get.call_count == 2
+
+    @patch("utils.game_alias_fetcher.requests.get")
+    def test_backoff_doubles_and_resets_on_success(self, mock_get):
+        mock_get.side_effect = ConnectionError("network down")
+
+        with patch.dict(os.environ, {"GAME_ALIAS_ENDPOINT": "https://example.com/api"}):
+            mod.fetch_global_alias_map(force_refresh=True)
+            first = mod._retry_after - time.time()
+            mod.fetch_global_alias_map(force_refresh=True)
+            second = mod._retry_after - time.time()
+            assert first == pytest.approx(mod._FAILURE_BACKOFF, abs=5)
+            assert second == pytest.approx(mod._FAILURE_BACKOFF * 2, abs=5)
+
+            # 退避期間內快取為空也不同步抓取
+            assert mod.fetch_global_alias_map() == {}
+            assert mock_get.call_count == 2
+
+            mock_get.side_effect = None
+            mock_get.return_value = _api_response({"Apex": ["APEX"]})
+            mod.fetch_global_alias_map(force_refresh=True)
+            assert mod._failure_count == 0
+            assert mod._retry_after == 0
+
+    @patch("utils.game_alias_fetcher.requests.get")
+    def test_concurrent_cold_callers_share_one_request(self, mock_get):
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_get(*args, **kwargs):
+            started.set()
+            release.wait(timeout=5)
+            return _api_response({"Apex": ["APEX"]})
+
+        mock_get.side_effect = slow_get
+        results: list[dict] = []
+
+        def worker():
+            results.append(mod.fetch_global_alias_map())
+
+        with patch.dict(os.environ, {"GAME_ALIAS_ENDPOINT": "https://example.com/api"}):
+            threads = [threading.Thread(target=worker) for _ in range(5)]
+            threads[0].start()
+            assert started.wait(timeout=5)
+            for t in threads[1:]:
+                t.start()
+            release.set()
+            for t in threads:
+                t.join(timeout=5)
+
+        assert mock_get.call_count == 1
+        assert results == [{"Apex": ["APEX"]}] * 5
+
+
+# ═══════════════════════════════════════════════════════
+# 磁碟快照
+# ═══════════════════════════════════════════════════════
+
+
+class TestSnapshot:
+    @patch("utils.game_alias_fetcher.requests.get")
+    def test_fetch_writes_snapshot_and_new_process_loads_it(self, mock_get, tmp_path):
+        path = tmp_path / "aliases.json"
+        mock_get.return_value = _api_response({"Apex": ["APEX"]})
+
+        env = {
+            "GAME_ALIAS_ENDPOINT": "https://example.com/api",
+            "GAME_ALIAS_SNAPSHOT_PATH": str(path),
+        }
+        with patch.dict(os.environ, env):
+            _, etag = mod.fetch_global_alias_map_with_etag(force_refresh=True)
+            snapshot = json.loads(path.read_text(encoding="utf-8"))
+            assert snapshot["aliases"] == {"Apex": ["APEX"]}
+            assert snapshot["etag"] == etag
+
+            # 模擬新程序：記憶體快取清空後，第一次呼叫直接從快照取得，不打 API
+            mod._cache = {}
+            mod._last_fetch_time = 0
+            mod._cache_etag = ""
+            mod._snapshot_loaded = False
+            mock_get.reset_mock()
+
+            assert mod.fetch_global_alias_map_with_etag() == ({"Apex": ["APEX"]}, etag)
+            mock_get.assert_not_called()
+
+    def test_load_is_attempted_once(self, tmp_path):
+        path = tmp_path / "aliases.json"
+        path.write_text(
+            json.dumps({"fetched_at": time.time(), "aliases": {"Apex": ["APEX"]}}),
+            encoding="utf-8",
+        )
+
+        with patch.dict(os.environ, {"GAME_ALIAS_SNAPSHOT_PATH": str(path)}):
+            assert mod.load_alias_snapshot() is True
+            assert mod.load_alias_snapshot() is False
+        assert mod._cache == {"Apex": ["APEX"]}
+
+    def test_corrupt_snapshot_ignored(self, tmp_path):
+        path = tmp_path / "aliases.json"
+        path.write_text("{not json", encoding="utf-8")
+
+        with patch.dict(os.environ, {"GAME_ALIAS_SNAPSHOT_PATH": str(path)}):
+            assert mod.load_alias_snapshot() is False
+        assert mod._cache == {}
+
+    def test_empty_path_disables_snapshot(self):
+        with patch.dict(os.environ, {"GAME_ALIAS_SNAPSHOT_PATH": ""}):
+            assert mod.load_alias_snapshot() is False
+
+    def test_seed_replaces_cache_without_fetch(self, tmp_path):
+        path = tmp_path / "aliases.json"
+        path.write_text(
+            json.dumps({"fetched_at": time.time(), "aliases": {"Apex": ["APEX"]}}),
+            encoding="utf-8",
+        )
+
+        with (
+            patch.dict(os.environ, {"GAME_ALIAS_SNAPSHOT_PATH": str(path)}),
+            patch("utils.game_alias_fetcher.requests.get") as mock_get,
+        ):
+            mod.seed_alias_cache({"Minecraft": ["MC"]})
+            data, etag = mod.fetch_global_alias_map_with_etag()
+
+        # 快照不會覆蓋指定內容，也不發出請求
+        assert data == {"Minecraft": ["MC"]}
+        assert etag == mod.get_alias_map_etag() != ""
+        mock_get.assert_not_called()
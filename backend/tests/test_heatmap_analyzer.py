@@ -2,15 +2,20 @@
 heatmap_analyzer 測試：空矩陣建立、單頻道分析、全頻道批次分析
 """
 
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import UTC, datetime
 from unittest.mock import MagicMock, patch
 
 import pytest
+from google.api_core.exceptions import GoogleAPIError
 
 from services.heatmap_analyzer import (
     WEEKDAY_KEYS,
     analyze_and_update_all_channels,
     create_empty_video_matrix,
+    update_channel_heatmap_incremental,
     update_single_channel_heatmap,
 )
 
@@ -178,37 +183,75 @@ class TestAnalyzeAndUpdateAllChannels:
         assert result["skipped"] == 1
         mock_update.assert_not_called()
 
-    @patch("services.heatmap_analyzer.update_single_channel_heatmap", return_value=True)
+    @patch("services.heatmap_analyzer.HeatmapBulkWriter")
+    @patch("services.heatmap_analyzer.compute_channel_heatmap")
     @patch("services.heatmap_analyzer.is_within_last_7_days", return_value=True)
     @patch("services.heatmap_analyzer.load_all_channels_from_index_list")
-    def test_processes_recent_channel(self, mock_load, mock_within, mock_update, mock_db):
-        """lastVideoSyncAt 在 7 天內 → 呼叫 update_single_channel_heatmap"""
+    def test_processes_recent_channel(
+        self, mock_load, mock_within, mock_compute, mock_writer_cls, mock_db
+    ):
+        """lastVideoSyncAt 在 7 天內 → 統計後交給批次寫入"""
         mock_load.return_value = [
             {
                 "channel_id": "UC001",
                 "lastVideoSyncAt": datetime.now(UTC).isoformat(),
             }
         ]
+        mock_compute.return_value = ({"Mon": []}, 3, [1, 1, 1, 0])
+        writer = mock_writer_cls.return_value
+        writer.close.return_value = {"heatmap": [], "active_time": []}
+
         result = analyze_and_update_all_channels(mock_db)
+
         assert result["updated"] == 1
-        mock_update.assert_called_once_with(mock_db, "UC001")
+        mock_compute.assert_called_once_with(mock_db, "UC001", timeout=60.0)
+        args = writer.add.call_args[0]
+        assert args[:4] == ("UC001", {"Mon": []}, 3, [1, 1, 1, 0])
+        writer.close.assert_called_once()
 
-    @patch("services.heatmap_analyzer.update_single_channel_heatmap")
+    @patch("services.heatmap_analyzer.HeatmapBulkWriter")
+    @patch("services.heatmap_analyzer.compute_channel_heatmap")
     @patch("services.heatmap_analyzer.is_within_last_7_days", return_value=True)
     @patch("services.heatmap_analyzer.load_all_channels_from_index_list")
-    def test_exception_counted_as_skipped(self, mock_load, mock_within, mock_update, mock_db):
-        """update_single_channel_heatmap 拋錯 → skipped，不中斷其他頻道"""
+    def test_exception_counted_as_skipped(
+        self, mock_load, mock_within, mock_compute, mock_writer_cls, mock_db
+    ):
+        """統計拋錯 → skipped，不中斷其他頻道"""
         mock_load.return_value = [
             {"channel_id": "UC001", "lastVideoSyncAt": datetime.now(UTC).isoformat()},
             {"channel_id": "UC002", "lastVideoSyncAt": datetime.now(UTC).isoformat()},
         ]
-        mock_update.side_effect = [RuntimeError("boom"), True]
+        mock_compute.side_effect = [RuntimeError("boom"), ({}, 1, [1, 0, 0, 0])]
+        mock_writer_cls.return_value.close.return_value = {"heatmap": [], "active_time": []}
 
         result = analyze_and_update_all_channels(mock_db)
         assert result["updated"] == 1
         assert result["skipped"] == 1
         assert "UC001" in result["skipped_channels"]
 
+    @patch("services.heatmap_analyzer.HeatmapBulkWriter")
+    @patch("services.heatmap_analyzer.compute_channel_heatmap")
+    @patch("services.heatmap_analyzer.is_within_last_7_days", return_value=True)
+    @patch("services.heatmap_analyzer.load_all_channels_from_index_list")
+    def test_failed_heatmap_write_counted_as_skipped(
+        self, mock_load, mock_within, mock_compute, mock_writer_cls, mock_db
+    ):
+        """批次寫入放棄的頻道 → skipped"""
+        now = datetime.now(UTC).isoformat()
+        mock_load.return_value = [
+            {"channel_id": "UC001", "lastVideoSyncAt": now},
+            {"channel_id": "UC002", "lastVideoSyncAt": now},
+        ]
+        mock_compute.return_value = ({}, 1, [1, 0, 0, 0])
+        mock_writer_cls.return_value.close.return_value = {
+            "heatmap": ["UC002"],
+            "active_time": [],
+        }
+
+        result = analyze_and_update_all_channels(mock_db)
+        assert result["updated"] == 1
+        assert result["skipped_channels"] == ["UC002"]
+
     @patch("services.heatmap_analyzer.update_single_channel_heatmap")
     @patch("services.heatmap_analyzer.load_all_channels_from_index_list")
     def test_invalid_date_format_skipped(self, mock_load, mock_update, mock_db):
@@ -217,3 +260,303 @@ class TestAnalyzeAndUpdateAllChannels:
         result = analyze_and_update_all_channels(mock_db)
         assert result["skipped"] == 1
         mock_update.assert_not_called()
+
+
+# ═══════════════════════════════════════════════════════
+# 並行執行（thread pool、逾時、熔斷回壓）
+# ═══════════════════════════════════════════════════════
+
+
+def _recent_channels(*channel_ids):
+    now = datetime.now(UTC).isoformat()
+    return [{"channel_id": cid, "lastVideoSyncAt": now} for cid in channel_ids]
+
+
+@patch("services.heatmap_analyzer.HeatmapBulkWriter")
+@patch("services.heatmap_analyzer.is_within_last_7_days", return_value=True)
+@patch("services.heatmap_analyzer.load_all_channels_from_index_list")
+class TestParallelExecution:
+    @pytest.fixture(autouse=True)
+    def _writer_close(self):
+        self.close_result = {"heatmap": [], "active_time": []}
+
+    def _setup_writer(self, mock_writer_cls):
+        mock_writer_cls.return_value.close.return_value = self.close_result
+        return mock_writer_cls.return_value
+
+    @patch("services.heatmap_analyzer.compute_channel_heatmap")
+    def test_channels_run_concurrently(
+        self, mock_compute, mock_load, _mock_within, mock_writer_cls, mock_db
+    ):
+        """4 個頻道、4 個 worker：全部同時在途才會通過 barrier"""
+        mock_load.return_value = _recent_channels("UC1", "UC2", "UC3", "UC4")
+        barrier = threading.Barrier(4, timeout=5)
+
+        def compute(db, channel_id, **kwargs):
+            barrier.wait()
+            return ({}, 1, [1, 0, 0, 0])
+
+        mock_compute.side_effect = compute
+        writer = self._setup_writer(mock_writer_cls)
+
+        result = analyze_and_update_all_channels(mock_db, max_workers=4, channel_timeout=5)
+
+        assert result["updated"] == 4
+        assert {call[0][0] for call in writer.add.call_args_list} == {"UC1", "UC2", "UC3", "UC4"}
+
+    @patch("services.heatmap_analyzer.compute_channel_heatmap")
+    def test_single_worker_is_serial(
+        self, mock_compute, mock_load, _mock_within, mock_writer_cls, mock_db
+    ):
+        mock_load.return_value = _recent_channels("UC1", "UC2", "UC3")
+        active = []
+        peak = []
+
+        def compute(db, channel_id, **kwargs):
+            active.append(channel_id)
+            peak.append(len(active))
+            time.sleep(0.01)
+            active.remove(channel_id)
+            return ({}, 1, [1, 0, 0, 0])
+
+        mock_compute.side_effect = compute
+        self._setup_writer(mock_writer_cls)
+
+        result = analyze_and_update_all_channels(mock_db, max_workers=1, channel_timeout=5)
+
+        assert result["updated"] == 3
+        assert max(peak) == 1
+
+    @patch("services.heatmap_analyzer.compute_channel_heatmap")
+    def test_slow_channel_times_out(
+        self, mock_compute, mock_load, _mock_within, mock_writer_cls, mock_db
+    ):
+        """超過 channel_timeout 的頻道計為跳過，不拖住其他頻道"""
+        mock_load.return_value = _recent_channels("UC_SLOW", "UC_FAST")
+        release = threading.Event()
+
+        def compute(db, channel_id, **kwargs):
+            if channel_id == "UC_SLOW":
+                release.wait(timeout=5)
+            return ({}, 1, [1, 0, 0, 0])
+
+        mock_compute.side_effect = compute
+        self._setup_writer(mock_writer_cls)
+
+        try:
+            result = analyze_and_update_all_channels(mock_db, max_workers=2, channel_timeout=0.2)
+        finally:
+            release.set()
+
+        assert result["updated"] == 1
+        assert result["timed_out_channels"] == ["UC_SLOW"]
+        assert "UC_SLOW" in result["skipped_channels"]
+
+    @patch("services.heatmap_analyzer.compute_channel_heatmap")
+    def test_timed_out_thread_keeps_its_slot(
+        self, mock_compute, mock_load, _mock_within, mock_writer_cls, mock_db
+    ):
+        """逾時的執行緒結束前仍佔用 worker，不會在它後面繼續堆積新頻道"""
+        mock_load.return_value = _recent_channels("UC_SLOW", "UC_B", "UC_C")
+        release = threading.Event()
+        events = []
+
+        def compute(db, channel_id, **kwargs):
+            if channel_id == "UC_SLOW":
+                release.wait(timeout=5)
+                events.append("done:UC_SLOW")
+            return ({}, 1, [1, 0, 0, 0])
+
+        class RecordingExecutor(ThreadPoolExecutor):
+            def submit(self, fn, channel_id):
+                events.append(f"submit:{channel_id}")
+                return super().submit(fn, channel_id)
+
+        mock_compute.side_effect = compute
+        self._setup_writer(mock_writer_cls)
+        timer = threading.Timer(0.4, release.set)
+        timer.start()
+        try:
+            with patch("services.heatmap_analyzer.ThreadPoolExecutor", RecordingExecutor):
+                result = analyze_and_update_all_channels(
+                    mock_db, max_workers=1, channel_timeout=0.1
+                )
+        finally:
+            timer.cancel()
+            release.set()
+
+        assert result["timed_out_channels"] == ["UC_SLOW"]
+        assert result["updated"] == 2
+        assert events.index("done:UC_SLOW") < events.index("submit:UC_C")
+
+    @patch("services.heatmap_analyzer.compute_channel_heatmap")
+    def test_breaker_not_recovering_skips_remaining(
+        self, mock_compute, mock_load, _mock_within, mock_writer_cls, mock_db, monkeypatch
+    ):
+        """熔斷在暫停上限內未恢復：其餘頻道不再派發，列入 circuit_open_channels 供重試"""
+        from utils.breaker_instances import firestore_breaker
+
+        monkeypatch.setenv("HEATMAP_BREAKER_PAUSE", "0")
+        mock_load.return_value = _recent_channels("UC1", "UC2", "UC3")
+
+        def compute(db, channel_id, **kwargs):
+            for _ in range(firestore_breaker.failure_threshold):
+                firestore_breaker.record_failure()
+            return None
+
+        mock_compute.side_effect = compute
+        self._setup_writer(mock_writer_cls)
+
+        result = analyze_and_update_all_channels(mock_db, max_workers=1, channel_timeout=5)
+
+        assert mock_compute.call_count == 1
+        assert result["updated"] == 0
+        assert sorted(result["skipped_channels"]) == ["UC1", "UC2", "UC3"]
+        assert result["circuit_open_channels"] == ["UC2", "UC3"]
+
+    @patch("services.heatmap_analyzer._BREAKER_POLL_INTERVAL", 0.01)
+    @patch("services.heatmap_analyzer.compute_channel_heatmap")
+    def test_breaker_recovery_resumes_dispatch(
+        self, mock_compute, mock_load, _mock_within, mock_writer_cls, mock_db
+    ):
+        """熔斷時暫停派發，breaker 進入 HALF_OPEN 後繼續統計剩餘頻道"""
+        from utils.breaker_instances import firestore_breaker
+
+        mock_load.return_value = _recent_channels("UC1", "UC2", "UC3")
+
+        def compute(db, channel_id, **kwargs):
+            if channel_id == "UC1":
+                for _ in range(firestore_breaker.failure_threshold):
+                    firestore_breaker.record_failure()
+                return None
+            firestore_breaker.record_success()
+            return ({}, 1, [1, 0, 0, 0])
+
+        mock_compute.side_effect = compute
+        self._setup_writer(mock_writer_cls)
+
+        with patch.object(firestore_breaker, "recovery_timeout", 0.05):
+            result = analyze_and_update_all_channels(mock_db, max_workers=1, channel_timeout=5)
+
+        assert mock_compute.call_count == 3
+        assert result["updated"] == 2
+        assert result["circuit_open_channels"] == []
+
+    def test_timeout_passed_to_firestore_reads(
+        self, mock_load, _mock_within, mock_writer_cls, mock_db
+    ):
+        mock_load.return_value = _recent_channels("UC1")
+        self._setup_writer(mock_writer_cls)
+
+        with patch("services.heatmap_analyzer.load_videos_for_channel", return_value=[]) as loader:
+            analyze_and_update_all_channels(mock_db, max_workers=1, channel_timeout=7)
+
+        loader.assert_called_once_with(mock_db, "UC1", timeout=7)
+
+    @patch("services.heatmap_analyzer.compute_channel_heatmap", return_value=None)
+    def test_workers_default_from_env(
+        self, _mock_compute, mock_load, _mock_within, mock_writer_cls, mock_db, monkeypatch
+    ):
+        monkeypatch.setenv("HEATMAP_SYNC_WORKERS", "3")
+        mock_load.return_value = _recent_channels("UC1")
+        self._setup_writer(mock_writer_cls)
+
+        with patch("services.heatmap_analyzer.ThreadPoolExecutor") as mock_pool:
+            mock_pool.return_value.submit.side_effect = lambda fn, *args: _done_future(fn(*args))
+            analyze_and_update_all_channels(mock_db)
+
+        assert mock_pool.call_args[1]["max_workers"] == 3
+
+
+def _done_future(value):
+    future = Future()
+    future.set_result(value)
+    return future
+
+
+# ═══════════════════════════════════════════════════════
+# update_channel_heatmap_incremental
+# ═══════════════════════════════════════════════════════
+
+
+class TestUpdateChannelHeatmapIncremental:
+    """只套用本次寫入的影片，不重新載入所有影片"""
+
+    _WRITE_RESULT = {
+        # 2025-01-06 10:00 台灣時間 → Mon 10 點（早）
+        "written_videos": [{"videoId": "v1", "publishDate": "2025-01-06T10:00:00+08:00"}],
+        "replaced_videos": [],
+    }
+
+    @patch("services.heatmap_analyzer.update_single_channel_heatmap")
+    @patch("services.heatmap_analyzer.apply_active_time_delta", return_value=True)
+    @patch("services.heatmap_analyzer.apply_heatmap_increment", return_value=([0, 1, 0, 0], 1))
+    def test_applies_increment_without_full_reload(
+        self, mock_increment, mock_delta, mock_full, mock_db
+    ):
+        assert update_channel_heatmap_incremental(mock_db, "UC001", self._WRITE_RESULT) is True
+
+        mock_increment.assert_called_once_with(
+            mock_db, "UC001", added=[("v1", "Mon", 10)], removed=[]
+        )
+        assert mock_delta.call_args[0][2:4] == ([0, 1, 0, 0], 1)
+        mock_full.assert_not_called()
+
+    @patch("services.heatmap_analyzer.update_single_channel_heatmap", return_value=True)
+    @patch("services.heatmap_analyzer.apply_heatmap_increment", return_value=None)
+    def test_uninitialized_falls_back_to_full_rebuild(self, mock_increment, mock_full, mock_db):
+        assert update_channel_heatmap_incremental(mock_db, "UC001", self._WRITE_RESULT) is True
+        mock_full.assert_called_once_with(mock_db, "UC001")
+
+    @patch("services.heatmap_analyzer.update_single_channel_heatmap", return_value=True)
+    @patch("services.heatmap_analyzer.apply_active_time_delta", return_value=False)
+    @patch("services.heatmap_analyzer.apply_heatmap_increment", return_value=([0, 1, 0, 0], 1))
+    def test_missing_active_time_falls_back_to_full_rebuild(
+        self, mock_increment, mock_delta, mock_full, mock_db
+    ):
+        update_channel_heatmap_incremental(mock_db, "UC001", self._WRITE_RESULT)
+        mock_full.assert_called_once()
+
+    @patch("services.heatmap_analyzer.update_single_channel_heatmap", return_value=True)
+    @patch(
+        "services.heatmap_analyzer.apply_heatmap_increment",
+        side_effect=GoogleAPIError("transaction aborted"),
+    )
+    def test_transaction_error_falls_back_to_full_rebuild(self, mock_increment, mock_full, mock_db):
+        assert update_channel_heatmap_incremental(mock_db, "UC001", self._WRITE_RESULT) is True
+        mock_full.assert_called_once_with(mock_db, "UC001")
+
+    @patch("services.heatmap_analyzer.update_single_channel_heatmap", return_value=True)
+    @patch(
+        "services.heatmap_analyzer.apply_active_time_delta",
+        side_effect=GoogleAPIError("transaction aborted"),
+    )
+    @patch("services.heatmap_analyzer.apply_heatmap_increment", return_value=([0, 1, 0, 0], 1))
+    def test_active_time_error_after_heatmap_commit_rebuilds_both(
+        self, mock_increment, mock_delta, mock_full, mock_db
+    ):
+        """heat_map 已提交、active_time_all 失敗時以完整重算讓兩者一致"""
+        assert update_channel_heatmap_incremental(mock_db, "UC001", self._WRITE_RESULT) is True
+        mock_full.assert_called_once_with(mock_db, "UC001")
+
+    @patch(
+        "services.heatmap_analyzer.update_single_channel_heatmap",
+        side_effect=GoogleAPIError("unavailable"),
+    )
+    @patch(
+        "services.heatmap_analyzer.apply_heatmap_increment",
+        side_effect=GoogleAPIError("transaction aborted"),
+    )
+    def test_rebuild_error_returns_false(self, mock_increment, mock_full, mock_db):
+        assert update_channel_heatmap_incremental(mock_db, "UC001", self._WRITE_RESULT) is False
+
+    @patch("services.heatmap_analyzer.apply_active_time_delta")
+    @patch("services.heatmap_analyzer.apply_heatmap_increment", return_value=([0, 0, 0, 0], 0))
+    def test_no_change_skips_active_time(self, mock_increment, mock_delta, mock_db):
+        assert update_channel_heatmap_incremental(mock_db, "UC001", self._WRITE_RESULT) is True
+        mock_delta.assert_not_called()
+
+    @patch("services.heatmap_analyzer.apply_heatmap_increment")
+    def test_nothing_written_is_noop(self, mock_increment, mock_db):
+        assert update_channel_heatmap_incremental(mock_db, "UC001", {"videos_written": 0}) is True
+        mock_increment.assert_not_called()
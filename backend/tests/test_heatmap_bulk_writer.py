@@ -0,0 +1,80 @@
+"""
+heatmap_bulk_writer 測試：heat_map 經 BulkWriter 送出、active_time 分組寫入
+"""
+
+from datetime import UTC, datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from services.firestore.heatmap_bulk_writer import HeatmapBulkWriter
+
+_MOD = "services.firestore.heatmap_bulk_writer"
+NOW = datetime(2025, 6, 1, tzinfo=UTC)
+
+
+@pytest.fixture
+def mock_db():
+    db = MagicMock()
+    db.document.side_effect = lambda path: MagicMock(path=path)
+    return db
+
+
+def _failure(path, attempts):
+    failure = MagicMock()
+    failure.operation.reference.path = path
+    failure.attempts = attempts
+    failure.message = "unavailable"
+    return failure
+
+
+class TestHeatmapBulkWriter:
+    @patch(f"{_MOD}.write_active_time_for_channels", return_value=[])
+    def test_collects_outputs_and_commits_on_close(self, mock_active_time, mock_db):
+        writer = HeatmapBulkWriter(mock_db)
+        bulk = mock_db.bulk_writer.return_value
+
+        writer.add("UC001", {"Mon": [["v1"]]}, 1, [1, 0, 0, 0], NOW)
+        writer.add("UC002", {"Mon": [[]]}, 0, [0, 0, 0, 0], NOW)
+        mock_active_time.assert_not_called()
+
+        failed = writer.close()
+
+        assert failed == {"heatmap": [], "active_time": []}
+        # 每個頻道寫主文件（counts）與明細文件（影片 ID）
+        assert bulk.set.call_count == 4
+        (ref, data), (detail_ref, detail) = (c[0] for c in bulk.set.call_args_list[:2])
+        assert ref.path == "channel_data/UC001/heat_map/channel_video_heatmap"
+        assert "matrix" not in data["all_range"]
+        assert data["all_range"]["counts"][24] == 1
+        assert detail_ref.path == "channel_data/UC001/heat_map/channel_video_heatmap_ids"
+        assert detail["matrix"] == {"Mon": {"0": ["v1"]}}
+        bulk.close.assert_called_once()
+        stats = mock_active_time.call_args[0][1]
+        assert set(stats) == {"UC001", "UC002"}
+        assert stats["UC001"]["totalCount"] == 1
+
+    @patch(f"{_MOD}.write_active_time_for_channels", return_value=[])
+    def test_flushes_every_n_channels(self, _mock_active_time, mock_db):
+        writer = HeatmapBulkWriter(mock_db, flush_every=2)
+        for i in range(5):
+            writer.add(f"UC00{i}", {}, 0, [0, 0, 0, 0], NOW)
+
+        assert mock_db.bulk_writer.return_value.flush.call_count == 2
+
+    @patch(f"{_MOD}.write_active_time_for_channels", return_value=["UC002"])
+    def test_retries_then_reports_failed_channel(self, _mock_active_time, mock_db):
+        writer = HeatmapBulkWriter(mock_db, max_attempts=3)
+        on_error = mock_db.bulk_writer.return_value.on_write_error.call_args[0][0]
+        writer.add("UC001", {}, 0, [0, 0, 0, 0], NOW)
+        path = "channel_data/UC001/heat_map/channel_video_heatmap"
+
+        assert on_error(_failure(path, 1), None) is True
+        assert on_error(_failure(path, 3), None) is False
+
+        assert writer.close() == {"heatmap": ["UC001"], "active_time": ["UC002"]}
+
+    @patch(f"{_MOD}.write_active_time_for_channels")
+    def test_empty_close_skips_active_time(self, mock_active_time, mock_db):
+        assert HeatmapBulkWriter(mock_db).close() == {"heatmap": [], "active_time": []}
+        mock_active_time.assert_not_called()
@@ -0,0 +1,41 @@
+"""
+heatmap utils 測試：168 格 counts 與舊 matrix 格式互轉
+"""
+
+from services.heatmap.utils import (
+    COUNT_CELLS,
+    count_index,
+    matrix_to_counts,
+    read_active_time,
+)
+
+
+class TestMatrixToCounts:
+    def test_nested_map(self):
+        counts = matrix_to_counts({"Sun": {"0": ["v1"]}, "Sat": {"23": ["v2", "v3"]}})
+
+        assert len(counts) == COUNT_CELLS
+        assert counts[0] == 1
+        assert counts[-1] == 2
+        assert sum(counts) == 3
+
+    def test_list_matrix(self):
+        counts = matrix_to_counts({"Mon": [[], ["v1"]]})
+        assert counts[count_index("Mon", 1)] == 1
+
+
+class TestReadActiveTime:
+    def test_prefers_counts(self):
+        counts = [0] * COUNT_CELLS
+        counts[count_index("Tue", 20)] = 4
+
+        active_time, total = read_active_time({"counts": counts, "matrix": {}})
+
+        assert active_time["Tue"]["20"] == 4
+        assert total == 4
+
+    def test_legacy_matrix(self):
+        active_time, total = read_active_time({"matrix": {"Tue": {"20": ["v1", "v2"]}}})
+
+        assert active_time["Tue"] == {"20": 2}
+        assert total == 2
@@ -2,16 +2,18 @@
 heatmap_writer 測試：初始化檢查、矩陣轉換、Firestore 寫入
 """
 
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 import pytest
 from google.api_core.exceptions import GoogleAPIError
 
 from services.firestore.heatmap_writer import (
+    apply_heatmap_increment,
     convert_to_nested_map,
     is_channel_heatmap_initialized,
     write_channel_heatmap_result,
 )
+from services.heatmap.utils import count_index
 
 
 @pytest.fixture
@@ -116,39 +118,145 @@ class TestConvertToNestedMap:
 class TestWriteChannelHeatmapResult:
     """測試 heatmap 寫入 Firestore 的完整流程"""
 
-    def test_writes_correct_structure(self, mock_db):
-        """提供 matrix + count → doc_ref.set 被呼叫且結構正確"""
-        matrix = {"Mon": [[] for _ in range(24)]}
+    def _writes(self, mock_db):
+        batch = mock_db.batch.return_value
+        return {c[0][0]: c[0][1] for c in batch.set.call_args_list}
+
+    def test_writes_counts_and_detail(self, mock_db):
+        """主文件只存 counts，影片 ID 寫入明細文件，兩者同一個 batch 提交"""
+        mock_db.document.side_effect = lambda path: path
+        matrix = {"Mon": [["v1"]] + [[] for _ in range(23)]}
         write_channel_heatmap_result(mock_db, "UC001", full_matrix=matrix, full_count=42)
 
-        mock_db.document.return_value.set.assert_called_once()
-        written = mock_db.document.return_value.set.call_args[0][0]
-        assert "all_range" in written
-        assert written["all_range"]["totalCount"] == 42
-        assert "matrix" in written["all_range"]
-        assert "updatedAt" in written["all_range"]
+        mock_db.batch.return_value.commit.assert_called_once()
+        writes = self._writes(mock_db)
+        summary = writes["channel_data/UC001/heat_map/channel_video_heatmap"]
+        assert summary["all_range"]["totalCount"] == 42
+        assert "matrix" not in summary["all_range"]
+        assert len(summary["all_range"]["counts"]) == 168
+        assert summary["all_range"]["counts"][24] == 1
+        assert "updatedAt" in summary["all_range"]
+        detail = writes["channel_data/UC001/heat_map/channel_video_heatmap_ids"]
+        assert detail["matrix"]["Mon"]["0"] == ["v1"]
 
     def test_no_data_skips_write(self, mock_db):
-        """matrix 和 count 都是 None → 不呼叫 set"""
+        """matrix 和 count 都是 None → 不寫入"""
         write_channel_heatmap_result(mock_db, "UC001", full_matrix=None, full_count=None)
-        mock_db.document.return_value.set.assert_not_called()
+        mock_db.batch.assert_not_called()
 
     def test_matrix_only_without_count_skips(self, mock_db):
         """只有 matrix 沒有 count → 條件不成立，不寫入"""
         matrix = {"Mon": [[] for _ in range(24)]}
         write_channel_heatmap_result(mock_db, "UC001", full_matrix=matrix, full_count=None)
-        mock_db.document.return_value.set.assert_not_called()
+        mock_db.batch.assert_not_called()
 
     def test_google_api_error_caught(self, mock_db):
         """Firestore 寫入失敗 → 例外被捕獲"""
-        mock_db.document.return_value.set.side_effect = GoogleAPIError("fail")
+        mock_db.batch.return_value.commit.side_effect = GoogleAPIError("fail")
         matrix = {"Mon": [[] for _ in range(24)]}
         # 不應拋出例外
         write_channel_heatmap_result(mock_db, "UC001", full_matrix=matrix, full_count=1)
 
-    def test_correct_firestore_path(self, mock_db):
-        """驗證 Firestore document path 正確"""
-        matrix = {"Mon": [[] for _ in range(24)]}
-        write_channel_heatmap_result(mock_db, "UC_TEST", full_matrix=matrix, full_count=1)
 
-        mock_db.document.assert_called_with("channel_data/UC_TEST/heat_map/channel_video_heatmap")
+# ═══════════════════════════════════════════════════════
+# apply_heatmap_increment
+# ═══════════════════════════════════════════════════════
+
+
+def _counts(**cells):
+    """cells 以 Mon_3=1 的形式指定非零格"""
+    counts = [0] * 168
+    for key, value in cells.items():
+        day, hour = key.split("_")
+        counts[count_index(day, int(hour))] = value
+    return counts
+
+
+@patch("services.firestore.heatmap_writer.firestore.transactional", lambda func: func)
+class TestApplyHeatmapIncrement:
+    """只更新有變動的格子，重複套用不重複計數"""
+
+    SUMMARY = "channel_data/UC001/heat_map/channel_video_heatmap"
+    DETAIL = "channel_data/UC001/heat_map/channel_video_heatmap_ids"
+
+    def _set_docs(self, mock_db, summary, detail=None):
+        docs = {self.SUMMARY: summary, self.DETAIL: detail}
+
+        def document(path):
+            ref = MagicMock(name=path)
+            ref.get.return_value.exists = docs[path] is not None
+            ref.get.return_value.to_dict.return_value = docs[path]
+            return ref
+
+        mock_db.document.side_effect = document
+        return mock_db.transaction.return_value
+
+    def _updates(self, tx):
+        return {c[0][0]._extract_mock_name(): c[0][1] for c in tx.update.call_args_list}
+
+    def test_not_initialized_returns_none(self, mock_db):
+        tx = self._set_docs(mock_db, {"other": 1})
+
+        assert apply_heatmap_increment(mock_db, "UC001", [("v1", "Mon", 3)], []) is None
+        tx.update.assert_not_called()
+
+    def test_legacy_matrix_document_returns_none(self, mock_db):
+        """舊格式（matrix 在主文件）交由完整重算轉換"""
+        tx = self._set_docs(mock_db, {"all_range": {"matrix": {"Mon": {"3": ["v0"]}}}})
+
+        assert apply_heatmap_increment(mock_db, "UC001", [("v1", "Mon", 3)], []) is None
+        tx.update.assert_not_called()
+
+    def test_missing_detail_returns_none(self, mock_db):
+        self._set_docs(mock_db, {"all_range": {"counts": _counts(), "totalCount": 0}})
+        assert apply_heatmap_increment(mock_db, "UC001", [("v1", "Mon", 3)], []) is None
+
+    def test_adds_new_video_to_cell(self, mock_db):
+        tx = self._set_docs(
+            mock_db,
+            {"all_range": {"counts": _counts(Mon_3=1), "totalCount": 1}},
+            {"matrix": {"Mon": {"3": ["v0"]}}},
+        )
+
+        result = apply_heatmap_increment(mock_db, "UC001", [("v1", "Mon", 3)], [])
+
+        assert result == ([1, 0, 0, 0], 1)
+        updates = self._updates(tx)
+        detail = updates[self.DETAIL]
+        # 只寫入有變動的格子
+        assert [k for k in detail if k.startswith("matrix")] == ["matrix.Mon.`3`"]
+        assert detail["matrix.Mon.`3`"] == ["v0", "v1"]
+        summary = updates[self.SUMMARY]
+        assert summary["all_range.counts"] == _counts(Mon_3=2)
+        assert summary["all_range.totalCount"] == 2
+
+    def test_existing_video_is_idempotent(self, mock_db):
+        tx = self._set_docs(
+            mock_db,
+            {"all_range": {"counts": _counts(Mon_3=1), "totalCount": 1}},
+            {"matrix": {"Mon": {"3": ["v1"]}}},
+        )
+
+        assert apply_heatmap_increment(mock_db, "UC001", [("v1", "Mon", 3)], []) == (
+            [0, 0, 0, 0],
+            0,
+        )
+        tx.update.assert_not_called()
+
+    def test_replaced_video_moves_cell(self, mock_db):
+        tx = self._set_docs(
+            mock_db,
+            {"all_range": {"counts": _counts(Mon_3=1), "totalCount": 1}},
+            {"matrix": {"Mon": {"3": ["v1"]}}},
+        )
+
+        result = apply_heatmap_increment(
+            mock_db, "UC001", added=[("v1", "Tue", 20)], removed=[("v1", "Mon", 3)]
+        )
+
+        assert result == ([-1, 0, 0, 1], 0)
+        updates = self._updates(tx)
+        assert updates[self.DETAIL]["matrix.Mon.`3`"] == []
+        assert updates[self.DETAIL]["matrix.Tue.`20`"] == ["v1"]
+        assert updates[self.SUMMARY]["all_range.counts"] == _counts(Tue_20=1)
+        assert updates[self.SUMMARY]["all_range.totalCount"] == 1
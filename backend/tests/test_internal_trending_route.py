@@ -76,9 +76,28 @@ class TestBuildDailyTrending:
         )
         assert resp.status_code == 200
         mock_build.assert_called_once_with(
-            "2026-03-01", 7, pytest.approx(MagicMock(), abs=1), force=True
+            "2026-03-01", 7, pytest.approx(MagicMock(), abs=1), force=True, processes=None
         )
 
+    @patch("routes.internal_trending_route.build_trending_for_date_range")
+    def test_processes_passed_to_builder(self, mock_build, trending_client):
+        mock_build.return_value = {"status": "ok"}
+        resp = trending_client.post(
+            "/api/internal/build-daily-trending",
+            json={"startDate": "2026-03-01", "days": 30, "force": True, "processes": 4},
+            headers=ADMIN_HEADERS,
+        )
+        assert resp.status_code == 200
+        assert mock_build.call_args.kwargs["processes"] == 4
+
+    def test_invalid_processes_returns_422(self, trending_client):
+        resp = trending_client.post(
+            "/api/internal/build-daily-trending",
+            json={"processes": 0},
+            headers=ADMIN_HEADERS,
+        )
+        assert resp.status_code == 422
+
     @patch("routes.internal_trending_route.build_trending_for_date_range")
     def test_exception_returns_500(self, mock_build, trending_client):
         mock_build.side_effect = Exception("build failed")
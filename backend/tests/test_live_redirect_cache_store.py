@@ -0,0 +1,110 @@
+"""
+cache_store 測試：live_redirect_cache 程序內副本、snapshot listener、single-flight 重建
+"""
+
+import threading
+from datetime import UTC, datetime
+from unittest.mock import MagicMock
+
+import pytest
+
+from services.live_redirect.cache_store import get_today_cache, rebuild_single_flight
+
+NOW = datetime(2025, 6, 1, 12, 0, tzinfo=UTC)
+TODAY = "2025-06-01"
+
+
+@pytest.fixture
+def mock_db():
+    db = MagicMock()
+    doc_ref = db.collection.return_value.document.return_value
+    doc_ref.get.return_value.to_dict.return_value = {
+        "updatedAt": "2025-06-01T11:00:00+00:00",
+        "channels": [],
+    }
+    return db
+
+
+def _snapshot(data):
+    snapshot = MagicMock()
+    snapshot.exists = True
+    snapshot.to_dict.return_value = data
+    return snapshot
+
+
+class TestGetTodayCache:
+    def test_reads_document_until_listener_syncs(self, mock_db):
+        doc_ref = mock_db.collection.return_value.document.return_value
+
+        assert get_today_cache(mock_db, TODAY)["updatedAt"] == "2025-06-01T11:00:00+00:00"
+        doc_ref.on_snapshot.assert_called_once()
+
+        # listener 送達快照後不再讀取文件
+        callback = doc_ref.on_snapshot.call_args[0][0]
+        callback([_snapshot({"updatedAt": "2025-06-01T11:30:00+00:00"})], [], None)
+        doc_ref.get.reset_mock()
+
+        assert get_today_cache(mock_db, TODAY)["updatedAt"] == "2025-06-01T11:30:00+00:00"
+        doc_ref.get.assert_not_called()
+
+    def test_new_day_resubscribes(self, mock_db):
+        doc_ref = mock_db.collection.return_value.document.return_value
+        get_today_cache(mock_db, TODAY)
+        first_watch = doc_ref.on_snapshot.return_value
+
+        get_today_cache(mock_db, "2025-06-02")
+
+        first_watch.unsubscribe.assert_called_once()
+        assert doc_ref.on_snapshot.call_count == 2
+
+    def test_listener_failure_falls_back_to_reads(self, mock_db):
+        doc_ref = mock_db.collection.return_value.document.return_value
+        doc_ref.on_snapshot.side_effect = RuntimeError("no watch")
+
+        assert get_today_cache(mock_db, TODAY)["updatedAt"] == "2025-06-01T11:00:00+00:00"
+        assert get_today_cache(mock_db, TODAY)
+        assert doc_ref.get.call_count == 2
+
+
+class TestRebuildSingleFlight:
+    def test_rebuild_result_becomes_cached_copy(self, mock_db):
+        result = {"updatedAt": "2025-06-01T12:00:00+00:00", "channels": []}
+
+        assert rebuild_single_flight(mock_db, NOW, lambda: result) is result
+        mock_db.collection.return_value.document.return_value.get.reset_mock()
+        callback = mock_db.collection.return_value.document.return_value.on_snapshot.call_args
+        callback[0][0]([], [], None)
+
+        assert get_today_cache(mock_db, TODAY) is result
+
+    def test_concurrent_callers_get_previous_result(self, mock_db):
+        get_today_cache(mock_db, TODAY)
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def slow_build():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return {"updatedAt": "2025-06-01T12:00:00+00:00", "channels": ["new"]}
+
+        worker = threading.Thread(target=rebuild_single_flight, args=(mock_db, NOW, slow_build))
+        worker.start()
+        started.wait(5)
+
+        # 重建進行中：不再重建，回傳前一次結果
+        previous = rebuild_single_flight(mock_db, NOW, slow_build)
+        release.set()
+        worker.join(5)
+
+        assert previous == {"updatedAt": "2025-06-01T11:00:00+00:00", "channels": []}
+        assert len(calls) == 1
+
+    def test_fresh_copy_after_wait_skips_rebuild(self, mock_db):
+        rebuild_single_flight(mock_db, NOW, lambda: {"updatedAt": "2025-06-01T12:00:00+00:00"})
+        build = MagicMock()
+
+        result = rebuild_single_flight(mock_db, NOW, build, is_fresh=lambda cache: True)
+
+        build.assert_not_called()
+        assert result == {"updatedAt": "2025-06-01T12:00:00+00:00"}
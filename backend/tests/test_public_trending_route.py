@@ -2,7 +2,9 @@
 Public trending route 測試：GET /api/trending-games
 """
 
+import gzip
 import importlib
+import json
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -80,3 +82,22 @@ class TestTrendingGames:
         resp = client.get("/api/trending-games")
         assert resp.status_code == 500
         assert resp.get_json()["error"] == "伺服器內部錯誤"
+
+    @patch("routes.public_trending_route.get_trending_games_summary")
+    def test_compact_format_is_gzipped(self, mock_summary, client):
+        mock_summary.return_value = {"dates": ["2025-06-01"], "gameList": []}
+        resp = client.get("/api/trending-games?format=compact", headers={"Accept-Encoding": "gzip"})
+
+        assert resp.status_code == 200
+        assert resp.headers["Content-Encoding"] == "gzip"
+        body = json.loads(gzip.decompress(resp.data))
+        assert body["format"] == "compact"
+        assert body["dates"] == ["2025-06-01"]
+
+    @patch("routes.public_trending_route.get_trending_games_summary")
+    def test_compact_format_without_gzip_support(self, mock_summary, client):
+        mock_summary.return_value = {"dates": [], "gameList": []}
+        resp = client.get("/api/trending-games?format=compact")
+
+        assert "Content-Encoding" not in resp.headers
+        assert resp.get_json()["format"] == "compact"
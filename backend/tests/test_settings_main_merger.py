@@ -4,7 +4,10 @@ settings_main_merger 測試：default config 合併、關鍵字去重、遊戲
 
 from unittest.mock import MagicMock
 
-from utils.settings_main_merger import merge_main_categories_with_user_config
+from utils.settings_main_merger import (
+    get_default_config_version,
+    merge_main_categories_with_user_config,
+)
 
 
 def _mock_db_with_defaults(default_config):
@@ -179,3 +182,42 @@ class TestMergeMainEdgeCases:
         settings = {"key": "value"}
         result = merge_main_categories_with_user_config(db, settings)
         assert result == settings
+
+
+class TestDefaultConfigCache:
+    """default_categories_config_v2 程序內快取"""
+
+    def test_default_config_read_once(self):
+        db = _mock_db_with_defaults({"雜談": {"閒聊": ["聊天"]}})
+        merge_main_categories_with_user_config(db, {})
+        merge_main_categories_with_user_config(db, {})
+        assert db.collection.return_value.document.return_value.get.call_count == 1
+
+    def test_version_reflects_content(self):
+        from utils.settings_main_merger import clear_default_config_cache
+
+        v1 = get_default_config_version(_mock_db_with_defaults({"雜談": {"閒聊": []}}))
+        clear_default_config_cache()
+        v2 = get_default_config_version(_mock_db_with_defaults({"雜談": {"閒聊": ["聊天"]}}))
+        clear_default_config_cache()
+        v3 = get_default_config_version(_mock_db_with_defaults({"雜談": {"閒聊": []}}))
+        assert v1 != v2
+        assert v1 == v3
+
+    def test_version_uses_update_time(self):
+        from datetime import UTC, datetime
+
+        from utils.settings_main_merger import clear_default_config_cache
+
+        db = _mock_db_with_defaults({"雜談": {"閒聊": []}})
+        doc = db.collection.return_value.document.return_value.get.return_value
+        doc.update_time = datetime(2026, 1, 1, tzinfo=UTC)
+        v1 = get_default_config_version(db)
+        clear_default_config_cache()
+        doc.update_time = datetime(2026, 1, 2, tzinfo=UTC)
+        v2 = get_default_config_version(db)
+        assert v1 == "2026-01-01T00:00:00+00:00"
+        assert v1 != v2
+
+    def test_missing_default_version(self):
+        assert get_default_config_version(_mock_db_no_defaults()) == "missing"
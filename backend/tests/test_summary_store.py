@@ -0,0 +1,129 @@
+"""
+summary_store 測試：預先計算 trending 摘要與程序內快取
+"""
+
+from datetime import date, timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+from google.api_core.exceptions import GoogleAPIError
+
+from services.trending import summary_store
+from services.trending.summary_store import (
+    build_trending_summaries,
+    get_compact_payload,
+    get_materialized_summary,
+)
+from services.trending.trending_analyzer import window_dates
+from services.trending.trending_loader import TrendingDailyData
+
+_MOD = "services.trending.summary_store"
+
+
+@pytest.fixture
+def mock_db():
+    return MagicMock()
+
+
+def _summary(days=7, **fields):
+    return {"dates": window_dates(days), **fields}
+
+
+def _summary_doc(mock_db, data):
+    doc = MagicMock()
+    doc.exists = data is not None
+    doc.to_dict.return_value = data
+    mock_db.collection.return_value.document.return_value.get.return_value = doc
+
+
+class TestBuildTrendingSummaries:
+    @patch(f"{_MOD}.load_channel_info_index", return_value={})
+    @patch(f"{_MOD}.load_trending_videos_by_date")
+    def test_builds_three_windows_from_one_load(self, mock_load, mock_info, mock_db):
+        dates = window_dates(30)
+        # 每天一支影片，最舊的一天起算
+        mock_load.return_value = TrendingDailyData(
+            {
+                d: [{"game": "A", "channelId": "UC1", "publishDate": f"{d}T10:00:00+00:00"}]
+                for d in reversed(dates)
+            },
+            [],
+        )
+
+        versions = build_trending_summaries(mock_db)
+
+        mock_load.assert_called_once_with(mock_db, days=30)
+        mock_info.assert_called_once()
+        assert set(versions) == {7, 14, 30}
+        doc_set = mock_db.collection.return_value.document.return_value.set
+        written = {c[0][0]["days"]: c[0][0]["summary"] for c in doc_set.call_args_list}
+        for days in (7, 14, 30):
+            assert sum(written[days]["videoCountByGameAndDate"]["A"].values()) == days
+        # 建立後本程序直接命中快取
+        mock_db.reset_mock()
+        assert get_materialized_summary(mock_db, 14) is written[14]
+        mock_db.collection.assert_not_called()
+
+
+class TestGetMaterializedSummary:
+    def test_missing_doc_returns_none(self, mock_db):
+        _summary_doc(mock_db, None)
+        assert get_materialized_summary(mock_db, 7) is None
+
+    def test_cache_hit_within_ttl_skips_read(self, mock_db):
+        _summary_doc(mock_db, {"version": "v1", "summary": _summary(gameList=["A"])})
+
+        assert get_materialized_summary(mock_db, 7) == _summary(gameList=["A"])
+        assert get_materialized_summary(mock_db, 7) == _summary(gameList=["A"])
+
+        mock_db.collection.return_value.document.return_value.get.assert_called_once()
+
+    def test_new_version_replaces_cache_after_ttl(self, mock_db):
+        _summary_doc(mock_db, {"version": "v1", "summary": _summary(gameList=["A"])})
+        first = get_materialized_summary(mock_db, 7)
+
+        _summary_doc(mock_db, {"version": "v1", "summary": _summary(gameList=["A"])})
+        with patch.object(summary_store, "_SUMMARY_TTL", 0):
+            # 版本未變 → 沿用同一個物件
+            assert get_materialized_summary(mock_db, 7) is first
+            _summary_doc(mock_db, {"version": "v2", "summary": _summary(gameList=["B"])})
+            assert get_materialized_summary(mock_db, 7) == _summary(gameList=["B"])
+
+    def test_read_error_falls_back_to_stale_cache(self, mock_db):
+        _summary_doc(mock_db, {"version": "v1", "summary": _summary(gameList=["A"])})
+        get_materialized_summary(mock_db, 7)
+
+        mock_db.collection.return_value.document.return_value.get.side_effect = GoogleAPIError("x")
+        with patch.object(summary_store, "_SUMMARY_TTL", 0):
+            assert get_materialized_summary(mock_db, 7) == _summary(gameList=["A"])
+
+    def test_summary_from_previous_day_falls_back_to_live(self, mock_db):
+        """跨日後摘要尚未重建：不論快取或文件都不使用前一天的區間"""
+        _summary_doc(mock_db, {"version": "v1", "summary": _summary(gameList=["A"])})
+        assert get_materialized_summary(mock_db, 7) is not None
+        mock_db.collection.return_value.document.return_value.get.reset_mock()
+
+        tomorrow = [
+            (date.fromisoformat(d) + timedelta(days=1)).isoformat() for d in window_dates(7)
+        ]
+        with patch(f"{_MOD}.window_dates", return_value=tomorrow):
+            assert get_materialized_summary(mock_db, 7) is None
+            # 快取失效後改讀文件，文件仍是前一天的區間
+            mock_db.collection.return_value.document.return_value.get.assert_called_once()
+
+            _summary_doc(mock_db, {"version": "v2", "summary": {"dates": tomorrow}})
+            assert get_materialized_summary(mock_db, 7) == {"dates": tomorrow}
+
+
+class TestGetCompactPayload:
+    def test_materialized_summary_encoded_once_per_version(self, mock_db):
+        _summary_doc(mock_db, {"version": "v1", "summary": _summary(gameList=[])})
+        summary = get_materialized_summary(mock_db, 7)
+
+        with patch(f"{_MOD}.encode_compact_summary", return_value=b"gz") as mock_encode:
+            assert get_compact_payload(7, summary) == b"gz"
+            assert get_compact_payload(7, summary) == b"gz"
+            # 即時計算的結果不快取
+            get_compact_payload(7, {"dates": []})
+
+        assert mock_encode.call_count == 2
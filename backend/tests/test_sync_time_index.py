@@ -1,147 +1,243 @@
 """
-sync_time_index 測試：lastVideoSyncAt 的讀取與更新
+sync_time_index 測試：頻道同步狀態文件與彙總檢視
 """
 
-from datetime import UTC, datetime
+from datetime import UTC, datetime, timedelta
 from unittest.mock import MagicMock
 
 import pytest
-from google.api_core.exceptions import GoogleAPIError
+from google.api_core.exceptions import AlreadyExists, GoogleAPIError, NotFound
+from google.cloud import firestore
 
+from services.firestore.sync_time_index import (
+    compact_sync_index,
+    get_channel_sync_state,
+    get_last_video_sync_time,
+    load_sync_index,
+    record_channel_sync_state,
+    update_last_sync_time,
+)
 
-@pytest.fixture
-def mock_db():
-    return MagicMock()
 
-
-def _make_index_doc(exists, data=None):
+def _make_doc(data):
     doc = MagicMock()
-    doc.exists = exists
-    doc.to_dict.return_value = data or {}
+    doc.exists = data is not None
+    doc.to_dict.return_value = data
     return doc
 
 
-class TestGetLastVideoSyncTime:
-    def test_doc_not_exists_returns_none(self, mock_db):
-        from services.firestore.sync_time_index import get_last_video_sync_time
+class _SyncDb:
+    """channel_sync_state（頻道文件）與 channel_sync_index（彙總文件）分開 mock"""
 
-        mock_db.collection.return_value.document.return_value.get.return_value = _make_index_doc(
-            False
-        )
-        result = get_last_video_sync_time(mock_db, "UC001")
-        assert result is None
+    def __init__(self, state=None, index=None, changed=()):
+        self.db = MagicMock()
+        self.states = MagicMock()
+        self.index = MagicMock()
+        self.states.document.return_value.get.return_value = _make_doc(state)
+        changed_docs = [_make_doc(s) for s in changed]
+        self.states.stream.return_value = changed_docs
+        self.states.where.return_value.stream.return_value = changed_docs
+        self.index.document.return_value.get.return_value = _make_doc(index)
+        self.db.collection.side_effect = lambda name: {
+            "channel_sync_state": self.states,
+            "channel_sync_index": self.index,
+        }[name]
 
-    def test_channel_not_found_returns_none(self, mock_db):
-        from services.firestore.sync_time_index import get_last_video_sync_time
+    @property
+    def state_ref(self):
+        return self.states.document.return_value
 
-        mock_db.collection.return_value.document.return_value.get.return_value = _make_index_doc(
-            True, {"channels": [{"channel_id": "UC999"}]}
-        )
-        result = get_last_video_sync_time(mock_db, "UC001")
-        assert result is None
+    @property
+    def index_ref(self):
+        return self.index.document.return_value
 
-    def test_string_date_parsed(self, mock_db):
-        from services.firestore.sync_time_index import get_last_video_sync_time
 
-        mock_db.collection.return_value.document.return_value.get.return_value = _make_index_doc(
-            True,
-            {
-                "channels": [
-                    {
-                        "channel_id": "UC001",
-                        "lastVideoSyncAt": "2025-06-01T12:00:00Z",
-                    }
-                ]
-            },
-        )
-        result = get_last_video_sync_time(mock_db, "UC001")
+class TestGetLastVideoSyncTime:
+    def test_no_state_and_no_index_returns_none(self):
+        assert get_last_video_sync_time(_SyncDb().db, "UC001") is None
+
+    def test_reads_channel_state_doc_only(self):
+        mock = _SyncDb(state={"channel_id": "UC001", "lastVideoSyncAt": "2025-06-01T12:00:00Z"})
+
+        result = get_last_video_sync_time(mock.db, "UC001")
+
         assert isinstance(result, datetime)
         assert result.year == 2025
+        mock.states.document.assert_called_once_with("UC001")
+        mock.index_ref.get.assert_not_called()
 
-    def test_firestore_timestamp_converted(self, mock_db):
-        from services.firestore.sync_time_index import get_last_video_sync_time
-
+    def test_firestore_timestamp_converted(self):
         ts = MagicMock()
         expected_dt = datetime(2025, 6, 1, tzinfo=UTC)
         ts.to_datetime.return_value = expected_dt
+        mock = _SyncDb(state={"channel_id": "UC001", "lastVideoSyncAt": ts})
 
-        mock_db.collection.return_value.document.return_value.get.return_value = _make_index_doc(
-            True,
-            {"channels": [{"channel_id": "UC001", "lastVideoSyncAt": ts}]},
-        )
-        result = get_last_video_sync_time(mock_db, "UC001")
-        assert result == expected_dt
-
-    def test_google_api_error_returns_none(self, mock_db):
-        from services.firestore.sync_time_index import get_last_video_sync_time
+        assert get_last_video_sync_time(mock.db, "UC001") == expected_dt
 
-        mock_db.collection.return_value.document.return_value.get.side_effect = GoogleAPIError(
-            "fail"
+    def test_falls_back_to_legacy_index(self):
+        """尚未建立頻道文件時回退讀取彙總文件的舊資料"""
+        mock = _SyncDb(
+            index={"channels": [{"channel_id": "UC001", "lastVideoSyncAt": "2025-05-01T00:00:00Z"}]}
         )
-        result = get_last_video_sync_time(mock_db, "UC001")
-        assert result is None
 
+        result = get_last_video_sync_time(mock.db, "UC001")
+        assert result == datetime(2025, 5, 1, tzinfo=UTC)
 
-class TestUpdateLastSyncTime:
-    def test_empty_videos_returns_none(self, mock_db):
-        from services.firestore.sync_time_index import update_last_sync_time
+    def test_channel_not_in_legacy_index_returns_none(self):
+        mock = _SyncDb(index={"channels": [{"channel_id": "UC999"}]})
+        assert get_last_video_sync_time(mock.db, "UC001") is None
 
-        result = update_last_sync_time(mock_db, "UC001", [])
-        assert result is None
+    def test_google_api_error_returns_none(self):
+        mock = _SyncDb()
+        mock.state_ref.get.side_effect = GoogleAPIError("fail")
+        assert get_last_video_sync_time(mock.db, "UC001") is None
 
-    def test_creates_new_index_when_doc_not_exists(self, mock_db):
-        from services.firestore.sync_time_index import update_last_sync_time
 
-        doc = _make_index_doc(False)
-        mock_db.collection.return_value.document.return_value.get.return_value = doc
-        mock_tx = MagicMock()
-        mock_db.transaction.return_value = mock_tx
+class TestUpdateLastSyncTime:
+    def test_empty_videos_returns_none(self):
+        mock = _SyncDb()
+        assert update_last_sync_time(mock.db, "UC001", []) is None
+        mock.state_ref.set.assert_not_called()
 
+    def test_updates_latest_in_channel_doc(self):
+        mock = _SyncDb(state={"channel_id": "UC001"})
         videos = [
             {"snippet": {"publishedAt": "2025-06-01T12:00:00Z"}},
             {"snippet": {"publishedAt": "2025-06-02T12:00:00Z"}},
         ]
-        result = update_last_sync_time(mock_db, "UC001", videos)
+
+        result = update_last_sync_time(mock.db, "UC001", videos)
+
         assert result == "2025-06-02T12:00:00Z"
+        written = mock.state_ref.update.call_args[0][0]
+        assert written["lastVideoSyncAt"] == "2025-06-02T12:00:00Z"
+        assert written["channel_id"] == "UC001"
+        assert written["updatedAt"] is firestore.SERVER_TIMESTAMP
+        # 不再改寫整份彙總文件，也不需要 transaction
+        mock.index_ref.set.assert_not_called()
+        mock.index_ref.get.assert_not_called()
+        mock.db.transaction.assert_not_called()
+
+    def test_google_api_error_returns_none(self):
+        mock = _SyncDb()
+        mock.state_ref.update.side_effect = GoogleAPIError("fail")
 
-    def test_updates_existing_channel(self, mock_db):
-        from services.firestore.sync_time_index import update_last_sync_time
+        videos = [{"snippet": {"publishedAt": "2025-06-01T00:00:00Z"}}]
+        assert update_last_sync_time(mock.db, "UC001", videos) is None
 
-        doc = _make_index_doc(
-            True,
-            {"channels": [{"channel_id": "UC001", "lastVideoSyncAt": "2025-05-01T00:00:00Z"}]},
+    def test_legacy_only_channel_keeps_last_checked_at(self):
+        """只存在於彙總文件的頻道：更新 lastVideoSyncAt 後仍讀得到 lastCheckedAt"""
+        mock = _SyncDb(
+            index={
+                "channels": [
+                    {
+                        "channel_id": "UC001",
+                        "lastCheckedAt": "2025-05-01T00:00:00+00:00",
+                        "lastVideoSyncAt": "2025-04-01T00:00:00Z",
+                    }
+                ]
+            }
         )
-        mock_db.collection.return_value.document.return_value.get.return_value = doc
-        mock_tx = MagicMock()
-        mock_db.transaction.return_value = mock_tx
+        stored = {}
 
-        videos = [{"snippet": {"publishedAt": "2025-06-15T10:00:00Z"}}]
-        result = update_last_sync_time(mock_db, "UC001", videos)
-        assert result == "2025-06-15T10:00:00Z"
+        def update(data):
+            if not stored:
+                raise NotFound("no doc")
+            stored.update(data)
 
-    def test_appends_new_channel(self, mock_db):
-        from services.firestore.sync_time_index import update_last_sync_time
+        def create(data):
+            if stored:
+                raise AlreadyExists("exists")
+            stored.update(data)
+
+        mock.state_ref.update.side_effect = update
+        mock.state_ref.create.side_effect = create
+        mock.state_ref.get.side_effect = lambda: _make_doc(dict(stored) if stored else None)
+
+        videos = [{"snippet": {"publishedAt": "2025-06-02T12:00:00Z"}}]
+        update_last_sync_time(mock.db, "UC001", videos)
+
+        state = get_channel_sync_state(mock.db, "UC001")
+        assert state["lastCheckedAt"] == "2025-05-01T00:00:00+00:00"
+        assert state["lastVideoSyncAt"] == "2025-06-02T12:00:00Z"
+
+    def test_concurrent_first_write_only_updates_fields(self):
+        mock = _SyncDb(index={"channels": [{"channel_id": "UC001", "lastCheckedAt": "old"}]})
+        mock.state_ref.update.side_effect = [NotFound("no doc"), None]
+        mock.state_ref.create.side_effect = AlreadyExists("exists")
+
+        record_channel_sync_state(mock.db, "UC001", {"lastCheckedAt": "new"})
+
+        assert mock.state_ref.update.call_args[0][0]["lastCheckedAt"] == "new"
+
+
+# ═══════════════════════════════════════════════════════
+# 彙總檢視
+# ═══════════════════════════════════════════════════════
 
-        doc = _make_index_doc(
-            True,
-            {"channels": [{"channel_id": "UC999", "lastVideoSyncAt": "2025-01-01"}]},
-        )
-        mock_db.collection.return_value.document.return_value.get.return_value = doc
-        mock_tx = MagicMock()
-        mock_db.transaction.return_value = mock_tx
 
-        videos = [{"snippet": {"publishedAt": "2025-06-10T00:00:00Z"}}]
-        result = update_last_sync_time(mock_db, "UC001", videos)
-        assert result == "2025-06-10T00:00:00Z"
+class TestLoadSyncIndex:
+    def test_merges_changes_after_built_at(self):
+        mock = _SyncDb(
+            index={
+                "channels": [
+                    {"channel_id": "UC001", "lastCheckedAt": "old"},
+                    {"channel_id": "UC002", "lastCheckedAt": "old"},
+                ],
+                "builtAt": datetime(2025, 6, 1, tzinfo=UTC),
+            },
+            changed=[
+                {"channel_id": "UC002", "lastCheckedAt": "new", "updatedAt": "x"},
+                {"channel_id": "UC003", "lastCheckedAt": "new", "updatedAt": "x"},
+            ],
+        )
 
-    def test_google_api_error_returns_none(self, mock_db):
-        from services.firestore.sync_time_index import update_last_sync_time
+        index = load_sync_index(mock.db)
 
-        mock_db.collection.return_value.document.return_value.get.side_effect = GoogleAPIError(
-            "fail"
+        # 往前重疊一段時間，吸收本機時鐘與 commit 時間的誤差
+        mock.states.where.assert_called_once_with(
+            "updatedAt", ">", datetime(2025, 6, 1, tzinfo=UTC) - timedelta(seconds=60)
+        )
+        assert [ch["channel_id"] for ch in index.channels] == ["UC001", "UC002", "UC003"]
+        assert index.channels[1]["lastCheckedAt"] == "new"
+        assert "updatedAt" not in index.channels[2]
+
+    @pytest.mark.parametrize("built_at", [None, "2025-06-01T00:00:00.000000+00:00"])
+    def test_legacy_index_reads_all_states(self, built_at):
+        """沒有 builtAt 或舊版字串 builtAt：字串 updatedAt 無法與 Timestamp 比較，讀取全部"""
+        mock = _SyncDb(
+            index={"channels": [{"channel_id": "UC001"}], "builtAt": built_at},
+            changed=[{"channel_id": "UC002", "lastCheckedAt": "new"}],
         )
-        mock_db.transaction.return_value = MagicMock()
 
-        videos = [{"snippet": {"publishedAt": "2025-06-01T00:00:00Z"}}]
-        result = update_last_sync_time(mock_db, "UC001", videos)
-        assert result is None
+        index = load_sync_index(mock.db)
+
+        mock.states.where.assert_not_called()
+        assert [ch["channel_id"] for ch in index.channels] == ["UC001", "UC002"]
+
+    def test_missing_index_uses_states_only(self):
+        mock = _SyncDb(changed=[{"channel_id": "UC001"}, {"no_id": True}])
+        assert [ch["channel_id"] for ch in load_sync_index(mock.db).channels] == ["UC001"]
+
+    def test_compact_writes_view_with_built_at(self):
+        mock = _SyncDb(index={"channels": [{"channel_id": "UC001"}]})
+        index = load_sync_index(mock.db)
+
+        compact_sync_index(mock.db, index)
+
+        written = mock.index_ref.set.call_args[0][0]
+        assert written["channels"] == [{"channel_id": "UC001"}]
+        assert written["builtAt"] == index.as_of
+        assert isinstance(index.as_of, datetime)
+
+    def test_get_channel_sync_state_prefers_channel_doc(self):
+        mock = _SyncDb(state={"channel_id": "UC001", "lastCheckedAt": "new"})
+        assert get_channel_sync_state(mock.db, "UC001") == {
+            "channel_id": "UC001",
+            "lastCheckedAt": "new",
+        }
+        mock.index_ref.get.assert_not_called()
+
+    @pytest.mark.parametrize("index", [None, {"channels": []}])
+    def test_get_channel_sync_state_none_when_unknown(self, index):
+        assert get_channel_sync_state(_SyncDb(index=index).db, "UC001") is None
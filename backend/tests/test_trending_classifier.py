@@ -59,3 +59,17 @@ class TestClassifyVideosToGames:
         game_map, stats = classify_videos_to_games(videos, "UC001", {}, _simple_matcher)
         assert len(game_map) == 0
         assert stats["videos_classified"] == 0
+
+    def test_default_uses_batch_classifier(self):
+        """未指定 matcher_func → 以 classify_batch 整批分類"""
+        settings = {"videos": {"遊戲": {"Minecraft": ["mc"], "Apex": ["apex"]}}}
+        videos = [
+            _make_video("v1", "mc 生存"),
+            _make_video("v2", "APEX ranked"),
+            _make_video("v3", "雜談"),
+        ]
+        game_map, stats = classify_videos_to_games(videos, "UC001", settings)
+
+        assert [v["videoId"] for v in game_map["Minecraft"]] == ["v1"]
+        assert [v["videoId"] for v in game_map["Apex"]] == ["v2"]
+        assert stats["videos_classified"] == 2
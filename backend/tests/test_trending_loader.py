@@ -0,0 +1,73 @@
+"""
+trending_loader 測試：一次 get_all 讀取每日文件、GameVideo 檢視
+"""
+
+from datetime import UTC, datetime, timedelta
+from unittest.mock import MagicMock
+
+from services.trending.trending_loader import (
+    GameVideo,
+    load_trending_videos_by_date,
+    load_trending_videos_by_date_range,
+)
+
+
+def _dates(days):
+    today = datetime.now(UTC).date()
+    return [(today - timedelta(days=i)).isoformat() for i in range(1, days + 1)]
+
+
+def _snapshot(doc_id, data):
+    snapshot = MagicMock()
+    snapshot.id = doc_id
+    snapshot.exists = data is not None
+    snapshot.to_dict.return_value = data
+    return snapshot
+
+
+class TestGameVideo:
+    def test_behaves_like_dict_with_game(self):
+        video = {"videoId": "v1", "title": "t"}
+        view = GameVideo(video, "Minecraft")
+
+        assert view["game"] == "Minecraft"
+        assert view.get("videoId") == "v1"
+        assert view.get("missing", "x") == "x"
+        assert dict(view) == {"videoId": "v1", "title": "t", "game": "Minecraft"}
+        assert len(view) == 3
+        # 不複製原本的影片 dict
+        assert "game" not in video
+
+
+class TestLoadTrendingVideosByDate:
+    def test_single_get_all_and_reports_missing(self):
+        d1, d2, d3 = _dates(3)
+        db = MagicMock()
+        # get_all 回傳順序與請求不同，且缺少文件的日期以 exists=False 回傳
+        db.get_all.return_value = [
+            _snapshot(d3, {"Apex": [{"videoId": "v3"}]}),
+            _snapshot(d2, None),
+            _snapshot(d1, {"Minecraft": [{"videoId": "v1"}, "bad"], "meta": 1}),
+        ]
+
+        daily = load_trending_videos_by_date(db, days=3)
+
+        db.get_all.assert_called_once()
+        assert len(db.get_all.call_args[0][0]) == 3
+        assert list(daily.videos_by_date) == [d1, d3]
+        assert [dict(v) for v in daily.videos_by_date[d1]] == [
+            {"videoId": "v1", "game": "Minecraft"}
+        ]
+        assert daily.missing_dates == [d2]
+
+    def test_range_flattens_all_dates(self):
+        d1, d2 = _dates(2)
+        db = MagicMock()
+        db.get_all.return_value = [
+            _snapshot(d1, {"A": [{"videoId": "v1"}]}),
+            _snapshot(d2, {"B": [{"videoId": "v2"}]}),
+        ]
+
+        videos = load_trending_videos_by_date_range(db, days=2)
+
+        assert [(v["videoId"], v["game"]) for v in videos] == [("v1", "A"), ("v2", "B")]
@@ -0,0 +1,148 @@
+"""
+process_pool 測試：process pool 分類結果與本執行緒分類一致
+"""
+
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import patch
+
+from services.trending.process_pool import ChannelClassifyPool, _to_row, available_cpus
+from utils.classification_trace import dump_trace, enable_channel_trace
+from utils.compiled_settings import AliasTable, CompiledSettings
+from utils.trending_classifier import classify_videos_to_games
+
+
+def _video(i, title):
+    return {
+        "videoId": f"v{i}",
+        "title": title,
+        "publishDate": f"2025-06-0{1 + i % 2}T10:00:00Z",
+        "duration": 60,
+        "type": "live",
+        "extra": "不會傳送到 worker",
+    }
+
+
+def test_pool_matches_in_thread_classification():
+    table = AliasTable({"Minecraft": ["minecraft", "麥塊"], "Apex": ["apex"]}, "fp")
+    settings = CompiledSettings({"live": {"遊戲": {"Tetris": ["俄羅斯方塊"]}}}, table)
+    days = {
+        "2025-06-01": [_video(0, "麥塊生存"), _video(2, "聊天")],
+        "2025-06-02": [_video(1, "APEX 排位"), _video(3, "俄羅斯方塊 99")],
+    }
+
+    pool = ChannelClassifyPool(2, table)
+    try:
+        pool.submit(5, "UC001", settings, days)
+        results = list(pool.drain())
+    finally:
+        pool.close()
+
+    assert [order for order, _ in results] == [5]
+    day_results = results[0][1]
+    for date_str, videos in days.items():
+        assert day_results[date_str] == classify_videos_to_games(videos, "UC001", settings)
+    assert list(day_results["2025-06-02"][0]) == ["Apex", "Tetris"]
+
+
+# ═══════════════════════════════════════════════════════
+# worker 失敗時的退回
+# ═══════════════════════════════════════════════════════
+
+
+def _failed_future(exc):
+    future = Future()
+    future.set_exception(exc)
+    return future
+
+
+def _fallback_fixture():
+    table = AliasTable({"Minecraft": ["麥塊"]}, "fp")
+    settings = CompiledSettings({}, table)
+    days = {"2025-06-01": [_video(0, "麥塊生存")]}
+    return table, settings, days
+
+
+@patch("services.trending.process_pool.ProcessPoolExecutor")
+def test_worker_error_falls_back_to_in_thread(mock_executor_cls):
+    table, settings, days = _fallback_fixture()
+    mock_executor_cls.return_value.submit.return_value = _failed_future(KeyError("title"))
+
+    pool = ChannelClassifyPool(2, table)
+    pool.submit(0, "UC001", settings, days)
+    results = list(pool.drain())
+
+    assert results == [
+        (0, {"2025-06-01": classify_videos_to_games(days["2025-06-01"], "UC001", settings)})
+    ]
+
+
+@patch("services.trending.process_pool.ProcessPoolExecutor")
+def test_broken_pool_classifies_remaining_channels_in_thread(mock_executor_cls):
+    table, settings, days = _fallback_fixture()
+    executor = mock_executor_cls.return_value
+    executor.submit.side_effect = [_failed_future(BrokenProcessPool()), BrokenProcessPool()]
+
+    pool = ChannelClassifyPool(2, table)
+    pool.submit(0, "UC001", settings, days)
+    pool.submit(1, "UC002", settings, days)
+    pool.submit(2, "UC003", settings, days)
+    results = dict(pool.drain())
+
+    assert sorted(results) == [0, 1, 2]
+    assert list(results[2]["2025-06-01"][0]) == ["Minecraft"]
+    # 損毀後不再送進 pool
+    assert executor.submit.call_count == 2
+
+
+def test_to_row_keeps_fields_as_is():
+    assert _to_row({"videoId": None, "title": "麥塊生存", "extra": 1}) == {
+        "videoId": None,
+        "title": "麥塊生存",
+    }
+
+
+def test_pool_matches_in_thread_for_incomplete_videos():
+    """缺少 videoId、duration、type 的影片在兩條路徑的計數與結果相同"""
+    table = AliasTable({"Minecraft": ["麥塊"]}, "fp")
+    settings = CompiledSettings({}, table)
+    days = {
+        "2025-06-01": [
+            {"videoId": None, "title": "麥塊生存", "publishDate": "2025-06-01T10:00:00Z"},
+            {"videoId": "", "title": "麥塊建築", "publishDate": "2025-06-01T11:00:00Z"},
+            {"videoId": "v1", "title": "", "publishDate": "2025-06-01T12:00:00Z"},
+        ]
+    }
+
+    pool = ChannelClassifyPool(2, table)
+    try:
+        pool.submit(0, "UC001", settings, days)
+        results = list(pool.drain())
+    finally:
+        pool.close()
+
+    in_thread = classify_videos_to_games(days["2025-06-01"], "UC001", settings)
+    assert results == [(0, {"2025-06-01": in_thread})]
+    assert in_thread[1]["videos_processed"] == 3
+
+
+@patch("services.trending.process_pool.ProcessPoolExecutor")
+def test_traced_channel_classified_in_thread(mock_executor_cls):
+    table, settings, days = _fallback_fixture()
+    enable_channel_trace("UC001")
+
+    pool = ChannelClassifyPool(2, table)
+    pool.submit(0, "UC001", settings, days)
+    results = list(pool.drain())
+
+    mock_executor_cls.return_value.submit.assert_not_called()
+    assert results[0][1]["2025-06-01"][1]["videos_classified"] == 1
+    assert dump_trace("UC001")
+
+
+def test_available_cpus_prefers_env(monkeypatch):
+    monkeypatch.setenv("TRENDING_BUILD_MAX_PROCESSES", "3")
+    assert available_cpus() == 3
+
+    monkeypatch.delenv("TRENDING_BUILD_MAX_PROCESSES")
+    assert available_cpus() >= 1
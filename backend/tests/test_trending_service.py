@@ -46,3 +46,14 @@ class TestGetTrendingGamesSummary:
         mock_load_ch.side_effect = GoogleAPIError("boom")
         result = get_trending_games_summary(mock_db, days=7)
         assert "error" in result
+
+    @patch("services.trending.trending_service.load_trending_videos_by_date_range")
+    @patch("services.trending.trending_service.get_materialized_summary")
+    def test_serves_materialized_summary(self, mock_materialized, mock_load_vid, mock_db):
+        from services.trending.trending_service import get_trending_games_summary
+
+        mock_materialized.return_value = {"gameList": ["Minecraft"]}
+
+        assert get_trending_games_summary(mock_db, days=14) == {"gameList": ["Minecraft"]}
+        mock_materialized.assert_called_once_with(mock_db, 14)
+        mock_load_vid.assert_not_called()
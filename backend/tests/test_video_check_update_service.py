@@ -5,106 +5,86 @@ from unittest.mock import MagicMock, patch
 
 from services.video_check_update_service import check_channel_update_status
 
+_MOD = "services.video_check_update_service"
 
+
+@patch(f"{_MOD}.record_channel_sync_state")
+@patch(f"{_MOD}.get_channel_sync_state")
 class TestCheckChannelUpdateStatus:
     def setup_method(self):
         self.db = MagicMock()
         self.channel_id = "UC_test_channel"
-        self.index_ref = MagicMock()
-        self.db.collection.return_value.document.return_value = self.index_ref
-
-    def test_no_existing_index_creates_new_and_returns_should_update(self):
-        """index_list 不存在時，建立新紀錄並回傳 shouldUpdate=True"""
-        doc = MagicMock()
-        doc.exists = False
-        self.index_ref.get.return_value = doc
+        self.token_ref = MagicMock()
+        self.db.document.return_value = self.token_ref
 
-        # Mock token 寫入
-        token_ref = MagicMock()
-        self.db.document.return_value = token_ref
+    def test_no_existing_state_creates_new_and_returns_should_update(self, mock_get, mock_record):
+        """頻道沒有同步狀態時，建立新紀錄並回傳 shouldUpdate=True"""
+        mock_get.return_value = None
 
         result = check_channel_update_status(self.db, self.channel_id)
 
         assert result["shouldUpdate"] is True
         assert result["channelId"] == self.channel_id
         assert "updateToken" in result
-        self.index_ref.set.assert_called_once()
+        mock_record.assert_called_once()
+        assert set(mock_record.call_args[0][2]) == {"lastCheckedAt"}
 
-    def test_existing_channel_within_12h_no_update(self):
-        """頻道在 12 小時內已檢查過，不需更新"""
+    def test_existing_channel_within_12h_no_update(self, mock_get, mock_record):
+        """頻道在 12 小時內已檢查過，不需更新，也不寫入任何文件"""
         recent_time = (datetime.now(UTC) - timedelta(hours=1)).isoformat()
-        doc = MagicMock()
-        doc.exists = True
-        doc.to_dict.return_value = {
-            "channels": [
-                {
-                    "channel_id": self.channel_id,
-                    "lastCheckedAt": recent_time,
-                    "lastVideoSyncAt": "2025-01-01T00:00:00+00:00",
-                }
-            ]
+        mock_get.return_value = {
+            "channel_id": self.channel_id,
+            "lastCheckedAt": recent_time,
+            "lastVideoSyncAt": "2025-01-01T00:00:00+00:00",
+            "updatedAt": recent_time,
         }
-        self.index_ref.get.return_value = doc
 
         result = check_channel_update_status(self.db, self.channel_id)
 
         assert result["shouldUpdate"] is False
+        assert result["lastVideoSyncAt"] == "2025-01-01T00:00:00+00:00"
         assert "updateToken" not in result
+        mock_record.assert_not_called()
+        self.token_ref.set.assert_not_called()
 
-    def test_existing_channel_past_12h_needs_update(self):
-        """頻道超過 12 小時未檢查，需要更新"""
+    def test_existing_channel_past_12h_needs_update(self, mock_get, mock_record):
+        """頻道超過 12 小時未檢查，需要更新；只寫 lastCheckedAt"""
         old_time = (datetime.now(UTC) - timedelta(hours=13)).isoformat()
-        doc = MagicMock()
-        doc.exists = True
-        doc.to_dict.return_value = {
-            "channels": [
-                {
-                    "channel_id": self.channel_id,
-                    "lastCheckedAt": old_time,
-                }
-            ]
+        mock_get.return_value = {
+            "channel_id": self.channel_id,
+            "lastCheckedAt": old_time,
+            "lastVideoSyncAt": "2025-01-01T00:00:00+00:00",
+            "updatedAt": old_time,
         }
-        self.index_ref.get.return_value = doc
-
-        token_ref = MagicMock()
-        self.db.document.return_value = token_ref
 
         result = check_channel_update_status(self.db, self.channel_id)
 
         assert result["shouldUpdate"] is True
         assert "updateToken" in result
+        assert set(mock_record.call_args[0][2]) == {"lastCheckedAt"}
 
-    def test_channel_not_in_list_gets_added(self):
-        """頻道不在 index_list 中，新增後回傳 shouldUpdate=True"""
-        doc = MagicMock()
-        doc.exists = True
-        doc.to_dict.return_value = {
-            "channels": [{"channel_id": "UC_other", "lastCheckedAt": "2025-01-01T00:00:00+00:00"}]
+    def test_legacy_state_is_migrated(self, mock_get, mock_record):
+        """狀態回退自彙總文件（無 updatedAt）時，一併寫入 lastVideoSyncAt"""
+        mock_get.return_value = {
+            "channel_id": self.channel_id,
+            "lastVideoSyncAt": "2025-01-01T00:00:00+00:00",
         }
-        self.index_ref.get.return_value = doc
-
-        token_ref = MagicMock()
-        self.db.document.return_value = token_ref
 
         result = check_channel_update_status(self.db, self.channel_id)
 
         assert result["shouldUpdate"] is True
-        assert result["channelId"] == self.channel_id
+        fields = mock_record.call_args[0][2]
+        assert fields["lastVideoSyncAt"] == "2025-01-01T00:00:00+00:00"
 
-    @patch("services.video_check_update_service.secrets.token_urlsafe", return_value="mock-token")
-    def test_update_token_written_to_firestore(self, _mock_token):
+    @patch(f"{_MOD}.secrets.token_urlsafe", return_value="mock-token")
+    def test_update_token_written_to_firestore(self, _mock_token, mock_get, _mock_record):
         """shouldUpdate 時會將 token 寫入 Firestore"""
-        doc = MagicMock()
-        doc.exists = False
-        self.index_ref.get.return_value = doc
-
-        token_ref = MagicMock()
-        self.db.document.return_value = token_ref
+        mock_get.return_value = None
 
         result = check_channel_update_status(self.db, self.channel_id)
 
         assert result["updateToken"] == "mock-token"
-        token_ref.set.assert_called_once()
-        written = token_ref.set.call_args[0][0]
+        self.token_ref.set.assert_called_once()
+        written = self.token_ref.set.call_args[0][0]
         assert written["token"] == "mock-token"
         assert "expiresAt" in written
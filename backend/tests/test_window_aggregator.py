@@ -0,0 +1,102 @@
+"""
+window_aggregator 測試：滑動視窗結果與 analyze_trending_summary 一致
+"""
+
+import random
+from datetime import date, timedelta
+
+from services.trending.trending_analyzer import analyze_trending_summary, window_dates
+from services.trending.window_aggregator import TrendingWindowAggregator
+
+
+def _videos(dates, n=300, seed=7):
+    rng = random.Random(seed)
+    videos = []
+    for i in range(n):
+        d = rng.choice(dates)
+        videos.append(
+            {
+                "game": rng.choice(["A", "B", "C", "D", "E"]),
+                "channelId": f"UC{rng.randint(1, 12)}",
+                "channelName": "",
+                "videoId": f"v{i}",
+                "title": f"t{i}",
+                "publishDate": f"{d}T{i % 24:02d}:{i % 60:02d}:00+00:00",
+            }
+        )
+    return videos
+
+
+class TestTrendingWindowAggregator:
+    def test_matches_full_recompute(self):
+        dates = window_dates(30)
+        videos = _videos(dates)
+        channel_info = {f"UC{i}": {"name": f"ch{i}", "thumbnail": ""} for i in range(1, 13)}
+
+        aggregator = TrendingWindowAggregator()
+        aggregator.add_videos(videos)
+
+        # 由長到短縮小視窗，每次結果都與完整重算相同
+        for days in (30, 14, 7):
+            expected = analyze_trending_summary(videos, channel_info=channel_info, days=days)
+            assert aggregator.summary(window_dates(days), channel_info) == expected
+
+    def test_ties_keep_first_appearance_order(self):
+        """排序鍵相同時依影片清單中第一次出現的順序，不受視窗日期的走訪順序影響"""
+        d1, d2 = window_dates(2)
+        videos = [
+            {"game": "B", "channelId": "UC2", "publishDate": f"{d2}T12:00:00+00:00"},
+            {"game": "A", "channelId": "UC1", "publishDate": f"{d2}T12:00:00+00:00"},
+            {"game": "A", "channelId": "UC1", "publishDate": f"{d1}T00:00:00+00:00"},
+            {"game": "B", "channelId": "UC2", "publishDate": f"{d1}T00:00:00+00:00"},
+        ]
+        aggregator = TrendingWindowAggregator()
+        aggregator.add_videos(videos)
+
+        # 先只看 d1：A 先出現；擴大視窗後主題總計的順序仍是 A、B，但 B 在整體清單中較早
+        assert aggregator.summary([d1])["gameList"] == ["A", "B"]
+        assert aggregator.summary([d1, d2])["gameList"] == ["B", "A"]
+        assert analyze_trending_summary(videos, days=2)["gameList"] == ["B", "A"]
+
+    def test_slide_adds_new_day_and_drops_oldest(self):
+        start = date(2025, 6, 1)
+        days = [(start + timedelta(days=i)).isoformat() for i in range(4)]
+        aggregator = TrendingWindowAggregator()
+        aggregator.add_videos(
+            {"game": "A", "channelId": f"UC{i}", "publishDate": f"{d}T00:00:00+00:00"}
+            for i, d in enumerate(days[:3])
+        )
+        aggregator.set_window(days[:3])
+        assert aggregator.summary(days[:3])["videoCountByGameAndDate"]["A"] == {
+            days[0]: 1,
+            days[1]: 1,
+            days[2]: 1,
+        }
+
+        # 視窗前進一天：加入新的一天，扣除最舊的一天
+        aggregator.add_videos(
+            [{"game": "B", "channelId": "UC9", "publishDate": f"{days[3]}T00:00:00+00:00"}]
+        )
+        summary = aggregator.summary(days[1:])
+
+        assert summary["gameList"] == ["A", "B"]
+        assert summary["videoCountByGameAndDate"]["A"] == {days[1]: 1, days[2]: 1, days[3]: 0}
+
+    def test_theme_leaves_when_its_days_drop_out(self):
+        aggregator = TrendingWindowAggregator()
+        aggregator.add_videos(
+            [{"game": "A", "channelId": "UC1", "publishDate": "2025-06-01T00:00:00+00:00"}]
+        )
+
+        assert aggregator.summary(["2025-06-01"])["gameList"] == ["A"]
+        assert aggregator.summary(["2025-06-02"])["gameList"] == []
+
+    def test_skips_incomplete_videos(self):
+        aggregator = TrendingWindowAggregator()
+        aggregator.add_videos(
+            [
+                {"game": "A", "publishDate": "2025-06-01T00:00:00+00:00"},
+                {"channelId": "UC1", "publishDate": "2025-06-01T00:00:00+00:00"},
+            ]
+        )
+        assert aggregator.summary(["2025-06-01"])["gameList"] == []
@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+benchmark_classification.py
+---------------------------
+離線量測影片分類流程的吞吐量，用來比較 categorizer / merger 改動前後的效能
+
+功能：
+- 以固定亂數種子產生合成頻道（中英日混合標題）、主分類設定與遊戲別名表
+- 量測 match_category_and_game、classify_batch（合併後 dict 與 CompiledSettings）、
+  merge_main_categories_with_user_config（每次清空 default config 快取的冷路徑，
+  與命中快取的 _cached 路徑）、merge_game_categories_with_aliases（主分類合併命中快取）、
+  CompiledSettings 建立、get_classified_videos（記憶體版 Firestore）
+- 每個項目回報 titles/sec（或 ops/sec）與 tracemalloc 峰值記憶體
+- 結果以 JSON 輸出，方便 CI 比對兩次執行的差異
+
+使用範例：
+  # 預設情境矩陣
+  python tools/benchmark_classification.py
+
+  # 指定參數（可給多個值，取笛卡兒積）
+  python tools/benchmark_classification.py --titles 1000 10000 --keywords 50 --aliases 100 2000
+
+  # 輸出到檔案
+  python tools/benchmark_classification.py --output bench.json
+"""
+
+import argparse
+import copy
+import gc
+import itertools
+import json
+import logging
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+# 加入 backend 目錄以匯入模組
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from services.classified_video_fetcher import (  # noqa: E402
+    get_classified_videos,
+    invalidate_merged_settings,
+)
+from services.firestore.classification_store import (  # noqa: E402
+    reset_classification_store,
+    wait_for_classified_writes,
+)
+from utils.categorizer import (  # noqa: E402
+    classify_batch,
+    clear_compiled_settings_cache,
+    match_category_and_game,
+)
+from utils.compiled_settings import (  # noqa: E402
+    CompiledSettings,
+    clear_alias_table,
+    get_alias_table,
+)
+from utils.game_alias_fetcher import seed_alias_cache  # noqa: E402
+from utils.settings_game_merger import merge_game_categories_with_aliases  # noqa: E402
+from utils.settings_main_merger import (  # noqa: E402
+    clear_default_config_cache,
+    merge_main_categories_with_user_config,
+)
+
+CHANNEL_ID = "UCbenchmark000000000000"
+BATCH_SIZE = 2000
+VIDEO_TYPES = ("直播檔", "影片", "Shorts")
+MAIN_CATEGORIES = ("雜談", "音樂", "節目")
+
+_CJK_CHARS = "配信初見實況挑戰生存建築合作企劃歌回雜談閒聊通關攻略恐怖解謎聯動週年紀念新衣裝"
+_KANA_CHARS = "あいうえおかきくけこさしすせそたちつてとなにぬねのまみむめもらりるれろ"
+_EN_WORDS = (
+    "live", "stream", "part", "ranked", "collab", "chill", "first", "play", "final", "boss",
+    "speedrun", "hardcore", "endless", "season", "update", "review", "reaction", "morning",
+)  # fmt: skip
+
+
+# ════════════════════════════════════════════════════════
+# 合成資料
+# ════════════════════════════════════════════════════════
+
+
+def _cjk_word(rng: random.Random, low: int = 2, high: int = 4) -> str:
+    pool = _CJK_CHARS if rng.random() < 0.7 else _KANA_CHARS
+    return "".join(rng.choice(pool) for _ in range(rng.randint(low, high)))
+
+
+def build_alias_map(rng: random.Random, size: int) -> dict[str, list[str]]:
+    """產生遊戲別名表：英文名稱 + 英文縮寫 + 中日文別名"""
+    alias_map: dict[str, list[str]] = {}
+    for i in range(size):
+        name = f"{rng.choice(_EN_WORDS).title()} Quest {i}"
+        aliases = [f"gq{i}", _cjk_word(rng, 3, 5)]
+        if rng.random() < 0.5:
+            aliases.append(_cjk_word(rng, 2, 4))
+        alias_map[name] = aliases
+    return alias_map
+
+
+def build_default_config(rng: random.Random, keyword_count: int) -> dict[str, dict[str, list[str]]]:
+    """產生 default_categories_config_v2：keyword_count 個關鍵字平均分散到各子分類"""
+    config: dict[str, dict[str, list[str]]] = {main: {} for main in MAIN_CATEGORIES}
+    for i in range(keyword_count):
+        main = MAIN_CATEGORIES[i % len(MAIN_CATEGORIES)]
+        sub = f"{main}{i % 7}"
+        keyword = _cjk_word(rng) if rng.random() < 0.75 else f"{rng.choice(_EN_WORDS)}{i}"
+        config[main].setdefault(sub, []).append(keyword)
+    return config
+
+
+def build_user_config(rng: random.Random, alias_map: dict[str, list[str]]) -> dict[str, Any]:
+    """產生使用者 config：少量自訂關鍵字與自訂遊戲"""
+    games = dict(itertools.islice(((k, [f"my{i}"]) for i, k in enumerate(alias_map)), 5))
+    games["Original Game"] = ["原創遊戲", "og"]
+    return {
+        "雜談": {"雜談": ["閒聊", "freetalk"]},
+        "音樂": {"歌回": ["歌枠", "karaoke"]},
+        "遊戲": games,
+    }
+
+
+def build_titles(
+    rng: random.Random,
+    count: int,
+    default_config: dict[str, dict[str, list[str]]],
+    alias_map: dict[str, list[str]],
+) -> list[tuple[str, str]]:
+    """產生 (title, video_type)：約半數命中遊戲、三成命中主分類關鍵字"""
+    category_keywords = [
+        kw for subs in default_config.values() for kws in subs.values() for kw in kws
+    ]
+    game_terms = [term for name, aliases in alias_map.items() for term in (name, *aliases)]
+
+    titles = []
+    for _ in range(count):
+        parts = [f"【{_cjk_word(rng)}】"]
+        if game_terms and rng.random() < 0.5:
+            parts.append(rng.choice(game_terms))
+        if category_keywords and rng.random() < 0.3:
+            parts.append(rng.choice(category_keywords))
+        parts.extend(rng.choice(_EN_WORDS) for _ in range(rng.randint(0, 3)))
+        parts.append(_cjk_word(rng, 3, 8))
+        if rng.random() < 0.2:
+            parts.append(f"@guest_{rng.randint(1, 99)}")
+        parts.append(f"#{rng.randint(1, 300)}")
+        titles.append((" ".join(parts), rng.choice(VIDEO_TYPES)))
+    return titles
+
+
+# ════════════════════════════════════════════════════════
+# 記憶體版 Firestore（僅實作 get_classified_videos 用到的 API）
+# ════════════════════════════════════════════════════════
+
+
+class _Snapshot:
+    def __init__(self, doc_id: str, data: dict | None):
+        self.id = doc_id
+        self._data = data
+        self.exists = data is not None
+
+    def to_dict(self) -> dict | None:
+        return copy.deepcopy(self._data)
+
+
+class _DocumentRef:
+    def __init__(self, store: dict, path: tuple[str, ...]):
+        self._store = store
+        self._path = path
+        self.id = path[-1]
+
+    def collection(self, name: str) -> "_CollectionRef":
+        return _CollectionRef(self._store, (*self._path, name))
+
+    def get(self, transaction: Any = None) -> _Snapshot:
+        return _Snapshot(self.id, self._store.get(self._path))
+
+    def set(self, data: dict, merge: bool = False) -> None:
+        existing = self._store.get(self._path) if merge else None
+        self._store[self._path] = {**(existing or {}), **copy.deepcopy(data)}
+
+
+class _CollectionRef:
+    def __init__(self, store: dict, path: tuple[str, ...]):
+        self._store = store
+        self._path = path
+
+    def document(self, doc_id: str) -> _DocumentRef:
+        return _DocumentRef(self._store, (*self._path, doc_id))
+
+    def stream(self):
+        depth = len(self._path) + 1
+        for path in sorted(self._store):
+            if len(path) == depth and path[:-1] == self._path:
+                yield _Snapshot(path[-1], self._store[path])
+
+
+class InMemoryFirestore:
+    """以 dict 模擬 Firestore，key 為文件路徑 tuple"""
+
+    def __init__(self):
+        self.store: dict[tuple[str, ...], dict] = {}
+
+    def collection(self, name: str) -> _CollectionRef:
+        return _CollectionRef(self.store, (name,))
+
+    def get_all(self, refs, transaction: Any = None):
+        for ref in refs:
+            yield ref.get()
+
+    def clear_collection(self, *path: str) -> None:
+        for key in [k for k in self.store if k[: len(path)] == path]:
+            del self.store[key]
+
+
+def build_channel_db(
+    titles: list[tuple[str, str]],
+    default_config: dict[str, dict[str, list[str]]],
+    user_config: dict[str, Any],
+) -> InMemoryFirestore:
+    db = InMemoryFirestore()
+    db.collection("global_settings").document("default_categories_config_v2").set(default_config)
+    channel = db.collection("channel_data").document(CHANNEL_ID)
+    channel.collection("settings").document("config").set(user_config)
+
+    videos = [
+        {
+            "videoId": f"vid{i:07d}",
+            "title": title,
+            "publishDate": f"2024-{(i % 12) + 1:02d}-{(i % 28) + 1:02d}T12:00:00+00:00",
+            "duration": 30 + i % 240,
+            "type": video_type,
+        }
+        for i, (title, video_type) in enumerate(titles)
+    ]
+    for start in range(0, len(videos), BATCH_SIZE):
+        channel.collection("videos_batch").document(f"batch_{start // BATCH_SIZE}").set(
+            {"videos": videos[start : start + BATCH_SIZE]}
+        )
+    return db
+
+
+# ════════════════════════════════════════════════════════
+# 量測
+# ════════════════════════════════════════════════════════
+
+
+def _reset_caches() -> None:
+    wait_for_classified_writes()
+    reset_classification_store()
+    clear_compiled_settings_cache()
+    clear_alias_table()
+    clear_default_config_cache()
+    invalidate_merged_settings()
+
+
+def _measure(
+    func: Callable[[], Any], units: int, repeat: int, setup: Callable[[], Any] | None = None
+) -> dict[str, float]:
+    """取 repeat 次中最快的一次計算吞吐量，另跑一次 tracemalloc 取峰值記憶體"""
+    best = float("inf")
+    for _ in range(repeat):
+        if setup:
+            setup()
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+
+    if setup:
+        setup()
+    gc.collect()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "seconds": round(best, 6),
+        "per_sec": round(units / best, 1) if best > 0 else 0.0,
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def run_scenario(
+    title_count: int, keyword_count: int, alias_count: int, repeat: int = 3, seed: int = 42
+) -> dict[str, Any]:
+    rng = random.Random(seed)
+    alias_map = build_alias_map(rng, alias_count)
+    default_config = build_default_config(rng, keyword_count)
+    user_config = build_user_config(rng, alias_map)
+    titles = build_titles(rng, title_count, default_config, alias_map)
+    db = build_channel_db(titles, default_config, user_config)
+
+    # 遊戲別名改由記憶體快取提供，不發出 HTTP 請求（一個情境遠短於快取 TTL）
+    seed_alias_cache(alias_map)
+    _reset_caches()
+
+    merged = merge_game_categories_with_aliases(
+        merge_main_categories_with_user_config(db, copy.deepcopy(user_config))
+    )
+
+    alias_table = get_alias_table()
+    compiled = CompiledSettings(
+        merge_main_categories_with_user_config(db, copy.deepcopy(user_config)), alias_table
+    )
+
+    def _compile_settings():
+        settings = CompiledSettings(
+            merge_main_categories_with_user_config(db, copy.deepcopy(user_config)), alias_table
+        )
+        for type_key in ("live", "videos", "shorts"):
+            settings.for_type(type_key)
+
+    def _match_each():
+        for title, video_type in titles:
+            match_category_and_game(title, video_type, merged)
+
+    def _cold_fetch_setup():
+        _reset_caches()
+        db.clear_collection("channel_data", CHANNEL_ID, "videos_classified")
+
+    results = {
+        "match_category_and_game": _measure(_match_each, title_count, repeat),
+        "classify_batch": _measure(lambda: classify_batch(titles, merged), title_count, repeat),
+        "classify_batch_game_only": _measure(
+            lambda: classify_batch(titles, merged, game_only=True), title_count, repeat
+        ),
+        "classify_batch_compiled": _measure(
+            lambda: classify_batch(titles, compiled), title_count, repeat
+        ),
+        "compile_settings": _measure(_compile_settings, 1, repeat),
+        "merge_main_categories_with_user_config": _measure(
+            lambda: merge_main_categories_with_user_config(db, copy.deepcopy(user_config)),
+            1,
+            repeat,
+            clear_default_config_cache,
+        ),
+        "merge_main_categories_with_user_config_cached": _measure(
+            lambda: merge_main_categories_with_user_config(db, copy.deepcopy(user_config)),
+            1,
+            repeat,
+        ),
+        "merge_game_categories_with_aliases": _measure(
+            lambda: merge_game_categories_with_aliases(
+                merge_main_categories_with_user_config(db, copy.deepcopy(user_config))
+            ),
+            1,
+            repeat,
+        ),
+        "get_classified_videos_cold": _measure(
+            lambda: get_classified_videos(db, CHANNEL_ID), title_count, repeat, _cold_fetch_setup
+        ),
+        "get_classified_videos_warm": _measure(
+            lambda: get_classified_videos(db, CHANNEL_ID), title_count, repeat
+        ),
+    }
+
+    return {
+        "params": {
+            "titles": title_count,
+            "keywords": keyword_count,
+            "aliases": alias_count,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="影片分類吞吐量基準測試（離線，輸出 JSON）")
+    parser.add_argument("--titles", type=int, nargs="+", default=[1000, 10000], help="標題數")
+    parser.add_argument("--keywords", type=int, nargs="+", default=[60, 300], help="主分類關鍵字數")
+    parser.add_argument(
+        "--aliases", type=int, nargs="+", default=[100, 2000], help="遊戲別名表大小"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="每個項目重複次數（取最快）")
+    parser.add_argument("--seed", type=int, default=42, help="亂數種子")
+    parser.add_argument("--output", type=str, help="輸出 JSON 檔案路徑（預設印出到 stdout）")
+    args = parser.parse_args()
+
+    # 分類流程的 debug / info log 會嚴重干擾量測
+    logging.disable(logging.WARNING)
+
+    scenarios = [
+        run_scenario(titles, keywords, aliases, repeat=args.repeat, seed=args.seed)
+        for titles, keywords, aliases in itertools.product(args.titles, args.keywords, args.aliases)
+    ]
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+        },
+        "scenarios": scenarios,
+    }
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+        print(f"✅ 已寫入 {args.output}（{len(scenarios)} 個情境）")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
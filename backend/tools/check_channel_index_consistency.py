@@ -9,6 +9,7 @@ from pathlib import Path
 
 # 載入 .env.local 並將專案根目錄加入 sys.path（必須在其他 backend 模組 import 前完成）
 sys.path.append(str(Path(__file__).resolve().parents[2]))
+sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 from dotenv import load_dotenv  # noqa: E402
 
@@ -27,6 +28,11 @@ from backend.services.firebase_init_service import init_firestore  # noqa: E402
 from google.api_core.exceptions import GoogleAPIError  # noqa: E402
 from google.cloud import firestore  # noqa: E402
 
+from services.firestore.channel_locator import (  # noqa: E402
+    LOCATOR_DOC_PATH,
+    rebuild_channel_locator,
+)
+
 # 初始化 logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
 
@@ -52,6 +58,42 @@ def fetch_all_batch_channels(db: firestore.Client) -> list[dict]:
         raise
 
 
+def fetch_batch_id_map(db: firestore.Client) -> dict[str, str]:
+    """從 channel_index_batch 建立實際的 channel_id → batch_id 對照表"""
+    result: dict[str, str] = {}
+    for doc in db.collection(BATCH_COLLECTION).stream():
+        for ch in (doc.to_dict() or {}).get("channels", []):
+            cid = ch.get("channel_id")
+            if cid:
+                result.setdefault(cid, doc.id)
+    return result
+
+
+def check_locator(db: firestore.Client, dry_run: bool = True) -> None:
+    """比對頻道定位表與 channel_index_batch 實際位置，--fix 時整張重建"""
+    actual = fetch_batch_id_map(db)
+    snapshot = db.document(LOCATOR_DOC_PATH).get()
+    stored = ((snapshot.to_dict() or {}) if snapshot.exists else {}).get("channels") or {}
+
+    wrong = {cid: bid for cid, bid in actual.items() if stored.get(cid) != bid}
+    extra = [cid for cid in stored if cid not in actual]
+
+    print("\n====== 頻道定位表 ======")
+    print(f"✅ 正確筆數：{len(actual) - len(wrong)}")
+    print(f"❌ 缺少或錯誤：{len(wrong)}")
+    print(f"⚠️ 已不存在的頻道：{len(extra)}")
+    for cid, bid in wrong.items():
+        print(f" - {cid}：{stored.get(cid)} → {bid}")
+
+    if not wrong and not extra:
+        return
+    if dry_run:
+        print("🛠️ Dry Run 模式，不會重建定位表（加上 --fix 以重建）")
+    else:
+        rebuild_channel_locator(db, actual)
+        print(f"📝 已重建頻道定位表，共 {len(actual)} 筆")
+
+
 def compare_documents(expected: dict, actual: dict) -> list[str]:
     differences = []
 
@@ -171,6 +213,7 @@ def main():
         db = init_firestore()
         batch_channels = fetch_all_batch_channels(db)
         check_consistency(db, batch_channels, dry_run=not args.fix)
+        check_locator(db, dry_run=not args.fix)
     except Exception as e:
         logging.error(f"❌ 執行過程中發生錯誤：{e}")
 
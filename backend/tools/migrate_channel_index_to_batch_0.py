@@ -20,6 +20,7 @@ from pathlib import Path
 
 # 載入 .env.local 並將專案根目錄加入 sys.path（必須在其他 backend 模組 import 前完成）
 sys.path.append(str(Path(__file__).resolve().parents[2]))
+sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 from dotenv import load_dotenv  # noqa: E402
 
@@ -42,6 +43,8 @@ from backend.services.firebase_init_service import init_firestore  # noqa: E402
 from google.api_core.exceptions import GoogleAPIError  # noqa: E402
 from google.cloud import firestore  # noqa: E402
 
+from services.firestore.channel_locator import rebuild_channel_locator  # noqa: E402
+
 # 初始化 logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
 
@@ -90,6 +93,10 @@ def write_to_batch_0(db, channels: list[dict], dry_run: bool = False):
             }
         )
         logging.info(f"✅ 寫入 batch_0 成功，共 {len(channels)} 筆")
+
+        # 同步更新頻道定位表（channel_id → batch_id）
+        rebuild_channel_locator(db, {ch["channel_id"]: "batch_0" for ch in channels})
+        logging.info("✅ 已重建頻道定位表")
     except GoogleAPIError:
         logging.exception("❌ 寫入 batch_0 時發生錯誤")
         raise
@@ -1,6 +1,22 @@
+import hashlib
+import json
 import logging
 import re
-from typing import Any
+import threading
+from collections import deque
+from collections.abc import Iterable
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from cachetools import LRUCache
+
+from utils.classification_trace import current_trace, record_trace
+
+if TYPE_CHECKING:
+    from utils.compiled_settings import CompiledSettings
+
+_MENTION_PATTERN = re.compile(r"@\w+")
+_TOKEN_PATTERN = re.compile(r"[a-z0-9_.:\-–—]{2,}")
+_EN_KEYWORD_PATTERN = re.compile(r"[a-z0-9]{2,}")
 
 
 def normalize(text: str) -> str:
@@ -21,13 +37,7 @@ def tokenize_title(title: str) -> set[str]:
     # \w 包含 a-zA-Z0-9_，我們手動補上 . : -
     tokens = re.findall(r"[a-z0-9_.:\-–—]{2,}", clean_title)
 
-    english_tokens = set(tokens)
-
-    logging.debug("🧱 tokenize_title | raw_title=%s", title)
-    logging.debug("🧱 tokenize_title | clean_title=%s", clean_title)
-    logging.debug("🧱 tokenize_title | tokens=%s", english_tokens)
-
-    return english_tokens
+    return set(tokens)
 
 
 def keyword_in_title(keyword: str, tokens: set[str], raw_title: str) -> bool:
@@ -35,28 +45,13 @@ def keyword_in_title(keyword: str, tokens: set[str], raw_title: str) -> bool:
     根據關鍵字類型使用不同策略：
     - 英文/數字（含混合）：比對 tokens（字詞集合）
     - 其他語言（例如中文）：使用 in 直接檢查原始標題（未 normalize）
-    並印出詳細 log
+    分類時的命中細節改由 classification_trace 追蹤模式記錄
     """
     kw_lower = keyword.lower()
 
     if re.fullmatch(r"[a-z0-9]{2,}", kw_lower):
-        result = kw_lower in tokens
-        logging.debug(
-            "🔎 keyword_in_title | keyword=%s | type=EN | tokens=%s | result=%s",
-            keyword,
-            tokens,
-            result,
-        )
-    else:
-        result = keyword.lower() in raw_title.lower()
-        logging.debug(
-            "🔎 keyword_in_title | keyword=%r | raw_title=%r | result=%s",
-            keyword,
-            raw_title,
-            result,
-        )
-
-    return result
+        return kw_lower in tokens
+    return kw_lower in raw_title.lower()
 
 
 TYPE_MAP = {
@@ -68,40 +63,201 @@ TYPE_MAP = {
 }
 
 
-def match_category_and_game(
-    title: str, video_type: str, settings: dict[str, Any]
-) -> dict[str, Any]:
+class ClassificationResult(NamedTuple):
+    """單一標題的分類結果（輕量 record，需要 dict 時呼叫 to_dict()）"""
+
+    matched_categories: list[str]
+    game: str | None
+    matched_keywords: list[str]
+    matched_pairs: list[dict[str, Any]]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "matchedCategories": self.matched_categories,
+            "game": self.game,
+            "matchedKeywords": self.matched_keywords,
+            "matchedPairs": self.matched_pairs,
+        }
+
+
+def _fallback_result() -> ClassificationResult:
+    """分類發生錯誤時的安全預設值"""
+    return ClassificationResult(
+        ["其他"], None, [], [{"main": "其他", "keyword": "", "hitKeywords": []}]
+    )
+
+
+# ════════════════════════════════════════════════════════
+# 編譯後的關鍵字比對器
+# ════════════════════════════════════════════════════════
+
+
+def _extract_tokens(title: str) -> set[str]:
+    """與 tokenize_title 相同的 token 規則，使用預先編譯的 regex（供熱路徑使用）"""
+    return set(_TOKEN_PATTERN.findall(_MENTION_PATTERN.sub("", title).lower()))
+
+
+class _SubstringAutomaton:
+    """
+    Aho-Corasick 自動機：對已轉小寫的標題掃描一次，
+    即可找出所有出現在標題中的子字串關鍵字（中文、日文、含符號的關鍵字）。
     """
-    根據設定檔判斷影片標題屬於哪些主分類，並解析遊戲名稱。
 
-    回傳格式：
-    {
-        "matchedCategories": List[str],  # e.g. ["遊戲", "雜談"]
-        "game": Optional[str],          # e.g. "GeoGuessr"
-        "matchedKeywords": List[str],   # 實際命中的關鍵字
-        "matchedPairs": List[Dict]      # e.g. [{main: "遊戲", keyword: "GeoGuessr", hitKeywords: ["mc", "麥塊"]}]
-    }
+    __slots__ = ("_goto", "_fail", "_output")
+
+    def __init__(self, patterns: Iterable[str]):
+        goto: list[dict[str, int]] = [{}]
+        output: list[set[str]] = [set()]
+
+        # 1️⃣ 建立 trie
+        for pattern in patterns:
+            state = 0
+            for ch in pattern:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    output.append(set())
+                state = nxt
+            output[state].add(pattern)
+
+        # 2️⃣ BFS 建立 failure link，並把 failure 節點的輸出併入
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                fallback = fail[state]
+                while fallback and ch not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[nxt] = goto[fallback].get(ch, 0)
+                output[nxt] |= output[fail[nxt]]
+
+        self._goto = goto
+        self._fail = fail
+        self._output = [tuple(o) for o in output]
+
+    def find_all(self, text: str) -> set[str]:
+        goto, fail, output = self._goto, self._fail, self._output
+        found: set[str] = set()
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+
+
+class KeywordScanner:
+    """
+    將一組（已轉小寫的）關鍵字拆成兩種比對策略：
+    - 純英數關鍵字（[a-z0-9]{2,}）放進 token hash set，與標題 token 取交集
+    - 其他關鍵字（中文、日文、含符號）放進 Aho-Corasick 自動機，一次掃描標題
     """
-    try:
-        matched_categories: list[str] = []
-        matched_keywords: list[str] = []
-        matched_pairs: list[dict[str, Any]] = []
-        matched_game: str | None = None
 
-        logging.debug("🧪 settings 結構：%s", settings.keys())
-        logging.debug("🧪 settings['live'] = %s", settings.get("live", "❌ 無資料"))
+    __slots__ = ("token_keywords", "automaton", "match_empty")
 
-        title_tokens = tokenize_title(title)
-        logging.debug("🔍 [match] 處理影片標題: %s", title)
-        logging.debug("🔍 [match] tokens: %s", title_tokens)
+    def __init__(self, keywords: Iterable[str]):
+        keywords = set(keywords)
+        self.match_empty = "" in keywords
+        self.token_keywords = frozenset(kw for kw in keywords if _EN_KEYWORD_PATTERN.fullmatch(kw))
+        substrings = [kw for kw in keywords if kw and kw not in self.token_keywords]
+        self.automaton = _SubstringAutomaton(substrings) if substrings else None
 
-        type_key = TYPE_MAP.get(video_type, video_type)
-        category_settings = settings.get(type_key, {})
-        logging.debug("📁 [match] 類型分類設定: %s", list(category_settings.keys()))
+    def find_hits(self, title: str) -> set[str]:
+        """回傳標題命中的（小寫）關鍵字集合"""
+        return self.scan(title.lower(), _extract_tokens(title))
+
+    def scan(self, lowered_title: str, tokens: set[str]) -> set[str]:
+        """以預先轉小寫的標題與 token 比對；同一標題交給多個 scanner 時只需準備一次"""
+        hits = self.automaton.find_all(lowered_title) if self.automaton else set()
+        if self.token_keywords:
+            hits.update(self.token_keywords.intersection(tokens))
+        if self.match_empty:
+            hits.add("")
+        return hits
+
+
+class CompiledGames:
+    """
+    遊戲分類：依設定順序排列的遊戲條目，加上「小寫關鍵字 → 遊戲順位」反向索引。
+    命中的關鍵字中順位最小者即為結果，等同依設定順序逐一比對、第一個命中即停止。
+    """
+
+    __slots__ = ("entries", "game_index", "broken_game_index", "_scanner")
+
+    def __init__(self, game_entries: dict[str, Any]):
+        # 順位 → (game_name, 原始關鍵字, 小寫關鍵字)
+        self.entries: dict[int, tuple[str, tuple, tuple]] = {}
+        # 小寫關鍵字 → 第一個包含它的遊戲順位
+        self.game_index: dict[str, int] = {}
+        # 第一個格式錯誤的條目順位（比對掃到該處時視同分類錯誤）
+        self.broken_game_index: int | None = None
+        self._scanner: KeywordScanner | None = None
+
+        for index, (game_name, keywords) in enumerate(game_entries.items()):
+            try:
+                originals = tuple(keywords + [game_name])
+                lowered = tuple(kw.lower() for kw in originals)
+            except (TypeError, AttributeError):
+                self.broken_game_index = index
+                break
+            self.entries[index] = (game_name, originals, lowered)
+            for low in lowered:
+                self.game_index.setdefault(low, index)
+
+    @property
+    def local_keywords(self) -> Iterable[str]:
+        """需要放進各類型自有 scanner 的關鍵字"""
+        return self.game_index
+
+    @property
+    def shared_scanner(self) -> KeywordScanner | None:
+        """跨頻道共用的 scanner（單一設定檔版本沒有）"""
+        return None
+
+    @property
+    def scanner(self) -> KeywordScanner:
+        if self._scanner is None:
+            self._scanner = KeywordScanner(self.game_index)
+        return self._scanner
+
+    def resolve(self, hits: set[str]) -> tuple[str, tuple, tuple] | None:
+        """回傳順位最高的命中遊戲條目；掃到格式錯誤的條目時丟出 TypeError"""
+        best = min((self.game_index[kw] for kw in hits if kw in self.game_index), default=None)
+        if best is None:
+            if self.broken_game_index is not None:
+                raise TypeError(f"遊戲設定第 {self.broken_game_index} 筆格式錯誤")
+            return None
+        return self.entries[best]
+
+
+class CompiledCategorySettings:
+    """
+    單一影片類型（live / videos / shorts）預先編譯好的分類設定。
+    比對結果與逐一呼叫 keyword_in_title 完全一致。
+
+    遊戲分類可由外部傳入（例如以中央別名表為底、疊加使用者設定的版本），
+    此時共用的別名關鍵字由 games.shared_scanner 負責掃描，不會複製進本物件；
+    標題只轉換一次小寫與 token，再交給兩個 scanner，命中結果合併。
+    """
+
+    __slots__ = (
+        "subcategories",
+        "games",
+        "has_other",
+        "scanner",
+        "_game_scanner",
+    )
+
+    def __init__(self, category_settings: dict[str, Any], games: Any = None):
+        # (main_category, sub_name, 原始關鍵字, 小寫關鍵字, 小寫關鍵字 set)
+        self.subcategories: list[tuple[str, str, tuple, tuple, frozenset]] = []
 
-        # ────────────────────────────────────────────────
-        # 1️⃣ 非遊戲分類比對
-        # ────────────────────────────────────────────────
         for main_category, subcategories in category_settings.items():
             if main_category == "遊戲":
                 continue
@@ -111,89 +267,272 @@ def match_category_and_game(
                 continue
 
             for sub_name, keywords in subcategories.items():
-                hit_keywords = []
-
-                if keyword_in_title(sub_name, title_tokens, title):
-                    hit_keywords.append(sub_name)
-
-                for kw in keywords:
-                    if keyword_in_title(kw, title_tokens, title):
-                        hit_keywords.append(kw)
+                originals = (sub_name, *keywords)
+                lowered = tuple(kw.lower() for kw in originals)
+                self.subcategories.append(
+                    (main_category, sub_name, originals, lowered, frozenset(lowered))
+                )
+
+        if games is None:
+            game_entries = category_settings.get("遊戲", {})
+            games = CompiledGames(game_entries if isinstance(game_entries, dict) else {})
+        self.games = games
+
+        self.has_other = "其他" in category_settings
+
+        all_keywords = set(games.local_keywords)
+        for entry in self.subcategories:
+            all_keywords.update(entry[4])
+        self.scanner = KeywordScanner(all_keywords)
+        self._game_scanner: KeywordScanner | None = None
+
+    def _find_hits(self, title: str, game_only: bool = False) -> set[str]:
+        if game_only:
+            if self._game_scanner is None:
+                self._game_scanner = KeywordScanner(self.games.local_keywords)
+            scanner = self._game_scanner
+        else:
+            scanner = self.scanner
+
+        lowered, tokens = title.lower(), _extract_tokens(title)
+        hits = scanner.scan(lowered, tokens)
+        shared = self.games.shared_scanner
+        if shared is not None:
+            hits |= shared.scan(lowered, tokens)
+        return hits
+
+    def _match_game(
+        self, hits: set[str], matched_keywords: list[str], matched_pairs: list[dict[str, Any]]
+    ) -> str | None:
+        """依反向索引找出順位最高的遊戲，並補上命中關鍵字與 pair"""
+        entry = self.games.resolve(hits)
+        if entry is None:
+            return None
+
+        game_name, originals, lowered = entry
+        local_hits = [kw for kw, low in zip(originals, lowered, strict=True) if low in hits]
+        matched_keywords.extend(local_hits)
+        matched_pairs.append({"main": "遊戲", "keyword": game_name, "hitKeywords": local_hits})
+        return game_name  # type: ignore[no-any-return]
+
+    def match(self, title: str) -> ClassificationResult:
+        hits = self._find_hits(title)
 
-                if hit_keywords:
-                    if main_category not in matched_categories:
-                        matched_categories.append(main_category)
-                    matched_keywords.extend(hit_keywords)
-                    matched_pairs.append(
-                        {"main": main_category, "keyword": sub_name, "hitKeywords": hit_keywords}
-                    )
-                    logging.debug(
-                        "🏷️ 命中分類 [%s > %s] via %s", main_category, sub_name, hit_keywords
-                    )
+        matched_categories: list[str] = []
+        matched_keywords: list[str] = []
+        matched_pairs: list[dict[str, Any]] = []
 
-        # ────────────────────────────────────────────────
-        # 2️⃣ 遊戲分類比對
-        # ────────────────────────────────────────────────
-        game_entries = category_settings.get("遊戲", {})
-        matched_game_name: str | None = None
-        game_hit_keywords: list[str] = []
-
-        if isinstance(game_entries, dict):
-            for game_name, keywords in game_entries.items():
-                all_keywords = keywords + [game_name]
-                local_hits = []
-
-                for kw in all_keywords:
-                    if keyword_in_title(kw, title_tokens, title):
-                        local_hits.append(kw)
-
-                if local_hits:
-                    matched_game_name = game_name
-                    matched_keywords.extend(local_hits)
-                    game_hit_keywords = local_hits
-                    matched_pairs.append(
-                        {"main": "遊戲", "keyword": game_name, "hitKeywords": game_hit_keywords}
-                    )
-                    logging.debug("🎮 命中遊戲 [%s] via keywords %s", game_name, local_hits)
-                    break
+        # 1️⃣ 非遊戲分類比對
+        if hits:
+            for main_category, sub_name, originals, lowered, key_set in self.subcategories:
+                if hits.isdisjoint(key_set):
+                    continue
+                hit_keywords = [
+                    kw for kw, low in zip(originals, lowered, strict=True) if low in hits
+                ]
+                if main_category not in matched_categories:
+                    matched_categories.append(main_category)
+                matched_keywords.extend(hit_keywords)
+                matched_pairs.append(
+                    {"main": main_category, "keyword": sub_name, "hitKeywords": hit_keywords}
+                )
+
+        # 2️⃣ 遊戲分類比對（依設定順序，第一個命中者優先）
+        matched_game = self._match_game(hits, matched_keywords, matched_pairs)
 
-        # ────────────────────────────────────────────────
         # 3️⃣ 統整結果
-        # ────────────────────────────────────────────────
-        if matched_game_name:
-            matched_game = matched_game_name
-            if "遊戲" not in matched_categories:
-                matched_categories.append("遊戲")
-        else:
-            matched_categories = [cat for cat in matched_categories if cat != "遊戲"]
+        if matched_game and "遊戲" not in matched_categories:
+            matched_categories.append("遊戲")
 
-        matched_categories = list(dict.fromkeys(matched_categories))
         matched_keywords = list(dict.fromkeys(matched_keywords))
 
-        if not matched_categories and "其他" in category_settings:
+        if not matched_categories and self.has_other:
             matched_categories = ["其他"]
-            logging.debug("➕ 無命中分類，自動套用 [其他]")
 
-        logging.debug(
-            "✅ [match] 結果 | Categories: %s | Game: %s | Keywords: %s | Pairs: %s",
-            matched_categories,
+        return ClassificationResult(
+            matched_categories, matched_game, matched_keywords, matched_pairs
+        )
+
+    def hit_keywords(self, title: str, game_only: bool = False) -> list[str]:
+        """標題命中的所有（小寫）關鍵字，供追蹤模式記錄比對依據"""
+        return sorted(self._find_hits(title, game_only))
+
+    def match_game_only(self, title: str) -> ClassificationResult:
+        """只比對遊戲分類（trending 用），略過所有非遊戲分類與「其他」補位"""
+        hits = self._find_hits(title, game_only=True)
+
+        matched_keywords: list[str] = []
+        matched_pairs: list[dict[str, Any]] = []
+        matched_game = self._match_game(hits, matched_keywords, matched_pairs)
+
+        return ClassificationResult(
+            ["遊戲"] if matched_game else [],
             matched_game,
-            matched_keywords,
+            list(dict.fromkeys(matched_keywords)),
             matched_pairs,
         )
 
-        return {
-            "matchedCategories": matched_categories,
-            "game": matched_game,
-            "matchedKeywords": matched_keywords,
-            "matchedPairs": matched_pairs,
-        }
 
+# 編譯結果快取：key 為 (id(settings), type_key)，值保留 settings 參照以避免 id 被回收重用。
+# settings 在合併完成後視為唯讀；若原地修改 settings，需呼叫 clear_compiled_settings_cache()。
+_COMPILED_CACHE_SIZE = 128
+_compiled_cache: LRUCache = LRUCache(maxsize=_COMPILED_CACHE_SIZE)
+_compiled_cache_lock = threading.Lock()
+
+
+# 比對規則變動時遞增，讓既有的持久化分類結果一併失效
+CLASSIFIER_VERSION = 1
+
+_fingerprint_cache: LRUCache = LRUCache(maxsize=_COMPILED_CACHE_SIZE)
+
+
+def clear_compiled_settings_cache() -> None:
+    """清空編譯後的分類設定快取（主要供測試使用）"""
+    with _compiled_cache_lock:
+        _compiled_cache.clear()
+        _fingerprint_cache.clear()
+
+
+def settings_fingerprint(settings: "dict[str, Any] | CompiledSettings") -> str:
+    """
+    計算合併後設定（含遊戲別名）的指紋，用於判斷持久化分類結果是否過期。
+    同一份 settings 物件只計算一次。
+    """
+    if not isinstance(settings, dict):
+        return settings.fingerprint
+
+    with _compiled_cache_lock:
+        cached = _fingerprint_cache.get(id(settings))
+    if cached is not None and cached[0] is settings:
+        return cached[1]  # type: ignore[no-any-return]
+
+    payload = json.dumps(
+        [CLASSIFIER_VERSION, settings], sort_keys=True, ensure_ascii=False, default=str
+    )
+    fingerprint = hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+    with _compiled_cache_lock:
+        _fingerprint_cache[id(settings)] = (settings, fingerprint)
+    return fingerprint
+
+
+def _get_compiled_category_settings(
+    settings: "dict[str, Any] | CompiledSettings", type_key: str
+) -> CompiledCategorySettings:
+    if not isinstance(settings, dict):
+        return settings.for_type(type_key)
+
+    cache_key = (id(settings), type_key)
+    with _compiled_cache_lock:
+        cached = _compiled_cache.get(cache_key)
+    if cached is not None and cached[0] is settings:
+        return cached[1]  # type: ignore[no-any-return]
+
+    compiled = CompiledCategorySettings(settings.get(type_key, {}))
+    with _compiled_cache_lock:
+        _compiled_cache[cache_key] = (settings, compiled)
+    return compiled
+
+
+def classify_batch(
+    items: Iterable[tuple[str, str]],
+    settings: "dict[str, Any] | CompiledSettings",
+    game_only: bool = False,
+) -> list[ClassificationResult]:
+    """
+    以同一份 settings（合併後 dict 或 CompiledSettings）批次分類多個標題。
+    - items 為 (title, video_type) 序列，回傳結果與輸入順序一一對應
+    - 每種影片類型只準備一次編譯後設定，整批在同一個迴圈內完成
+    - game_only=True 時只比對遊戲分類，matchedCategories 僅含「遊戲」或為空
+    - 單筆分類失敗時該筆回傳「其他」預設值，不影響其他標題
+    """
+    compiled_by_type: dict[str, CompiledCategorySettings | None] = {}
+    results: list[ClassificationResult] = []
+    # 追蹤模式只在整批開始時判斷一次，未啟用時迴圈內沒有任何額外成本
+    trace_channel = current_trace()
+    fingerprint = settings_fingerprint(settings) if trace_channel is not None else None
+
+    for title, video_type in items:
+        compiled = None
+        try:
+            if video_type in compiled_by_type:
+                compiled = compiled_by_type[video_type]
+            else:
+                try:
+                    type_key = TYPE_MAP.get(video_type, video_type)
+                    compiled = _get_compiled_category_settings(settings, type_key)
+                except Exception:  # noqa: BLE001
+                    logging.error(
+                        "🔥 [classify_batch] 類型 %r 的分類設定無法使用", video_type, exc_info=True
+                    )
+                    compiled = None
+                compiled_by_type[video_type] = compiled
+
+            if compiled is None:
+                result = _fallback_result()
+            elif game_only:
+                result = compiled.match_game_only(title)
+            else:
+                result = compiled.match(title)
+            failed = compiled is None
+
+        except Exception:  # noqa: BLE001
+            logging.error("🔥 [classify_batch] 發生分類錯誤：%r", title, exc_info=True)
+            result = _fallback_result()
+            failed = True
+
+        results.append(result)
+        if trace_channel is not None:
+            _record_decision(
+                trace_channel, fingerprint, title, video_type, compiled, result, game_only, failed
+            )
+
+    return results
+
+
+def _record_decision(
+    channel_id: str,
+    fingerprint: str | None,
+    title: str,
+    video_type: str,
+    compiled: CompiledCategorySettings | None,
+    result: ClassificationResult,
+    game_only: bool,
+    failed: bool,
+) -> None:
+    """將單筆分類決策寫入追蹤 buffer（僅在追蹤模式下呼叫）"""
+    try:
+        hits = compiled.hit_keywords(title, game_only) if compiled is not None else []
     except Exception:  # noqa: BLE001
-        logging.error("🔥 [match_category_and_game] 發生分類錯誤", exc_info=True)
-        return {
-            "matchedCategories": ["其他"],
-            "game": None,
-            "matchedKeywords": [],
-            "matchedPairs": [{"main": "其他", "keyword": "", "hitKeywords": []}],
-        }
+        hits = []
+
+    record_trace(
+        channel_id,
+        {
+            "title": title,
+            "videoType": video_type,
+            "typeKey": TYPE_MAP.get(video_type, video_type),
+            "gameOnly": game_only,
+            "settingsFingerprint": fingerprint,
+            "hits": hits,
+            "error": failed,
+            **result.to_dict(),
+        },
+    )
+
+
+def match_category_and_game(
+    title: str, video_type: str, settings: "dict[str, Any] | CompiledSettings"
+) -> dict[str, Any]:
+    """
+    根據設定檔判斷影片標題屬於哪些主分類，並解析遊戲名稱。
+    單一標題版本，內部交由 classify_batch 處理。
+
+    回傳格式：
+    {
+        "matchedCategories": List[str],  # e.g. ["遊戲", "雜談"]
+        "game": Optional[str],          # e.g. "GeoGuessr"
+        "matchedKeywords": List[str],   # 實際命中的關鍵字
+        "matchedPairs": List[Dict]      # e.g. [{main: "遊戲", keyword: "GeoGuessr", hitKeywords: ["mc", "麥塊"]}]
+    }
+    """
+    return classify_batch([(title, video_type)], settings)[0].to_dict()
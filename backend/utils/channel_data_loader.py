@@ -1,43 +1,158 @@
-from typing import Any
+import logging
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from functools import partial
+from typing import Any, NamedTuple
 
+from google.api_core.exceptions import GoogleAPIError
 from google.cloud.firestore import Client
 
-from utils.settings_game_merger import merge_game_categories_with_aliases
+from utils.breaker_instances import firestore_breaker
+from utils.circuit_breaker import CircuitOpenError
+from utils.compiled_settings import CompiledSettings, get_alias_table
+
+logger = logging.getLogger(__name__)
+
+# get_all 單次讀取的文件數上限
+CONFIG_BATCH_SIZE = 100
+# 同時串流 videos_batch 的頻道數
+DEFAULT_MAX_WORKERS = 8
+
+
+class ChannelData(NamedTuple):
+    channel_id: str
+    settings: CompiledSettings
+    videos: list[dict[str, Any]]
+
+
+def _config_path(channel_id: str) -> str:
+    return f"channel_data/{channel_id}/settings/config"
+
+
+def _guarded(label: str, func: Callable[[], Any]) -> Any:
+    """以 firestore_breaker 保護單次 Firestore 呼叫；熔斷中直接丟出 CircuitOpenError"""
+    if not firestore_breaker.allow_request():
+        logger.warning("🔴 Firestore 熔斷中，中止載入：%s", label)
+        raise CircuitOpenError(firestore_breaker.name)
+    try:
+        result = func()
+    except GoogleAPIError:
+        firestore_breaker.record_failure()
+        logger.error("🔥 載入頻道資料失敗：%s", label, exc_info=True)
+        raise
+    firestore_breaker.record_success()
+    return result
+
+
+def _get_all(db: Client, refs: list) -> list:
+    return list(db.get_all(refs))
+
+
+def _load_configs(db: Client, channel_ids: list[str]) -> dict[str, dict[str, Any]]:
+    """以 get_all 分批讀取所有頻道的 settings/config，缺少設定的頻道回傳空 dict"""
+    configs: dict[str, dict[str, Any]] = {}
+    for start in range(0, len(channel_ids), CONFIG_BATCH_SIZE):
+        chunk = channel_ids[start : start + CONFIG_BATCH_SIZE]
+        refs = [db.document(_config_path(cid)) for cid in chunk]
+        path_to_channel = {_config_path(cid): cid for cid in chunk}
+        snapshots = _guarded(f"settings/config ×{len(refs)}", partial(_get_all, db, refs))
+        for snapshot in snapshots:
+            channel_id = path_to_channel.get(snapshot.reference.path)
+            if channel_id and snapshot.exists:
+                configs[channel_id] = snapshot.to_dict() or {}
+    return configs
+
+
+def _load_videos(db: Client, channel_id: str) -> list[dict[str, Any]]:
+    def stream() -> list[dict[str, Any]]:
+        batch_ref = db.collection("channel_data").document(channel_id).collection("videos_batch")
+        video_items: list[dict[str, Any]] = []
+        for doc in batch_ref.stream():
+            video_items.extend((doc.to_dict() or {}).get("videos", []))
+        return video_items
+
+    return _guarded(f"{channel_id}/videos_batch", stream)  # type: ignore[no-any-return]
+
+
+def stream_channel_data(
+    db: Client,
+    active_channels: list[dict[str, Any]],
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    timings: dict[str, Any] | None = None,
+) -> Iterator[ChannelData]:
+    """
+    並行載入頻道設定與影片，每個頻道載入完成即 yield（順序不保證與輸入相同）：
+    - settings/config 以 get_all 分批一次取回，所有頻道共用同一張中央別名表
+    - videos_batch 由有上限的 thread pool 串流，同時在途的頻道數最多 2 × max_workers，
+      消費端處理較慢時不會把所有頻道的影片都堆在記憶體裡
+    - 每次 Firestore 呼叫都經過 firestore_breaker；熔斷或讀取失敗時丟出例外並取消其餘工作
+    - 傳入 timings 時寫入各階段耗時（秒）：configs / videos_wait / total，以及頻道與影片數
+    """
+    started = time.perf_counter()
+    channel_ids = list(
+        dict.fromkeys(cid for channel in active_channels if (cid := channel.get("channel_id")))
+    )
+    stats: dict[str, Any] = {"channels": len(channel_ids), "videos": 0, "videos_wait": 0.0}
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="channel-loader")
+    pending: dict[Future, str] = {}
+    queue = iter(channel_ids)
+
+    def submit_next() -> None:
+        channel_id = next(queue, None)
+        if channel_id is not None:
+            pending[executor.submit(_load_videos, db, channel_id)] = channel_id
+
+    try:
+        # 影片先開始串流，設定在主執行緒以 get_all 讀取，兩者重疊進行
+        for _ in range(max_workers * 2):
+            submit_next()
+
+        config_started = time.perf_counter()
+        alias_table = get_alias_table()
+        configs = _load_configs(db, channel_ids)
+        stats["configs"] = round(time.perf_counter() - config_started, 4)
+
+        while pending:
+            wait_started = time.perf_counter()
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            stats["videos_wait"] += time.perf_counter() - wait_started
+            for future in done:
+                channel_id = pending.pop(future)
+                videos = future.result()
+                submit_next()
+                stats["videos"] += len(videos)
+                settings = CompiledSettings(configs.get(channel_id, {}), alias_table)
+                yield ChannelData(channel_id, settings, videos)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        stats["videos_wait"] = round(stats["videos_wait"], 4)
+        stats["total"] = round(time.perf_counter() - started, 4)
+        if timings is not None:
+            timings.update(stats)
+        logger.info(
+            "📥 頻道資料載入：%d 個頻道、%d 部影片｜設定 %.2fs、等待影片 %.2fs、總計 %.2fs",
+            stats["channels"],
+            stats["videos"],
+            stats.get("configs", 0.0),
+            stats["videos_wait"],
+            stats["total"],
+        )
 
 
 def load_channel_settings_and_videos(
     db: Client, active_channels: list[dict[str, Any]]
-) -> tuple[dict[str, Any], dict[str, list[dict[str, Any]]]]:
+) -> tuple[dict[str, CompiledSettings], dict[str, list[dict[str, Any]]]]:
     """
     載入頻道設定與影片，回傳兩個 dict：
-    - channel_settings_map[channel_id] = merged_settings
+    - channel_settings_map[channel_id] = CompiledSettings（所有頻道共用同一張中央別名表）
     - channel_videos_map[channel_id] = List of video items
+    需要邊載入邊處理時請改用 stream_channel_data。
     """
     channel_settings_map = {}
     channel_videos_map = {}
-
-    for channel in active_channels:
-        channel_id = channel.get("channel_id")
-        if not channel_id:
-            continue
-
-        # 設定
-        config_doc = (
-            db.collection("channel_data")
-            .document(channel_id)
-            .collection("settings")
-            .document("config")
-            .get()
-        )
-        raw_settings = config_doc.to_dict() if config_doc.exists else {}
-        merged_settings = merge_game_categories_with_aliases(raw_settings)
-        channel_settings_map[channel_id] = merged_settings
-
-        # 影片
-        batch_ref = db.collection("channel_data").document(channel_id).collection("videos_batch")
-        video_items = []
-        for doc in batch_ref.stream():
-            video_items.extend(doc.to_dict().get("videos", []))
-        channel_videos_map[channel_id] = video_items
-
+    for data in stream_channel_data(db, active_channels):
+        channel_settings_map[data.channel_id] = data.settings
+        channel_videos_map[data.channel_id] = data.videos
     return channel_settings_map, channel_videos_map
@@ -0,0 +1,149 @@
+"""
+分類追蹤模式：取代逐關鍵字的 debug log，只在明確啟用時記錄分類決策。
+
+- 預設關閉：分類熱路徑每批只讀一次 contextvar，不做任何格式化或 log 呼叫
+- 啟用方式：
+  - 針對單一頻道啟用一段時間（enable_channel_trace），之後該頻道的分類都會被記錄
+  - 單次呼叫強制啟用（trace_scope(channel_id, force=True)），例如 admin 端點重跑分類
+- 記錄寫入有上限的 ring buffer（超過上限時丟棄最舊的），由 admin 端點 dump
+
+注意：啟用狀態與 buffer 皆為 process 內記憶體，多個 instance 之間不共享。
+"""
+
+import threading
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import UTC, datetime
+from typing import Any
+
+from utils.request_id import get_request_id
+
+TRACE_BUFFER_SIZE = 2000
+DEFAULT_CHANNEL_TRACE_TTL = 3600  # 秒
+MAX_CHANNEL_TRACE_TTL = 86400
+
+_trace_buffer: deque[dict[str, Any]] = deque(maxlen=TRACE_BUFFER_SIZE)
+_trace_lock = threading.Lock()
+_traced_channels: dict[str, float] = {}  # channel_id → 到期時間（time.monotonic）
+
+# 目前呼叫範圍正在追蹤的 channel_id（None 代表未追蹤）
+_active_trace: ContextVar[str | None] = ContextVar("classification_trace", default=None)
+# 呼叫端若需要取回本次範圍內的記錄，另外收集到這個 list
+_active_sink: ContextVar[list[dict[str, Any]] | None] = ContextVar(
+    "classification_trace_sink", default=None
+)
+
+
+def enable_channel_trace(channel_id: str, ttl: int = DEFAULT_CHANNEL_TRACE_TTL) -> int:
+    """啟用指定頻道的追蹤，回傳實際生效的秒數（上限 MAX_CHANNEL_TRACE_TTL）"""
+    ttl = max(1, min(int(ttl), MAX_CHANNEL_TRACE_TTL))
+    with _trace_lock:
+        _traced_channels[channel_id] = time.monotonic() + ttl
+    return ttl
+
+
+def disable_channel_trace(channel_id: str) -> bool:
+    """停用指定頻道的追蹤，回傳該頻道原本是否在追蹤中"""
+    with _trace_lock:
+        return _traced_channels.pop(channel_id, None) is not None
+
+
+def get_traced_channels() -> dict[str, int]:
+    """回傳追蹤中的頻道與剩餘秒數（順便清掉已到期者）"""
+    now = time.monotonic()
+    with _trace_lock:
+        for channel_id in [cid for cid, exp in _traced_channels.items() if exp <= now]:
+            del _traced_channels[channel_id]
+        return {cid: int(exp - now) for cid, exp in _traced_channels.items()}
+
+
+def is_channel_traced(channel_id: str) -> bool:
+    if not _traced_channels:
+        return False
+    with _trace_lock:
+        expires_at = _traced_channels.get(channel_id)
+        if expires_at is None:
+            return False
+        if expires_at <= time.monotonic():
+            del _traced_channels[channel_id]
+            return False
+        return True
+
+
+@contextmanager
+def trace_scope(
+    channel_id: str, force: bool = False, sink: list[dict[str, Any]] | None = None
+) -> Iterator[bool]:
+    """
+    在 with 範圍內，若頻道已啟用追蹤（或 force=True），分類決策會寫入 ring buffer。
+    - 指定 sink 時，範圍內的記錄同時附加到 sink（不受 buffer 上限影響）
+    - 外層範圍已在追蹤同一頻道時，內層範圍沿用追蹤狀態
+    - yield 值代表此範圍是否正在追蹤
+    """
+    if not force and _active_trace.get() != channel_id and not is_channel_traced(channel_id):
+        yield False
+        return
+
+    token = _active_trace.set(channel_id)
+    sink_token = _active_sink.set(sink) if sink is not None else None
+    try:
+        yield True
+    finally:
+        if sink_token is not None:
+            _active_sink.reset(sink_token)
+        _active_trace.reset(token)
+
+
+def current_trace() -> str | None:
+    """目前呼叫範圍正在追蹤的 channel_id；未追蹤時回傳 None"""
+    return _active_trace.get()
+
+
+def record_trace(channel_id: str, entry: dict[str, Any]) -> None:
+    """寫入一筆分類決策（由 categorizer 在追蹤中呼叫）"""
+    record = {
+        "ts": datetime.now(UTC).isoformat(),
+        "channelId": channel_id,
+        "requestId": get_request_id(),
+        **entry,
+    }
+    with _trace_lock:
+        _trace_buffer.append(record)
+
+    sink = _active_sink.get()
+    if sink is not None:
+        sink.append(record)
+
+
+def dump_trace(channel_id: str | None = None, limit: int | None = None) -> list[dict[str, Any]]:
+    """取出 buffer 內容（舊 → 新），可依頻道過濾並只取最新 limit 筆"""
+    with _trace_lock:
+        entries = list(_trace_buffer)
+    if channel_id:
+        entries = [e for e in entries if e["channelId"] == channel_id]
+    if limit is not None:
+        entries = entries[-limit:] if limit > 0 else []
+    return entries
+
+
+def clear_trace(channel_id: str | None = None) -> int:
+    """清空 buffer（或只清除指定頻道的記錄），回傳清除筆數"""
+    with _trace_lock:
+        before = len(_trace_buffer)
+        if channel_id:
+            kept = [e for e in _trace_buffer if e["channelId"] != channel_id]
+            _trace_buffer.clear()
+            _trace_buffer.extend(kept)
+        else:
+            _trace_buffer.clear()
+        return before - len(_trace_buffer)
+
+
+def reset_classification_trace() -> None:
+    """清空 buffer 與所有頻道追蹤設定（主要供測試使用）"""
+    with _trace_lock:
+        _trace_buffer.clear()
+        _traced_channels.clear()
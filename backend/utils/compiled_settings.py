@@ -0,0 +1,266 @@
+"""
+CompiledSettings：合併後分類設定的結構共用表示。
+
+舊流程會把主分類複製到 live / videos / shorts 三份，再各自把整張中央遊戲別名表
+合併進去，每個頻道都持有三份別名副本並各自編譯。這裡改為：
+- 中央別名表只編譯一次（AliasTable），所有頻道以參照方式共用
+- 每個頻道、每種影片類型只保存使用者自訂遊戲的 overlay（關鍵字已預先轉小寫）
+- 內容相同的影片類型共用同一個編譯結果
+- 比對時以共用的別名 scanner 加上各頻道的小型 scanner 掃描，命中結果合併；
+  標題的小寫與 token 只準備一次，別名自動機不會因頻道而重建
+
+categorizer（classify_batch / match_category_and_game）可直接接受 CompiledSettings；
+需要舊格式 dict（例如回傳給前端）時呼叫 to_dict()，展開結果會快取在物件上。
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from types import MappingProxyType
+from typing import Any
+
+from utils.categorizer import (
+    CLASSIFIER_VERSION,
+    CompiledCategorySettings,
+    CompiledGames,
+    KeywordScanner,
+)
+from utils.game_alias_fetcher import fetch_global_alias_map_with_etag
+from utils.settings_game_merger import merge_game_config
+
+logger = logging.getLogger(__name__)
+
+VIDEO_TYPE_KEYS = ("live", "videos", "shorts")
+
+
+class AliasTable:
+    """中央遊戲別名表的編譯結果，跨頻道共用（alias_map 為別名快取本身的參照，不複製）"""
+
+    __slots__ = ("alias_map", "games", "positions", "fingerprint", "scanner")
+
+    def __init__(self, alias_map: dict[str, list[str]], etag: str = ""):
+        self.alias_map = alias_map
+        # 與 merge_game_config 相同：別名關鍵字去重後再加上遊戲名稱
+        self.games = CompiledGames(
+            {
+                name: list(dict.fromkeys(keywords)) if isinstance(keywords, list) else keywords
+                for name, keywords in alias_map.items()
+            }
+        )
+        self.positions = {name: index for index, name in enumerate(alias_map)}
+        if etag:
+            self.fingerprint = etag
+        else:
+            payload = json.dumps(alias_map, sort_keys=True, ensure_ascii=False, default=str)
+            self.fingerprint = hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+        # 別名表的自動機最大，建表時一次建好，之後所有頻道唯讀共用
+        self.scanner: KeywordScanner = self.games.scanner
+
+
+_alias_table: AliasTable | None = None
+_alias_table_lock = threading.Lock()
+
+
+def get_alias_table() -> AliasTable:
+    """取得目前別名快取對應的 AliasTable；別名內容（etag）未變動時沿用同一個物件"""
+    global _alias_table
+    try:
+        alias_map, etag = fetch_global_alias_map_with_etag()
+    except Exception:
+        logger.error("🔥 取得中央遊戲別名失敗，改用空別名表", exc_info=True)
+        alias_map, etag = {}, ""
+
+    with _alias_table_lock:
+        table = _alias_table
+        if table is not None and (
+            table.alias_map is alias_map or (etag and table.fingerprint == etag)
+        ):
+            return table
+
+    table = AliasTable(alias_map, etag)
+    logger.info("🧩 重建中央遊戲別名表，共 %d 筆", len(alias_map))
+    with _alias_table_lock:
+        _alias_table = table
+    return table
+
+
+def clear_alias_table() -> None:
+    """清除已編譯的別名表（主要供測試使用）"""
+    global _alias_table
+    with _alias_table_lock:
+        _alias_table = None
+
+
+class _LayeredGames:
+    """
+    以中央別名表為底、疊加使用者自訂遊戲的遊戲分類。
+    順位與 merge_game_config 的結果一致：別名表依序在前，使用者新增的遊戲接在後面；
+    使用者對既有遊戲補充的關鍵字沿用該遊戲在別名表中的順位。
+    """
+
+    __slots__ = ("table", "entries", "game_index", "broken_game_index")
+
+    def __init__(self, table: AliasTable, user_games: dict[str, Any]):
+        self.table = table
+        self.entries: dict[int, tuple[str, tuple, tuple]] = {}
+        self.game_index: dict[str, int] = {}
+        broken = table.games.broken_game_index
+
+        extra_position = len(table.alias_map)
+        for game_name, keywords in user_games.items():
+            shared_position = table.positions.get(game_name)
+            if shared_position is None:
+                # 使用者新增的遊戲
+                position = extra_position
+                extra_position += 1
+            elif not isinstance(keywords, list) or not keywords:
+                # 沒有補充關鍵字，直接使用別名表條目
+                continue
+            else:
+                position = shared_position
+
+            try:
+                if shared_position is None:
+                    originals = tuple(keywords + [game_name])
+                else:
+                    merged = dict.fromkeys(table.alias_map[game_name] + keywords)
+                    originals = (*merged, game_name)
+                lowered = tuple(kw.lower() for kw in originals)
+            except (TypeError, AttributeError):
+                broken = position if broken is None else min(broken, position)
+                continue
+
+            self.entries[position] = (game_name, originals, lowered)
+            for low in lowered:
+                current = self.game_index.get(low)
+                if current is None or position < current:
+                    self.game_index[low] = position
+
+        self.broken_game_index = broken
+
+    @property
+    def local_keywords(self) -> dict[str, int]:
+        return self.game_index
+
+    @property
+    def shared_scanner(self) -> KeywordScanner:
+        return self.table.scanner
+
+    def resolve(self, hits: set[str]) -> tuple[str, tuple, tuple] | None:
+        """回傳順位最高的命中遊戲條目；掃到格式錯誤的條目時丟出 TypeError"""
+        shared_index = self.table.games.game_index
+        best = None
+        for kw in hits:
+            for index in (shared_index.get(kw), self.game_index.get(kw)):
+                if index is not None and (best is None or index < best):
+                    best = index
+
+        broken = self.broken_game_index
+        if broken is not None and (best is None or best >= broken):
+            raise TypeError(f"遊戲設定第 {broken} 筆格式錯誤")
+        if best is None:
+            return None
+        return self.entries.get(best) or self.table.games.entries[best]
+
+
+class CompiledSettings:
+    """
+    單一頻道合併後分類設定（建立後請勿修改傳入的 settings）。
+    - base：遊戲別名合併前的設定（主分類合併後的 live / videos / shorts，或原始設定）；
+      只有最上層是唯讀 view，底下的分類 dict 仍與傳入的 settings 共用，不可就地修改
+    - 遊戲分類以 AliasTable 參照 + 使用者 overlay 表示
+    - 各影片類型的比對器延遲編譯，內容相同的類型共用同一個
+    """
+
+    __slots__ = ("base", "alias_table", "_compiled", "_fingerprint", "_expanded", "_lock")
+
+    def __init__(self, settings: dict[str, Any], alias_table: AliasTable):
+        self.base: MappingProxyType[str, Any] = MappingProxyType(dict(settings))
+        self.alias_table = alias_table
+        self._compiled: dict[str, CompiledCategorySettings] = {}
+        self._fingerprint: str | None = None
+        self._expanded: dict[str, Any] | None = None
+        self._lock = threading.Lock()
+
+    def _category_settings(self, type_key: str) -> dict[str, Any]:
+        category_settings = self.base.get(type_key, {})
+        if not isinstance(category_settings, dict):
+            raise TypeError(f"[{type_key}] 分類設定不是 dict 結構")
+        return category_settings
+
+    def _user_games(self, type_key: str) -> dict[str, Any]:
+        user_games = self._category_settings(type_key).get("遊戲", {})
+        if not isinstance(user_games, dict):
+            logger.warning("⚠️ [%s] 使用者遊戲分類格式錯誤，重設為空 dict", type_key)
+            return {}
+        return user_games
+
+    def for_type(self, type_key: str) -> CompiledCategorySettings:
+        """取得指定影片類型（live / videos / shorts）的編譯後設定"""
+        with self._lock:
+            compiled = self._compiled.get(type_key)
+            if compiled is not None:
+                return compiled
+
+            category_settings = self._category_settings(type_key)
+            if type_key not in VIDEO_TYPE_KEYS:
+                # 非標準類型不合併中央別名（與 merge_game_categories_with_aliases 一致）
+                compiled = CompiledCategorySettings(category_settings)
+            else:
+                # 主分類合併後三種類型通常內容相同，直接共用
+                for other_key, other in self._compiled.items():
+                    if (
+                        other_key in VIDEO_TYPE_KEYS
+                        and self.base.get(other_key) == category_settings
+                    ):
+                        compiled = other
+                        break
+                else:
+                    games = _LayeredGames(self.alias_table, self._user_games(type_key))
+                    compiled = CompiledCategorySettings(category_settings, games=games)
+
+            self._compiled[type_key] = compiled
+            return compiled
+
+    @property
+    def fingerprint(self) -> str:
+        """設定指紋（含別名表版本），用於判斷持久化分類結果是否過期"""
+        if self._fingerprint is None:
+            payload = json.dumps(
+                [CLASSIFIER_VERSION, dict(self.base), self.alias_table.fingerprint],
+                sort_keys=True,
+                ensure_ascii=False,
+                default=str,
+            )
+            self._fingerprint = hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+        return self._fingerprint
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        展開為舊格式的合併設定 dict（與 merge_game_categories_with_aliases 結果相同）。
+        第一次呼叫時展開並快取，之後回傳同一個物件；呼叫端只能讀取，需要修改請自行複製。
+        """
+        expanded = self._expanded
+        if expanded is not None:
+            return expanded
+
+        settings = dict(self.base)
+        for type_key in VIDEO_TYPE_KEYS:
+            category_settings = dict(self._category_settings(type_key))
+            category_settings["遊戲"] = merge_game_config(
+                self.alias_table.alias_map, self._user_games(type_key)
+            )
+            settings[type_key] = category_settings
+        with self._lock:
+            if self._expanded is None:
+                self._expanded = settings
+            return self._expanded
+
+    def __bool__(self) -> bool:
+        return bool(self.base)
+
+
+def compile_settings(settings: dict[str, Any]) -> CompiledSettings:
+    """以目前的中央別名表建立 CompiledSettings"""
+    return CompiledSettings(settings, get_alias_table())
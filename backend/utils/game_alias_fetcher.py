@@ -1,45 +1,241 @@
+import hashlib
+import json
 import logging
 import os
+import tempfile
+import threading
 import time
+from pathlib import Path
 
 import requests
 
 logger = logging.getLogger(__name__)
 
-# ✅ 快取區
+# ✅ 快取區（讀寫皆需持有 _lock）
 _cache: dict[str, list[str]] = {}
 _last_fetch_time: float = 0
 _CACHE_TTL = 3600  # 一小時（秒）
+_FETCH_TIMEOUT = 30
+_cache_etag: str = ""  # 快取內容雜湊，跨 process / 重啟皆穩定
+# 連續抓取失敗時暫停自動重新抓取：60 秒起每次加倍，最長 30 分鐘（force_refresh 不受限）
+_FAILURE_BACKOFF = 60
+_FAILURE_BACKOFF_MAX = 1800
+_failure_count = 0
+_retry_after: float = 0
 
+_lock = threading.Lock()
+# 進行中的刷新（single-flight）：同一時間只有一個執行緒向 API 發出請求
+_inflight: threading.Event | None = None
+_snapshot_loaded = False
 
-def fetch_global_alias_map(force_refresh: bool = False) -> dict[str, list[str]]:
+# 磁碟快照：成功抓取後寫入，create_app() 啟動時載入，讓新 worker 不必同步等待 API
+# 預設位置在暫存目錄，只在同一個容器內有效（例如 gunicorn worker 重啟）；
+# Cloud Run 冷啟動時暫存目錄是空的，要跨冷啟動保留須以 GAME_ALIAS_SNAPSHOT_PATH
+# 指向掛載的持久化 volume（例如 Cloud Storage volume mount）。
+# 設為空字串可停用（測試環境即如此）
+_DEFAULT_SNAPSHOT_PATH = os.path.join(tempfile.gettempdir(), "game_alias_snapshot.json")
+
+
+def _snapshot_path() -> str:
+    return os.getenv("GAME_ALIAS_SNAPSHOT_PATH", _DEFAULT_SNAPSHOT_PATH)
+
+
+def _compute_etag(data: dict[str, list[str]]) -> str:
+    payload = json.dumps(data, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+
+
+def get_alias_map_etag() -> str:
+    """回傳目前遊戲別名快取的內容雜湊（空快取為空字串），供下游快取作為 key"""
+    return _cache_etag
+
+
+def _replace_cache(data: dict[str, list[str]], fetched_at: float) -> bool:
+    """以新資料替換快取，回傳內容是否有變動（呼叫端需持有 _lock）"""
+    global _cache, _last_fetch_time, _cache_etag
+    changed = data != _cache
+    if changed:
+        _cache_etag = _compute_etag(data)
+    _cache = data
+    _last_fetch_time = fetched_at
+    return changed
+
+
+def load_alias_snapshot() -> bool:
     """
-    從 Google Apps Script 抓取遊戲別名 JSON，使用記憶體快取。
+    從磁碟快照載入遊戲別名（每個程序只嘗試一次），回傳是否成功載入。
+    快照的抓取時間會一併還原，過期時第一次使用即會在背景重新驗證。
     """
-    global _cache, _last_fetch_time
-    now = time.time()
+    global _snapshot_loaded
+    with _lock:
+        if _snapshot_loaded:
+            return False
+        _snapshot_loaded = True
+        if _cache:
+            return False
+
+    path = _snapshot_path()
+    if not path or not os.path.exists(path):
+        return False
+
+    try:
+        snapshot = json.loads(Path(path).read_text(encoding="utf-8"))
+        data = snapshot["aliases"]
+        if not isinstance(data, dict):
+            raise ValueError("快照格式錯誤，預期 aliases 為 dict")
+        fetched_at = float(snapshot.get("fetched_at", 0))
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.warning("⚠️ 無法載入遊戲別名快照 %s：%s", path, e)
+        return False
+
+    with _lock:
+        if _cache:
+            return False
+        _replace_cache(data, fetched_at)
+    logger.info("📂 從快照載入遊戲別名，共 %d 筆（etag=%s）", len(data), _cache_etag)
+    return True
+
+
+def seed_alias_cache(data: dict[str, list[str]]) -> None:
+    """
+    以指定內容取代遊戲別名快取，並視為剛抓取完成（離線工具用，例如效能量測）。
+    不寫入磁碟快照，也不會再被啟動時的快照覆蓋；TTL 到期後照常重新抓取。
+    """
+    global _snapshot_loaded, _failure_count, _retry_after
+    with _lock:
+        _snapshot_loaded = True
+        _failure_count = 0
+        _retry_after = 0
+        _replace_cache(data, time.time())
+
+
+def _write_snapshot(data: dict[str, list[str]], fetched_at: float, etag: str) -> None:
+    """將別名寫入磁碟快照（先寫暫存檔再 rename，避免讀到寫一半的檔案）"""
+    path = _snapshot_path()
+    if not path:
+        return
+
+    try:
+        directory = os.path.dirname(path) or "."
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".game_alias_", suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(
+                {"fetched_at": fetched_at, "etag": etag, "aliases": data}, f, ensure_ascii=False
+            )
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning("⚠️ 無法寫入遊戲別名快照 %s：%s", path, e)
+
+
+def _record_fetch_result(ok: bool) -> None:
+    """記錄抓取結果並計算下一次允許自動重新抓取的時間（呼叫端需持有 _lock）"""
+    global _failure_count, _retry_after
+    if ok:
+        _failure_count, _retry_after = 0, 0
+        return
+    _failure_count += 1
+    backoff = min(_FAILURE_BACKOFF * 2 ** (_failure_count - 1), _FAILURE_BACKOFF_MAX)
+    _retry_after = time.time() + backoff
 
-    if not force_refresh and _cache and (now - _last_fetch_time < _CACHE_TTL):
-        logger.debug("♻️ 使用快取遊戲別名，共 %d 筆", len(_cache))
-        return _cache
 
+def _fetch_and_store() -> None:
+    """向 Google Apps Script 抓取別名並替換快取；失敗時保留舊快取並延後下一次自動抓取"""
     alias_api_url = os.getenv("GAME_ALIAS_ENDPOINT")
     if not alias_api_url:
         raise OSError("❌ GAME_ALIAS_ENDPOINT 尚未設定，請檢查環境變數")
 
     logger.debug("🌐 向 Google Sheet API 發送請求：%s", alias_api_url)
     try:
-        res = requests.get(alias_api_url, timeout=30)
+        res = requests.get(alias_api_url, timeout=_FETCH_TIMEOUT)
         res.raise_for_status()
         data = res.json()
 
         if not isinstance(data, dict):
             raise ValueError("回傳格式錯誤，預期為 dict")
 
-        _cache = data
-        _last_fetch_time = now
-        logger.info("✅ 成功抓取遊戲別名 JSON，共 %d 筆", len(data))
+        fetched_at = time.time()
+        with _lock:
+            changed = _replace_cache(data, fetched_at)
+            etag = _cache_etag
+            _record_fetch_result(ok=True)
+        logger.info("✅ 成功抓取遊戲別名 JSON，共 %d 筆（內容變動=%s）", len(data), changed)
+        _write_snapshot(data, fetched_at, etag)
+    except Exception as e:
+        with _lock:
+            _record_fetch_result(ok=False)
+            failures = _failure_count
+        logger.warning("⚠️ 無法取得遊戲別名（連續 %d 次），使用快取資料。原因：%s", failures, e)
+
+
+def _claim_refresh() -> tuple[threading.Event, bool]:
+    """取得進行中的刷新；沒有時由呼叫端負責執行（回傳 owner=True）"""
+    global _inflight
+    with _lock:
+        if _inflight is not None:
+            return _inflight, False
+        _inflight = threading.Event()
+        return _inflight, True
+
+
+def _run_refresh(event: threading.Event) -> None:
+    global _inflight
+    try:
+        _fetch_and_store()
+    finally:
+        with _lock:
+            _inflight = None
+        event.set()
+
+
+def _background_refresh(event: threading.Event) -> None:
+    try:
+        _run_refresh(event)
     except Exception as e:
-        logger.warning("⚠️ 無法取得遊戲別名，使用快取資料。原因：%s", e)
+        logger.warning("⚠️ 背景更新遊戲別名失敗，繼續使用舊資料：%s", e)
 
-    return _cache
+
+def fetch_global_alias_map_with_etag(
+    force_refresh: bool = False,
+) -> tuple[dict[str, list[str]], str]:
+    """
+    取得中央遊戲別名 JSON（Google Apps Script）與其 etag，使用記憶體快取。
+    - 快取有效：直接回傳
+    - 快取過期：立即回傳舊資料，並由單一背景執行緒重新驗證（stale-while-revalidate）
+    - 快取為空或 force_refresh：同步抓取；同時間的其他呼叫等待同一次請求結果（single-flight）
+    - 最近抓取失敗時，退避期間內不自動重新抓取，直接回傳目前快取（可能為空）
+    """
+    if not _snapshot_loaded:
+        load_alias_snapshot()
+
+    with _lock:
+        cache, etag = _cache, _cache_etag
+        now = time.time()
+        fresh = bool(cache) and (now - _last_fetch_time < _CACHE_TTL)
+        backing_off = now < _retry_after
+
+    if not force_refresh and (fresh or backing_off):
+        logger.debug("♻️ 使用快取遊戲別名，共 %d 筆", len(cache))
+        return cache, etag
+
+    if not force_refresh and cache:
+        event, owner = _claim_refresh()
+        if owner:
+            threading.Thread(
+                target=_background_refresh, args=(event,), name="game-alias-refresh", daemon=True
+            ).start()
+        logger.debug("⏳ 遊戲別名快取過期，先使用舊資料並於背景更新")
+        return cache, etag
+
+    event, owner = _claim_refresh()
+    if owner:
+        _run_refresh(event)
+    else:
+        event.wait(timeout=_FETCH_TIMEOUT + 5)
+
+    with _lock:
+        return _cache, _cache_etag
+
+
+def fetch_global_alias_map(force_refresh: bool = False) -> dict[str, list[str]]:
+    """取得中央遊戲別名 JSON（快取策略同 fetch_global_alias_map_with_etag）"""
+    return fetch_global_alias_map_with_etag(force_refresh)[0]
@@ -15,6 +15,32 @@ except Exception as e:
         return {}
 
 
+def merge_game_config(
+    global_alias_map: dict[str, list[str]], user_game_config: dict[str, Any]
+) -> dict[str, Any]:
+    """
+    合併單一影片類型的遊戲設定：中央別名在前（依別名表順序），使用者新增的遊戲接在後面。
+    - 遊戲名稱一致時關鍵字合併（去重），使用者關鍵字不是 list 時忽略
+    """
+    merged_games: dict[str, Any] = {}
+
+    # 1️⃣ 遍歷所有 global alias，與使用者定義合併
+    for game_name, global_keywords in global_alias_map.items():
+        user_keywords = user_game_config.get(game_name, [])
+        if not isinstance(user_keywords, list):
+            user_keywords = []
+
+        # 合併去重
+        merged_games[game_name] = list(dict.fromkeys(global_keywords + user_keywords))
+
+    # 2️⃣ 補上使用者新增但 global 沒有的遊戲
+    for game_name, user_keywords in user_game_config.items():
+        if game_name not in merged_games:
+            merged_games[game_name] = user_keywords
+
+    return merged_games
+
+
 def merge_game_categories_with_aliases(settings: dict[str, Any]) -> dict[str, Any]:
     """
     傳入原始 Firestore settings，對所有影片類型（live/videos/shorts）進行遊戲別名合併。
@@ -37,32 +63,12 @@ def merge_game_categories_with_aliases(settings: dict[str, Any]) -> dict[str, An
                 logger.warning("⚠️ [%s] 使用者遊戲分類格式錯誤，重設為空 dict", video_type_key)
                 user_game_config = {}
 
-            logger.debug("📥 [%s] 使用者自訂遊戲項目：%d", video_type_key, len(user_game_config))
-
-            merged_games: dict[str, list[str]] = {}
-
-            # 1️⃣ 遍歷所有 global alias，與使用者定義合併
-            for game_name, global_keywords in global_alias_map.items():
-                user_keywords = user_game_config.get(game_name, [])
-                if not isinstance(user_keywords, list):
-                    user_keywords = []
-
-                # 合併去重
-                merged_keywords = list(dict.fromkeys(global_keywords + user_keywords))
-                merged_games[game_name] = merged_keywords
-
-            # 2️⃣ 補上使用者新增但 global 沒有的遊戲
-            for game_name, user_keywords in user_game_config.items():
-                if game_name not in merged_games:
-                    merged_games[game_name] = user_keywords
-
+            merged_games = merge_game_config(global_alias_map, user_game_config)
             logger.debug("🔗 [%s] 合併後遊戲項目：%d", video_type_key, len(merged_games))
 
             category_settings["遊戲"] = merged_games
             settings[video_type_key] = category_settings
 
-            logger.debug("✅ [%s] 遊戲別名合併完成", video_type_key)
-
         return settings
 
     except Exception:
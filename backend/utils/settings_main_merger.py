@@ -1,11 +1,62 @@
+import hashlib
+import json
 import logging
+import threading
+from datetime import datetime
 from typing import Any
 
+from cachetools import TTLCache
 from google.cloud.firestore import Client
 
 logger = logging.getLogger(__name__)
 logger.debug("✅ [settings_main_merger.py] 模組載入中...")
 
+# default_categories_config_v2 只由 CLI 工具更新；程序內快取 60 秒，
+# 其他 instance 最晚 60 秒內讀到新版本，下游的合併設定快取也會因版本變動而失效
+_DEFAULT_CONFIG_TTL = 60
+_default_config_cache: TTLCache = TTLCache(maxsize=1, ttl=_DEFAULT_CONFIG_TTL)
+_default_config_lock = threading.Lock()
+
+
+def clear_default_config_cache() -> None:
+    """清空 default_categories_config_v2 快取（主要供測試使用）"""
+    with _default_config_lock:
+        _default_config_cache.clear()
+
+
+def _load_default_config(db: Client) -> tuple[dict[str, Any] | None, str]:
+    """
+    讀取 default_categories_config_v2，回傳 (config, version)。
+    version 為文件的 update_time（取不到時改用內容雜湊），文件不存在時 config 為 None、
+    version 為 "missing"。
+    """
+    with _default_config_lock:
+        cached = _default_config_cache.get("default")
+    if cached is not None:
+        return cached  # type: ignore[no-any-return]
+
+    default_doc = db.collection("global_settings").document("default_categories_config_v2").get()
+    if not default_doc.exists:  # type: ignore[union-attr]
+        entry: tuple[dict[str, Any] | None, str] = (None, "missing")
+    else:
+        config = default_doc.to_dict() or {}  # type: ignore[union-attr]
+        update_time = getattr(default_doc, "update_time", None)
+        if isinstance(update_time, datetime):
+            version = update_time.isoformat()
+        else:
+            payload = json.dumps(config, sort_keys=True, ensure_ascii=False, default=str)
+            version = hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+        entry = (config, version)
+
+    with _default_config_lock:
+        _default_config_cache["default"] = entry
+    return entry
+
+
+def get_default_config_version(db: Client) -> str:
+    """回傳目前 default_categories_config_v2 的版本（update_time），供下游快取判斷是否失效"""
+    return _load_default_config(db)[1]
+
 
 def merge_main_categories_with_user_config(db: Client, settings: dict[str, Any]) -> dict[str, Any]:
     """
@@ -18,13 +69,11 @@ def merge_main_categories_with_user_config(db: Client, settings: dict[str, Any])
     try:
         logger.debug("🔧 merge_main_categories_with_user_config() 被呼叫")
 
-        default_ref = db.collection("global_settings").document("default_categories_config_v2")
-        default_doc = default_ref.get()
-        if not default_doc.exists:  # type: ignore[union-attr]
+        default_config, _ = _load_default_config(db)
+        if default_config is None:
             logger.warning("⚠️ 找不到 default_categories_config_v2，跳過合併")
             return settings
 
-        default_config = default_doc.to_dict() or {}  # type: ignore[union-attr]
         logger.debug("📥 成功載入 default_categories_config_v2")
 
         # 🔍 使用者設定為扁平主分類格式
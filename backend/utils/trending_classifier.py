@@ -1,16 +1,22 @@
 from collections.abc import Callable
 from typing import Any
 
+from utils.categorizer import classify_batch
+from utils.classification_trace import trace_scope
+from utils.compiled_settings import CompiledSettings
+
 
 def classify_videos_to_games(
     videos: list[dict[str, Any]],
     channel_id: str,
-    settings: dict[str, Any],
-    matcher_func: Callable[[str, str, dict[str, Any]], dict[str, Any]],
+    settings: dict[str, Any] | CompiledSettings,
+    matcher_func: Callable[[str, str, Any], dict[str, Any]] | None = None,
 ) -> tuple[dict[str, list[dict[str, Any]]], dict[str, Any]]:
     """
-    將影片根據 matcher_func 結果分類至遊戲名稱下，並統計分類過程
-    - matcher_func(title, type, settings) → {'game': str | None}
+    將影片根據分類結果歸入遊戲名稱下，並統計分類過程
+    - settings 可為合併後 dict 或 CompiledSettings
+    - 預設使用 classify_batch 的 game_only 模式整批分類（只比對遊戲分類）
+    - 指定 matcher_func(title, type, settings) → {'game': str | None} 時改為逐部比對
     """
     game_map: dict[str, list[dict[str, Any]]] = {}
     stats: dict[str, Any] = {
@@ -19,11 +25,18 @@ def classify_videos_to_games(
         "games_found": {},
     }
 
-    for video in videos:
+    if matcher_func is None:
+        with trace_scope(channel_id):
+            matches = classify_batch(
+                [(v["title"], v.get("type", "")) for v in videos], settings, game_only=True
+            )
+        games = [m.game for m in matches]
+    else:
+        games = [matcher_func(v["title"], v.get("type", ""), settings).get("game") for v in videos]
+
+    for video, game in zip(videos, games, strict=True):
         stats["videos_processed"] += 1
 
-        result = matcher_func(video["title"], video.get("type", ""), settings)
-        game = result.get("game")
         if not game:
             continue
 